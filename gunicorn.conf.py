@@ -0,0 +1,33 @@
+import multiprocessing
+import os
+
+# === Gunicorn sozlamalari ===
+# gunicorn joriy papkadagi shu faylni o'zi o'qiydi (Procfile: `gunicorn --log-file -`).
+# SERVER_REJIMI=wsgi — sinxron ishchilar (gthread): har bir so'rov bitta oqimni javob tugaguncha band qiladi.
+# SERVER_REJIMI=asgi — uvicorn ishchilari: async view'lar (balanslar, tarix) kutish paytida
+# ishchini band qilmaydi, bitta ishchi ko'p ulanishni ushlab turadi.
+SERVER_REJIMI = os.environ.get('SERVER_REJIMI', 'wsgi')
+if SERVER_REJIMI not in ('wsgi', 'asgi'):
+    raise ValueError(f"SERVER_REJIMI 'wsgi' yoki 'asgi' bo'lishi kerak, {SERVER_REJIMI!r} berildi")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# Xotira sizib chiqishiga qarshi: ishchi shuncha so'rovdan keyin qayta ishga tushadi (0 — o'chirilgan)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+if SERVER_REJIMI == 'asgi':
+    wsgi_app = 'sozlamalar.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    # Async view'larda ORM har bir so'rovning o'z oqimida ishlaydi: doimiy ulanish keyingi so'rovga
+    # o'tmaydi va oqim bilan birga ochiq qoladi. Django hujjati ham ASGI da ularni o'chirishni talab qiladi
+    # (PostgreSQL uchun PgBouncer). Ishchilar master jarayonning muhitini oladi.
+    os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+else:
+    wsgi_app = 'sozlamalar.wsgi:application'
+    worker_class = 'gthread'
+    # Bir ishchidagi oqimlar: bir vaqtda ko'pi bilan workers * threads so'rov bajariladi
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
@@ -1,23 +1,59 @@
-from datetime import datetime
+from datetime import date, datetime, time
 
-import xlsxwriter
-from django.contrib import admin
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import PAGE_VAR
 from django.contrib.auth.admin import UserAdmin
-from django.http import HttpResponse
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.validators import FileExtensionValidator
+from django.db.models import Sum
+from django.http import FileResponse, Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
 from django.utils.html import format_html
-from django.utils.timezone import localtime
+from django.utils.http import urlencode
 from django.utils.translation import gettext_lazy as _
 from django_otp.admin import OTPAdminSite
-from rangefilter.filters import DateTimeRangeFilter
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Table, TableStyle
-
+from rangefilter.filters import DateRangeFilter, DateTimeRangeFilter
+
+from .arxiv import tarix_modeli
+from .eksport_vazifalari import korish_mumkin, vazifa_qoshish
+from .exports import EKSPORT_FORMATLARI, eksport_javobi
+from .katalog import katalog_qatorlarini_oqish, katalogni_yuklash
+from .kesh import ishlatilgan_birlik_idlari, ishlatilgan_birliklar
+from .metrikalar import admin_amali_olchanadi
 from .models import CustomUser
-from .models import Mahsulot, MahsulotBalans, MahsulotBalansTarix, KirdiChiqdi, KirdiChiqdiForm, OlchovBirligi
+from .models import (EksportVazifasi, HarakatYigindisi, KamQoldiq, Mahsulot, MahsulotBalans, MahsulotBalansTarix,
+                     MahsulotBalansTarixHammasi, KirdiChiqdi, KirdiChiqdiForm, OlchovBirligi)
+from .pagination import KURSOR_VAR, KursorliAdminMixin
+from .qidiruv import MahsulotQidiruvMixin
+from .rasmlar import eskiz_url
+from .snapshot import balance_as_of, sanani_oqish
+from .yorliqlar import qr_matnini_ochish, yorliqlar_javobi
+
+KAM_QOLDIQ_VIDJETI = 10  # Bosh sahifada ko'rsatiladigan kam qoldiqlar soni
+
+
+def kam_qoldiqlar_konteksti(request):
+    """Bosh sahifa vidjeti: faqat KamQoldiq jadvali o'qiladi (sanash va birinchi qatorlar)."""
+    if not request.user.has_perm('ombor.view_kamqoldiq'):
+        return {}
+    kamlar = KamQoldiq.objects.select_related('mahsulot_nomi__olchov_birligi').order_by('qoldiq', '-chegara', 'id')
+    return {'kam_qoldiqlar': kamlar[:KAM_QOLDIQ_VIDJETI], 'kam_qoldiqlar_soni': kamlar.count()}
+
 
-admin.site.__class__ = OTPAdminSite
+class OmborAdminSite(OTPAdminSite):
+    """OTP tasdiqlashli admin sayti; bosh sahifada kam qoldiqlar vidjeti."""
+    index_template = 'admin/ombor/index.html'
+
+    def index(self, request, extra_context=None):
+        return super().index(request, {**kam_qoldiqlar_konteksti(request), **(extra_context or {})})
+
+
+admin.site.__class__ = OmborAdminSite
 
 
 class CustomUserAdmin(UserAdmin):
@@ -35,7 +71,11 @@ class CustomUserAdmin(UserAdmin):
 
     def profile_image_preview(self, obj):
         if obj.profile_image:
-            return format_html('<img src="{}" style="width: 100px; height: 100px;" />', obj.profile_image.url)
+            # Asl rasm o'rniga 160 px eskiz: WebP, eski brauzerlar uchun JPEG
+            return format_html(
+                '<picture><source srcset="{}" type="image/webp">'
+                '<img src="{}" width="100" height="100" loading="lazy" alt="" /></picture>',
+                eskiz_url(obj.profile_image, 'webp'), eskiz_url(obj.profile_image, 'jpg'))
         return "No Image"
 
     profile_image_preview.short_description = 'Profile Image'
@@ -44,109 +84,72 @@ class CustomUserAdmin(UserAdmin):
 admin.site.register(CustomUser, CustomUserAdmin)
 
 
+def _eksport(modeladmin, request, queryset, formati):
+    """
+    Kichik eksport so'rov ichida yuboriladi. EKSPORT_SINXRON_CHEGARASI dan katta eksport
+    navbatga qo'yiladi (gunicorn ishchisi band bo'lib qolmaydi) va foydalanuvchi eksport
+    vazifalari sahifasiga yo'naltiriladi.
+    """
+    qatorlar_soni = queryset.count()
+    if qatorlar_soni <= settings.EKSPORT_SINXRON_CHEGARASI:
+        return eksport_javobi(formati, modeladmin.model, queryset)
+    parametrlar = {'filtrlar': request.GET.dict(), 'hammasi': request.POST.get('select_across') == '1'}
+    vazifa, yangi = vazifa_qoshish(request.user, modeladmin.model, queryset, formati, qatorlar_soni, parametrlar)
+    holati = "navbatga qo'yildi" if yangi else "avvalgi so'rovdan qayta ishlatiladi"
+    modeladmin.message_user(request, format_html(
+        '{} qatorli eksport #{} {}. Holati va yuklab olish: <a href="{}">Eksport vazifalari</a>',
+        qatorlar_soni, vazifa.id, holati, reverse('admin:ombor_eksportvazifasi_changelist')))
+    return HttpResponseRedirect(reverse('admin:ombor_eksportvazifasi_changelist'))
+
+
+@admin_amali_olchanadi
 def download_pdf(self, request, queryset):
-    model_name = self.model.__name__
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename={model_name}.pdf'
-
-    pdf = canvas.Canvas(response, pagesize=letter)
-    pdf.setTitle('PDF Report')
-
-    ordered_queryset = queryset.order_by('-id')
-
-    headers = ["T/r"] + [field.verbose_name for field in self.model._meta.fields]
-    data = [headers]
-
-    for index, obj in enumerate(ordered_queryset, 1):
-        data_row = [index]
-        data_row += [localtime(getattr(obj, field.name)).strftime('%Y-%m-%d %H:%M:%S')
-                     if isinstance(getattr(obj, field.name), datetime) else getattr(obj, field.name)
-                     for field in self.model._meta.fields]
-        data.append(data_row)
-
-    table = Table(data)
-    style = TableStyle(
-        [
-            ('BACKGROUND', (0, 0), (-1, 0), colors.gray),  # Header background
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),  # Table grid
-        ]
-    )
+    return _eksport(self, request, queryset.order_by('-id'), 'pdf')
+
 
-    # Add color formatting for "Kirdi" and "Chiqdi"
-    for row_num, row_data in enumerate(data[1:], start=1):  # Skip header
-        if "Kirdi" in row_data:
-            style.add('TEXTCOLOR', (row_data.index("Kirdi"), row_num), (row_data.index("Kirdi"), row_num), colors.green)
-        elif "Chiqdi" in row_data:
-            style.add('TEXTCOLOR', (row_data.index("Chiqdi"), row_num), (row_data.index("Chiqdi"), row_num), colors.red)
+download_pdf.short_description = 'Tanlangan maydonlarni PDF fayl sifatda yuklash'
 
-    table.setStyle(style)
 
-    canvas_width = 550
-    canvas_height = 750
-    table.wrapOn(pdf, canvas_width, canvas_height)
-    table.drawOn(pdf, 20, canvas_height - (len(data) * 20))  # Adjust placement
+@admin_amali_olchanadi
+def download_excel(modeladmin, request, queryset):
+    return _eksport(modeladmin, request, queryset, 'excel')
 
-    pdf.save()
-    return response
 
+download_excel.short_description = "Tanlangan maydonlarni Excel fayl sifatida yuklab olish"
 
-download_pdf.short_description = 'Tanlangan maydonlarni PDF fayl sifatda yuklash'
 
+@admin_amali_olchanadi
+def qr_yorliqlar(modeladmin, request, queryset):
+    return yorliqlar_javobi(queryset, settings.QR_YORLIQ_JARAYONLARI)
 
-def download_excel(modeladmin, request, queryset):
-    model_name = modeladmin.model.__name__
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename={model_name}.xlsx'
-    workbook = xlsxwriter.Workbook(response, {'in_memory': True})
-    worksheet = workbook.add_worksheet()
-
-    # Define formats
-    header_format = workbook.add_format({'bold': True, 'bg_color': '#D3D3D3', 'border': 1})
-    kirdi_format = workbook.add_format({'font_color': 'green', 'bold': True})
-    chiqdi_format = workbook.add_format({'font_color': 'red', 'bold': True})
-    sana_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss', 'border': 1})  # Date format
-
-    # Write headers
-    headers = ["T/r"] + [field.verbose_name for field in modeladmin.model._meta.fields]
-    for col_num, header in enumerate(headers):
-        worksheet.write(0, col_num, header, header_format)
-
-    # Write data rows
-    for row_num, obj in enumerate(queryset, 1):
-        worksheet.write(row_num, 0, row_num)
-        for col_num, field in enumerate(modeladmin.model._meta.fields, 1):
-            value = str(getattr(obj, field.name))
-
-            # Apply conditional formatting
-            if field.name == "amaliyot_turi":  # Adjust this field name as per your model
-                if value == "Kirdi":
-                    worksheet.write(row_num, col_num, value, kirdi_format)
-                elif value == "Chiqdi":
-                    worksheet.write(row_num, col_num, value, chiqdi_format)
-                else:
-                    worksheet.write(row_num, col_num, value)
-            else:
-                worksheet.write(row_num, col_num, value)
 
-    workbook.close()
-    return response
+qr_yorliqlar.short_description = "Tanlangan mahsulotlar uchun QR yorliqlar (A4 PDF)"
 
 
-download_excel.short_description = "Tanlangan maydonlarni Excel fayl sifatida yuklab olish"
+# === Ro'yxat querysetlari ===
+def birligi_bilan(queryset):
+    """
+    Mahsulotning o'lchov birligi sahifadagi qatorlar uchun bitta IN so'rovi bilan olinadi.
+
+    Tarix va kirim-chiqim ro'yxatlarida `list_select_related` dagi mahsulot JOIN'iga ikkinchi
+    JOIN qo'shilsa, SQLite rejalashtiruvchisi sana/id indeksi o'rniga butun jadvalni saralaydi.
+    """
+    return queryset.prefetch_related('mahsulot_nomi__olchov_birligi')
 
 
 # === O'lchov birligi Admin ===
 # Bu bo'lim o'lchov birliklarini boshqarish uchun.
 @admin.register(OlchovBirligi)
 class OlchovBirligiAdmin(admin.ModelAdmin):
-    list_display = ('id', 'olchov_birligi')  # O'lchov birligini ko'rsatish
+    list_display = ('id', 'olchov_birligi', 'standart_minimal_qoldiq')  # O'lchov birligini ko'rsatish
     list_display_links = ('id', 'olchov_birligi')  # ID va nomga bosilganda ko'rsatilgan o'lchovga o'tish
     search_fields = ('olchov_birligi',)  # O'lchov birligi bo'yicha qidiruv
     ordering = ('-id',)  # O'lchov birligi ID bo'yicha tartibda ko'rsatish
     list_per_page = 20  # Bir sahifada ko'rsatilgan elementlar soni
 
-    def has_change_permission(self, request, obj=None):
-        return False
+    # Mavjud birlikda faqat standart minimal qoldiq o'zgartiriladi
+    def get_readonly_fields(self, request, obj=None):
+        return ('olchov_birligi',) if obj else ()
 
 
 # === Custom Filter ===
@@ -158,13 +161,8 @@ class OlchovBirligiFilter(admin.SimpleListFilter):
         """
         Filterda faqat `KirdiChiqdi` modelida mavjud o'lchov birliklari ko'rinadi.
         """
-        # KirdiChiqdi modelida ishlatilgan o'lchov birliklarini oling
-        olchov_birliklar = (
-            KirdiChiqdi.objects.values_list('mahsulot_nomi__olchov_birligi__id',
-                                            'mahsulot_nomi__olchov_birligi__olchov_birligi')
-            .distinct()
-        )
-        return [(ob[0], ob[1]) for ob in olchov_birliklar]
+        # KirdiChiqdi modelida ishlatilgan o'lchov birliklari keshdan olinadi
+        return ishlatilgan_birliklar()
 
     def queryset(self, request, queryset):
         """
@@ -176,24 +174,85 @@ class OlchovBirligiFilter(admin.SimpleListFilter):
 
 
 # === Mahsulot Admin ===
+class KatalogYuklashForm(forms.Form):
+    fayl = forms.FileField(label="Fayl (CSV yoki XLSX)",
+                           help_text="Ustunlar: mahsulot_nomi, olchov_birligi. Birinchi qator — sarlavha.",
+                           validators=[FileExtensionValidator(['csv', 'xlsx'])])
+    birlik_yaratish = forms.BooleanField(label="Bazada yo'q o'lchov birliklarini yaratish", required=False)
+
+
 # Bu bo'lim mahsulotlarni admin panelida boshqarish uchun.
 @admin.register(Mahsulot)
-class MahsulotAdmin(admin.ModelAdmin):
-    list_display = ('id', 'mahsulot_nomi', 'olchov_birligi')  # Admin panelda ko'rsatish uchun maydonlar
+class MahsulotAdmin(MahsulotQidiruvMixin, admin.ModelAdmin):
+    list_display = ('id', 'mahsulot_nomi', 'olchov_birligi', 'joriy_qoldiq',
+                    'minimal_qoldiq')  # Admin panelda ko'rsatish uchun maydonlar
     list_display_links = ('id', 'mahsulot_nomi')  # Ushbu maydonlarga bosilsa, tegishli mahsulotga o'tadi
     search_fields = ('mahsulot_nomi',)  # Mahsulot nomi bo'yicha qidiruv imkoniyati
+    mahsulot_maydoni = 'id'  # Qidiruv FTS indeksidagi mahsulot ID lari bo'yicha
+    list_select_related = ('olchov_birligi',)  # O'lchov birligi har bir qator uchun alohida so'ralmaydi
     ordering = ('-id',)  # Mahsulotlarni id bo'yicha tartibda ko'rsatish
     list_per_page = 20  # Bir sahifada ko'rsatilgan elementlar soni
-
-    def has_change_permission(self, request, obj=None):
-        return False
+    actions = [qr_yorliqlar]  # Javon yorliqlari: har bir mahsulot uchun QR
+
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        # Sahifadagi qoldiqlar balans keshidan bitta murojaat bilan (keshda yo'qlari bitta so'rov bilan)
+        qoldiqlar = MahsulotBalans.joriy_qoldiqlar([mahsulot.id for mahsulot in changelist.result_list])
+        for mahsulot in changelist.result_list:
+            mahsulot.keshdagi_qoldiq = qoldiqlar[mahsulot.id]
+        return changelist
+
+    def joriy_qoldiq(self, obj):
+        if not hasattr(obj, 'keshdagi_qoldiq'):
+            obj.keshdagi_qoldiq = MahsulotBalans.joriy_qoldiqlar([obj.id])[obj.id]
+        return obj.keshdagi_qoldiq if obj.keshdagi_qoldiq is not None else 0
+
+    joriy_qoldiq.short_description = "Qoldiq"
+
+    def get_urls(self):
+        return [
+            path('katalog-yuklash/', self.admin_site.admin_view(self.katalog_yuklash_view),
+                 name='ombor_mahsulot_katalog_yuklash'),
+        ] + super().get_urls()
+
+    def katalog_yuklash_view(self, request):
+        """CSV/XLSX katalogni yuklaydi; saqlanmagan qatorlar sababi bilan sahifada ko'rsatiladi."""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        forma = KatalogYuklashForm(request.POST or None, request.FILES or None)
+        xatolar = None
+        if request.method == 'POST' and forma.is_valid():
+            fayl = forma.cleaned_data['fayl']
+            try:
+                qatorlar = katalog_qatorlarini_oqish(fayl.read(), fayl.name.rsplit('.', 1)[-1].lower())
+                saqlandi, xatolar = katalogni_yuklash(qatorlar, forma.cleaned_data['birlik_yaratish'])
+            except ValidationError as xato:
+                forma.add_error('fayl', xato)
+            else:
+                self.message_user(request, f"{len(qatorlar)} ta qatordan {saqlandi} ta mahsulot saqlandi, "
+                                           f"{len(xatolar)} ta qator saqlanmadi.")
+                if not xatolar:
+                    return HttpResponseRedirect(reverse('admin:ombor_mahsulot_changelist'))
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Katalog yuklash",
+            'forma': forma,
+            'xatolar': xatolar,
+        }
+        return TemplateResponse(request, 'admin/ombor/mahsulot/katalog_yuklash.html', context)
+
+    # Mavjud mahsulotda faqat minimal qoldiq o'zgartiriladi
+    def get_readonly_fields(self, request, obj=None):
+        return ('mahsulot_nomi', 'olchov_birligi') if obj else ()
 
 
 # === MahsulotBalans Admin ===
 # Bu bo'lim mahsulot balansi (ombordagi miqdor)ni boshqarish uchun.
 @admin.register(MahsulotBalans)
-class MahsulotBalansAdmin(admin.ModelAdmin):
+class MahsulotBalansAdmin(MahsulotQidiruvMixin, admin.ModelAdmin):
     list_display = ('id', 'mahsulot_nomi', 'get_olchov_birligi', 'qoldiq')  # Ko'rinadigan ustunlar
+    list_select_related = ('mahsulot_nomi',)  # Mahsulot nomi har bir qator uchun alohida so'ralmaydi
     list_display_links = ('id', 'mahsulot_nomi')  # Mahsulotga bosilganda uning balansi ko'rsatiladi
     search_fields = ('mahsulot_nomi__mahsulot_nomi',)  # Mahsulot nomi bo'yicha qidiruv
     list_filter = (OlchovBirligiFilter,)  # Custom filterni qo'shish
@@ -202,17 +261,42 @@ class MahsulotBalansAdmin(admin.ModelAdmin):
     actions = [download_excel,
                download_pdf]  # Mahsulotning joriy balansi haqida malumot olish uchun fayl sifatida yuklab olish xizmati
 
+    def get_queryset(self, request):
+        # O'lchov birligi ustuni: har bir qator uchun alohida so'rov o'rniga sahifaga bitta IN so'rovi
+        return birligi_bilan(super().get_queryset(request))
+
     def get_olchov_birligi(self, obj):
         """Displays the 'olchov_birligi' of the related 'Mahsulot'."""
         return obj.mahsulot_nomi.olchov_birligi if obj.mahsulot_nomi else None
 
     get_olchov_birligi.short_description = "O'lchov Birligi"
 
+    def get_urls(self):
+        return [
+            path('sana-boyicha/', self.admin_site.admin_view(self.sana_boyicha_view),
+                 name='ombor_mahsulotbalans_sana_boyicha'),
+        ] + super().get_urls()
+
+    def sana_boyicha_view(self, request):
+        """Tanlangan kun oxiridagi barcha mahsulotlar qoldig'i (snapshot + keyingi harakatlar)."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        sana = sanani_oqish(request.GET.get('sana')) or timezone.localdate()
+        qoldiqlar = balance_as_of(sana)
+        mahsulotlar = Mahsulot.objects.filter(id__in=list(qoldiqlar)).select_related('olchov_birligi')
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Sana bo'yicha qoldiq",
+            'sana': sana,
+            'qatorlar': [(mahsulot, qoldiqlar[mahsulot.id]) for mahsulot in mahsulotlar.order_by('mahsulot_nomi')],
+        }
+        return TemplateResponse(request, 'admin/ombor/mahsulotbalans/sana_boyicha.html', context)
+
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == "mahsulot_nomi__olchov_birligi":
             # Faqat `KirdiChiqdi` orqali kiritilgan `OlchovBirligi`larni ko'rsatish
-            kwargs["queryset"] = OlchovBirligi.objects.filter(
-                id__in=KirdiChiqdi.objects.values('mahsulot_nomi__olchov_birligi'))
+            kwargs["queryset"] = OlchovBirligi.objects.filter(id__in=ishlatilgan_birlik_idlari())
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
     # Foydalanuvchining o'zi mahsulot uchun balance ni o'zgartira olmasligi zarur
@@ -229,14 +313,42 @@ class MahsulotBalansAdmin(admin.ModelAdmin):
     # Ob'ektlarni o'chirishni oldini olish
 
 
+# === KamQoldiq Admin ===
+# Minimal qoldiqqa yetgan mahsulotlar. Jadvalni postinglar yuritadi, qo'lda o'zgartirilmaydi.
+@admin.register(KamQoldiq)
+class KamQoldiqAdmin(MahsulotQidiruvMixin, admin.ModelAdmin):
+    list_display = ('mahsulot_nomi', 'get_olchov_birligi', 'qoldiq', 'chegara', 'sana')
+    list_select_related = ('mahsulot_nomi__olchov_birligi',)
+    search_fields = ('mahsulot_nomi__mahsulot_nomi',)  # Mahsulot nomi bo'yicha qidiruv
+    ordering = ('qoldiq', '-chegara', 'id')  # Tugaganlari birinchi
+    list_per_page = 50  # Bir sahifada ko'rsatilgan elementlar soni
+    actions = [download_excel]
+
+    def get_olchov_birligi(self, obj):
+        return obj.mahsulot_nomi.olchov_birligi
+
+    get_olchov_birligi.short_description = "O'lchov Birligi"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 # === MahsulotBalansTarix Admin ===
 # Bu bo'lim mahsulot balansi tarixini boshqarish uchun.
-@admin.register(MahsulotBalansTarix)
-class MahsulotBalansTarixAdmin(admin.ModelAdmin):
+class TarixAdminAsosi(MahsulotQidiruvMixin, KursorliAdminMixin, admin.ModelAdmin):
+    """Balans tarixi ro'yxatlari uchun umumiy sozlamalar: faqat o'qish uchun."""
     list_display = (
         'id', 'mahsulot_nomi', 'miqdor', 'get_olchov_birligi', 'qoldiq', 'sana',
         'colored_amaliyot_turi')  # Ko'rinadigan ustunlar
+    list_select_related = ('mahsulot_nomi',)  # Mahsulot nomi har bir qator uchun alohida so'ralmaydi
     search_fields = ('mahsulot_nomi__mahsulot_nomi', 'amaliyot_turi')  # Mahsulot nomi va turiga qidiruv
+    qidiruv_qiymatlari = {'amaliyot_turi': [tur for tur, _ in KirdiChiqdi.Kirdi_Chiqdi]}  # Tur tenglik bilan
     list_filter = [
         ('sana', DateTimeRangeFilter)]  # Operatsiya turi va sanasi bo'yicha filter ('amaliyot_turi', 'sana'),
     date_hierarchy = 'sana'  # Sanalar bo'yicha navigatsiya
@@ -254,6 +366,9 @@ class MahsulotBalansTarixAdmin(admin.ModelAdmin):
 
     colored_amaliyot_turi.short_description = "Amaliyot Turi"
 
+    def get_queryset(self, request):
+        return birligi_bilan(super().get_queryset(request))
+
     def get_olchov_birligi(self, obj):
         """Displays the 'olchov_birligi' of the related 'Mahsulot'."""
         return obj.mahsulot_nomi.olchov_birligi if obj.mahsulot_nomi else None
@@ -274,16 +389,67 @@ class MahsulotBalansTarixAdmin(admin.ModelAdmin):
     # Ob'ektlarni o'chirishni oldini olish
 
 
+@admin.register(MahsulotBalansTarix)
+class MahsulotBalansTarixAdmin(TarixAdminAsosi):
+    """Asosiy tarix jadvali: oxirgi TARIX_ARXIV_KUNLARI kun va har bir mahsulotning oxirgi yozuvi."""
+
+    def _davr_boshi(self, request):
+        """Sana filtrlari (oraliq, date_hierarchy) so'ragan davr boshi; filtr bo'lmasa None."""
+        boshlar = []
+        try:
+            # Oraliq filtri formasi kabi: sana va vaqt ikkalasi bo'lsagina filtr qo'llanadi
+            boshi = forms.SplitDateTimeField(required=False).clean(
+                [request.GET.get('sana__range__gte_0'), request.GET.get('sana__range__gte_1')])
+        except ValidationError:
+            boshi = None
+        if boshi is not None:
+            boshlar.append(boshi)
+        if 'sana__year' in request.GET:
+            try:
+                kun = date(int(request.GET['sana__year']), int(request.GET.get('sana__month', 1)),
+                           int(request.GET.get('sana__day', 1)))
+            except ValueError:
+                pass
+            else:
+                boshlar.append(timezone.make_aware(datetime.combine(kun, time.min)))
+        # Filtrlar AND bilan qo'shiladi: eng kech boshlanish amal qiladi
+        return max(boshlar) if boshlar else None
+
+    def changelist_view(self, request, extra_context=None):
+        # Davr arxivlangan yozuvlarga yetsa, shu filtrlar bilan arxivli ro'yxatga havola beriladi
+        if tarix_modeli(self._davr_boshi(request)) is not self.model:
+            filtrlar = request.GET.copy()
+            for kalit in (KURSOR_VAR, PAGE_VAR):
+                filtrlar.pop(kalit, None)
+            url = reverse('admin:ombor_mahsulotbalanstarixhammasi_changelist')
+            self.message_user(request, format_html(
+                'Bu davrning bir qismi arxivda. Arxiv bilan birga: <a href="{}{}">{}</a>',
+                url, f'?{filtrlar.urlencode()}' if filtrlar else '',
+                MahsulotBalansTarixHammasi._meta.verbose_name_plural), messages.INFO, fail_silently=True)
+        return super().changelist_view(request, extra_context)
+
+
+@admin.register(MahsulotBalansTarixHammasi)
+class MahsulotBalansTarixHammasiAdmin(TarixAdminAsosi):
+    """Asosiy jadval va arxiv birlashmasi (UNION ALL VIEW): arxivlangan davrlar shu yerda ko'riladi."""
+
+    # Ruxsat asosiy tarix bo'yicha: arxivli ro'yxat uchun alohida rol kerak emas
+    def has_view_permission(self, request, obj=None):
+        return request.user.has_perm('ombor.view_mahsulotbalanstarix')
+
+
 # === KirdiChiqdi Admin ===
 # Bu bo'lim kirim-chiqim operatsiyalarini boshqarish uchun.
 @admin.register(KirdiChiqdi)
-class KirdiChiqdiAdmin(admin.ModelAdmin):
+class KirdiChiqdiAdmin(MahsulotQidiruvMixin, KursorliAdminMixin, admin.ModelAdmin):
     form = KirdiChiqdiForm  # Maxsus forma qo'llanadi
     list_display = (
         'id', 'mahsulot_nomi', 'miqdor', 'get_olchov_birligi', 'sana',
         'colored_amaliyot_turi')  # Ko'rinadigan ustunlar
     list_display_links = ('id', 'mahsulot_nomi')  # Mahsulotga bosilganda operatsiya ko'rsatiladi
+    list_select_related = ('mahsulot_nomi',)  # Mahsulot nomi har bir qator uchun alohida so'ralmaydi
     search_fields = ('mahsulot_nomi__mahsulot_nomi', 'amaliyot_turi')  # Mahsulot nomi va turiga qidiruv
+    qidiruv_qiymatlari = {'amaliyot_turi': [tur for tur, _ in KirdiChiqdi.Kirdi_Chiqdi]}  # Tur tenglik bilan
     list_filter = ('amaliyot_turi', 'sana')  # Operatsiya turi va sanasi bo'yicha filter
     date_hierarchy = 'sana'  # Sanalar bo'yicha navigatsiya
     ordering = ('-sana',)  # Teskari tartibda tartib ko'rsatish
@@ -299,12 +465,173 @@ class KirdiChiqdiAdmin(admin.ModelAdmin):
 
     colored_amaliyot_turi.short_description = "Amaliyot Turi"
 
+    def get_queryset(self, request):
+        return birligi_bilan(super().get_queryset(request))
+
     def get_olchov_birligi(self, obj):
         """Displays the 'olchov_birligi' of the related 'Mahsulot'."""
         return obj.mahsulot_nomi.olchov_birligi if obj.mahsulot_nomi else None
 
     get_olchov_birligi.short_description = "O'lchov Birligi"  # Header in the admin table
 
+    def get_urls(self):
+        return [
+            path('skaner/', self.admin_site.admin_view(self.skaner_view), name='ombor_kirdichiqdi_skaner'),
+        ] + super().get_urls()
+
+    def skaner_view(self, request):
+        """
+        QR yorliq matnini kirim-chiqim formasiga aylantiradi.
+
+        Skaner matnni klaviatura kabi maydonga yozadi. Mahsulot bitta PK qidiruvi bilan
+        tekshiriladi va qo'shish formasiga mahsulot va amaliyot turi to'ldirilgan holda yo'naltiriladi.
+        """
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        kod = request.GET.get('kod', '').strip()
+        amaliyot_turi = request.GET.get('amaliyot_turi', '')
+        xato = None
+        if kod:
+            mahsulot_id = qr_matnini_ochish(kod)
+            if mahsulot_id is not None and Mahsulot.objects.filter(pk=mahsulot_id).exists():
+                boshlangich = {'mahsulot_nomi': mahsulot_id, '_skaner': 1}
+                if amaliyot_turi in dict(KirdiChiqdi.Kirdi_Chiqdi):
+                    boshlangich['amaliyot_turi'] = amaliyot_turi
+                return HttpResponseRedirect(f"{reverse('admin:ombor_kirdichiqdi_add')}?{urlencode(boshlangich)}")
+            if mahsulot_id is None:
+                xato = "Bu ombor yorlig'i emas."
+            else:
+                xato = f"ID {mahsulot_id} li mahsulot topilmadi."
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "QR skaner",
+            'kod': kod,
+            'amaliyot_turi': amaliyot_turi,
+            'turlar': KirdiChiqdi.Kirdi_Chiqdi,
+            'xato': xato,
+        }
+        return TemplateResponse(request, 'admin/ombor/kirdichiqdi/skaner.html', context)
+
+    def response_add(self, request, obj, post_url_continue=None):
+        # Skaner orqali ochilgan formadan keyin keyingi yorliqni skanerlashga qaytiladi
+        if '_skaner' in request.GET and not {'_addanother', '_continue'} & set(request.POST):
+            self.message_user(request, f"{obj.mahsulot_nomi}: {obj.amaliyot_turi} {obj.miqdor} saqlandi.")
+            return HttpResponseRedirect(
+                f"{reverse('admin:ombor_kirdichiqdi_skaner')}?{urlencode({'amaliyot_turi': obj.amaliyot_turi})}")
+        return super().response_add(request, obj, post_url_continue)
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# === HarakatYigindisi Admin ===
+# Kun/hafta/oy bo'yicha kirim-chiqim hisoboti. Faqat yig'indilar jadvali o'qiladi.
+@admin.register(HarakatYigindisi)
+class HarakatYigindisiAdmin(MahsulotQidiruvMixin, KursorliAdminMixin, admin.ModelAdmin):
+    list_display = ('mahsulot_nomi', 'davr_turi', 'davr', 'kirdi_sum', 'chiqdi_sum', 'harakatlar_soni')
+    list_select_related = ('mahsulot_nomi',)  # Mahsulot nomi har bir qator uchun alohida so'ralmaydi
+    search_fields = ('mahsulot_nomi__mahsulot_nomi',)  # Mahsulot nomi bo'yicha qidiruv
+    list_filter = ('davr_turi', ('davr', DateRangeFilter))  # Davr turi va sana oralig'i bo'yicha filter
+    ordering = ('-davr',)  # Eng yangi davrlar birinchi
+    list_per_page = 50  # Bir sahifada ko'rsatilgan elementlar soni
+    actions = [download_excel]
+
+    def changelist_view(self, request, extra_context=None):
+        javob = super().changelist_view(request, extra_context)
+        cl = getattr(javob, 'context_data', {}).get('cl')
+        if cl is not None:
+            # Tanlangan oraliq bo'yicha jami: bitta SUM so'rovi, xom ledgerga murojaat yo'q.
+            # Davr turi tanlanmagan bo'lsa, har bir harakat uch marta sanalmasligi uchun bitta tur
+            # olinadi: sana oralig'i bo'lsa kunliklar, bo'lmasa eng kam qatorli oyliklar.
+            yigindilar = cl.queryset.order_by()
+            if 'davr_turi__exact' not in request.GET:
+                oraliq_bor = any(kalit.startswith('davr__range__') and qiymat for kalit, qiymat in request.GET.items())
+                yigindilar = yigindilar.filter(davr_turi="kun" if oraliq_bor else "oy")
+            javob.context_data['jami'] = yigindilar.aggregate(
+                kirdi=Sum('kirdi_sum'), chiqdi=Sum('chiqdi_sum'), soni=Sum('harakatlar_soni'))
+        return javob
+
+    # Yig'indilar faqat harakatlar orqali o'zgaradi
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+# === EksportVazifasi Admin ===
+# Fon eksportlari holati va tayyor fayllarni yuklab olish. Foydalanuvchi faqat o'zi ko'ra
+# oladigan modellar eksportlarini ko'radi; bir xil eksport turli foydalanuvchilarga umumiy.
+@admin.register(EksportVazifasi)
+class EksportVazifasiAdmin(admin.ModelAdmin):
+    list_display = ('id', 'model', 'formati', 'rangli_holat', 'qatorlar_soni', 'hajm_mb', 'foydalanuvchi',
+                    'yaratilgan', 'tugagan', 'yuklab_olish')
+    list_filter = ('holat', 'formati')  # Holat va format bo'yicha filter
+    list_select_related = ('foydalanuvchi',)
+    exclude = ('sorov', 'kalit')  # Ichki maydonlar
+    ordering = ('-id',)  # Eng yangi vazifalar birinchi
+    list_per_page = 20  # Bir sahifada ko'rsatilgan elementlar soni
+    HOLAT_RANGLARI = {"kutilmoqda": "gray", "bajarilmoqda": "orange", "tayyor": "green", "xato": "red"}
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.user.is_superuser:
+            return queryset
+        modellar = set(EksportVazifasi.objects.order_by().values_list('model', flat=True).distinct())
+        return queryset.filter(model__in=[nomi for nomi in modellar if korish_mumkin(request.user, nomi)])
+
+    def changelist_view(self, request, extra_context=None):
+        # Navbatdagi yoki bajarilayotgan vazifa bo'lsa, sahifa o'zi yangilanadi
+        kutilmoqda = self.get_queryset(request).filter(holat__in=("kutilmoqda", "bajarilmoqda")).exists()
+        return super().changelist_view(request, {**(extra_context or {}), 'yangilanadi': kutilmoqda})
+
+    def rangli_holat(self, obj):
+        """Holatni rangli qilib ko'rsatadi; xato bo'lsa matni sarlavhada."""
+        return format_html('<span style="color: {};" title="{}">{}</span>', self.HOLAT_RANGLARI.get(obj.holat),
+                           obj.xato, obj.get_holat_display())
+
+    rangli_holat.short_description = "Holat"
+
+    def hajm_mb(self, obj):
+        return f"{obj.hajm / 1024 / 1024:.1f} MB" if obj.hajm is not None else "-"
+
+    hajm_mb.short_description = "Hajm"
+
+    def yuklab_olish(self, obj):
+        if obj.holat != "tayyor":
+            return "-"
+        return format_html('<a href="{}">Yuklab olish</a>',
+                           reverse('admin:ombor_eksportvazifasi_yuklab_olish', args=[obj.id]))
+
+    yuklab_olish.short_description = "Fayl"
+
+    def get_urls(self):
+        return [
+            path('<int:vazifa_id>/yuklab-olish/', self.admin_site.admin_view(self.yuklab_olish_view),
+                 name='ombor_eksportvazifasi_yuklab_olish'),
+        ] + super().get_urls()
+
+    def yuklab_olish_view(self, request, vazifa_id):
+        """Tayyor eksport faylini bo'laklab yuboradi (MEDIA_URL orqali ochiq berilmaydi)."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        vazifa = get_object_or_404(self.get_queryset(request), id=vazifa_id, holat="tayyor")
+        try:
+            fayl = vazifa.fayl.open('rb')
+        except FileNotFoundError:
+            raise Http404("Eksport fayli topilmadi.")
+        kengaytma, content_type = EKSPORT_FORMATLARI[vazifa.formati]
+        fayl_nomi = f"{vazifa.model.split('.')[-1]}_{vazifa.id}.{kengaytma}"
+        return FileResponse(fayl, as_attachment=True, filename=fayl_nomi, content_type=content_type)
+
+    # Vazifalar faqat admin amallari orqali yaratiladi
+    def has_add_permission(self, request):
+        return False
+
     def has_change_permission(self, request, obj=None):
         return False
 
@@ -0,0 +1,82 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import MahsulotBalansTarix, MahsulotBalansTarixArxiv, MahsulotBalansTarixHammasi
+
+PARTIYA_HAJMI = 5000
+MAYDONLAR = ('id', 'mahsulot_nomi_id', 'miqdor', 'qoldiq', 'sana', 'amaliyot_turi')
+
+
+# === Balans tarixini arxivlash ===
+# Asosiy tarix jadvalida faqat oxirgi TARIX_ARXIV_KUNLARI kun va har bir mahsulotning chegaradan
+# oldingi oxirgi yozuvi (o'sha paytdagi qoldiq) turadi; qolgani arxiv jadvalida. Ikkalasini
+# birga o'qish kerak bo'lsa MahsulotBalansTarixHammasi (UNION ALL VIEW) ishlatiladi.
+
+def arxiv_chegarasi(kunlar=None, bugun=None):
+    """`kunlar` kun oldingi mahalliy yarim tun: undan oldingi tarix arxivlanadi."""
+    kunlar = settings.TARIX_ARXIV_KUNLARI if kunlar is None else kunlar
+    kun = (bugun or timezone.localdate()) - timedelta(days=kunlar)
+    return timezone.make_aware(datetime.combine(kun, time.min))
+
+
+def tarixni_arxivlash(chegara, partiya=PARTIYA_HAJMI):
+    """
+    `chegara` dan oldingi tarix yozuvlarini asl ID lari bilan arxivga ko'chiradi va ko'chirilganlar sonini qaytaradi.
+
+    Har bir mahsulotning chegaradan oldingi eng katta ID li yozuvi asosiy jadvalda
+    qoladi: oxirgi tarix qoldig'i (solishtirish, balans tekshiruvi) arxivsiz topiladi.
+    Har bir partiya alohida tranzaksiyada ko'chiriladi, shuning uchun postinglar uzoq
+    kutib qolmaydi; to'xtab qolgan ishni qayta ishga tushirish xavfsiz.
+    """
+    eskilar = MahsulotBalansTarix.objects.filter(sana__lt=chegara).order_by()
+    qoldiriladi = sorted(eskilar.values('mahsulot_nomi_id').annotate(oxirgi=Max('id'))
+                         .values_list('oxirgi', flat=True))
+    # Ish davomida kechiktirib yuklangan eski sanali yozuvlar keyingi ishga qoladi
+    chegaralar = eskilar.aggregate(Min('id'), Max('id'))
+    if chegaralar['id__max'] is None:
+        return 0
+
+    arxiv_jadvali = connection.ops.quote_name(MahsulotBalansTarixArxiv._meta.db_table)
+    ustunlar = ', '.join(connection.ops.quote_name(MahsulotBalansTarixArxiv._meta.get_field(maydon).column)
+                         for maydon in MAYDONLAR)
+    kochirildi = 0
+    for kursor in range(chegaralar['id__min'] - 1, chegaralar['id__max'], partiya):
+        yuqori = min(kursor + partiya, chegaralar['id__max'])
+        # Qatorlar modelga aylantirilmaydi: INSERT ... SELECT va DELETE bazaning o'zida bajariladi
+        partiya_qatorlari = eskilar.filter(id__gt=kursor, id__lte=yuqori).exclude(
+            id__in=[i for i in qoldiriladi if kursor < i <= yuqori])
+        sql, parametrlar = partiya_qatorlari.values_list(*MAYDONLAR).query.sql_with_params()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {arxiv_jadvali} ({ustunlar}) {sql}", parametrlar)
+            kochirildi += cursor.rowcount
+            partiya_qatorlari.delete()
+    return kochirildi
+
+
+def tarix_modeli(dan=None):
+    """
+    `dan` vaqtdan boshlanadigan davrni o'qish uchun tarix modeli.
+
+    Davr arxivlangan yozuvlarga yetmasa — asosiy jadval, aks holda asosiy jadval va
+    arxiv birlashmasi. `dan` None — butun tarix (arxiv bo'sh bo'lsa asosiy jadval).
+    """
+    if dan is None:
+        bor = MahsulotBalansTarixArxiv.objects.exists()
+    else:
+        arxiv_oxiri = MahsulotBalansTarixArxiv.objects.aggregate(Max('sana'))['sana__max']
+        bor = arxiv_oxiri is not None and dan <= arxiv_oxiri
+    return MahsulotBalansTarixHammasi if bor else MahsulotBalansTarix
+
+
+async def atarix_modeli(dan=None):
+    """tarix_modeli() ning async varianti (async view'lar uchun)."""
+    if dan is None:
+        bor = await MahsulotBalansTarixArxiv.objects.aexists()
+    else:
+        arxiv_oxiri = (await MahsulotBalansTarixArxiv.objects.aaggregate(Max('sana')))['sana__max']
+        bor = arxiv_oxiri is not None and dan <= arxiv_oxiri
+    return MahsulotBalansTarixHammasi if bor else MahsulotBalansTarix
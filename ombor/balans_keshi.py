@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.db import transaction
+
+from .metrikalar import hisoblagich
+
+BALANS_KESHI = 'balans'  # settings.CACHES dagi nom
+# Tranzaksiya ichida yozilgan qiymat muddati: commit bo'lgach CACHES['balans']['TIMEOUT'] gacha
+# uzaytiriladi. Tashqi tranzaksiya bekor qilinsa, qiymat shu muddatdan keyin o'chadi.
+TASDIQLANMAGAN_MUDDAT = 30  # soniya
+_YOQ = object()
+
+
+# === Mahsulot qoldiqlari keshi ===
+# Kalit — mahsulot ID si, qiymat — MahsulotBalans.qoldiq (balans qatori bo'lmasa None).
+# Postinglar yangi qoldiqni balans qatori qulflangan paytda, o'z tranzaksiyasi ichida
+# yozadi (write-through): keyingi posting qulfni faqat commit'dan keyin oladi, shuning
+# uchun keshga yozish tartibi commit tartibi bilan bir xil. Kesh faqat o'qish uchun:
+# qoldiq yetarliligini baribir MahsulotBalans.qoldiqni_ozgartirish() shartli UPDATE bilan tekshiradi.
+
+def _kesh():
+    return caches[BALANS_KESHI]
+
+
+def _kalit(mahsulot_id):
+    return f'ombor:balans:{mahsulot_id}'
+
+
+def _murojaatlar():
+    return hisoblagich('ombor_balance_cache_requests_total', "Balans keshiga murojaatlar (natija: hit/miss)",
+                       teglar=('natija',))
+
+
+def keshdagi_qoldiqlar(mahsulot_idlari):
+    """Keshdagi qoldiqlarni ({mahsulot_id: qoldiq}, [keshda yo'q ID lar]) ko'rinishida qaytaradi."""
+    mahsulot_idlari = list(dict.fromkeys(mahsulot_idlari))
+    keshda = _kesh().get_many([_kalit(mahsulot_id) for mahsulot_id in mahsulot_idlari])
+    topildi, topilmadi = {}, []
+    for mahsulot_id in mahsulot_idlari:
+        qoldiq = keshda.get(_kalit(mahsulot_id), _YOQ)
+        if qoldiq is _YOQ:
+            topilmadi.append(mahsulot_id)
+        else:
+            topildi[mahsulot_id] = qoldiq
+    murojaatlar = _murojaatlar()
+    if topildi:
+        murojaatlar.oshirish(len(topildi), natija='hit')
+    if topilmadi:
+        murojaatlar.oshirish(len(topilmadi), natija='miss')
+    return topildi, topilmadi
+
+
+def qoldiqlarni_keshlash(qoldiqlar):
+    """
+    Bazadan o'qilgan qoldiqlarni keshga qo'shadi.
+
+    `add` ishlatiladi: o'qish va qo'shish orasida posting yozgan yangi qiymat
+    eski snapshotdagi qoldiq bilan almashtirilmaydi.
+    """
+    kesh = _kesh()
+    for mahsulot_id, qoldiq in qoldiqlar.items():
+        kesh.add(_kalit(mahsulot_id), qoldiq)
+
+
+@contextmanager
+def balans_tranzaksiyasi():
+    """
+    transaction.atomic() bloki; `yozish({mahsulot_id: qoldiq})` funksiyasini beradi.
+
+    Yozilgan qoldiqlar commit'dan keyin tasdiqlanadi (to'liq muddat). Blok xato bilan
+    tugasa (tranzaksiya bekor qilinsa), ular darhol keshdan o'chiriladi.
+    """
+    kalitlar = []
+
+    def yozish(qoldiqlar):
+        yangi = {_kalit(mahsulot_id): qoldiq for mahsulot_id, qoldiq in qoldiqlar.items()}
+        _kesh().set_many(yangi, TASDIQLANMAGAN_MUDDAT)
+        kalitlar.extend(yangi)
+
+        def tasdiqlash():
+            # set emas, touch: commit va shu chaqiruv orasida keyingi posting yozgan qiymat saqlanadi
+            for kalit in yangi:
+                _kesh().touch(kalit)
+
+        transaction.on_commit(tasdiqlash)
+
+    try:
+        with transaction.atomic():
+            yield yozish
+    except BaseException:
+        _kesh().delete_many(kalitlar)
+        raise
+
+
+def balanslar_eskirdi(mahsulot_idlari):
+    """Mahsulotlar qoldig'ini keshdan o'chiradi (keyingi o'qish bazadan oladi)."""
+    _kesh().delete_many([_kalit(mahsulot_id) for mahsulot_id in mahsulot_idlari])
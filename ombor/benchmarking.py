@@ -0,0 +1,133 @@
+import os
+import string
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.db import connection, connections
+from django.test import RequestFactory
+
+from .exports import eksport_javobi
+
+
+# === Benchmark yordamchilari ===
+# O'lchovlar ishchi bazaga tegmasligi uchun vaqtinchalik bazada bajariladi.
+
+@contextmanager
+def vaqtinchalik_baza():
+    """
+    Migratsiyalar qo'llangan vaqtinchalik bazani yaratadi va tugagach o'chiradi.
+
+    SQLite uchun baza fayl ko'rinishida yaratiladi, shuning uchun uni fork
+    qilingan jarayonlar ham ishlata oladi.
+    """
+    vaqtinchalik_papka = None
+    if connection.vendor == 'sqlite':
+        vaqtinchalik_papka = tempfile.mkdtemp(prefix='ombor_bench_')
+        connection.settings_dict['TEST']['NAME'] = os.path.join(vaqtinchalik_papka, 'bench.sqlite3')
+    eski_nom = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection.settings_dict['NAME']
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(eski_nom, verbosity=0)
+        if vaqtinchalik_papka:
+            for fayl in os.listdir(vaqtinchalik_papka):
+                os.remove(os.path.join(vaqtinchalik_papka, fayl))
+            os.rmdir(vaqtinchalik_papka)
+
+
+def harfli_nom(prefiks, raqam):
+    """Raqamdan faqat harflardan iborat nom yasaydi (Mahsulot.clean raqamlarni qabul qilmaydi)."""
+    harflar = ''
+    raqam += 1
+    while raqam:
+        raqam, qoldiq = divmod(raqam - 1, 26)
+        harflar = string.ascii_lowercase[qoldiq] + harflar
+    return f"{prefiks}{harflar}"
+
+
+def persentil(qiymatlar, ulush):
+    """Qiymatlarning `ulush` persentili (0.95 — p95); bo'sh ro'yxat uchun 0."""
+    if not qiymatlar:
+        return 0.0
+    qiymatlar = sorted(qiymatlar)
+    return qiymatlar[min(len(qiymatlar) - 1, int(len(qiymatlar) * ulush))]
+
+
+class Sekundomer:
+    """`with` bloki ichida o'tgan vaqtni soniyalarda o'lchaydi."""
+
+    def __enter__(self):
+        self.boshlanish = time.perf_counter()
+        self.soniya = 0.0
+        return self
+
+    def __exit__(self, *exc):
+        self.soniya = self.joriy()
+        return False
+
+    def joriy(self):
+        """Blok ichida shu paytgacha o'tgan vaqt."""
+        return time.perf_counter() - self.boshlanish
+
+
+class SorovHisoblagich:
+    """`with` bloki ichida bazaga yuborilgan so'rovlarni sanaydi (DEBUG talab qilinmaydi)."""
+
+    def __init__(self, ulanish=connection):
+        self.ulanish = ulanish
+        self.soni = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.soni += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = self.ulanish.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._wrapper.__exit__(*exc)
+
+
+def admin_sorovi(foydalanuvchi, yol, sorov_qatori=''):
+    """
+    Admin view'larni middleware'siz chaqirish uchun GET so'rovi yasaydi.
+
+    OTPMiddleware ishlamagani uchun foydalanuvchi OTP orqali tasdiqlangan deb belgilanadi.
+    """
+    foydalanuvchi.otp_device = None
+    foydalanuvchi.is_verified = lambda: True
+    request = RequestFactory().get(yol, QUERY_STRING=sorov_qatori)
+    request.user = foydalanuvchi
+    request.session = {}
+    return request
+
+
+def eksportni_olchash(formati, model, queryset, xotira=False):
+    """
+    Eksportni so'rov ichidagidek yig'adi; birinchi bayt vaqti, umumiy vaqt, hajm va (so'ralsa)
+    xotira cho'qqisini qaytaradi. tracemalloc vaqtni sezilarli sekinlashtiradi,
+    shuning uchun xotira alohida o'lchanadi.
+    """
+    if xotira:
+        tracemalloc.start()
+    boshlanish = time.perf_counter()
+    response = eksport_javobi(formati, model, queryset)
+    birinchi_bayt = None
+    hajm = 0
+    for bolak in response.streaming_content:
+        if birinchi_bayt is None:
+            birinchi_bayt = time.perf_counter() - boshlanish
+        hajm += len(bolak)
+    umumiy = time.perf_counter() - boshlanish
+    response.close()
+    xotira_choqqisi = None
+    if xotira:
+        _, xotira_choqqisi = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {'birinchi_bayt': birinchi_bayt, 'umumiy': umumiy, 'hajm': hajm, 'xotira_choqqisi': xotira_choqqisi}
@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import os
+import pickle
+import uuid
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_permission_codename
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+
+from .exports import EKSPORT_FORMATLARI, eksport_yozish
+from .models import EksportVazifasi, KirdiChiqdi
+
+logger = logging.getLogger('ombor.eksport')
+
+EKSPORT_PAPKASI = 'eksportlar'
+# Shundan uzoq "bajarilmoqda" holatida turgan vazifa to'xtab qolgan (ishchi jarayon o'lgan) hisoblanadi
+VAZIFA_VAQT_CHEGARASI = timedelta(hours=1)
+
+
+# === Fon eksport vazifalari ===
+# Admin amali querysetni (filtrlar, qidiruv, tanlangan qatorlar bilan) pickle qilingan Query
+# ko'rinishida saqlaydi; `run_export_worker` jarayonlari uni tiklab, faylni MEDIA_ROOT ga yozadi.
+
+def _kalit(formati, model, queryset):
+    """
+    Model, format, SQL so'rov va oxirgi harakat ID sidan kalit yasaydi.
+
+    Yangi harakat kelsa kalit o'zgaradi, shuning uchun eski natija qayta ishlatilmaydi.
+    """
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        sql, params = '', ()
+    oxirgi_harakat = KirdiChiqdi.objects.order_by('-id').values_list('id', flat=True).first()
+    matn = '|'.join([formati, model._meta.label_lower, sql, repr(params), str(oxirgi_harakat)])
+    return hashlib.sha256(matn.encode()).hexdigest()
+
+
+def vazifa_qoshish(foydalanuvchi, model, queryset, formati, qatorlar_soni=None, parametrlar=None):
+    """
+    Eksportni navbatga qo'yadi va (vazifa, yangi yaratildimi) qaytaradi.
+
+    Shu kalitli vazifa navbatda turgan, bajarilayotgan yoki oxirgi
+    EKSPORT_QAYTA_ISHLATISH_MUDDATI ichida tayyor bo'lgan bo'lsa, yangisi yaratilmaydi.
+    """
+    kalit = _kalit(formati, model, queryset)
+    hozir = timezone.now()
+    yaqinda = hozir - timedelta(seconds=settings.EKSPORT_QAYTA_ISHLATISH_MUDDATI)
+    mavjud = (
+        EksportVazifasi.objects.filter(kalit=kalit)
+        .filter(Q(holat__in=("kutilmoqda", "bajarilmoqda")) | Q(holat="tayyor", tugagan__gte=yaqinda, muddati__gt=hozir))
+        .order_by('-id').first()
+    )
+    if mavjud is not None:
+        return mavjud, False
+    vazifa = EksportVazifasi.objects.create(
+        foydalanuvchi=foydalanuvchi, model=model._meta.label_lower, formati=formati, parametrlar=parametrlar or {},
+        sorov=pickle.dumps(queryset.query), kalit=kalit, qatorlar_soni=qatorlar_soni,
+    )
+    return vazifa, True
+
+
+def korish_mumkin(foydalanuvchi, model_nomi):
+    """Foydalanuvchi `model_nomi` (app_label.model_name) eksportlarini ko'ra oladimi (admindagi kabi)."""
+    try:
+        opts = apps.get_model(model_nomi)._meta
+    except LookupError:
+        return foydalanuvchi.is_superuser
+    return any(foydalanuvchi.has_perm(f'{opts.app_label}.{get_permission_codename(amal, opts)}')
+               for amal in ('view', 'change'))
+
+
+def vazifani_olish(vazifa_id):
+    """Navbatdagi vazifani shu ishchi uchun band qiladi; boshqasi olib bo'lgan bo'lsa False."""
+    return bool(EksportVazifasi.objects.filter(id=vazifa_id, holat="kutilmoqda")
+                .update(holat="bajarilmoqda", boshlangan=timezone.now()))
+
+
+def _queryset_tiklash(vazifa):
+    """
+    Saqlangan Query dan querysetni tiklaydi.
+
+    Navbatga qo'yilgandan keyin model yoki maydon o'chirilgan (migratsiya) yoki pickle buzilgan
+    bo'lsa, xato matni tushunarli bo'lishi uchun ValueError ko'tariladi.
+    """
+    try:
+        model = apps.get_model(vazifa.model)
+        sorov = pickle.loads(vazifa.sorov)
+    except (LookupError, FieldDoesNotExist, pickle.UnpicklingError, AttributeError, EOFError,
+            ImportError, IndexError, TypeError, ValueError) as xato:
+        raise ValueError(f"Saqlangan so'rovni tiklab bo'lmadi (ma'lumotlar tuzilmasi o'zgargan bo'lishi mumkin), "
+                         f"eksportni qaytadan boshlang. {type(xato).__name__}: {xato}") from xato
+    if getattr(sorov, 'model', None) is not model:
+        raise ValueError(f"Saqlangan so'rov {vazifa.model} modeliga tegishli emas, eksportni qaytadan boshlang.")
+    queryset = model._default_manager.all()
+    queryset.query = sorov
+    return model, queryset
+
+
+def vazifani_bajarish(vazifa_id):
+    """
+    Band qilingan vazifa faylini yozadi; muvaffaqiyatli bo'lsa True.
+
+    Fayl avval vaqtinchalik nom bilan yoziladi va tayyor bo'lgach joyiga ko'chiriladi:
+    yarim yozilgan fayl hech qachon yuklab olinmaydi. Xato (tiklanmagan so'rov ham) vazifaga yoziladi.
+    """
+    vazifa = EksportVazifasi.objects.get(id=vazifa_id)
+    kengaytma, _ = EKSPORT_FORMATLARI[vazifa.formati]
+    nom = f'{EKSPORT_PAPKASI}/{uuid.uuid4().hex}.{kengaytma}'
+    yol = default_storage.path(nom)
+    os.makedirs(os.path.dirname(yol), exist_ok=True)
+    try:
+        model, queryset = _queryset_tiklash(vazifa)
+        with open(f'{yol}.tmp', 'wb') as fayl:
+            eksport_yozish(vazifa.formati, model, queryset, fayl)
+        os.replace(f'{yol}.tmp', yol)
+    except Exception as xato:
+        logger.exception("Eksport #%s bajarilmadi", vazifa_id)
+        if os.path.exists(f'{yol}.tmp'):
+            os.remove(f'{yol}.tmp')
+        hozir = timezone.now()
+        EksportVazifasi.objects.filter(id=vazifa_id).update(
+            holat="xato", xato=f"{type(xato).__name__}: {xato}", tugagan=hozir,
+            muddati=hozir + timedelta(seconds=settings.EKSPORT_SAQLASH_MUDDATI))
+        return False
+    hozir = timezone.now()
+    EksportVazifasi.objects.filter(id=vazifa_id).update(
+        holat="tayyor", fayl=nom, hajm=os.path.getsize(yol), tugagan=hozir,
+        muddati=hozir + timedelta(seconds=settings.EKSPORT_SAQLASH_MUDDATI))
+    return True
+
+
+def toxtab_qolganlarni_qaytarish():
+    """VAZIFA_VAQT_CHEGARASI dan uzoq bajarilayotgan vazifalarni navbatga qaytaradi."""
+    return (EksportVazifasi.objects
+            .filter(holat="bajarilmoqda", boshlangan__lt=timezone.now() - VAZIFA_VAQT_CHEGARASI)
+            .update(holat="kutilmoqda", boshlangan=None))
+
+
+def eskirganlarni_tozalash():
+    """Saqlash muddati tugagan vazifalarni o'chiradi (fayllari post_delete signalida o'chiriladi)."""
+    return EksportVazifasi.objects.filter(muddati__lt=timezone.now()).delete()[0]
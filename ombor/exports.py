@@ -0,0 +1,253 @@
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+
+import xlsxwriter
+from django.http import FileResponse
+from django.utils.timezone import is_aware, localtime
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import mm
+from reportlab.platypus import LongTable, SimpleDocTemplate, TableStyle
+
+# Querysetni bazadan bo'laklab o'qish hajmi: xotira eksport hajmiga bog'liq bo'lmaydi
+EKSPORT_BOLAK_HAJMI = 2000
+EXCEL_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PDF_CONTENT_TYPE = 'application/pdf'
+# PDF 5 MB gacha xotirada, undan kattasi vaqtinchalik faylda yig'iladi
+PDF_XOTIRA_CHEGARASI = 5 * 1024 * 1024
+AMALIYOT_RANGLARI = {"Kirdi": colors.green, "Chiqdi": colors.red}
+# Format -> (fayl kengaytmasi, content type)
+EKSPORT_FORMATLARI = {'excel': ('xlsx', EXCEL_CONTENT_TYPE), 'pdf': ('pdf', PDF_CONTENT_TYPE)}
+
+
+# === Eksport yordamchilari ===
+# Admin amallari va boshqa eksportlar uchun umumiy, oqimli (streaming) yozuvchilar.
+
+def eksport_maydonlari(model):
+    return model._meta.fields
+
+
+def eksport_sarlavhalari(model):
+    return ["T/r"] + [field.verbose_name for field in eksport_maydonlari(model)]
+
+
+def eksport_qatorlari(model, queryset):
+    """
+    Obyektlarni bo'laklab qaytaradi; ForeignKey maydonlari bitta JOIN bilan olinadi,
+    shuning uchun har bir qator uchun qo'shimcha so'rov bo'lmaydi.
+    """
+    bogliq = [field.name for field in eksport_maydonlari(model) if field.is_relation]
+    return queryset.select_related(*bogliq).iterator(chunk_size=EKSPORT_BOLAK_HAJMI)
+
+
+def fayl_javobi(fayl, fayl_nomi, content_type):
+    """Vaqtinchalik faylni boshidan o'qib, bo'laklab yuboradigan javob qaytaradi."""
+    fayl.seek(0)
+    return FileResponse(fayl, as_attachment=True, filename=fayl_nomi, content_type=content_type)
+
+
+def eksport_yozish(formati, model, queryset, fayl):
+    """Querysetni `fayl`ga EKSPORT_FORMATLARI dagi formatda yozadi."""
+    if formati == 'pdf':
+        pdf_yozish(model, queryset, fayl, sarlavha='PDF Report')
+    else:
+        excel_yozish(model, queryset, fayl)
+
+
+def eksport_javobi(formati, model, queryset):
+    """Eksportni so'rov ichida yig'ib, bo'laklab yuboradigan javob qaytaradi."""
+    kengaytma, content_type = EKSPORT_FORMATLARI[formati]
+    if formati == 'pdf':
+        fayl = tempfile.SpooledTemporaryFile(max_size=PDF_XOTIRA_CHEGARASI)
+    else:
+        # Fayl vaqtinchalik diskda yig'iladi va bo'laklab yuboriladi, xotirada to'liq saqlanmaydi
+        fayl = tempfile.TemporaryFile()
+    eksport_yozish(formati, model, queryset, fayl)
+    return fayl_javobi(fayl, f'{model.__name__}.{kengaytma}', content_type)
+
+
+def excel_yozish(model, queryset, fayl):
+    """
+    Querysetni `fayl`ga xlsx ko'rinishida yozadi.
+
+    Workbook `constant_memory` rejimida ishlaydi: har bir qator yozilishi bilan
+    diskka tushadi. Sana va sonlar matn emas, Excel'ning o'z turlarida yoziladi.
+    """
+    workbook = xlsxwriter.Workbook(fayl, {
+        'constant_memory': True,
+        'tmpdir': tempfile.gettempdir(),
+        'remove_timezone': True,
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+    })
+    worksheet = workbook.add_worksheet()
+
+    # Define formats
+    header_format = workbook.add_format({'bold': True, 'bg_color': '#D3D3D3', 'border': 1})
+    kirdi_format = workbook.add_format({'font_color': 'green', 'bold': True})
+    chiqdi_format = workbook.add_format({'font_color': 'red', 'bold': True})
+    sana_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss', 'border': 1})  # Date format
+    amaliyot_formatlari = {"Kirdi": kirdi_format, "Chiqdi": chiqdi_format}
+
+    maydonlar = eksport_maydonlari(model)
+    for col_num, field in enumerate(maydonlar, 1):
+        if field.get_internal_type() in ('DateTimeField', 'DateField'):
+            worksheet.set_column(col_num, col_num, 20)
+
+    # Write headers
+    for col_num, header in enumerate(eksport_sarlavhalari(model)):
+        worksheet.write_string(0, col_num, str(header), header_format)
+
+    # Write data rows
+    for row_num, obj in enumerate(eksport_qatorlari(model, queryset), 1):
+        worksheet.write_number(row_num, 0, row_num)
+        for col_num, field in enumerate(maydonlar, 1):
+            value = getattr(obj, field.name)
+            if value is None:
+                worksheet.write_blank(row_num, col_num, None)
+            elif isinstance(value, datetime):
+                worksheet.write_datetime(row_num, col_num, localtime(value) if is_aware(value) else value,
+                                         sana_format)
+            elif isinstance(value, date):
+                worksheet.write_datetime(row_num, col_num, value, sana_format)
+            elif isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+                worksheet.write_number(row_num, col_num, value)
+            elif field.name == "amaliyot_turi":
+                worksheet.write_string(row_num, col_num, value, amaliyot_formatlari.get(value))
+            else:
+                worksheet.write_string(row_num, col_num, str(value))
+
+    workbook.close()
+
+
+# === PDF hisobot ===
+
+PDF_SHRIFT_OLCHAMI = 8
+PDF_QATOR_BALANDLIGI = 14
+PDF_CHETLAR = 12 * mm
+
+
+def _ustun_ogirligi(field):
+    """Ustun kengligi ulushi: sana va nomlar kengroq, raqamlar torroq."""
+    if field.get_internal_type() in ('DateTimeField', 'DateField'):
+        return 3
+    if field.is_relation or field.get_internal_type() == 'CharField':
+        return 3
+    return 1.5
+
+
+def _pdf_qiymat(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return (localtime(value) if is_aware(value) else value).strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+
+class RangliJadval(LongTable):
+    """
+    Bitta ustun uchun qiymatga qarab rang beradigan jadval.
+
+    Har bir katak uchun alohida TEXTCOLOR buyrug'i qo'shish o'rniga, rang katak
+    chizilayotganda ustun qoidasidan olinadi.
+    """
+    rang_ustuni = None
+    qiymat_ranglari = AMALIYOT_RANGLARI
+
+    def _drawCell(self, cellval, cellstyle, pos, size):
+        if self.rang_ustuni is not None and pos[0] == self._colpositions[self.rang_ustuni]:
+            rang = self.qiymat_ranglari.get(cellval)
+            if rang is not None:
+                # Rangli uslub har bir rang uchun bir marta yaratiladi
+                uslublar = self.__dict__.setdefault('_rangli_uslublar', {})
+                if rang not in uslublar:
+                    uslublar[rang] = cellstyle.copy()
+                    uslublar[rang].color = rang
+                cellstyle = uslublar[rang]
+        super()._drawCell(cellval, cellstyle, pos, size)
+
+    def split(self, availWidth, availHeight):
+        qismlar = super().split(availWidth, availHeight)
+        for qism in qismlar:
+            qism.rang_ustuni = self.rang_ustuni
+        return qismlar
+
+
+class _BolakliHikoya(list):
+    """
+    Platypus uchun "dangasa" story: keyingi jadval bo'lagi faqat oldingisi
+    sahifaga joylashtirilgandan keyin yaratiladi, shuning uchun xotirada bir
+    vaqtning o'zida bitta bo'lak turadi.
+    """
+
+    def __init__(self, bolaklar):
+        super().__init__()
+        self._bolaklar = iter(bolaklar)
+
+    def __len__(self):
+        if not super().__len__():
+            keyingi = next(self._bolaklar, None)
+            if keyingi is not None:
+                self.append(keyingi)
+        return super().__len__()
+
+
+def pdf_yozish(model, queryset, fayl, sarlavha=None):
+    """
+    Querysetni `fayl`ga ko'p sahifali PDF jadval ko'rinishida yozadi.
+
+    Har bir sahifa querysetdan o'qilgan bitta bo'lakdan quriladi; sarlavha qatori
+    har bir sahifada takrorlanadi. "Kirdi"/"Chiqdi" ranglari bitta ustun qoidasi
+    bilan beriladi.
+    """
+    maydonlar = eksport_maydonlari(model)
+    sarlavha = sarlavha or str(model._meta.verbose_name_plural)
+    doc = SimpleDocTemplate(fayl, pagesize=letter, title=sarlavha,
+                            leftMargin=PDF_CHETLAR, rightMargin=PDF_CHETLAR,
+                            topMargin=PDF_CHETLAR + 6 * mm, bottomMargin=PDF_CHETLAR)
+
+    ogirliklar = [0.8] + [_ustun_ogirligi(field) for field in maydonlar]
+    kengliklar = [doc.width * ogirlik / sum(ogirliklar) for ogirlik in ogirliklar]
+    # Frame ichki chekkalari (6pt + 6pt) va sarlavha qatori chiqarib tashlanadi
+    sahifadagi_qatorlar = max(int((doc.height - 12) // PDF_QATOR_BALANDLIGI) - 1, 1)
+
+    rang_ustuni = None
+    for col_num, field in enumerate(maydonlar, 1):
+        if field.name == "amaliyot_turi":
+            rang_ustuni = col_num
+
+    uslub = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.gray),  # Header background
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),  # Table grid
+        ('FONTSIZE', (0, 0), (-1, -1), PDF_SHRIFT_OLCHAMI),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ])
+    sarlavhalar = [str(header) for header in eksport_sarlavhalari(model)]
+
+    def bolaklar():
+        qatorlar = enumerate(eksport_qatorlari(model, queryset), 1)
+        while True:
+            bolak = [
+                [str(index)] + [_pdf_qiymat(getattr(obj, field.name)) for field in maydonlar]
+                for index, obj in islice(qatorlar, sahifadagi_qatorlar)
+            ]
+            if not bolak:
+                return
+            jadval = RangliJadval([sarlavhalar] + bolak, colWidths=kengliklar,
+                                  rowHeights=PDF_QATOR_BALANDLIGI, repeatRows=1)
+            jadval.rang_ustuni = rang_ustuni
+            jadval.setStyle(uslub)
+            yield jadval
+
+    def sahifa_sarlavhasi(canvas, document):
+        canvas.saveState()
+        canvas.setFont('Helvetica-Bold', 9)
+        canvas.drawString(PDF_CHETLAR, document.pagesize[1] - PDF_CHETLAR, sarlavha)
+        canvas.setFont('Helvetica', 8)
+        canvas.drawRightString(document.pagesize[0] - PDF_CHETLAR, document.pagesize[1] - PDF_CHETLAR,
+                               f"{document.page}-sahifa")
+        canvas.restoreState()
+
+    doc.build(_BolakliHikoya(bolaklar()), onFirstPage=sahifa_sarlavhasi, onLaterPages=sahifa_sarlavhasi)
@@ -0,0 +1,168 @@
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .balans_keshi import balans_tranzaksiyasi
+from .kesh import api_eskirdi, birliklarni_tekshirish
+from .models import HarakatYigindisi, KamQoldiq, KirdiChiqdi, Mahsulot, MahsulotBalans, MahsulotBalansTarix
+
+AMALIYOT_TURLARI = {tur for tur, _ in KirdiChiqdi.Kirdi_Chiqdi}
+PARTIYA_HAJMI = 500
+
+
+# === Ommaviy kirim-chiqim yuklash ===
+# Smena oxiridagi minglab qatorlar bitta tranzaksiyada, bir necha so'rov bilan saqlanadi.
+# Kiruvchi qatorlardagi ustun nomlari KirdiChiqdi maydonlari bilan bir xil:
+# mahsulot_nomi (nom yoki ID), miqdor, amaliyot_turi, sana (ixtiyoriy, ISO 8601).
+
+def qatorlarni_oqish(matn, fayl_turi):
+    """CSV yoki JSON matnini lug'atlar ro'yxatiga aylantiradi."""
+    if fayl_turi == 'json':
+        try:
+            qatorlar = json.loads(matn)
+        except ValueError as xato:
+            raise ValidationError(f"JSON noto'g'ri: {xato}")
+        if not isinstance(qatorlar, list) or not all(isinstance(q, dict) for q in qatorlar):
+            raise ValidationError("JSON obyektlar ro'yxati bo'lishi kerak.")
+        return qatorlar
+    if fayl_turi == 'csv':
+        return list(csv.DictReader(io.StringIO(matn)))
+    raise ValidationError(f"Noma'lum format: {fayl_turi}")
+
+
+def _raqamlarmi(matn):
+    """Faqat ASCII 0-9 raqamlari: str.isdigit() "²" yoki "٣" ni ham qabul qiladi, int() esa yo'q."""
+    return matn.isascii() and matn.isdigit()
+
+
+def _mahsulotlarni_aniqlash(qiymatlar):
+    """Mahsulot nomi yoki ID larini ikki so'rov bilan Mahsulot ID lariga aylantiradi."""
+    idlar = {q for q in qiymatlar if _raqamlarmi(q)}
+    nomlar = {q.capitalize() for q in qiymatlar if not _raqamlarmi(q)}
+    topilgan = {}
+    if idlar:
+        for mahsulot_id in Mahsulot.objects.filter(id__in=idlar).values_list('id', flat=True):
+            topilgan[str(mahsulot_id)] = mahsulot_id
+    if nomlar:
+        for mahsulot_id, nom in Mahsulot.objects.filter(mahsulot_nomi__in=nomlar).values_list('id', 'mahsulot_nomi'):
+            topilgan[nom] = mahsulot_id
+    return {q: topilgan.get(q if _raqamlarmi(q) else q.capitalize()) for q in qiymatlar}
+
+
+def _miqdorni_oqish(qiymat):
+    """Butun son (JSON) yoki raqamlar satri (CSV); 2.7 yoki "2.7" kabi qiymatlar uchun None."""
+    if isinstance(qiymat, int) and not isinstance(qiymat, bool):
+        return qiymat
+    if isinstance(qiymat, str) and _raqamlarmi(qiymat.strip()):
+        return int(qiymat)
+    return None
+
+
+def _sanani_oqish(sana_matni, hozir):
+    """Bo'sh satr uchun `hozir`; formati yoki qiymati noto'g'ri sana (2026-02-30) uchun None."""
+    if not sana_matni:
+        return hozir
+    try:
+        sana = parse_datetime(sana_matni)
+    except ValueError:
+        return None
+    if sana is not None and timezone.is_naive(sana):
+        sana = timezone.make_aware(sana)
+    return sana
+
+
+def _qatorlarni_tekshirish(qatorlar):
+    """
+    Har bir qatorni bazaga murojaat qilmasdan tekshiradi.
+
+    (tartib raqami, mahsulot qiymati, miqdor, amaliyot turi, sana) ko'rinishidagi
+    ro'yxat va xatolar ro'yxatini qaytaradi.
+    """
+    tozalangan = []
+    xatolar = []
+    hozir = timezone.now()
+    for raqam, qator in enumerate(qatorlar, 1):
+        mahsulot = str(qator.get('mahsulot_nomi') or '').strip()
+        amaliyot_turi = str(qator.get('amaliyot_turi') or '').strip().capitalize()
+        miqdor = _miqdorni_oqish(qator.get('miqdor'))
+        sana_matni = str(qator.get('sana') or '').strip()
+        sana = _sanani_oqish(sana_matni, hozir)
+
+        if not mahsulot:
+            xatolar.append(f"{raqam}-qator: mahsulot nomi kiritilishi shart!")
+        elif miqdor is None or miqdor <= 0:
+            xatolar.append(f"{raqam}-qator: mahsulot miqdori musbat butun son bo'lishi kerak!")
+        elif amaliyot_turi not in AMALIYOT_TURLARI:
+            xatolar.append(f"{raqam}-qator: amaliyot turi 'Kirdi' yoki 'Chiqdi' bo'lishi kerak!")
+        elif sana is None:
+            xatolar.append(f"{raqam}-qator: sana noto'g'ri ({sana_matni}).")
+        else:
+            tozalangan.append((raqam, mahsulot, miqdor, amaliyot_turi, sana))
+    return tozalangan, xatolar
+
+
+def harakatlarni_joylash(qatorlar):
+    """
+    Kirim-chiqim qatorlarini bitta tranzaksiyada saqlaydi va saqlangan qatorlar sonini qaytaradi.
+
+    Butun partiya joriy balanslarga nisbatan xotirada tekshiriladi: birorta qator
+    xato bo'lsa, hech narsa saqlanmaydi va barcha xatolar bilan ValidationError
+    ko'tariladi. Qoldiqlar har bir mahsulot uchun sana tartibida bir o'tishda
+    hisoblanadi.
+    """
+    tozalangan, xatolar = _qatorlarni_tekshirish(qatorlar)
+    mahsulot_idlari = _mahsulotlarni_aniqlash({q[1] for q in tozalangan})
+    for raqam, mahsulot, *_ in tozalangan:
+        if mahsulot_idlari[mahsulot] is None:
+            xatolar.append(f"{raqam}-qator: '{mahsulot}' mahsuloti topilmadi!")
+    if xatolar:
+        raise ValidationError(xatolar)
+
+    tozalangan.sort(key=lambda q: q[4])
+    idlar = set(mahsulot_idlari.values())
+
+    with balans_tranzaksiyasi() as qoldiqlarni_yozish:
+        MahsulotBalans.objects.bulk_create(
+            [MahsulotBalans(mahsulot_nomi_id=mahsulot_id, qoldiq=0) for mahsulot_id in idlar],
+            ignore_conflicts=True,
+        )
+        # Bo'sh UPDATE balans qatorlarini tranzaksiya oxirigacha qulflaydi (SQLite'da
+        # yozish qulfini oladi), shuning uchun quyidagi o'qish eskirib qolmaydi
+        MahsulotBalans.objects.filter(mahsulot_nomi_id__in=idlar).update(qoldiq=F('qoldiq'))
+        balanslar = {b.mahsulot_nomi_id: b for b in MahsulotBalans.objects.filter(mahsulot_nomi_id__in=idlar)}
+
+        harakatlar = []
+        tarixlar = []
+        for raqam, mahsulot, miqdor, amaliyot_turi, sana in tozalangan:
+            balans = balanslar[mahsulot_idlari[mahsulot]]
+            yangi_qoldiq = balans.qoldiq + miqdor if amaliyot_turi == "Kirdi" else balans.qoldiq - miqdor
+            if yangi_qoldiq < 0:
+                xatolar.append(f"{raqam}-qator: omborda '{mahsulot}' mahsuloti yetarli emas "
+                               f"(qoldiq {balans.qoldiq}, so'ralgan {miqdor}).")
+                continue
+            balans.qoldiq = yangi_qoldiq
+            harakatlar.append(KirdiChiqdi(mahsulot_nomi_id=balans.mahsulot_nomi_id, miqdor=miqdor,
+                                          amaliyot_turi=amaliyot_turi, sana=sana))
+            tarixlar.append(MahsulotBalansTarix(mahsulot_nomi_id=balans.mahsulot_nomi_id, miqdor=miqdor,
+                                                qoldiq=yangi_qoldiq, sana=sana, amaliyot_turi=amaliyot_turi))
+        if xatolar:
+            raise ValidationError(xatolar)
+
+        KirdiChiqdi.objects.bulk_create(harakatlar, batch_size=PARTIYA_HAJMI)
+        MahsulotBalansTarix.objects.bulk_create(tarixlar, batch_size=PARTIYA_HAJMI)
+        MahsulotBalans.objects.bulk_update(balanslar.values(), ['qoldiq'], batch_size=PARTIYA_HAJMI)
+        qoldiqlarni_yozish({mahsulot_id: balans.qoldiq for mahsulot_id, balans in balanslar.items()})
+        KamQoldiq.qayta_hisoblash(idlar)
+        HarakatYigindisi.harakatlarni_qoshish(
+            (h.mahsulot_nomi_id, h.sana, h.amaliyot_turi, h.miqdor) for h in harakatlar)
+        # bulk_create signal yubormaydi: birliklar keshi shu yerda tekshiriladi
+        birlik_idlari = list(Mahsulot.objects.filter(id__in=idlar).values_list('olchov_birligi_id', flat=True))
+        transaction.on_commit(lambda: birliklarni_tekshirish(birlik_idlari))
+        transaction.on_commit(api_eskirdi)
+    return len(harakatlar)
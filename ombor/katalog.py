@@ -0,0 +1,184 @@
+import csv
+import io
+import re
+import zipfile
+from xml.etree import ElementTree
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .kesh import api_eskirdi
+from .models import NOM_ANDOZASI, KamQoldiq, Mahsulot, OlchovBirligi
+from .normallash import nomni_normallash
+
+KATALOG_USTUNLARI = ('mahsulot_nomi', 'olchov_birligi')
+PARTIYA_HAJMI = 1000
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_USTUN_HARFLARI = re.compile(r'[A-Z]+')
+
+
+# === Mahsulot katalogini yuklash ===
+# Minglab mahsulot bir necha so'rov bilan qo'shiladi: qatorlar va o'lchov birliklari xotirada
+# tekshiriladi, takrorlar qidiruv_nomi unikal indeksi bo'yicha bitta so'rovda topiladi.
+# Xato qatorlar saqlanmaydi, qolganlari saqlanadi; har bir xato qator raqami bilan qaytariladi.
+
+def _xlsx_qatorlari(mazmun):
+    """XLSX faylning birinchi varag'idagi qatorlarni matnlar ro'yxati sifatida o'qiydi."""
+    try:
+        arxiv = zipfile.ZipFile(io.BytesIO(mazmun))
+    except zipfile.BadZipFile:
+        raise ValidationError("XLSX fayl o'qilmadi.")
+    with arxiv:
+        nomlar = arxiv.namelist()
+        umumiy = []
+        if 'xl/sharedStrings.xml' in nomlar:
+            for si in ElementTree.fromstring(arxiv.read('xl/sharedStrings.xml')).iter(f'{XLSX_NS}si'):
+                umumiy.append(''.join(t.text or '' for t in si.iter(f'{XLSX_NS}t')))
+        varaqlar = sorted(nom for nom in nomlar if nom.startswith('xl/worksheets/sheet'))
+        if not varaqlar:
+            raise ValidationError("XLSX faylda varaq topilmadi.")
+        varaq = 'xl/worksheets/sheet1.xml' if 'xl/worksheets/sheet1.xml' in varaqlar else varaqlar[0]
+        ildiz = ElementTree.fromstring(arxiv.read(varaq))
+
+    qatorlar = []
+    for row in ildiz.iter(f'{XLSX_NS}row'):
+        qator = []
+        for c in row.iter(f'{XLSX_NS}c'):
+            # Bo'sh kataklar faylga yozilmaydi: ustun o'rni katak manzilidan (B7) olinadi
+            ustun = 0
+            for harf in _USTUN_HARFLARI.match(c.get('r', 'A')).group():
+                ustun = ustun * 26 + ord(harf) - ord('A') + 1
+            qator.extend([''] * (ustun - 1 - len(qator)))
+            turi, v = c.get('t'), c.find(f'{XLSX_NS}v')
+            if turi == 's':
+                qiymat = umumiy[int(v.text)]
+            elif turi == 'inlineStr':
+                qiymat = ''.join(t.text or '' for t in c.iter(f'{XLSX_NS}t'))
+            else:
+                qiymat = v.text if v is not None and v.text else ''
+            qator.append(qiymat)
+        qatorlar.append(qator)
+    return qatorlar
+
+
+def katalog_qatorlarini_oqish(mazmun, fayl_turi):
+    """CSV yoki XLSX fayl mazmunini (bytes) lug'atlar ro'yxatiga aylantiradi; birinchi qator — sarlavha."""
+    if fayl_turi == 'csv':
+        try:
+            matn = mazmun.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ValidationError("CSV fayl UTF-8 kodlashda bo'lishi kerak.")
+        return list(csv.DictReader(io.StringIO(matn)))
+    if fayl_turi == 'xlsx':
+        sarlavha, *qatorlar = _xlsx_qatorlari(mazmun) or [[]]
+        sarlavha = [str(ustun).strip().lower() for ustun in sarlavha]
+        return [dict(zip(sarlavha, qator)) for qator in qatorlar]
+    raise ValidationError(f"Noma'lum format: {fayl_turi}")
+
+
+def _qatorlarni_tekshirish(qatorlar, birliklar, birlik_yaratish):
+    """
+    Qatorlarni bazaga murojaat qilmasdan tekshiradi.
+
+    (fayl qator raqami, nom, kalit, birlik kaliti) ro'yxati, yangi birliklar
+    (kalit -> nom) va (qator raqami, xato) ro'yxatini qaytaradi. Qator raqami
+    fayldagidek: sarlavha 1-qator.
+    """
+    tozalangan = []
+    yangi_birliklar = {}
+    xatolar = []
+    korilgan = {}
+    for raqam, qator in enumerate(qatorlar, 2):
+        nom = str(qator.get('mahsulot_nomi') or '').strip().capitalize()
+        birlik = str(qator.get('olchov_birligi') or '').strip().capitalize()
+        kalit = nomni_normallash(nom)
+        birlik_kaliti = nomni_normallash(birlik)
+        if not nom and not birlik:
+            continue  # bo'sh qator
+        if not nom:
+            xatolar.append((raqam, "Mahsulot nomi kiritilishi shart!"))
+        elif not NOM_ANDOZASI.fullmatch(nom):
+            xatolar.append((raqam, f"'{nom}': mahsulot nomi faqat harflardan iborat bo'lishi kerak!"))
+        elif kalit in korilgan:
+            xatolar.append((raqam, f"'{nom}' mahsuloti faylning {korilgan[kalit]}-qatorida ham bor."))
+        elif not birlik:
+            xatolar.append((raqam, f"'{nom}' uchun o'lchov birligi kiritilishi shart!"))
+        elif birlik_kaliti not in birliklar and not birlik_yaratish:
+            xatolar.append((raqam, f"'{birlik}' o'lchov birligi topilmadi!"))
+        elif birlik_kaliti not in birliklar and not NOM_ANDOZASI.fullmatch(birlik):
+            xatolar.append((raqam, f"'{birlik}': o'lchov birligi faqat harflardan iborat bo'lishi kerak!"))
+        else:
+            korilgan[kalit] = raqam
+            if birlik_kaliti not in birliklar:
+                yangi_birliklar.setdefault(birlik_kaliti, birlik)
+            tozalangan.append((raqam, nom, kalit, birlik_kaliti))
+    return tozalangan, yangi_birliklar, xatolar
+
+
+def _partiyani_saqlash(partiya, birliklar, xatolar):
+    """Partiyani bitta INSERT bilan saqlaydi; parallel qo'shilgan takror bo'lsa — bittalab."""
+    mahsulotlar = [Mahsulot(mahsulot_nomi=nom, qidiruv_nomi=kalit, olchov_birligi_id=birliklar[birlik_kaliti])
+                   for _, nom, kalit, birlik_kaliti in partiya]
+    try:
+        with transaction.atomic():
+            Mahsulot.objects.bulk_create(mahsulotlar)
+        return len(mahsulotlar)
+    except IntegrityError:
+        pass
+    saqlandi = 0
+    for (raqam, nom, *_), mahsulot in zip(partiya, mahsulotlar):
+        mahsulot.pk = None
+        try:
+            with transaction.atomic():
+                Mahsulot.objects.bulk_create([mahsulot])
+            saqlandi += 1
+        except IntegrityError:
+            xatolar.append((raqam, f"'{nom}' mahsuloti bazada allaqachon mavjud!"))
+    return saqlandi
+
+
+def katalogni_yuklash(qatorlar, birlik_yaratish=False):
+    """
+    Mahsulot katalogini (mahsulot_nomi, olchov_birligi ustunlari) ommaviy saqlaydi.
+
+    O'lchov birliklari bitta so'rov bilan xotiraga olinadi; `birlik_yaratish` bo'lsa
+    topilmaganlari yaratiladi. Mavjud mahsulotlar qidiruv_nomi bo'yicha aniqlanadi
+    ("Шакар" bazadagi "Shakar" ning takrori). Saqlangan mahsulotlar soni va
+    (qator raqami, xato) ro'yxatini qaytaradi.
+    """
+    birliklar = dict(OlchovBirligi.objects.values_list('qidiruv_nomi', 'id'))
+    tozalangan, yangi_birliklar, xatolar = _qatorlarni_tekshirish(qatorlar, birliklar, birlik_yaratish)
+
+    kalitlar = [q[2] for q in tozalangan]
+    mavjud = {}
+    for i in range(0, len(kalitlar), PARTIYA_HAJMI):
+        mavjud.update(Mahsulot.objects.filter(qidiruv_nomi__in=kalitlar[i:i + PARTIYA_HAJMI])
+                      .values_list('qidiruv_nomi', 'mahsulot_nomi'))
+    saqlanadi = []
+    for qator in tozalangan:
+        raqam, nom, kalit, _ = qator
+        if kalit in mavjud:
+            xatolar.append((raqam, f"'{nom}' mahsuloti bazada allaqachon mavjud ('{mavjud[kalit]}')."))
+        else:
+            saqlanadi.append(qator)
+
+    saqlandi = 0
+    with transaction.atomic():
+        if yangi_birliklar:
+            OlchovBirligi.objects.bulk_create(
+                [OlchovBirligi(olchov_birligi=nom, qidiruv_nomi=kalit) for kalit, nom in yangi_birliklar.items()],
+                ignore_conflicts=True,
+            )
+            birliklar.update(OlchovBirligi.objects.filter(qidiruv_nomi__in=yangi_birliklar)
+                             .values_list('qidiruv_nomi', 'id'))
+        for i in range(0, len(saqlanadi), PARTIYA_HAJMI):
+            saqlandi += _partiyani_saqlash(saqlanadi[i:i + PARTIYA_HAJMI], birliklar, xatolar)
+            # Standart minimal qoldig'i bor birlikdagi yangi mahsulot (qoldiq 0) darhol kam qoldiqlarga tushadi
+            KamQoldiq.qayta_hisoblash(Mahsulot.objects.filter(
+                qidiruv_nomi__in=[qator[2] for qator in saqlanadi[i:i + PARTIYA_HAJMI]],
+                olchov_birligi__standart_minimal_qoldiq__isnull=False).values_list('id', flat=True))
+        # bulk_create signal yubormaydi: API ro'yxatlari keshi shu yerda eskiradi
+        if saqlandi or yangi_birliklar:
+            transaction.on_commit(api_eskirdi)
+    xatolar.sort()
+    return saqlandi, xatolar
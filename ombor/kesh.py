@@ -0,0 +1,108 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from .models import KirdiChiqdi, Mahsulot, OlchovBirligi
+
+BIRLIKLAR_VERSIYA_KALITI = 'ombor:ishlatilgan_birliklar:versiya'
+BIRLIKLAR_KESH_MUDDATI = 60 * 60  # soniya; kesh umumiy bo'lmagan jarayonlar uchun eskirish chegarasi
+
+
+# === Ishlatilgan o'lchov birliklari keshi ===
+# Kirim-chiqimlarda uchragan o'lchov birliklari to'plami faqat yangi mahsulot/birlik
+# juftligi birinchi marta paydo bo'lganda o'zgaradi. To'plam versiyali kalit ostida
+# saqlanadi: signallar versiyani oshiradi, keyingi o'qish to'plamni qayta quradi.
+
+def _birliklar_versiyasi():
+    versiya = cache.get(BIRLIKLAR_VERSIYA_KALITI)
+    if versiya is None:
+        # Versiya keshdan o'chib ketsa, eski to'plamlar bilan to'qnashmasligi uchun vaqtdan boshlanadi
+        cache.add(BIRLIKLAR_VERSIYA_KALITI, time.time_ns(), None)
+        versiya = cache.get(BIRLIKLAR_VERSIYA_KALITI)
+    return versiya
+
+
+def _birliklar_kaliti():
+    return f'ombor:ishlatilgan_birliklar:{_birliklar_versiyasi()}'
+
+
+def ishlatilgan_birliklar():
+    """
+    Kirim-chiqimlarda ishlatilgan o'lchov birliklarini [(id, nomi), ...] ko'rinishida qaytaradi.
+
+    Kesh bo'sh bo'lsa, to'plam har bir mahsulot uchun bitta indeks qidiruvi bilan
+    quriladi: butun jadval bo'yicha DISTINCT bajarilmaydi.
+    """
+    kalit = _birliklar_kaliti()
+    birliklar = cache.get(kalit)
+    if birliklar is None:
+        harakatli_mahsulotlar = Mahsulot.objects.filter(
+            Exists(KirdiChiqdi.objects.filter(mahsulot_nomi=OuterRef('pk')))
+        ).values('olchov_birligi_id')
+        birliklar = list(OlchovBirligi.objects.filter(id__in=harakatli_mahsulotlar)
+                         .order_by('olchov_birligi').values_list('id', 'olchov_birligi'))
+        cache.set(kalit, birliklar, BIRLIKLAR_KESH_MUDDATI)
+    return birliklar
+
+
+def ishlatilgan_birlik_idlari():
+    return [birlik_id for birlik_id, _ in ishlatilgan_birliklar()]
+
+
+def birliklar_eskirdi():
+    """To'plamni eskirgan deb belgilaydi (versiyani oshiradi)."""
+    try:
+        cache.incr(BIRLIKLAR_VERSIYA_KALITI)
+    except ValueError:
+        # Versiya hali yaratilmagan: keyingi o'qish yangi versiya bilan boshlanadi
+        pass
+
+
+def birliklarni_tekshirish(birlik_idlari):
+    """
+    Yangi harakatlardagi birliklar keshdagi to'plamda bo'lmasa, uni eskirgan deb belgilaydi.
+
+    Tranzaksiya yakunlangach chaqiriladi. Kesh bo'sh bo'lsa ham versiya oshiriladi:
+    shu payt qurilayotgan (yangi qatorni ko'rmagan) to'plam eski versiya ostida qoladi.
+    """
+    birliklar = cache.get(_birliklar_kaliti())
+    if birliklar is None or not set(birlik_idlari) <= {birlik_id for birlik_id, _ in birliklar}:
+        birliklar_eskirdi()
+
+
+# === API ma'lumotlari versiyasi ===
+# Har bir harakat (va katalog o'zgarishi) tranzaksiya yakunlangach versiyani oshiradi. JSON API
+# shu versiyadan ETag yasaydi va javob tanasini versiyali kalit ostida qisqa muddat saqlaydi.
+# Kesh jarayonlar orasida umumiy bo'lmasa (LocMemCache), versiya kaliti muddati boshqa
+# jarayonlardagi o'zgarishlar qancha kechikib ko'rinishining chegarasi bo'ladi.
+
+API_VERSIYA_KALITI = 'ombor:api:versiya'
+API_VERSIYA_MUDDATI = 60  # soniya
+API_KESH_MUDDATI = 30  # soniya
+
+
+def api_versiyasi():
+    versiya = cache.get(API_VERSIYA_KALITI)
+    if versiya is None:
+        cache.add(API_VERSIYA_KALITI, time.time_ns(), API_VERSIYA_MUDDATI)
+        versiya = cache.get(API_VERSIYA_KALITI)
+    return versiya
+
+
+async def aapi_versiyasi():
+    """api_versiyasi() ning async varianti."""
+    versiya = await cache.aget(API_VERSIYA_KALITI)
+    if versiya is None:
+        await cache.aadd(API_VERSIYA_KALITI, time.time_ns(), API_VERSIYA_MUDDATI)
+        versiya = await cache.aget(API_VERSIYA_KALITI)
+    return versiya
+
+
+def api_eskirdi():
+    """API javoblarini eskirgan deb belgilaydi (versiyani oshiradi)."""
+    try:
+        cache.incr(API_VERSIYA_KALITI)
+    except ValueError:
+        # Versiya hali yaratilmagan yoki muddati tugagan: keyingi o'qish yangi versiya bilan boshlanadi
+        pass
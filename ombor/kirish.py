@@ -0,0 +1,48 @@
+import functools
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+
+KIRISH_KESHI = 'kirish'  # CACHES dagi alias
+
+
+# === Kirish keshi ===
+# Har bir admin so'rovida AuthenticationMiddleware foydalanuvchini, OTPMiddleware esa OTP qurilmasini
+# bazadan o'qiydi. Ikkalasi kamdan-kam o'zgaradi: 'kirish' keshida saqlanadi va model saqlanganda
+# yoki o'chirilganda (commit'dan keyin) keshdan o'chiriladi (ombor.signals).
+# Ruxsatlar keshlanmaydi: guruh va ruxsat o'zgarishlari foydalanuvchi saqlanmasdan ham bo'ladi.
+
+def foydalanuvchi_kaliti(user_id):
+    return f'foydalanuvchi:{user_id}'
+
+
+def qurilma_kaliti(persistent_id):
+    return f'otp-qurilma:{persistent_id}'
+
+
+def keshdan_olish(kalit, olish):
+    """Keshdagi qiymat; yo'q bo'lsa `olish()` natijasi keshga yoziladi (None keshlanmaydi)."""
+    if not settings.KIRISH_KESHI_YOQILGAN:
+        return olish()
+    kesh = caches[KIRISH_KESHI]
+    qiymat = kesh.get(kalit)
+    if qiymat is None:
+        qiymat = olish()
+        if qiymat is not None:
+            kesh.set(kalit, qiymat)
+    return qiymat
+
+
+def keshdan_ochirish(kalit):
+    # Commit'dan oldin o'chirilsa, parallel so'rov eski qatorni qayta keshga yozib qo'yishi mumkin
+    transaction.on_commit(lambda: caches[KIRISH_KESHI].delete(kalit))
+
+
+class KeshlanganModelBackend(ModelBackend):
+    """ModelBackend; sessiyadagi foydalanuvchi har so'rovda bazadan emas, kirish keshidan olinadi."""
+
+    def get_user(self, user_id):
+        # Faol bo'lmagan foydalanuvchi uchun ModelBackend None qaytaradi va u keshlanmaydi
+        return keshdan_olish(foydalanuvchi_kaliti(user_id), functools.partial(super().get_user, user_id))
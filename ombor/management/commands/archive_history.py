@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ombor.arxiv import PARTIYA_HAJMI, arxiv_chegarasi, tarixni_arxivlash
+from ombor.benchmarking import Sekundomer
+from ombor.models import MahsulotBalansTarix, MahsulotBalansTarixArxiv
+
+
+class Command(BaseCommand):
+    help = ("Eski mahsulot balans tarixini arxiv jadvaliga ko'chiradi. Har bir mahsulotning chegaradan "
+            "oldingi oxirgi yozuvi qoldiq sifatida asosiy jadvalda qoladi. Kuniga bir marta (cron) ishga tushiriladi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kunlar', type=int, default=settings.TARIX_ARXIV_KUNLARI,
+                            help="Shuncha kundan eski yozuvlar arxivlanadi (standart TARIX_ARXIV_KUNLARI)")
+        parser.add_argument('--partiya', type=int, default=PARTIYA_HAJMI,
+                            help="Bitta tranzaksiyada ko'chiriladigan ID oralig'i kengligi")
+
+    def handle(self, *args, **options):
+        if options['kunlar'] <= 0:
+            raise CommandError("--kunlar musbat bo'lishi kerak.")
+        chegara = arxiv_chegarasi(options['kunlar'])
+        with Sekundomer() as sekundomer:
+            kochirildi = tarixni_arxivlash(chegara, options['partiya'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{chegara:%Y-%m-%d} dan oldingi {kochirildi} ta yozuv arxivlandi ({sekundomer.soniya:.2f} s). "
+            f"Asosiy jadvalda {MahsulotBalansTarix.objects.count()} ta, "
+            f"arxivda {MahsulotBalansTarixArxiv.objects.count()} ta yozuv."))
@@ -0,0 +1,64 @@
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django_otp import DEVICE_ID_SESSION_KEY
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from ombor.benchmarking import Sekundomer, harfli_nom, vaqtinchalik_baza
+from ombor.models import CustomUser, KirdiChiqdi, Mahsulot, OlchovBirligi
+
+
+def _mijoz(foydalanuvchi):
+    """OTP orqali tasdiqlangan sessiyali test mijozi (butun middleware zanjiri ishlaydi)."""
+    mijoz = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+    mijoz.force_login(foydalanuvchi)
+    qurilma = TOTPDevice.objects.create(user=foydalanuvchi, name="bench")
+    sessiya = mijoz.session
+    sessiya[DEVICE_ID_SESSION_KEY] = qurilma.persistent_id
+    sessiya.save()
+    return mijoz
+
+
+class Command(BaseCommand):
+    help = ("Joriy balanslarni admin ro'yxati (HTML) va JSON API orqali o'qishni solishtiradi: "
+            "sekundiga so'rovlar soni va javob hajmi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sorovlar', type=int, default=200, help="Har bir holat uchun so'rovlar soni")
+        parser.add_argument('--mahsulotlar', type=int, default=200, help="Mahsulotlar soni")
+
+    def handle(self, *args, **options):
+        with vaqtinchalik_baza():
+            birlik = OlchovBirligi.objects.create(olchov_birligi="Dona")
+            tasodif = random.Random(1)
+            for i in range(options['mahsulotlar']):
+                mahsulot = Mahsulot.objects.create(mahsulot_nomi=harfli_nom("Mahsulot", i), olchov_birligi=birlik)
+                KirdiChiqdi(mahsulot_nomi=mahsulot, miqdor=tasodif.randint(1, 500), amaliyot_turi="Kirdi").save()
+            admin = CustomUser.objects.create_superuser("bench", "bench@example.com", "bench")
+            mijoz = _mijoz(admin)
+            # Admin ro'yxati sahifada 20 ta balans ko'rsatadi; API barcha balanslarni bitta javobda beradi
+            holatlar = [
+                # (nomi, yo'l, har bir so'rovdan oldin kesh tozalansinmi, If-None-Match yuborilsinmi)
+                ("Admin ro'yxati (HTML)", '/admin/ombor/mahsulotbalans/', False, False),
+                ("API, kesh bo'sh", '/api/balanslar/', True, False),
+                ("API, keshdan", '/api/balanslar/', False, False),
+                ("API, If-None-Match (304)", '/api/balanslar/', False, True),
+            ]
+            for nom, yol, keshsiz, shartli in holatlar:
+                sarlavhalar = {'HTTP_IF_NONE_MATCH': mijoz.get(yol)['ETag']} if shartli else {}
+                hajm = 0
+                holat = None
+                with Sekundomer() as sekundomer:
+                    for _ in range(options['sorovlar']):
+                        if keshsiz:
+                            cache.clear()
+                        javob = mijoz.get(yol, **sarlavhalar)
+                        holat = javob.status_code
+                        hajm = len(javob.content)
+                tezlik = options['sorovlar'] / sekundomer.soniya
+                self.stdout.write(f"{nom}: {tezlik:.0f} so'rov/s, "
+                                  f"{sekundomer.soniya / options['sorovlar'] * 1000:.1f} ms/so'rov, "
+                                  f"HTTP {holat}, {hajm} bayt")
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django_otp import DEVICE_ID_SESSION_KEY
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from ombor.benchmarking import Sekundomer, harfli_nom, vaqtinchalik_baza
+from ombor.kirish import KIRISH_KESHI
+from ombor.models import CustomUser, Mahsulot, OlchovBirligi
+
+# (nomi, sozlamalar). Birinchisi — Django'ning o'z bazadagi sessiyalari, keshsiz (oldingi holat)
+HOLATLAR = [
+    ("db, keshsiz (oldin)", {'SESSION_ENGINE': 'django.contrib.sessions.backends.db', 'KIRISH_KESHI_YOQILGAN': False}),
+    ("db + kirish keshi", {'SESSION_ENGINE': 'ombor.sessiyalar.db'}),
+    ("cached_db + kirish keshi", {'SESSION_ENGINE': 'ombor.sessiyalar.cached_db'}),
+    ("signed_cookies + kirish keshi", {'SESSION_ENGINE': 'django.contrib.sessions.backends.signed_cookies'}),
+    ("db, uzaytirish, har so'rovda yozish (oldin)",
+     {'SESSION_ENGINE': 'django.contrib.sessions.backends.db', 'KIRISH_KESHI_YOQILGAN': False,
+      'SESSION_SAVE_EVERY_REQUEST': True}),
+    ("db, uzaytirish + SESSIYA_YOZISH_ORALIGI",
+     {'SESSION_ENGINE': 'ombor.sessiyalar.db', 'SESSION_SAVE_EVERY_REQUEST': True}),
+]
+
+
+def _turi(sql):
+    if '"django_session"' in sql:
+        return "sessiya o'qish" if sql.startswith('SELECT') else "sessiya yozish"
+    if 'FROM "ombor_customuser"' in sql:
+        return "foydalanuvchi"
+    if '"otp_' in sql:
+        return "OTP qurilma"
+    if sql in ('BEGIN', 'COMMIT'):
+        return "tranzaksiya"  # sessiyani saqlash atomic() ichida
+    return "boshqa"
+
+
+class Command(BaseCommand):
+    help = ("Autentifikatsiyalangan admin ro'yxati uchun har bir so'rovdagi SQL so'rovlarini sessiya "
+            "rejimlari va kirish keshi bilan/siz solishtiradi: sessiya, foydalanuvchi, OTP qurilmasi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sorovlar', type=int, default=200, help="Har bir holat uchun so'rovlar soni")
+        parser.add_argument('--yol', default='/admin/ombor/mahsulot/', help="O'lchanadigan sahifa")
+
+    def handle(self, *args, **options):
+        soni = options['sorovlar']
+        with vaqtinchalik_baza():
+            birlik = OlchovBirligi.objects.create(olchov_birligi="Dona")
+            for i in range(100):
+                Mahsulot.objects.create(mahsulot_nomi=harfli_nom("Mahsulot", i), olchov_birligi=birlik)
+            admin = CustomUser.objects.create_superuser("bench", "bench@example.com", "bench")
+            qurilma = TOTPDevice.objects.create(user=admin, name="bench")
+
+            for nomi, sozlamalar in HOLATLAR:
+                with override_settings(**sozlamalar):
+                    caches[KIRISH_KESHI].clear()
+                    # Yangi mijoz: SessionMiddleware dvigatelni zanjir qurilganda o'qiydi
+                    mijoz = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+                    mijoz.force_login(admin)
+                    sessiya = mijoz.session
+                    sessiya[DEVICE_ID_SESSION_KEY] = qurilma.persistent_id
+                    sessiya.save()
+                    # signed_cookies da sessiya kaliti — ma'lumotning o'zi, saqlangach o'zgaradi
+                    mijoz.cookies[settings.SESSION_COOKIE_NAME] = sessiya.session_key
+                    holat = mijoz.get(options['yol']).status_code  # qizdirish: keshlar to'ladi
+
+                    with CaptureQueriesContext(connection) as sorovlar, Sekundomer() as sekundomer:
+                        for _ in range(soni):
+                            mijoz.get(options['yol'])
+                turlari = {}
+                for sorov in sorovlar.captured_queries:
+                    turi = _turi(sorov['sql'])
+                    turlari[turi] = turlari.get(turi, 0) + 1
+                tafsilot = ', '.join(f"{turi} {turlari.get(turi, 0) / soni:.2f}" for turi in
+                                     ("sessiya o'qish", "sessiya yozish", "tranzaksiya", "foydalanuvchi",
+                                                  "OTP qurilma", "boshqa"))
+                self.stdout.write(
+                    f"{nomi}: HTTP {holat}, {len(sorovlar.captured_queries) / soni:.2f} so'rov/sahifa ({tafsilot}), "
+                    f"{sekundomer.soniya / soni * 1000:.1f} ms/sahifa")
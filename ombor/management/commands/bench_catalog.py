@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from ombor.benchmarking import Sekundomer, SorovHisoblagich, harfli_nom, vaqtinchalik_baza
+from ombor.katalog import katalogni_yuklash
+from ombor.models import Mahsulot, OlchovBirligi
+
+BIRLIKLAR = ("Dona", "Kg", "Litr", "Metr", "Quti")
+
+
+class Command(BaseCommand):
+    help = "Katalogni ommaviy yuklash va Mahsulot.save() orqali bittalab saqlash tezligini taqqoslaydi (qator/s)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--qatorlar', type=int, default=20_000, help="Katalogdagi mahsulotlar soni")
+        parser.add_argument('--takrorlar', type=int, default=200,
+                            help="Katalogga qo'shiladigan, bazada allaqachon bor mahsulotlar soni")
+
+    def handle(self, *args, **options):
+        soni = options['qatorlar']
+        qatorlar = [{'mahsulot_nomi': harfli_nom("Mahsulot", i), 'olchov_birligi': BIRLIKLAR[i % len(BIRLIKLAR)]}
+                    for i in range(soni)]
+        with vaqtinchalik_baza():
+            birliklar = {nom: OlchovBirligi.objects.create(olchov_birligi=nom) for nom in BIRLIKLAR}
+
+            # Joriy yo'l: har bir mahsulot clean() tekshiruvlari va alohida INSERT bilan
+            with SorovHisoblagich() as bittalab_sorovlar, Sekundomer() as bittalab:
+                for qator in qatorlar:
+                    Mahsulot.objects.create(mahsulot_nomi=qator['mahsulot_nomi'],
+                                            olchov_birligi=birliklar[qator['olchov_birligi']])
+            Mahsulot.objects.all().delete()
+
+            # Bazada bor mahsulotlar katalogda takrorlanadi: ular xato sifatida qaytishi kerak
+            for qator in qatorlar[:options['takrorlar']]:
+                Mahsulot.objects.create(mahsulot_nomi=qator['mahsulot_nomi'].upper(),
+                                        olchov_birligi=birliklar[qator['olchov_birligi']])
+            with SorovHisoblagich() as ommaviy_sorovlar, Sekundomer() as ommaviy:
+                saqlandi, xatolar = katalogni_yuklash(qatorlar)
+            if saqlandi + len(xatolar) != soni or len(xatolar) != min(options['takrorlar'], soni):
+                raise AssertionError(f"Kutilmagan natija: {saqlandi} saqlandi, {len(xatolar)} xato")
+
+        self.stdout.write(f"Qatorlar: {soni} ({len(xatolar)} tasi bazadagi mahsulot takrori)")
+        self.stdout.write(f"Bittalab (Mahsulot.save): {bittalab.soniya:.2f} s, "
+                          f"{soni / bittalab.soniya:.0f} qator/s, {bittalab_sorovlar.soni} so'rov")
+        self.stdout.write(f"Ommaviy yuklash:          {ommaviy.soniya:.2f} s, "
+                          f"{soni / ommaviy.soniya:.0f} qator/s, {ommaviy_sorovlar.soni} so'rov")
+        self.stdout.write(self.style.SUCCESS(f"Tezlanish: {bittalab.soniya / ommaviy.soniya:.1f}x"))
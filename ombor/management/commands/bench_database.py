@@ -0,0 +1,106 @@
+import multiprocessing
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection, connections
+from django.test.utils import override_settings
+
+from ombor.benchmarking import harfli_nom, persentil, vaqtinchalik_baza
+from ombor.models import KirdiChiqdi, Mahsulot, MahsulotBalans, MahsulotBalansTarix, OlchovBirligi
+
+
+def _ishchi(turi, mahsulot_idlari, soniya, urug):
+    """
+    `soniya` davomida yozadi (KirdiChiqdi.save) yoki o'qiydi (balanslar va tarix sahifasi).
+
+    Har bir amaldan keyin so'rov oxiridagi kabi close_old_connections() chaqiriladi:
+    CONN_MAX_AGE=0 bo'lsa ulanish yopiladi va keyingi amal yangisini ochadi.
+    (bajarilganlar, xatolar, kechikishlar ro'yxati) qaytaradi.
+    """
+    tasodif = random.Random(urug)
+    kechikishlar = []
+    xatolar = 0
+    tugash = time.monotonic() + soniya
+    while time.monotonic() < tugash:
+        mahsulot_id = tasodif.choice(mahsulot_idlari)
+        boshlanish = time.perf_counter()
+        try:
+            if turi == 'yozish':
+                amaliyot_turi = "Kirdi" if tasodif.random() < 0.6 else "Chiqdi"
+                KirdiChiqdi(mahsulot_nomi_id=mahsulot_id, miqdor=tasodif.randint(1, 20),
+                            amaliyot_turi=amaliyot_turi).save()
+            else:
+                list(MahsulotBalans.objects.select_related('mahsulot_nomi').order_by('-id')[:20])
+                list(MahsulotBalansTarix.objects.filter(mahsulot_nomi_id=mahsulot_id).order_by('-id')[:20])
+        except ValidationError:
+            pass  # Qoldiq yetarli emas: rad etilgan chiqim ham to'liq tranzaksiya
+        except OperationalError:
+            xatolar += 1
+            continue
+        finally:
+            close_old_connections()
+        kechikishlar.append(time.perf_counter() - boshlanish)
+    connections.close_all()
+    return turi, xatolar, kechikishlar
+
+
+class Command(BaseCommand):
+    help = ("Parallel yozuvchi va o'quvchi jarayonlar bilan baza profillarini solishtiradi: "
+            "SQLite uchun standart sozlamalar va WAL/PRAGMA + doimiy ulanishlar, PostgreSQL uchun "
+            "har so'rovda yangi ulanish va doimiy ulanishlar.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--yozuvchilar', type=int, default=2, help="Yozuvchi jarayonlar soni")
+        parser.add_argument('--oquvchilar', type=int, default=4, help="O'quvchi jarayonlar soni")
+        parser.add_argument('--soniya', type=float, default=10, help="Har bir profil uchun o'lchash vaqti")
+        parser.add_argument('--mahsulotlar', type=int, default=50, help="Mahsulotlar soni")
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            profillar = [
+                ("SQLite standart (rollback jurnal, har so'rovda ulanish)", {}, 0),
+                ("SQLite sozlangan (WAL, PRAGMA, doimiy ulanish)", settings.SQLITE_PRAGMALAR,
+                 settings.DB_CONN_MAX_AGE),
+            ]
+        else:
+            profillar = [
+                (f"{connection.vendor}, har so'rovda ulanish", {}, 0),
+                (f"{connection.vendor}, doimiy ulanish", {}, settings.DB_CONN_MAX_AGE),
+            ]
+        for nom, pragmalar, conn_max_age in profillar:
+            with override_settings(SQLITE_PRAGMALAR=pragmalar):
+                self.stdout.write(nom)
+                self._olchash(conn_max_age, options)
+
+    def _olchash(self, conn_max_age, options):
+        # Har bir profil yangi bazada: journal_mode fayl bilan birga saqlanib qoladi
+        with vaqtinchalik_baza():
+            birlik = OlchovBirligi.objects.create(olchov_birligi="Dona")
+            mahsulot_idlari = []
+            for i in range(options['mahsulotlar']):
+                mahsulot = Mahsulot.objects.create(mahsulot_nomi=harfli_nom("Mahsulot", i), olchov_birligi=birlik)
+                KirdiChiqdi(mahsulot_nomi=mahsulot, miqdor=1000, amaliyot_turi="Kirdi").save()
+                mahsulot_idlari.append(mahsulot.id)
+            connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+            # Fork qilingan jarayonlar ota jarayonning ulanishini meros qilib olmasligi kerak
+            connections.close_all()
+
+            vazifalar = ([('yozish', mahsulot_idlari, options['soniya'], i) for i in range(options['yozuvchilar'])]
+                         + [('oqish', mahsulot_idlari, options['soniya'], 100 + i)
+                            for i in range(options['oquvchilar'])])
+            kontekst = multiprocessing.get_context('fork')
+            with kontekst.Pool(len(vazifalar)) as pool:
+                natijalar = pool.starmap(_ishchi, vazifalar)
+            connection.settings_dict['CONN_MAX_AGE'] = settings.DB_CONN_MAX_AGE
+
+        for turi, nomi in (('yozish', "yozish"), ('oqish', "o'qish")):
+            kechikishlar = [k for t, _, ks in natijalar if t == turi for k in ks]
+            xatolar = sum(x for t, x, _ in natijalar if t == turi)
+            self.stdout.write(
+                f"  {nomi}: {len(kechikishlar) / options['soniya']:.0f} amal/s, "
+                f"p50 {persentil(kechikishlar, 0.5) * 1000:.1f} ms, "
+                f"p95 {persentil(kechikishlar, 0.95) * 1000:.1f} ms, "
+                f"xatolar (database is locked): {xatolar}")
@@ -0,0 +1,43 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ombor.benchmarking import eksportni_olchash, harfli_nom, vaqtinchalik_baza
+from ombor.models import Mahsulot, MahsulotBalansTarix, OlchovBirligi
+
+
+class Command(BaseCommand):
+    help = "MahsulotBalansTarix eksportlari (PDF va Excel) uchun birinchi bayt va umumiy vaqtni o'lchaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--qatorlar', type=int, default=100_000, help="Tarix qatorlari soni")
+        parser.add_argument('--mahsulotlar', type=int, default=100, help="Mahsulotlar soni")
+        parser.add_argument('--xotira', action='store_true', help="Xotira cho'qqisini ham o'lchash (sekinroq)")
+
+    def handle(self, *args, **options):
+        with vaqtinchalik_baza():
+            birlik = OlchovBirligi.objects.create(olchov_birligi="Dona")
+            mahsulotlar = [
+                Mahsulot.objects.create(mahsulot_nomi=harfli_nom("Mahsulot", i), olchov_birligi=birlik)
+                for i in range(options['mahsulotlar'])
+            ]
+            tasodif = random.Random(1)
+            hozir = timezone.now()
+            MahsulotBalansTarix.objects.bulk_create(
+                (MahsulotBalansTarix(mahsulot_nomi=tasodif.choice(mahsulotlar), miqdor=tasodif.randint(1, 50),
+                                     qoldiq=tasodif.randint(0, 500), sana=hozir - timedelta(minutes=i),
+                                     amaliyot_turi=tasodif.choice(("Kirdi", "Chiqdi")))
+                 for i in range(options['qatorlar'])),
+                batch_size=5000,
+            )
+
+            queryset = MahsulotBalansTarix.objects.all()
+            for nom, formati in (('PDF', 'pdf'), ('Excel', 'excel')):
+                natija = eksportni_olchash(formati, MahsulotBalansTarix, queryset, options['xotira'])
+                qator = (f"{nom}: {options['qatorlar']} qator, birinchi bayt {natija['birinchi_bayt']:.2f} s, "
+                         f"umumiy {natija['umumiy']:.2f} s, {natija['hajm'] / 1024 / 1024:.1f} MB")
+                if natija['xotira_choqqisi'] is not None:
+                    qator += f", xotira cho'qqisi {natija['xotira_choqqisi'] / 1024 / 1024:.1f} MB"
+                self.stdout.write(qator)
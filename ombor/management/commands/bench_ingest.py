@@ -0,0 +1,65 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ombor.benchmarking import Sekundomer, SorovHisoblagich, harfli_nom, vaqtinchalik_baza
+from ombor.ingest import harakatlarni_joylash
+from ombor.models import KirdiChiqdi, KirdiChiqdiForm, Mahsulot, MahsulotBalans, MahsulotBalansTarix, OlchovBirligi
+
+
+def _qatorlar(mahsulot_nomlari, soni, urug):
+    """Hech qachon manfiy qoldiq bermaydigan tasodifiy kirim-chiqim qatorlari."""
+    tasodif = random.Random(urug)
+    qoldiqlar = dict.fromkeys(mahsulot_nomlari, 0)
+    boshlanish = timezone.now() - timedelta(hours=8)
+    qatorlar = []
+    for i in range(soni):
+        nom = tasodif.choice(mahsulot_nomlari)
+        miqdor = tasodif.randint(1, 20)
+        amaliyot_turi = "Chiqdi" if qoldiqlar[nom] >= miqdor and tasodif.random() < 0.45 else "Kirdi"
+        qoldiqlar[nom] += miqdor if amaliyot_turi == "Kirdi" else -miqdor
+        qatorlar.append({'mahsulot_nomi': nom, 'miqdor': miqdor, 'amaliyot_turi': amaliyot_turi,
+                         'sana': (boshlanish + timedelta(seconds=i)).isoformat()})
+    return qatorlar
+
+
+class Command(BaseCommand):
+    help = "Ommaviy yuklash va admin formasi orqali bittalab saqlash tezligini taqqoslaydi (qator/s)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--qatorlar', type=int, default=5000, help="Partiyadagi qatorlar soni")
+        parser.add_argument('--mahsulotlar', type=int, default=50, help="Mahsulotlar soni")
+
+    def handle(self, *args, **options):
+        with vaqtinchalik_baza():
+            birlik = OlchovBirligi.objects.create(olchov_birligi="Dona")
+            nomlar = [
+                Mahsulot.objects.create(mahsulot_nomi=harfli_nom("Mahsulot", i), olchov_birligi=birlik).mahsulot_nomi
+                for i in range(options['mahsulotlar'])
+            ]
+            idlar = dict(Mahsulot.objects.values_list('mahsulot_nomi', 'id'))
+            qatorlar = _qatorlar(nomlar, options['qatorlar'], 1)
+
+            # Joriy yo'l: har bir qator KirdiChiqdiForm tekshiruvi va KirdiChiqdi.save() orqali
+            with SorovHisoblagich() as bittalab_sorovlar, Sekundomer() as bittalab:
+                for qator in qatorlar:
+                    forma = KirdiChiqdiForm(data={**qator, 'mahsulot_nomi': idlar[qator['mahsulot_nomi']]})
+                    if not forma.is_valid():
+                        raise AssertionError(forma.errors)
+                    forma.save()
+
+            for model in (KirdiChiqdi, MahsulotBalansTarix, MahsulotBalans):
+                model.objects.all().delete()
+
+            with SorovHisoblagich() as ommaviy_sorovlar, Sekundomer() as ommaviy:
+                harakatlarni_joylash(qatorlar)
+
+        soni = len(qatorlar)
+        self.stdout.write(f"Qatorlar: {soni}")
+        self.stdout.write(f"Bittalab (forma + save): {bittalab.soniya:.2f} s, "
+                          f"{soni / bittalab.soniya:.0f} qator/s, {bittalab_sorovlar.soni} so'rov")
+        self.stdout.write(f"Ommaviy yuklash:        {ommaviy.soniya:.2f} s, "
+                          f"{soni / ommaviy.soniya:.0f} qator/s, {ommaviy_sorovlar.soni} so'rov")
+        self.stdout.write(self.style.SUCCESS(f"Tezlanish: {bittalab.soniya / ommaviy.soniya:.1f}x"))
@@ -0,0 +1,94 @@
+import random
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django_otp import DEVICE_ID_SESSION_KEY
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from ombor.benchmarking import Sekundomer, harfli_nom, vaqtinchalik_baza
+from ombor.models import CustomUser, KamQoldiq, KirdiChiqdi, Mahsulot, MahsulotBalans, OlchovBirligi
+from ombor.normallash import nomni_normallash
+
+CHEGARA = 20  # O'lchov birligining standart minimal qoldig'i
+
+
+def _kam_qoldiq_sorovi(sql):
+    return '"ombor_kamqoldiq"' in sql or 'standart_minimal_qoldiq' in sql
+
+
+class Command(BaseCommand):
+    help = ("Kam qoldiqlar jadvalini o'lchaydi: posting boshiga qo'shimcha so'rovlar va admin bosh sahifasi "
+            "mahsulotlar soniga bog'liq emasligi, barcha balanslarni ko'rib chiqish bilan solishtirib.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mahsulotlar', default='1000,10000,100000', help="Mahsulotlar soni, vergul bilan")
+        parser.add_argument('--postinglar', type=int, default=300, help="Har bir o'lchamda postinglar soni")
+        parser.add_argument('--sorovlar', type=int, default=50, help="Bosh sahifa so'rovlari soni")
+
+    def handle(self, *args, **options):
+        for soni in [int(i) for i in options['mahsulotlar'].split(',')]:
+            with vaqtinchalik_baza():
+                self._olchash(soni, options['postinglar'], options['sorovlar'])
+
+    def _olchash(self, soni, postinglar, sorovlar):
+        tasodif = random.Random(1)
+        birlik = OlchovBirligi.objects.create(olchov_birligi="Dona", standart_minimal_qoldiq=CHEGARA)
+        nomlar = [harfli_nom("Mahsulot", i) for i in range(soni)]
+        Mahsulot.objects.bulk_create([Mahsulot(mahsulot_nomi=nom, qidiruv_nomi=nomni_normallash(nom),
+                                               olchov_birligi=birlik) for nom in nomlar], batch_size=1000)
+        mahsulot_idlari = list(Mahsulot.objects.values_list('id', flat=True))
+        MahsulotBalans.objects.bulk_create([MahsulotBalans(mahsulot_nomi_id=i, qoldiq=tasodif.randint(0, 200))
+                                            for i in mahsulot_idlari], batch_size=1000)
+        with Sekundomer() as qayta:
+            KamQoldiq.qayta_hisoblash(mahsulot_idlari)
+        self.stdout.write(f"{soni} mahsulot: qayta hisoblash {qayta.soniya:.2f} s, "
+                          f"kam qoldiqda {KamQoldiq.objects.count()} ta")
+
+        with CaptureQueriesContext(connection) as sorovlar_, Sekundomer() as sekundomer:
+            for _ in range(postinglar):
+                mahsulot_id = tasodif.choice(mahsulot_idlari)
+                miqdor = tasodif.randint(1, 30)
+                amaliyot_turi = "Kirdi" if tasodif.random() < 0.5 else "Chiqdi"
+                try:
+                    KirdiChiqdi(mahsulot_nomi_id=mahsulot_id, miqdor=miqdor, amaliyot_turi=amaliyot_turi).save()
+                except ValidationError:  # Qoldiq yetarli emas: posting bekor qilinadi
+                    pass
+        kam_qoldiq = sum(_kam_qoldiq_sorovi(sorov['sql']) for sorov in sorovlar_.captured_queries)
+        self.stdout.write(f"  posting: {len(sorovlar_.captured_queries) / postinglar:.2f} so'rov "
+                          f"(kam qoldiq {kam_qoldiq / postinglar:.2f}), "
+                          f"{sekundomer.soniya / postinglar * 1000:.2f} ms")
+
+        mijoz = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        admin = CustomUser.objects.create_superuser("bench", "bench@example.com", "bench")
+        mijoz.force_login(admin)
+        sessiya = mijoz.session
+        sessiya[DEVICE_ID_SESSION_KEY] = TOTPDevice.objects.create(user=admin, name="bench").persistent_id
+        sessiya.save()
+        mijoz.get('/admin/')
+        with CaptureQueriesContext(connection) as sorovlar_, Sekundomer() as sekundomer:
+            for _ in range(sorovlar):
+                holat = mijoz.get('/admin/').status_code
+        kam_qoldiq = sum(_kam_qoldiq_sorovi(sorov['sql']) for sorov in sorovlar_.captured_queries)
+        self.stdout.write(f"  bosh sahifa: HTTP {holat}, {len(sorovlar_.captured_queries) / sorovlar:.2f} so'rov "
+                          f"(kam qoldiq {kam_qoldiq / sorovlar:.2f}), {sekundomer.soniya / sorovlar * 1000:.1f} ms")
+
+        # Taqqoslash: jadvalsiz vidjet har safar barcha balanslarni chegarasi bilan solishtirardi
+        kamlar = (MahsulotBalans.objects.annotate(
+            chegara=Coalesce('mahsulot_nomi__minimal_qoldiq', 'mahsulot_nomi__olchov_birligi__standart_minimal_qoldiq'))
+            .filter(qoldiq__lte=F('chegara')))
+        with Sekundomer() as sekundomer:
+            for _ in range(sorovlar):
+                kamlar.count()
+                list(kamlar.select_related('mahsulot_nomi').order_by('qoldiq')[:10])
+        with Sekundomer() as jadval:
+            for _ in range(sorovlar):
+                KamQoldiq.objects.count()
+                list(KamQoldiq.objects.select_related('mahsulot_nomi').order_by('qoldiq', '-chegara', 'id')[:10])
+        self.stdout.write(f"  vidjet ma'lumoti: KamQoldiq {jadval.soniya / sorovlar * 1000:.2f} ms, "
+                          f"barcha balanslar bo'yicha {sekundomer.soniya / sorovlar * 1000:.2f} ms")
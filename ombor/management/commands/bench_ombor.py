@@ -0,0 +1,176 @@
+import json
+import random
+import statistics
+import subprocess
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from ombor.benchmarking import (Sekundomer, SorovHisoblagich, admin_sorovi, eksportni_olchash, persentil,
+                                vaqtinchalik_baza)
+from ombor.models import (CustomUser, HarakatYigindisi, KirdiChiqdi, Mahsulot, MahsulotBalans,
+                          MahsulotBalansTarix, OlchovBirligi)
+from ombor.sintetik import sintetik_ombor
+
+
+def _versiya():
+    """Joriy commit (o'zgartirilgan fayllar bo'lsa `-dirty` bilan); git bo'lmasa None."""
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ms(soniya):
+    return round(soniya * 1000, 2)
+
+
+class Command(BaseCommand):
+    help = ("Vaqtinchalik bazani seed_ombor ma'lumotlari bilan to'ldirib, posting kechikishi, har bir ombor "
+            "admin changelist render vaqti, filtr/qidiruv kechikishi va Excel/PDF eksport vaqti hamda xotirasini "
+            "o'lchaydi. Natija commitlar orasida solishtirish uchun JSON hisobot sifatida yoziladi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--birliklar', type=int, default=5, help="O'lchov birliklari soni")
+        parser.add_argument('--mahsulotlar', type=int, default=200, help="Mahsulotlar soni")
+        parser.add_argument('--harakatlar', type=int, default=50_000, help="Kirim-chiqimlar soni")
+        parser.add_argument('--kunlar', type=int, default=365, help="Harakatlar oxirgi necha kunga tarqatiladi")
+        parser.add_argument('--urug', type=int, default=1, help="Tasodifiy sonlar urug'i")
+        parser.add_argument('--takror', type=int, default=5,
+                            help="Har bir changelist necha marta o'lchanadi (mediana olinadi)")
+        parser.add_argument('--postinglar', type=int, default=300, help="O'lchanadigan KirdiChiqdi.save() soni")
+        parser.add_argument('--eksport-qatorlar', type=int, default=10_000,
+                            help="Eksport qilinadigan oxirgi tarix qatorlari soni")
+        parser.add_argument('--chiqish', help="JSON hisobot yoziladigan fayl (ko'rsatilmasa stdout)")
+
+    def _changelist(self, foydalanuvchi, model, sorov_qatori, takror):
+        """Changelistni bir marta qizdirib, `takror` marta o'lchaydi."""
+        model_admin = admin.site._registry[model]
+        yol = f'/admin/{model._meta.app_label}/{model._meta.model_name}/'
+        model_admin.changelist_view(admin_sorovi(foydalanuvchi, yol, sorov_qatori)).render()
+        vaqtlar = []
+        for _ in range(takror):
+            with SorovHisoblagich() as hisoblagich, Sekundomer() as sekundomer:
+                response = model_admin.changelist_view(admin_sorovi(foydalanuvchi, yol, sorov_qatori))
+                if hasattr(response, 'render'):
+                    response.render()
+            vaqtlar.append(sekundomer.soniya)
+        natija = {'mediana_ms': _ms(statistics.median(vaqtlar)), 'min_ms': _ms(min(vaqtlar)),
+                  'sorovlar': hisoblagich.soni, 'status': response.status_code}
+        if response.status_code != 200:
+            # Noto'g'ri filtr parametrida admin ?e=1 ga yo'naltiradi — o'lchov ma'nosiz
+            self.stderr.write(self.style.WARNING(f"{model.__name__} ?{sorov_qatori}: status {response.status_code}"))
+        return natija
+
+    def _filtrlar(self):
+        """(model, sorov qatori) ssenariylari — qiymatlar seed ma'lumotlaridan olinadi."""
+        mahsulot = Mahsulot.objects.order_by('id').values_list('mahsulot_nomi', flat=True).first()
+        birlik_id = OlchovBirligi.objects.order_by('id').values_list('id', flat=True).first()
+        bugun = timezone.localdate()
+        hafta_oldin = bugun - timedelta(days=7)
+        oy_oldin = bugun - timedelta(days=30)
+        orta = timezone.localtime() - timedelta(days=180)
+        return [
+            (KirdiChiqdi, f'q={mahsulot}'),
+            (KirdiChiqdi, 'amaliyot_turi__exact=Chiqdi'),
+            (KirdiChiqdi, f'sana__gte={hafta_oldin.isoformat()}'),
+            (KirdiChiqdi, f'sana__year={orta.year}&sana__month={orta.month}'),
+            (MahsulotBalansTarix, f'q={mahsulot}'),
+            (MahsulotBalansTarix, f'sana__range__gte_0={oy_oldin.isoformat()}&sana__range__gte_1=00:00:00'
+                                  f'&sana__range__lte_0={bugun.isoformat()}&sana__range__lte_1=23:59:59'),
+            (MahsulotBalans, f'q={mahsulot}'),
+            (MahsulotBalans, f'olchov_birligi={birlik_id}'),
+            (Mahsulot, f'q={mahsulot}'),
+            (HarakatYigindisi, 'davr_turi__exact=oy'),
+            (HarakatYigindisi, f'davr_turi__exact=kun&davr__range__gte={oy_oldin.isoformat()}'
+                               f'&davr__range__lte={bugun.isoformat()}'),
+        ]
+
+    def _postinglar(self, soni, urug):
+        """Bittalab KirdiChiqdi.save() kechikishlari (rad etilgan chiqimlar ham hisobga kiradi)."""
+        tasodif = random.Random(urug)
+        mahsulot_idlari = list(Mahsulot.objects.values_list('id', flat=True))
+        kechikishlar = []
+        rad_etilgan = 0
+        for _ in range(soni):
+            harakat = KirdiChiqdi(mahsulot_nomi_id=tasodif.choice(mahsulot_idlari), miqdor=tasodif.randint(1, 20),
+                                  amaliyot_turi="Kirdi" if tasodif.random() < 0.5 else "Chiqdi")
+            with Sekundomer() as sekundomer:
+                try:
+                    harakat.save()
+                except ValidationError:
+                    rad_etilgan += 1
+            kechikishlar.append(sekundomer.soniya)
+        return {'soni': soni, 'rad_etilgan': rad_etilgan, 'ortacha_ms': _ms(statistics.fmean(kechikishlar)),
+                'p50_ms': _ms(persentil(kechikishlar, 0.5)), 'p95_ms': _ms(persentil(kechikishlar, 0.95)),
+                'max_ms': _ms(max(kechikishlar))}
+
+    def handle(self, *args, **options):
+        hisobot = {
+            'versiya': _versiya(),
+            'sana': timezone.now().isoformat(timespec='seconds'),
+            'baza': connection.vendor,
+            'parametrlar': {nom: options[nom] for nom in ('birliklar', 'mahsulotlar', 'harakatlar', 'kunlar', 'urug',
+                                                          'takror', 'postinglar', 'eksport_qatorlar')},
+        }
+        with vaqtinchalik_baza():
+            with Sekundomer() as sekundomer:
+                sintetik_ombor(options['birliklar'], options['mahsulotlar'], options['harakatlar'],
+                               options['kunlar'], options['urug'])
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+            hisobot['seed'] = {'soniya': round(sekundomer.soniya, 2),
+                               'qator_s': round(options['harakatlar'] / sekundomer.soniya)}
+            hisobot['qatorlar'] = {model.__name__: model.objects.count() for model in (
+                OlchovBirligi, Mahsulot, MahsulotBalans, KirdiChiqdi, MahsulotBalansTarix, HarakatYigindisi)}
+            self.stdout.write(f"Seed: {options['harakatlar']} harakat, {sekundomer.soniya:.1f} s")
+
+            foydalanuvchi = CustomUser.objects.create_superuser('bench', 'bench@example.com', 'bench')
+            modellar = sorted((model for model in admin.site._registry if model._meta.app_label == 'ombor'),
+                              key=lambda model: model.__name__)
+            hisobot['changelistlar'] = {}
+            for model in modellar:
+                natija = self._changelist(foydalanuvchi, model, '', options['takror'])
+                hisobot['changelistlar'][model.__name__] = natija
+                self.stdout.write(f"Changelist {model.__name__}: {natija['mediana_ms']} ms, "
+                                  f"{natija['sorovlar']} so'rov")
+
+            hisobot['filtrlar'] = {}
+            for model, sorov_qatori in self._filtrlar():
+                natija = self._changelist(foydalanuvchi, model, sorov_qatori, options['takror'])
+                hisobot['filtrlar'][f'{model.__name__}?{sorov_qatori}'] = natija
+                self.stdout.write(f"Filtr {model.__name__}?{sorov_qatori}: {natija['mediana_ms']} ms")
+
+            chegara = (MahsulotBalansTarix.objects.order_by('-id')
+                       .values_list('id', flat=True)[options['eksport_qatorlar'] - 1:].first() or 0)
+            queryset = MahsulotBalansTarix.objects.filter(id__gte=chegara)
+            eksport_qatorlari = queryset.count()
+            hisobot['eksportlar'] = {}
+            for nom, formati in (('Excel', 'excel'), ('PDF', 'pdf')):
+                natija = eksportni_olchash(formati, MahsulotBalansTarix, queryset)
+                # tracemalloc vaqtni buzadi: xotira cho'qqisi alohida o'tishda o'lchanadi
+                xotira = eksportni_olchash(formati, MahsulotBalansTarix, queryset, xotira=True)['xotira_choqqisi']
+                hisobot['eksportlar'][nom] = {
+                    'qatorlar': eksport_qatorlari, 'birinchi_bayt_ms': _ms(natija['birinchi_bayt']),
+                    'umumiy_ms': _ms(natija['umumiy']), 'hajm_bayt': natija['hajm'], 'xotira_choqqisi_bayt': xotira,
+                }
+                self.stdout.write(f"Eksport {nom}: {eksport_qatorlari} qator, {natija['umumiy']:.2f} s, "
+                                  f"xotira cho'qqisi {xotira / 1024 / 1024:.1f} MB")
+
+            hisobot['posting'] = self._postinglar(options['postinglar'], options['urug'])
+            self.stdout.write(f"Posting: p50 {hisobot['posting']['p50_ms']} ms, p95 {hisobot['posting']['p95_ms']} ms")
+
+        matn = json.dumps(hisobot, indent=2, ensure_ascii=False)
+        if options['chiqish']:
+            with open(options['chiqish'], 'w', encoding='utf-8') as fayl:
+                fayl.write(matn + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Hisobot yozildi: {options['chiqish']}"))
+        else:
+            self.stdout.write(matn)
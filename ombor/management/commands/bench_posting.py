@@ -0,0 +1,87 @@
+import multiprocessing
+import random
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+
+from ombor.benchmarking import Sekundomer, harfli_nom, vaqtinchalik_baza
+from ombor.models import KirdiChiqdi, Mahsulot, MahsulotBalans, MahsulotBalansTarix, OlchovBirligi
+
+
+def _ishchi(mahsulot_idlari, soni, urug):
+    """Bitta jarayonda `soni` ta tasodifiy operatsiyani KirdiChiqdi.save() orqali o'tkazadi."""
+    tasodif = random.Random(urug)
+    qabul_qilingan = defaultdict(int)
+    rad_etilgan = 0
+    xatolar = 0
+    for _ in range(soni):
+        mahsulot_id = tasodif.choice(mahsulot_idlari)
+        miqdor = tasodif.randint(1, 20)
+        amaliyot_turi = "Kirdi" if tasodif.random() < 0.55 else "Chiqdi"
+        try:
+            KirdiChiqdi(mahsulot_nomi_id=mahsulot_id, miqdor=miqdor, amaliyot_turi=amaliyot_turi).save()
+        except ValidationError:
+            rad_etilgan += 1
+            continue
+        except OperationalError:
+            xatolar += 1
+            continue
+        qabul_qilingan[mahsulot_id] += miqdor if amaliyot_turi == "Kirdi" else -miqdor
+    connections.close_all()
+    return dict(qabul_qilingan), rad_etilgan, xatolar
+
+
+class Command(BaseCommand):
+    help = "Parallel jarayonlarda KirdiChiqdi postingini o'lchaydi va yakuniy balanslar to'g'riligini tekshiradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jarayonlar', type=int, default=4, help="Parallel jarayonlar soni")
+        parser.add_argument('--mahsulotlar', type=int, default=10, help="Mahsulotlar soni")
+        parser.add_argument('--operatsiyalar', type=int, default=500, help="Har bir jarayondagi operatsiyalar soni")
+
+    def handle(self, *args, **options):
+        jarayonlar = options['jarayonlar']
+        with vaqtinchalik_baza():
+            birlik = OlchovBirligi.objects.create(olchov_birligi="Dona")
+            mahsulot_idlari = [
+                Mahsulot.objects.create(mahsulot_nomi=harfli_nom("Mahsulot", i), olchov_birligi=birlik).id
+                for i in range(options['mahsulotlar'])
+            ]
+            # Fork qilingan jarayonlar ota jarayonning ulanishini meros qilib olmasligi kerak
+            connections.close_all()
+
+            kontekst = multiprocessing.get_context('fork')
+            vazifalar = [(mahsulot_idlari, options['operatsiyalar'], i) for i in range(jarayonlar)]
+            with Sekundomer() as sekundomer, kontekst.Pool(jarayonlar) as pool:
+                natijalar = pool.starmap(_ishchi, vazifalar)
+
+            kutilgan = defaultdict(int)
+            rad_etilgan = xatolar = 0
+            for qabul_qilingan, rad, xato in natijalar:
+                for mahsulot_id, farq in qabul_qilingan.items():
+                    kutilgan[mahsulot_id] += farq
+                rad_etilgan += rad
+                xatolar += xato
+
+            nomuvofiq = []
+            for mahsulot_id in mahsulot_idlari:
+                balans = MahsulotBalans.objects.filter(mahsulot_nomi_id=mahsulot_id).values_list('qoldiq', flat=True)
+                balans = balans.first() or 0
+                tarix = MahsulotBalansTarix.objects.filter(mahsulot_nomi_id=mahsulot_id).order_by('-id').first()
+                tarix_qoldiq = tarix.qoldiq if tarix else 0
+                if not balans == tarix_qoldiq == kutilgan[mahsulot_id]:
+                    nomuvofiq.append((mahsulot_id, kutilgan[mahsulot_id], balans, tarix_qoldiq))
+
+            bajarilgan = jarayonlar * options['operatsiyalar']
+            self.stdout.write(f"Jarayonlar: {jarayonlar}, operatsiyalar: {bajarilgan} "
+                              f"(rad etilgan: {rad_etilgan}, xatolar: {xatolar})")
+            self.stdout.write(f"Vaqt: {sekundomer.soniya:.2f} s, {bajarilgan / sekundomer.soniya:.0f} operatsiya/s")
+            if nomuvofiq:
+                for mahsulot_id, kutilgan_qoldiq, balans, tarix_qoldiq in nomuvofiq:
+                    self.stderr.write(f"Mahsulot #{mahsulot_id}: kutilgan {kutilgan_qoldiq}, "
+                                      f"balans {balans}, tarix {tarix_qoldiq}")
+                self.stderr.write(self.style.ERROR(f"{len(nomuvofiq)} ta mahsulot balansi noto'g'ri"))
+            else:
+                self.stdout.write(self.style.SUCCESS("Barcha yakuniy balanslar to'g'ri"))
@@ -0,0 +1,217 @@
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django_otp import DEVICE_ID_SESSION_KEY
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from ombor.benchmarking import harfli_nom, persentil, vaqtinchalik_baza
+from ombor.models import CustomUser, KirdiChiqdi, Mahsulot, OlchovBirligi
+
+SOROV_VAQTI_CHEGARASI = 30  # soniya; shundan uzoq kutilgan so'rov xato hisoblanadi
+SEKIN_MIJOZ_YOLI = '/api/balanslar/'  # barcha mahsulotlar: eng katta javob
+SEKIN_MIJOZ_BUFERI = 4096  # bayt; sekin mijoz har 0.1 s da shuncha o'qiydi (~40 KB/s)
+
+
+def _bosh_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def _javobni_oqish(reader):
+    """HTTP/1.1 javobini o'qiydi; (status, ulanish ochiq qoladimi) qaytaradi."""
+    holat_qatori = await reader.readline()
+    if not holat_qatori:
+        raise ConnectionError("server ulanishni yopdi")
+    status = int(holat_qatori.split()[1])
+    sarlavhalar = {}
+    while (qator := await reader.readline()) not in (b'\r\n', b''):
+        nomi, _, qiymat = qator.decode('latin-1').partition(':')
+        sarlavhalar[nomi.strip().lower()] = qiymat.strip().lower()
+    if sarlavhalar.get('transfer-encoding') == 'chunked':
+        while hajm := int((await reader.readline()).split(b';')[0], 16):
+            await reader.readexactly(hajm + 2)
+        await reader.readline()
+    else:
+        await reader.readexactly(int(sarlavhalar.get('content-length', 0)))
+    return status, sarlavhalar.get('connection') != 'close'
+
+
+async def _ulanish(port, host, cookie, yollar, tugash, natija):
+    """Bitta keep-alive ulanish: tugash vaqtigacha ketma-ket GET so'rovlar yuboradi."""
+    tasodif = random.Random()
+    reader = writer = None
+    while time.monotonic() < tugash:
+        boshlanish = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write((f"GET {tasodif.choice(yollar)} HTTP/1.1\r\nHost: {host}\r\n"
+                          f"Cookie: {cookie}\r\n\r\n").encode())
+            status, ochiq = await asyncio.wait_for(_javobni_oqish(reader), SOROV_VAQTI_CHEGARASI)
+        except (OSError, ConnectionError, ValueError, IndexError, asyncio.TimeoutError,
+                asyncio.IncompleteReadError):
+            natija['xatolar'] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        natija['kechikishlar'].append(time.perf_counter() - boshlanish)
+        if status != 200:
+            natija['xatolar'] += 1
+        if not ochiq:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _sekin_mijoz(port, host, cookie, yol, tugash):
+    """
+    Katta javobni sekin o'qiydigan mijoz (mobil tarmoqdagi dashboard, eksportni yuklab olish).
+
+    Qabul buferi kichik: server javobni to'liq yubora olmaydi va mijoz o'qishini kutadi.
+    """
+    while time.monotonic() < tugash:
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SEKIN_MIJOZ_BUFERI)
+        sock.setblocking(False)
+        try:
+            await asyncio.get_running_loop().sock_connect(sock, ('127.0.0.1', port))
+            reader, writer = await asyncio.open_connection(sock=sock, limit=SEKIN_MIJOZ_BUFERI)
+        except OSError:
+            sock.close()
+            await asyncio.sleep(0.1)
+            continue
+        try:
+            writer.write(f"GET {yol} HTTP/1.1\r\nHost: {host}\r\nCookie: {cookie}\r\n"
+                         f"Connection: close\r\n\r\n".encode())
+            while await reader.read(SEKIN_MIJOZ_BUFERI) and time.monotonic() < tugash:
+                await asyncio.sleep(0.1)
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+
+async def _yuklama(port, host, cookie, yollar, ulanishlar, soniya, sekin_mijozlar=0):
+    natija = {'kechikishlar': [], 'xatolar': 0}
+    tugash = time.monotonic() + soniya
+    await asyncio.gather(*(_ulanish(port, host, cookie, yollar, tugash, natija) for _ in range(ulanishlar)),
+                         *(_sekin_mijoz(port, host, cookie, SEKIN_MIJOZ_YOLI, tugash) for _ in range(sekin_mijozlar)))
+    return natija
+
+
+class Command(BaseCommand):
+    help = ("Bir xil ishchilar soni bilan sinxron WSGI (gunicorn gthread) va ASGI (uvicorn ishchilari) "
+            "serverlarini yuklama ostida solishtiradi: bir vaqtdagi ulanishlar soni oshgan sari "
+            "sekundiga so'rovlar, p50/p95 va xatolar. Sig'im — p95 chegaradan oshmagan eng ko'p ulanishlar.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ulanishlar', default='10,50,200',
+                            help="Bir vaqtdagi ulanishlar soni (vergul bilan, har biri alohida o'lchanadi)")
+        parser.add_argument('--soniya', type=float, default=10, help="Har bir o'lchash davomiyligi")
+        parser.add_argument('--ishchilar', type=int, default=2, help="gunicorn ishchilari (WEB_CONCURRENCY)")
+        parser.add_argument('--oqimlar', type=int, default=4, help="WSGI ishchisidagi oqimlar (GUNICORN_THREADS)")
+        parser.add_argument('--mahsulotlar', type=int, default=2000,
+                            help="Mahsulotlar soni (balanslar javobi hajmi shunga bog'liq)")
+        parser.add_argument('--sekin-mijozlar', type=int, default=8,
+                            help="Fonda balanslar javobini sekin o'qiydigan mijozlar soni (0 — o'lchanmaydi)")
+        parser.add_argument('--p95-chegara', type=float, default=1.0, help="Sig'im uchun p95 chegarasi (soniya)")
+
+    def handle(self, *args, **options):
+        try:
+            ulanishlar = sorted({int(son) for son in options['ulanishlar'].split(',')})
+        except ValueError:
+            raise CommandError("--ulanishlar butun sonlar ro'yxati bo'lishi kerak (masalan 10,50,200).")
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+
+        with vaqtinchalik_baza() as baza_nomi:
+            birlik = OlchovBirligi.objects.create(olchov_birligi="Dona")
+            tasodif = random.Random(1)
+            mahsulot_idlari = []
+            for i in range(options['mahsulotlar']):
+                mahsulot = Mahsulot.objects.create(mahsulot_nomi=harfli_nom("Mahsulot", i), olchov_birligi=birlik)
+                for _ in range(5):
+                    KirdiChiqdi(mahsulot_nomi=mahsulot, miqdor=tasodif.randint(1, 500), amaliyot_turi="Kirdi").save()
+                mahsulot_idlari.append(mahsulot.id)
+            # Sessiya bazada: server jarayonlari shu cookie bilan OTP orqali tasdiqlangan xodimni ko'radi
+            admin = CustomUser.objects.create_superuser("bench", "bench@example.com", "bench")
+            mijoz = Client()
+            mijoz.force_login(admin)
+            sessiya = mijoz.session
+            sessiya[DEVICE_ID_SESSION_KEY] = TOTPDevice.objects.create(user=admin, name="bench").persistent_id
+            sessiya.save()
+            cookie = f'{settings.SESSION_COOKIE_NAME}={mijoz.cookies[settings.SESSION_COOKIE_NAME].value}'
+            connections.close_all()
+
+            # Dashboard so'rovlari: balanslar va turli mahsulotlar tarixi. Tarix yo'llari turlicha
+            # bo'lgani uchun javob keshi ko'p hollarda chetlab o'tiladi va ORM haqiqatan ishlaydi.
+            yollar = ['/api/balanslar/'] + [f'/api/mahsulot/{mahsulot_id}/tarix/?soni={soni}'
+                                           for mahsulot_id in mahsulot_idlari for soni in (20, 50, 100)]
+            muhit = {**os.environ, 'DB_NAME': str(baza_nomi), 'WEB_CONCURRENCY': str(options['ishchilar']),
+                     'GUNICORN_THREADS': str(options['oqimlar']), 'GUNICORN_MAX_REQUESTS': '0',
+                     # Yuklama ostida deyarli har bir so'rov "sekin": log natijalarni ko'mib yubormasin
+                     'SEKIN_SOROV_CHEGARASI': '3600'}
+
+            for rejim, nomi in (('wsgi', f"WSGI (gthread, {options['ishchilar']} x {options['oqimlar']} oqim)"),
+                                ('asgi', f"ASGI (uvicorn, {options['ishchilar']} ishchi)")):
+                self.stdout.write(nomi)
+                port = _bosh_port()
+                server = subprocess.Popen(
+                    [sys.executable, '-m', 'gunicorn', '--config', str(settings.BASE_DIR / 'gunicorn.conf.py'),
+                     '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'],
+                    cwd=settings.BASE_DIR, env={**muhit, 'SERVER_REJIMI': rejim})
+                try:
+                    self._kutish(server, port, host, cookie, yollar)
+                    sigim = 0
+                    for soni in ulanishlar:
+                        natija = asyncio.run(_yuklama(port, host, cookie, yollar, soni, options['soniya']))
+                        kechikishlar = natija['kechikishlar']
+                        p95 = persentil(kechikishlar, 0.95)
+                        if natija['xatolar'] == 0 and kechikishlar and p95 <= options['p95_chegara']:
+                            sigim = soni
+                        self.stdout.write(
+                            f"  {soni:>4} ulanish: {len(kechikishlar) / options['soniya']:.0f} so'rov/s, "
+                            f"p50 {persentil(kechikishlar, 0.5) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, "
+                            f"eng sekini {max(kechikishlar, default=0) * 1000:.0f} ms, xatolar: {natija['xatolar']}")
+                    self.stdout.write(f"  Sig'im (p95 <= {options['p95_chegara']:g} s, xatosiz): {sigim} ulanish")
+                    if options['sekin_mijozlar']:
+                        soni = ulanishlar[0]
+                        natija = asyncio.run(_yuklama(port, host, cookie, yollar, soni, options['soniya'],
+                                                      options['sekin_mijozlar']))
+                        kechikishlar = natija['kechikishlar']
+                        self.stdout.write(
+                            f"  {options['sekin_mijozlar']} sekin mijoz fonida, {soni} ulanish: "
+                            f"{len(kechikishlar) / options['soniya']:.0f} so'rov/s, "
+                            f"p50 {persentil(kechikishlar, 0.5) * 1000:.0f} ms, "
+                            f"p95 {persentil(kechikishlar, 0.95) * 1000:.0f} ms, xatolar: {natija['xatolar']}")
+                finally:
+                    server.terminate()
+                    server.wait(timeout=60)
+
+    def _kutish(self, server, port, host, cookie, yollar):
+        """Server so'rovlarni qabul qila boshlaguncha kutadi va ishchilarni qizdiradi."""
+        tugash = time.monotonic() + 60
+        while time.monotonic() < tugash:
+            if server.poll() is not None:
+                raise CommandError(f"Server ishga tushmadi (chiqish kodi {server.returncode}).")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            except OSError:
+                time.sleep(0.2)
+                continue
+            natija = asyncio.run(_yuklama(port, host, cookie, yollar, 4, 2))
+            if natija['kechikishlar'] and not natija['xatolar']:
+                return
+            raise CommandError("Qizdirish so'rovlari muvaffaqiyatsiz: server 200 qaytarmadi.")
+        raise CommandError("Server 60 soniyada ishga tushmadi.")
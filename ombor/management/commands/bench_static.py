@@ -0,0 +1,86 @@
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django_otp import DEVICE_ID_SESSION_KEY
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from ombor.benchmarking import vaqtinchalik_baza
+
+SAHIFALAR = ('/admin/', '/admin/ombor/kirdichiqdi/', '/admin/ombor/kirdichiqdi/add/', '/admin/ombor/mahsulot/')
+ACCEPT_ENCODING = 'gzip, deflate, br'
+# Statik pipeline'gacha bo'lgan holat: siqish, ETag middleware'lari va xeshli nomlar yo'q
+ESKI_MIDDLEWARE = [m for m in settings.MIDDLEWARE if m not in (
+    'ombor.middleware.StatikMiddleware', 'django.middleware.gzip.GZipMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware')]
+ESKI_STORAGES = {**settings.STORAGES,
+                 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
+
+
+def _mijoz(foydalanuvchi):
+    """OTP orqali tasdiqlangan admin sessiyali test mijozi."""
+    mijoz = Client()
+    mijoz.force_login(foydalanuvchi)
+    qurilma = TOTPDevice.objects.get_or_create(user=foydalanuvchi, name="bench")[0]
+    sessiya = mijoz.session
+    sessiya[DEVICE_ID_SESSION_KEY] = qurilma.persistent_id
+    sessiya.save()
+    return mijoz
+
+
+def _havolalar(html):
+    """Sahifadagi statik fayl va tashqi (boshqa domen) CSS/JS/shrift havolalari."""
+    statik = re.findall(r'(?:href|src)="(%s[^"?#]+)' % re.escape(settings.STATIC_URL), html)
+    tashqi = re.findall(r'<(?:link|script)[^>]+(?:href|src)="(https?://[^"]+)"', html)
+    return list(dict.fromkeys(statik)), tashqi
+
+
+class Command(BaseCommand):
+    help = ("Admin sahifalari uchun uzatiladigan baytlar va so'rovlar sonini statik pipeline'dan oldin "
+            "(siqishsiz, xeshsiz) va keyin (gzip/brotli, immutable kesh) taqqoslaydi. Avval collectstatic kerak.")
+
+    def handle(self, *args, **options):
+        if not Path(settings.STATIC_ROOT, 'staticfiles.json').exists():
+            raise CommandError("STATIC_ROOT da manifest yo'q: avval `python manage.py collectstatic` ishga tushiring.")
+
+        with vaqtinchalik_baza(), override_settings(ALLOWED_HOSTS=['testserver']):
+            foydalanuvchi = get_user_model().objects.create_superuser('bench', 'bench@example.com', 'bench')
+
+            self.stdout.write(f"{'Sahifa':34} {'oldin: bayt':>12} {'so`rov':>7} {'keyin: bayt':>12} {'so`rov':>7} "
+                              f"{'qayta (oldin/keyin)':>20}")
+            jami_oldin = jami_keyin = 0
+            for sahifa in SAHIFALAR:
+                with override_settings(MIDDLEWARE=ESKI_MIDDLEWARE, STORAGES=ESKI_STORAGES,
+                                       JAZZMIN_SETTINGS={**settings.JAZZMIN_SETTINGS, 'use_google_fonts_cdn': True}):
+                    javob = _mijoz(foydalanuvchi).get(sahifa)
+                    statik, tashqi = _havolalar(javob.content.decode())
+                    # Fayllar siqilmagan holda, har bir sahifada qayta tekshiriladi (kesh sarlavhalari yo'q)
+                    oldin = len(javob.content) + sum(
+                        Path(settings.STATIC_ROOT, url[len(settings.STATIC_URL):]).stat().st_size for url in statik)
+                    oldin_sorovlar = 1 + len(statik) + len(tashqi)
+
+                mijoz = _mijoz(foydalanuvchi)
+                javob = mijoz.get(sahifa, HTTP_ACCEPT_ENCODING=ACCEPT_ENCODING)
+                statik, tashqi = _havolalar(javob.content.decode() if not javob.has_header('Content-Encoding')
+                                            else mijoz.get(sahifa).content.decode())
+                keyin = len(javob.content)
+                qayta_tekshiriladi = 1 + len(tashqi)
+                for url in statik:
+                    fayl = mijoz.get(url, HTTP_ACCEPT_ENCODING=ACCEPT_ENCODING)
+                    if fayl.status_code != 200:
+                        raise CommandError(f"{url}: {fayl.status_code}")
+                    keyin += len(b''.join(fayl.streaming_content))
+                    if 'immutable' not in fayl.get('Cache-Control', ''):
+                        qayta_tekshiriladi += 1
+                keyin_sorovlar = 1 + len(statik) + len(tashqi)
+
+                jami_oldin += oldin
+                jami_keyin += keyin
+                self.stdout.write(f"{sahifa:34} {oldin:>12,} {oldin_sorovlar:>7} {keyin:>12,} {keyin_sorovlar:>7} "
+                                  f"{oldin_sorovlar:>10} / {qayta_tekshiriladi}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Birinchi ochilish: {jami_oldin:,} → {jami_keyin:,} bayt ({jami_oldin / jami_keyin:.1f}x kam)"))
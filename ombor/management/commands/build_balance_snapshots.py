@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ombor.benchmarking import Sekundomer
+from ombor.models import BalansSnapshot
+from ombor.snapshot import snapshotlarni_yangilash
+
+
+class Command(BaseCommand):
+    help = ("Oxirgi snapshotdan keyingi yopilgan kunlar uchun mahsulot qoldiqlari snapshotini quradi. "
+            "Faqat yangi harakatlar o'qiladi; cron orqali har kuni ishga tushirish uchun.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--davr', type=int, default=1, help="Snapshotlar orasidagi kunlar soni")
+        parser.add_argument('--qaytadan', action='store_true', help="Barcha snapshotlarni o'chirib, boshidan qurish")
+
+    def handle(self, *args, **options):
+        if options['davr'] < 1:
+            raise CommandError("--davr kamida 1 bo'lishi kerak.")
+        if options['qaytadan']:
+            BalansSnapshot.objects.all().delete()
+
+        with Sekundomer() as sekundomer:
+            yaratildi = snapshotlarni_yangilash(davr=options['davr'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{yaratildi} ta sana uchun snapshot yaratildi ({sekundomer.soniya:.2f} s)"))
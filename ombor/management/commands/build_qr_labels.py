@@ -0,0 +1,47 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ombor.benchmarking import Sekundomer
+from ombor.models import Mahsulot
+from ombor.yorliqlar import (YORLIQ_QATORLARI, YORLIQ_USTUNLARI, qr_matni, qr_rasmlarini_tayyorlash,
+                             yorliq_qatorlari, yorliqlar_yozish)
+
+
+class Command(BaseCommand):
+    help = ("Mahsulotlar uchun QR rasmlarini jarayonlar pulida chizib keshlaydi va (--chiqish berilsa) "
+            "A4 yorliqlar varag'ini PDF ga yozadi. Keshdagi QR lar qayta chizilmaydi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chiqish', help="PDF fayl yo'li (berilmasa faqat QR keshi to'ldiriladi)")
+        parser.add_argument('--mahsulotlar', help="Mahsulot ID lari, vergul bilan (standart — barchasi)")
+        parser.add_argument('--jarayonlar', type=int, default=os.cpu_count() or 1, help="Parallel jarayonlar soni")
+
+    def handle(self, *args, **options):
+        if options['jarayonlar'] < 1:
+            raise CommandError("--jarayonlar kamida 1 bo'lishi kerak.")
+        queryset = Mahsulot.objects.all()
+        if options['mahsulotlar']:
+            try:
+                queryset = queryset.filter(id__in=[int(i) for i in options['mahsulotlar'].split(',')])
+            except ValueError:
+                raise CommandError("--mahsulotlar butun sonlar ro'yxati bo'lishi kerak (masalan 1,2,3).")
+
+        with Sekundomer() as sekundomer:
+            if options['chiqish']:
+                try:
+                    with open(options['chiqish'], 'wb') as fayl:
+                        soni, yangilari = yorliqlar_yozish(queryset, fayl, options['jarayonlar'])
+                except OSError as xato:
+                    raise CommandError(xato)
+            else:
+                matnlar = [qr_matni(*qator) for qator in yorliq_qatorlari(queryset)]
+                soni, yangilari = len(matnlar), qr_rasmlarini_tayyorlash(matnlar, options['jarayonlar'])[1]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{soni} ta mahsulot: {yangilari} ta QR chizildi, {soni - yangilari} tasi keshdan "
+            f"({sekundomer.soniya:.2f} s)"))
+        if options['chiqish']:
+            sahifalar = -(-soni // (YORLIQ_USTUNLARI * YORLIQ_QATORLARI))
+            self.stdout.write(f"{options['chiqish']}: {sahifalar} sahifa, "
+                              f"{os.path.getsize(options['chiqish']):,} bayt")
@@ -0,0 +1,76 @@
+import multiprocessing
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ombor.admin import CustomUserAdmin
+from ombor.benchmarking import Sekundomer
+from ombor.models import CustomUser
+from ombor.rasmlar import ESKIZ_FORMATLARI, eskiz_nomi, eskizlar_bormi, eskizlarni_saqlash
+
+
+def _eskizlash(nom):
+    """Pool ishchisi: (nom, {kengaytma: hajm} yoki None, xato matni) qaytaradi."""
+    try:
+        return nom, eskizlarni_saqlash(nom), None
+    except OSError as xato:  # yo'q yoki buzilgan fayl (PIL.UnidentifiedImageError ham OSError)
+        return nom, None, str(xato)
+
+
+class Command(BaseCommand):
+    help = ("Mavjud profil rasmlari uchun WebP/JPEG eskizlarini jarayonlar pulida yaratadi va admin "
+            "sahifalarida uzatiladigan baytlar tejamini chiqaradi. Yangi yuklamalar eskizini model o'zi yaratadi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jarayonlar', type=int, default=os.cpu_count() or 1, help="Parallel jarayonlar soni")
+        parser.add_argument('--qaytadan', action='store_true', help="Eskizi bor rasmlarni ham qayta ishlash")
+
+    def handle(self, *args, **options):
+        if options['jarayonlar'] < 1:
+            raise CommandError("--jarayonlar kamida 1 bo'lishi kerak.")
+        nomlar = list(CustomUser.objects.exclude(profile_image='').exclude(profile_image__isnull=True)
+                      .order_by().values_list('profile_image', flat=True).distinct())
+        if not options['qaytadan']:
+            nomlar = [nom for nom in nomlar if not eskizlar_bormi(nom)]
+
+        xatolar = 0
+        with Sekundomer() as sekundomer:
+            if nomlar:
+                # Fork qilingan jarayonlar ota jarayonning baza ulanishini meros qilib olmasligi kerak
+                connections.close_all()
+                kontekst = multiprocessing.get_context('fork')
+                with kontekst.Pool(min(options['jarayonlar'], len(nomlar))) as pool:
+                    for nom, _, xato in pool.imap_unordered(_eskizlash, nomlar, chunksize=4):
+                        if xato:
+                            xatolar += 1
+                            self.stderr.write(f"{nom}: {xato}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(nomlar) - xatolar} ta rasm uchun eskiz yaratildi, {xatolar} ta xato ({sekundomer.soniya:.2f} s)"))
+        self._tejam()
+
+    def _tejam(self):
+        """Asl rasmlar va eskizlar hajmi: har bir admin sahifasi sarlavhasi va foydalanuvchilar ro'yxati uchun."""
+        hajmlar = []  # (asl, {kengaytma: eskiz}) — eskizi bor rasmlar, admin ro'yxati tartibida
+        for nom in (CustomUser.objects.exclude(profile_image='').exclude(profile_image__isnull=True)
+                    .order_by(*CustomUserAdmin.ordering).values_list('profile_image', flat=True)):
+            if default_storage.exists(nom) and eskizlar_bormi(nom):
+                hajmlar.append((default_storage.size(nom), {
+                    kengaytma: default_storage.size(eskiz_nomi(nom, kengaytma)) for kengaytma in ESKIZ_FORMATLARI}))
+        if not hajmlar:
+            return
+
+        def qator(nomi, asl, eskizlar):
+            self.stdout.write(f"{nomi}: {asl:,} → WebP {eskizlar['webp']:,} / JPEG {eskizlar['jpg']:,} bayt "
+                              f"({asl / max(eskizlar['webp'], 1):.0f}x kam)")
+
+        def jami(tanlangan):
+            return sum(asl for asl, _ in tanlangan), {k: sum(e[k] for _, e in tanlangan) for k in ESKIZ_FORMATLARI}
+
+        asl, eskizlar = jami(hajmlar)
+        # Sarlavhadagi avatar: har bir admin sahifasida joriy foydalanuvchining bitta rasmi
+        qator("Har bir admin sahifasi (sarlavhadagi avatar, o'rtacha)",
+              asl // len(hajmlar), {k: hajm // len(hajmlar) for k, hajm in eskizlar.items()})
+        qator(f"Foydalanuvchilar ro'yxatining 1-sahifasi ({CustomUserAdmin.list_per_page} qatorgacha)",
+              *jami(hajmlar[:CustomUserAdmin.list_per_page]))
@@ -0,0 +1,164 @@
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from ombor.arxiv import arxiv_chegarasi, tarixni_arxivlash
+from ombor.benchmarking import Sekundomer, admin_sorovi, harfli_nom, vaqtinchalik_baza
+from ombor.models import (CustomUser, KirdiChiqdi, Mahsulot, MahsulotBalans, MahsulotBalansTarix,
+                          MahsulotBalansTarixHammasi, OlchovBirligi)
+from ombor.normallash import nomni_normallash
+from ombor.pagination import KEYINGI, kursor_yasash
+
+PARTIYA = 20_000
+
+
+class SorovYozuvchi:
+    """execute_wrapper: changelist yuborgan barcha SELECT so'rovlarini parametrlari bilan yig'adi."""
+
+    def __init__(self):
+        self.sorovlar = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith('SELECT'):
+            return execute(sql, params, many, context)
+        boshlanish = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sorovlar.append((sql, params, time.perf_counter() - boshlanish))
+
+
+class Command(BaseCommand):
+    help = ("Vaqtinchalik bazani N qator bilan to'ldirib, har bir ombor admin changelist so'rovi uchun "
+            "EXPLAIN natijasini Markdown hisobot sifatida chiqaradi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--qatorlar', type=int, default=1_000_000,
+                            help="KirdiChiqdi va MahsulotBalansTarix qatorlari soni")
+        parser.add_argument('--mahsulotlar', type=int, default=1000, help="Mahsulotlar soni")
+        parser.add_argument('--chiqish', help="Hisobot yoziladigan fayl (ko'rsatilmasa stdout)")
+
+    def _toldirish(self, qatorlar, mahsulotlar_soni):
+        birliklar = [OlchovBirligi.objects.create(olchov_birligi=nom) for nom in ("Dona", "Kg", "Litr")]
+        Mahsulot.objects.bulk_create(
+            Mahsulot(mahsulot_nomi=harfli_nom("Mahsulot", i), qidiruv_nomi=nomni_normallash(harfli_nom("Mahsulot", i)),
+                     olchov_birligi=birliklar[i % len(birliklar)])
+            for i in range(mahsulotlar_soni)
+        )
+        mahsulot_idlari = list(Mahsulot.objects.values_list('id', flat=True))
+        MahsulotBalans.objects.bulk_create(MahsulotBalans(mahsulot_nomi_id=i, qoldiq=100) for i in mahsulot_idlari)
+
+        tasodif = random.Random(1)
+        boshlanish = timezone.now() - timedelta(days=730)
+        qadam = timedelta(days=730) / qatorlar
+        for bosh in range(0, qatorlar, PARTIYA):
+            harakatlar = []
+            tarixlar = []
+            for i in range(bosh, min(bosh + PARTIYA, qatorlar)):
+                mahsulot_id = tasodif.choice(mahsulot_idlari)
+                turi = "Kirdi" if tasodif.random() < 0.55 else "Chiqdi"
+                sana = boshlanish + qadam * i
+                harakatlar.append(KirdiChiqdi(mahsulot_nomi_id=mahsulot_id, miqdor=5, amaliyot_turi=turi, sana=sana))
+                tarixlar.append(MahsulotBalansTarix(mahsulot_nomi_id=mahsulot_id, miqdor=5, qoldiq=100,
+                                                    sana=sana, amaliyot_turi=turi))
+            KirdiChiqdi.objects.bulk_create(harakatlar)
+            MahsulotBalansTarix.objects.bulk_create(tarixlar)
+        # Ishlab chiqarishdagi kabi: TARIX_ARXIV_KUNLARI kundan eski tarix arxiv jadvalida
+        arxivlandi = tarixni_arxivlash(arxiv_chegarasi())
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        return arxivlandi
+
+    def _reja(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            qatorlar = cursor.fetchall()
+        if connection.vendor == 'sqlite':
+            # (id, parent, notused, detail)
+            return [qator[-1] for qator in qatorlar]
+        return [' '.join(str(ustun) for ustun in qator) for qator in qatorlar]
+
+    def handle(self, *args, **options):
+        with vaqtinchalik_baza():
+            with Sekundomer() as toldirish:
+                arxivlandi = self._toldirish(options['qatorlar'], options['mahsulotlar'])
+            superuser = CustomUser.objects.create_superuser('explain', 'explain@example.com', 'explain')
+
+            oy = timezone.localtime(timezone.now() - timedelta(days=200))
+            # Arxivlangan davrdagi oy: arxivli tarix admini UNION ALL VIEW (MahsulotBalansTarixHammasi) ni o'qiydi
+            eski_oy = timezone.localtime(timezone.now() - timedelta(days=500))
+            # DateFieldListFilter "Past 7 days" havolasidagi kabi mahalliy yarim tun
+            hafta_oldin = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+            hafta_oldin = quote((hafta_oldin - timedelta(days=7)).isoformat(' '))
+            bir_mahsulot = Mahsulot.objects.order_by('id').values_list('id', flat=True).first()
+            # Jadval o'rtasidagi sahifa: kursor bo'yicha u ham 1-sahifadek o'qilishi kerak
+            orta = options['qatorlar'] // 2
+            kirdi_orta = kursor_yasash(KEYINGI, KirdiChiqdi.objects.order_by('-sana', '-id')
+                                       .values_list('sana', 'id')[orta])
+            tarix_orta = kursor_yasash(KEYINGI, MahsulotBalansTarix.objects.order_by('-id')
+                                       .values_list('id')[(options['qatorlar'] - arxivlandi) // 2])
+            ssenariylar = [
+                (KirdiChiqdi, ''),
+                (KirdiChiqdi, 'amaliyot_turi__exact=Kirdi'),
+                (KirdiChiqdi, f'sana__gte={hafta_oldin}'),
+                (KirdiChiqdi, f'amaliyot_turi__exact=Chiqdi&sana__gte={hafta_oldin}'),
+                (KirdiChiqdi, f'sana__year={oy.year}&sana__month={oy.month}'),
+                (KirdiChiqdi, f'kursor={kirdi_orta}'),
+                (MahsulotBalansTarix, ''),
+                (MahsulotBalansTarix, f'kursor={tarix_orta}'),
+                (MahsulotBalansTarix, f'sana__year={oy.year}&sana__month={oy.month}'),
+                (MahsulotBalansTarixHammasi, ''),
+                (MahsulotBalansTarixHammasi, f'sana__year={eski_oy.year}&sana__month={eski_oy.month}'),
+                (MahsulotBalans, ''),
+                (Mahsulot, ''),
+            ]
+
+            hisobot = [
+                "# Ombor admin so'rovlari uchun EXPLAIN hisoboti",
+                "",
+                f"`python manage.py explain_admin_queries --qatorlar {options['qatorlar']} "
+                f"--mahsulotlar {options['mahsulotlar']}` natijasi ({connection.vendor}).",
+                "",
+                f"KirdiChiqdi va MahsulotBalansTarix jadvallarida {options['qatorlar']:,} tadan qator, "
+                f"{options['mahsulotlar']} ta mahsulot (to'ldirish {toldirish.soniya:.0f} s). "
+                f"Tarixning {arxivlandi:,} ta qatori ({settings.TARIX_ARXIV_KUNLARI} kundan eskisi) arxivlangan.",
+                "",
+            ]
+            for model, sorov_qatori in ssenariylar:
+                model_admin = admin.site._registry[model]
+                request = admin_sorovi(superuser, f'/admin/ombor/{model._meta.model_name}/', sorov_qatori)
+                yozuvchi = SorovYozuvchi()
+                with connection.execute_wrapper(yozuvchi), Sekundomer() as sekundomer:
+                    model_admin.changelist_view(request).render()
+                hisobot += [f"## {model.__name__} `?{sorov_qatori}`", "",
+                            f"{len(yozuvchi.sorovlar)} ta SELECT, {sekundomer.soniya * 1000:.0f} ms", ""]
+                vaqtlar = defaultdict(list)
+                for sql, params, soniya in yozuvchi.sorovlar:
+                    vaqtlar[sql, tuple(params)].append(soniya)
+                for (sql, params), soniyalar in vaqtlar.items():
+                    hisobot += ["```sql", sql % tuple(repr(p) for p in params), "```", "",
+                                f"{len(soniyalar)} marta, {sum(soniyalar) * 1000:.1f} ms", ""]
+                    hisobot += [f"    {qator}" for qator in self._reja(sql, params)] + [""]
+
+            # Posting va qayta hisoblashdagi "mahsulotning oxirgi tarix yozuvi" so'rovi
+            oxirgi = MahsulotBalansTarix.objects.filter(mahsulot_nomi_id=bir_mahsulot).order_by('-id')[:1]
+            sql, params = oxirgi.query.sql_with_params()
+            hisobot += ["## Mahsulotning oxirgi tarix yozuvi", "", "```sql", sql % tuple(repr(p) for p in params),
+                        "```", ""] + [f"    {qator}" for qator in self._reja(sql, params)] + [""]
+
+        matn = '\n'.join(hisobot)
+        if options['chiqish']:
+            with open(options['chiqish'], 'w', encoding='utf-8') as fayl:
+                fayl.write(matn)
+            self.stdout.write(self.style.SUCCESS(f"Hisobot yozildi: {options['chiqish']}"))
+        else:
+            self.stdout.write(matn)
@@ -0,0 +1,53 @@
+import csv
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from ombor.benchmarking import Sekundomer
+from ombor.katalog import katalog_qatorlarini_oqish, katalogni_yuklash
+
+KORSATILADIGAN_XATOLAR = 20
+
+
+class Command(BaseCommand):
+    help = ("CSV/XLSX fayldagi mahsulot katalogini partiyalab yuklaydi. Ustunlar: mahsulot_nomi, olchov_birligi. "
+            "Xato qatorlar saqlanmaydi va qator raqami bilan xabar qilinadi, qolganlari saqlanadi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('fayl', help="CSV yoki XLSX fayl yo'li")
+        parser.add_argument('--format', choices=['csv', 'xlsx'],
+                            help="Fayl formati (ko'rsatilmasa kengaytmadan aniqlanadi)")
+        parser.add_argument('--birlik-yaratish', action='store_true',
+                            help="Bazada yo'q o'lchov birliklarini yaratish (aks holda bunday qatorlar xato)")
+        parser.add_argument('--xatolar', help="Xato qatorlar hisoboti yoziladigan CSV fayl (qator, xato)")
+
+    def handle(self, *args, **options):
+        fayl = Path(options['fayl'])
+        fayl_turi = options['format'] or fayl.suffix.lstrip('.').lower()
+        try:
+            mazmun = fayl.read_bytes()
+        except OSError as xato:
+            raise CommandError(xato)
+
+        try:
+            with Sekundomer() as sekundomer:
+                qatorlar = katalog_qatorlarini_oqish(mazmun, fayl_turi)
+                saqlandi, xatolar = katalogni_yuklash(qatorlar, options['birlik_yaratish'])
+        except ValidationError as xato:
+            raise CommandError(' '.join(xato.messages))
+
+        for raqam, xabar in xatolar[:KORSATILADIGAN_XATOLAR]:
+            self.stderr.write(f"{raqam}-qator: {xabar}")
+        if len(xatolar) > KORSATILADIGAN_XATOLAR:
+            self.stderr.write(f"... yana {len(xatolar) - KORSATILADIGAN_XATOLAR} ta xato")
+        if options['xatolar']:
+            with open(options['xatolar'], 'w', encoding='utf-8', newline='') as hisobot:
+                yozuvchi = csv.writer(hisobot)
+                yozuvchi.writerow(['qator', 'xato'])
+                yozuvchi.writerows(xatolar)
+
+        tezlik = len(qatorlar) / sekundomer.soniya if sekundomer.soniya else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(qatorlar)} ta qatordan {saqlandi} ta mahsulot saqlandi, {len(xatolar)} ta xato "
+            f"({sekundomer.soniya:.2f} s, {tezlik:.0f} qator/s)"))
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from ombor.benchmarking import Sekundomer
+from ombor.ingest import harakatlarni_joylash, qatorlarni_oqish
+
+
+class Command(BaseCommand):
+    help = ("CSV/JSON fayldagi kirim-chiqim qatorlarini bitta tranzaksiyada yuklaydi. "
+            "Ustunlar: mahsulot_nomi, miqdor, amaliyot_turi, sana.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('fayl', help="CSV yoki JSON fayl yo'li")
+        parser.add_argument('--format', choices=['csv', 'json'],
+                            help="Fayl formati (ko'rsatilmasa kengaytmadan aniqlanadi)")
+
+    def handle(self, *args, **options):
+        fayl = Path(options['fayl'])
+        fayl_turi = options['format'] or fayl.suffix.lstrip('.').lower()
+        try:
+            matn = fayl.read_text(encoding='utf-8-sig')
+        except OSError as xato:
+            raise CommandError(xato)
+
+        try:
+            with Sekundomer() as sekundomer:
+                saqlandi = harakatlarni_joylash(qatorlarni_oqish(matn, fayl_turi))
+        except ValidationError as xato:
+            for xabar in xato.messages:
+                self.stderr.write(xabar)
+            raise CommandError("Fayl yuklanmadi, hech qanday o'zgarish saqlanmadi.")
+
+        tezlik = saqlandi / sekundomer.soniya if sekundomer.soniya else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{saqlandi} ta qator saqlandi ({sekundomer.soniya:.2f} s, {tezlik:.0f} qator/s)"))
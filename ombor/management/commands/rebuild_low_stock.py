@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ombor.benchmarking import Sekundomer
+from ombor.models import KamQoldiq, Mahsulot
+
+
+class Command(BaseCommand):
+    help = ("Kam qoldiqlar jadvalini barcha mahsulotlar balansi va minimal qoldiqlaridan qayta hisoblaydi. "
+            "Postinglar jadvalni o'zlari yuritadi; modeldan o'tmagan o'zgarishlardan keyin ishga tushiriladi.")
+
+    def handle(self, *args, **options):
+        with Sekundomer() as sekundomer, transaction.atomic():
+            KamQoldiq.qayta_hisoblash(Mahsulot.objects.order_by('id').values_list('id', flat=True))
+            soni = KamQoldiq.objects.count()
+        self.stdout.write(self.style.SUCCESS(f"{soni} ta mahsulot minimal qoldiqda ({sekundomer.soniya:.2f} s)"))
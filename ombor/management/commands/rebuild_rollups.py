@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ombor.benchmarking import Sekundomer
+from ombor.snapshot import sanani_oqish
+from ombor.yigindilar import yigindilarni_qayta_qurish
+
+
+class Command(BaseCommand):
+    help = ("Kun/hafta/oy bo'yicha harakatlar yig'indilarini kirim-chiqim ledgeridan qayta hisoblaydi. "
+            "Birinchi o'rnatishda yoki modeldan o'tmagan ommaviy yuklashdan keyin ishga tushiriladi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dan', help="Shu kun (YYYY-MM-DD) tushadigan davrlardan boshlab qayta hisoblash; "
+                                          "ko'rsatilmasa, barcha yig'indilar")
+
+    def handle(self, *args, **options):
+        dan = None
+        if options['dan']:
+            dan = sanani_oqish(options['dan'])
+            if dan is None or hasattr(dan, 'time'):
+                raise CommandError("--dan YYYY-MM-DD formatida bo'lishi kerak.")
+
+        with Sekundomer() as sekundomer:
+            yaratildi = yigindilarni_qayta_qurish(dan=dan)
+        self.stdout.write(self.style.SUCCESS(
+            f"{yaratildi} ta yig'indi qatori yaratildi ({sekundomer.soniya:.2f} s)"))
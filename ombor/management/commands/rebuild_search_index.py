@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ombor.benchmarking import Sekundomer
+from ombor.qidiruv import qidiruv_indeksini_qayta_qurish
+
+
+class Command(BaseCommand):
+    help = ("Mahsulotlarning normallashgan qidiruv nomini (qidiruv_nomi) va SQLite FTS5 qidiruv indeksini "
+            "qayta hisoblaydi. Normallash qoidasi o'zgarganda yoki modeldan o'tmagan yozuvlardan keyin ishlatiladi.")
+
+    def handle(self, *args, **options):
+        with Sekundomer() as sekundomer:
+            yangilandi = qidiruv_indeksini_qayta_qurish()
+        self.stdout.write(self.style.SUCCESS(
+            f"{yangilandi} ta mahsulot nomi yangilandi, indeks qayta qurildi ({sekundomer.soniya:.2f} s)"))
@@ -0,0 +1,102 @@
+import multiprocessing
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ombor.benchmarking import Sekundomer
+from ombor.models import Mahsulot
+from ombor.solishtirish import PARTIYA_HAJMI, balanslarni_tuzatish, partiyani_tekshirish
+
+HISOBOT_ORALIGI = 1.0  # soniya; jarayon haqidagi qatorlar orasidagi eng kam vaqt
+
+
+def _partiyalar(hajm):
+    """Mahsulot ID larini `hajm` talik ro'yxatlarga bo'lib beradi."""
+    partiya = []
+    for mahsulot_id in Mahsulot.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=hajm):
+        partiya.append(mahsulot_id)
+        if len(partiya) == hajm:
+            yield partiya
+            partiya = []
+    if partiya:
+        yield partiya
+
+
+class Command(BaseCommand):
+    help = ("Har bir mahsulot uchun KirdiChiqdi yig'indisini joriy balans va oxirgi tarix qoldig'i bilan "
+            "solishtiradi, nomuvofiq va takroriy balans qatorlarini ko'rsatadi; --tuzatish bilan balanslarni "
+            "ledgerga tenglashtiradi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jarayonlar', type=int, default=os.cpu_count() or 1,
+                            help="Parallel jarayonlar soni (1 — joriy jarayonda)")
+        parser.add_argument('--partiya', type=int, default=PARTIYA_HAJMI, help="Bitta vazifadagi mahsulotlar soni")
+        parser.add_argument('--tuzatish', action='store_true',
+                            help="Nomuvofiq balanslarni partiyalab, alohida tranzaksiyalarda tuzatish")
+        parser.add_argument('--chegara', type=int, default=50, help="Batafsil ko'rsatiladigan nomuvofiqliklar soni")
+
+    def handle(self, *args, **options):
+        if options['jarayonlar'] < 1 or options['partiya'] < 1:
+            raise CommandError("--jarayonlar va --partiya kamida 1 bo'lishi kerak.")
+        jami_mahsulot = Mahsulot.objects.count()
+        partiyalar = _partiyalar(options['partiya'])
+
+        nomuvofiqlar = []
+        tekshirildi = harakatlar = 0
+        oxirgi_hisobot = time.monotonic()
+        with Sekundomer() as sekundomer:
+            if options['jarayonlar'] == 1:
+                natijalar = map(partiyani_tekshirish, partiyalar)
+                pool = None
+            else:
+                # ID lar ro'yxati ota jarayonda o'qiladi; fork qilingan jarayonlar ulanishni meros qilmasligi kerak
+                partiyalar = list(partiyalar)
+                connections.close_all()
+                pool = multiprocessing.get_context('fork').Pool(options['jarayonlar'])
+                natijalar = pool.imap_unordered(partiyani_tekshirish, partiyalar)
+            try:
+                for soni, partiya_nomuvofiqlari in natijalar:
+                    harakatlar += soni
+                    nomuvofiqlar.extend(partiya_nomuvofiqlari)
+                    tekshirildi = min(tekshirildi + options['partiya'], jami_mahsulot)
+                    if time.monotonic() - oxirgi_hisobot >= HISOBOT_ORALIGI:
+                        oxirgi_hisobot = time.monotonic()
+                        self._jarayon(tekshirildi, jami_mahsulot, harakatlar, sekundomer)
+            finally:
+                if pool is not None:
+                    pool.close()
+                    pool.join()
+        self._jarayon(jami_mahsulot, jami_mahsulot, harakatlar, sekundomer)
+
+        nomuvofiqlar.sort()
+        takroriylar = sum(1 for _, _, qoldiqlar, _ in nomuvofiqlar if len(qoldiqlar) > 1)
+        balans_nomuvofiq = [n for n in nomuvofiqlar if n[2] != [n[1]] and (n[2] or n[1])]
+        for mahsulot_id, kutilgan, qoldiqlar, tarix_qoldiq in nomuvofiqlar[:options['chegara']]:
+            self.stdout.write(f"Mahsulot {mahsulot_id}: ledger {kutilgan}, balans {qoldiqlar or '-'}, "
+                              f"tarix {'-' if tarix_qoldiq is None else tarix_qoldiq}")
+        if len(nomuvofiqlar) > options['chegara']:
+            self.stdout.write(f"... yana {len(nomuvofiqlar) - options['chegara']} ta")
+
+        uslub = self.style.WARNING if nomuvofiqlar else self.style.SUCCESS
+        self.stdout.write(uslub(f"Nomuvofiq mahsulotlar: {len(nomuvofiqlar)} (balansi: {len(balans_nomuvofiq)}, "
+                                f"faqat tarixi: {len(nomuvofiqlar) - len(balans_nomuvofiq)}), "
+                                f"takroriy balansli: {takroriylar}"))
+
+        if options['tuzatish'] and balans_nomuvofiq:
+            idlar = [nomuvofiqlik[0] for nomuvofiqlik in balans_nomuvofiq]
+            tuzatildi = 0
+            with Sekundomer() as tuzatish_vaqti:
+                for boshi in range(0, len(idlar), options['partiya']):
+                    tuzatildi += balanslarni_tuzatish(idlar[boshi:boshi + options['partiya']])
+            manfiy = sum(1 for _, kutilgan, _, _ in balans_nomuvofiq if kutilgan < 0)
+            self.stdout.write(self.style.SUCCESS(
+                f"{tuzatildi} ta balans tuzatildi ({tuzatish_vaqti.soniya:.2f} s). "
+                f"Ledger yig'indisi manfiy (tuzatilmadi): {manfiy}. Tarix yozuvlari o'zgartirilmaydi."))
+
+    def _jarayon(self, tekshirildi, jami, harakatlar, sekundomer):
+        otgan = sekundomer.joriy()
+        tezlik = harakatlar / otgan if otgan else 0
+        self.stdout.write(f"{tekshirildi}/{jami} mahsulot, {harakatlar} harakat, "
+                          f"{otgan:.1f} s, {tezlik:.0f} harakat/s")
@@ -0,0 +1,78 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ombor.eksport_vazifalari import (eskirganlarni_tozalash, toxtab_qolganlarni_qaytarish, vazifani_bajarish,
+                                      vazifani_olish)
+from ombor.models import EksportVazifasi
+
+TOZALASH_ORALIGI = 60  # soniya
+
+
+class Command(BaseCommand):
+    help = ("Admin navbatga qo'ygan eksport vazifalarini jarayonlar pulida bajaradi, tayyor fayllarni "
+            "MEDIA_ROOT/eksportlar/ ga yozadi va muddati tugaganlarini o'chiradi. Tashqi broker kerak emas: "
+            "navbat — EksportVazifasi jadvali.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jarayonlar', type=int, default=2, help="Parallel eksport jarayonlari soni")
+        parser.add_argument('--oraliq', type=float, default=2.0, help="Navbatni tekshirish oralig'i (soniya)")
+        parser.add_argument('--bir-marta', action='store_true',
+                            help="Navbatdagi vazifalarni bajarib chiqish (cron uchun), kutmaslik")
+
+    def _log(self, xabar):
+        self.stdout.write(f"[{timezone.localtime():%Y-%m-%d %H:%M:%S}] {xabar}")
+
+    def handle(self, *args, **options):
+        jarayonlar = options['jarayonlar']
+        bajarilmoqda = {}  # future -> vazifa ID
+        oxirgi_tozalash = None
+        # spawn: bola jarayonlar ota jarayonning baza ulanishini meros qilib olmaydi
+        kontekst = multiprocessing.get_context('spawn')
+        pool = ProcessPoolExecutor(max_workers=jarayonlar, mp_context=kontekst, initializer=django.setup)
+        self._log(f"Eksport ishchisi ishga tushdi ({jarayonlar} jarayon)")
+        try:
+            while True:
+                if oxirgi_tozalash is None or time.monotonic() - oxirgi_tozalash >= TOZALASH_ORALIGI:
+                    qaytarildi = toxtab_qolganlarni_qaytarish()
+                    ochirildi = eskirganlarni_tozalash()
+                    if qaytarildi or ochirildi:
+                        self._log(f"{qaytarildi} ta to'xtab qolgan vazifa navbatga qaytarildi, "
+                                  f"{ochirildi} ta eskirgan vazifa o'chirildi")
+                    oxirgi_tozalash = time.monotonic()
+
+                for future in [f for f in bajarilmoqda if f.done()]:
+                    vazifa_id = bajarilmoqda.pop(future)
+                    try:
+                        natija = "tayyor" if future.result() else "xato"
+                    except Exception as xato:
+                        natija = f"jarayon xatosi: {xato!r}"
+                    self._log(f"Eksport #{vazifa_id}: {natija}")
+
+                bosh_joy = jarayonlar - len(bajarilmoqda)
+                navbat = list(EksportVazifasi.objects.filter(holat="kutilmoqda").order_by('id')
+                              .values_list('id', flat=True)[:bosh_joy]) if bosh_joy else []
+                for vazifa_id in navbat:
+                    if vazifani_olish(vazifa_id):
+                        bajarilmoqda[pool.submit(vazifani_bajarish, vazifa_id)] = vazifa_id
+                        self._log(f"Eksport #{vazifa_id} boshlandi")
+
+                if options['bir_marta'] and not bajarilmoqda and not navbat:
+                    break
+                if bajarilmoqda:
+                    wait(bajarilmoqda, timeout=options['oraliq'], return_when=FIRST_COMPLETED)
+                else:
+                    time.sleep(options['oraliq'])
+        except KeyboardInterrupt:
+            self._log("To'xtatilmoqda")
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            # Tugallanmagan vazifalar boshqa ishchi olishi uchun navbatga qaytariladi
+            tugallanmagan = [vazifa_id for future, vazifa_id in bajarilmoqda.items() if not future.done()]
+            if tugallanmagan:
+                EksportVazifasi.objects.filter(id__in=tugallanmagan, holat="bajarilmoqda").update(
+                    holat="kutilmoqda", boshlangan=None)
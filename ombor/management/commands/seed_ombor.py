@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ombor.benchmarking import Sekundomer
+from ombor.sintetik import sintetik_ombor
+
+
+class Command(BaseCommand):
+    help = ("Bazani sintetik birliklar, mahsulotlar va kirim-chiqimlar bilan to'ldiradi. "
+            "Tarix, joriy balans va yig'indilar harakatlarga mos yoziladi; odatda bo'sh bazada ishlatiladi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--birliklar', type=int, default=5, help="O'lchov birliklari soni")
+        parser.add_argument('--mahsulotlar', type=int, default=200, help="Mahsulotlar soni")
+        parser.add_argument('--harakatlar', type=int, default=10_000, help="Kirim-chiqimlar soni")
+        parser.add_argument('--kunlar', type=int, default=365, help="Harakatlar oxirgi necha kunga tarqatiladi")
+        parser.add_argument('--urug', type=int, default=1, help="Tasodifiy sonlar urug'i (bir xil urug' — bir xil ma'lumot)")
+
+    def handle(self, *args, **options):
+        if min(options['birliklar'], options['mahsulotlar'], options['kunlar']) < 1 or options['harakatlar'] < 0:
+            raise CommandError("Birliklar, mahsulotlar va kunlar musbat, harakatlar manfiy bo'lmasligi kerak.")
+
+        with Sekundomer() as sekundomer:
+            def jarayon(yozilgan, jami):
+                self.stdout.write(f"{yozilgan}/{jami} harakat ({yozilgan / sekundomer.joriy():.0f} qator/s)")
+
+            yozilgan = sintetik_ombor(options['birliklar'], options['mahsulotlar'], options['harakatlar'],
+                                      options['kunlar'], options['urug'], jarayon=jarayon)
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['birliklar']} ta birlik, {options['mahsulotlar']} ta mahsulot, {yozilgan} ta harakat "
+            f"yaratildi ({sekundomer.soniya:.2f} s)"))
@@ -0,0 +1,259 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger('ombor.metrikalar')
+
+# Soniyalardagi histogramma chegaralari (Prometheus `le` qiymatlari)
+VAQT_CHEGARALARI = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SOROV_SONI_CHEGARALARI = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+# === Jarayon ichidagi metrikalar reestri (histogrammalar, hisoblagichlar) ===
+# Har bir jarayon (gunicorn ishchisi) o'z reestrini yuritadi; /metrics shu jarayon
+# qiymatlarini Prometheus matn formatida qaytaradi.
+
+class Gistogramma:
+    def __init__(self, nomi, tavsif, chegaralar, teglar):
+        self.nomi = nomi
+        self.tavsif = tavsif
+        self.chegaralar = tuple(chegaralar)
+        self.teglar = tuple(teglar)
+        self._qiymatlar = {}  # teg qiymatlari -> [har bir oraliqdagi soni, yig'indi, umumiy soni]
+        self._qulf = threading.Lock()
+
+    def kuzatish(self, qiymat, **teglar):
+        kalit = tuple(str(teglar.get(teg, '')) for teg in self.teglar)
+        with self._qulf:
+            holat = self._qiymatlar.get(kalit)
+            if holat is None:
+                holat = self._qiymatlar[kalit] = [[0] * (len(self.chegaralar) + 1), 0.0, 0]
+            holat[0][bisect_left(self.chegaralar, qiymat)] += 1
+            holat[1] += qiymat
+            holat[2] += 1
+
+    def matn(self):
+        qatorlar = [f'# HELP {self.nomi} {self.tavsif}', f'# TYPE {self.nomi} histogram']
+        with self._qulf:
+            qiymatlar = [(kalit, list(holat[0]), holat[1], holat[2]) for kalit, holat in self._qiymatlar.items()]
+        for kalit, oraliqlar, yigindi, soni in sorted(qiymatlar):
+            teglar = [f'{teg}="{_teg_qiymati(qiymat)}"' for teg, qiymat in zip(self.teglar, kalit)]
+            jami = 0
+            for chegara, oraliq_soni in zip(self.chegaralar + ('+Inf',), oraliqlar):
+                jami += oraliq_soni
+                oraliq_teglari = ','.join(teglar + [f'le="{chegara}"'])
+                qatorlar.append(f'{self.nomi}_bucket{{{oraliq_teglari}}} {jami}')
+            tegli = f'{{{",".join(teglar)}}}' if teglar else ''
+            qatorlar.append(f'{self.nomi}_sum{tegli} {yigindi}')
+            qatorlar.append(f'{self.nomi}_count{tegli} {soni}')
+        return '\n'.join(qatorlar)
+
+
+class Hisoblagich:
+    def __init__(self, nomi, tavsif, teglar):
+        self.nomi = nomi
+        self.tavsif = tavsif
+        self.teglar = tuple(teglar)
+        self._qiymatlar = {}  # teg qiymatlari -> soni
+        self._qulf = threading.Lock()
+
+    def oshirish(self, miqdor=1, **teglar):
+        kalit = tuple(str(teglar.get(teg, '')) for teg in self.teglar)
+        with self._qulf:
+            self._qiymatlar[kalit] = self._qiymatlar.get(kalit, 0) + miqdor
+
+    def qiymat(self, **teglar):
+        kalit = tuple(str(teglar.get(teg, '')) for teg in self.teglar)
+        with self._qulf:
+            return self._qiymatlar.get(kalit, 0)
+
+    def matn(self):
+        qatorlar = [f'# HELP {self.nomi} {self.tavsif}', f'# TYPE {self.nomi} counter']
+        with self._qulf:
+            qiymatlar = sorted(self._qiymatlar.items())
+        for kalit, soni in qiymatlar:
+            teglar = ','.join(f'{teg}="{_teg_qiymati(qiymat)}"' for teg, qiymat in zip(self.teglar, kalit))
+            qatorlar.append(f'{self.nomi}{{{teglar}}} {soni}' if teglar else f'{self.nomi} {soni}')
+        return '\n'.join(qatorlar)
+
+
+def _teg_qiymati(qiymat):
+    return qiymat.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_reestr = {}
+_reestr_qulfi = threading.Lock()
+
+
+def gistogramma(nomi, tavsif, chegaralar=VAQT_CHEGARALARI, teglar=()):
+    """Nomi bo'yicha histogrammani qaytaradi, bo'lmasa yaratadi."""
+    with _reestr_qulfi:
+        if nomi not in _reestr:
+            _reestr[nomi] = Gistogramma(nomi, tavsif, chegaralar, teglar)
+        return _reestr[nomi]
+
+
+def hisoblagich(nomi, tavsif, teglar=()):
+    """Nomi bo'yicha hisoblagichni (Prometheus counter) qaytaradi, bo'lmasa yaratadi."""
+    with _reestr_qulfi:
+        if nomi not in _reestr:
+            _reestr[nomi] = Hisoblagich(nomi, tavsif, teglar)
+        return _reestr[nomi]
+
+
+def prometheus_matni():
+    with _reestr_qulfi:
+        metrikalar = sorted(_reestr.values(), key=lambda m: m.nomi)
+    return '\n'.join(m.matn() for m in metrikalar) + '\n'
+
+
+# === Vaqt o'lchash ===
+# Joriy so'rov davomida o'lchangan bo'limlar Server-Timing sarlavhasiga ham yoziladi.
+_sorov_bolimlari = ContextVar('ombor_sorov_bolimlari', default=None)
+
+
+@contextmanager
+def vaqt_olchash(nomi, tavsif, bolim=None, **teglar):
+    """Blok davomiyligini `nomi` histogrammasiga yozadi; `bolim` — Server-Timing dagi nom."""
+    boshlanish = time.perf_counter()
+    try:
+        yield
+    finally:
+        davomiylik = time.perf_counter() - boshlanish
+        gistogramma(nomi, tavsif, teglar=tuple(teglar)).kuzatish(davomiylik, **teglar)
+        bolimlar = _sorov_bolimlari.get()
+        if bolim and bolimlar is not None:
+            bolimlar.append((bolim, davomiylik))
+
+
+def admin_amali_olchanadi(amal):
+    """Admin amalini (eksport va h.k.) `ombor_admin_action_duration_seconds` bilan o'lchaydi."""
+
+    @wraps(amal)
+    def _amal(modeladmin, request, queryset):
+        with vaqt_olchash('ombor_admin_action_duration_seconds', "Admin amallari davomiyligi",
+                          bolim=amal.__name__, amal=amal.__name__, model=modeladmin.model.__name__):
+            return amal(modeladmin, request, queryset)
+
+    return _amal
+
+
+# === Middleware ===
+class SorovSQLHisoblagich:
+    """Bitta so'rovdagi SQL so'rovlari soni, umumiy SQL vaqti va eng sekin so'rov."""
+
+    def __init__(self):
+        self.soni = 0
+        self.soniya = 0.0
+        self.eng_sekini = (0.0, '')
+
+    def __call__(self, execute, sql, params, many, context):
+        boshlanish = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            davomiylik = time.perf_counter() - boshlanish
+            self.soni += 1
+            self.soniya += davomiylik
+            if davomiylik > self.eng_sekini[0]:
+                self.eng_sekini = (davomiylik, sql)
+
+
+# SQL so'rovlari joriy so'rov hisoblagichiga ContextVar orqali yoziladi: async view'larda ORM
+# so'rovlari boshqa oqimda (sync_to_async) bajariladi, ContextVar qiymati esa u yerga ham o'tadi.
+_sorov_sql = ContextVar('ombor_sorov_sql', default=None)
+
+
+def sql_kuzatuvchisi(execute, sql, params, many, context):
+    """Har bir ulanishga o'rnatiladigan execute_wrapper (ombor.signals); so'rovdan tashqarida hech narsa qilmaydi."""
+    hisoblagich = _sorov_sql.get()
+    if hisoblagich is None:
+        return execute(sql, params, many, context)
+    return hisoblagich(execute, sql, params, many, context)
+
+
+class MetrikalarMiddleware:
+    """
+    Har bir so'rov uchun umumiy vaqt, SQL so'rovlari soni va vaqti, shablon render
+    vaqtini o'lchaydi; histogrammalarga yozadi va Server-Timing sarlavhasini qo'shadi.
+    settings.SEKIN_SOROV_CHEGARASI (soniya) dan uzoq so'rovlar logga yoziladi.
+    WSGI va ASGI zanjirlarida ham ishlaydi.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        boshlanish = time.perf_counter()
+        with self._sorov_olchovi() as (bolimlar, hisoblagich):
+            response = self.get_response(request)
+        return self._yozish(request, response, time.perf_counter() - boshlanish, bolimlar, hisoblagich)
+
+    async def __acall__(self, request):
+        boshlanish = time.perf_counter()
+        with self._sorov_olchovi() as (bolimlar, hisoblagich):
+            response = await self.get_response(request)
+        return self._yozish(request, response, time.perf_counter() - boshlanish, bolimlar, hisoblagich)
+
+    @contextmanager
+    def _sorov_olchovi(self):
+        bolimlar, hisoblagich = [], SorovSQLHisoblagich()
+        bolim_belgisi = _sorov_bolimlari.set(bolimlar)
+        sql_belgisi = _sorov_sql.set(hisoblagich)
+        try:
+            yield bolimlar, hisoblagich
+        finally:
+            _sorov_sql.reset(sql_belgisi)
+            _sorov_bolimlari.reset(bolim_belgisi)
+
+    def _yozish(self, request, response, davomiylik, bolimlar, hisoblagich):
+        match = request.resolver_match
+        view = match.view_name if match else 'topilmadi'
+        gistogramma('ombor_http_request_duration_seconds', "So'rovlarni qayta ishlash vaqti (javob oqimisiz)",
+                    teglar=('view', 'method', 'status')).kuzatish(
+            davomiylik, view=view, method=request.method, status=response.status_code)
+        gistogramma('ombor_http_db_queries', "Bitta so'rovdagi SQL so'rovlari soni",
+                    SOROV_SONI_CHEGARALARI, teglar=('view',)).kuzatish(hisoblagich.soni, view=view)
+        gistogramma('ombor_http_db_duration_seconds', "Bitta so'rovdagi umumiy SQL vaqti",
+                    teglar=('view',)).kuzatish(hisoblagich.soniya, view=view)
+
+        server_timing = [f'db;dur={hisoblagich.soniya * 1000:.1f};desc="{hisoblagich.soni} queries"']
+        server_timing += [f'{nomi};dur={soniya * 1000:.1f}' for nomi, soniya in bolimlar]
+        server_timing.append(f'total;dur={davomiylik * 1000:.1f}')
+        response['Server-Timing'] = ', '.join(server_timing)
+
+        if davomiylik >= settings.SEKIN_SOROV_CHEGARASI:
+            logger.warning(
+                "Sekin so'rov: %s %s %.0f ms (view %s, %d SQL, %.0f ms; eng sekini %.0f ms: %s)",
+                request.method, request.get_full_path(), davomiylik * 1000, view, hisoblagich.soni,
+                hisoblagich.soniya * 1000, hisoblagich.eng_sekini[0] * 1000, hisoblagich.eng_sekini[1][:500])
+        return response
+
+    def process_template_response(self, request, response):
+        # Oldingi middleware'larda bu hook yo'q, shuning uchun u oxirgi chaqiriladi: darhol render boshlanadi
+        bolimlar = _sorov_bolimlari.get()
+        boshlanish = time.perf_counter()
+
+        def render_tugadi(_response):
+            davomiylik = time.perf_counter() - boshlanish
+            match = request.resolver_match
+            gistogramma('ombor_template_render_seconds', "Shablon render vaqti", teglar=('view',)).kuzatish(
+                davomiylik, view=match.view_name if match else 'topilmadi')
+            if bolimlar is not None:
+                bolimlar.append(('render', davomiylik))
+
+        response.add_post_render_callback(render_tugadi)
+        return response
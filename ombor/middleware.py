@@ -0,0 +1,72 @@
+import functools
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.utils.functional import SimpleLazyObject
+from django_otp.middleware import OTPMiddleware
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .kirish import keshdan_olish, qurilma_kaliti
+
+
+# === ASGI uchun middleware moslamalari ===
+# WhiteNoise va django_otp middleware'lari faqat sinxron. ASGI da Django ular uchun har bir
+# so'rovni alohida oqimga o'tkazadi va async view'lar ham shu oqimni band qilib turadi.
+# Quyidagi klasslar xuddi shu ishni async zanjirda, oqimga o'tmasdan bajaradi.
+
+class _SinxronVaAsinxron:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+
+async def _fayl_qismlari(fayl, hajm=64 * 1024):
+    """Faylni oqim bo'lagida o'qib beradi (ASGI sinxron iteratorni butunlay xotiraga yig'maydi)."""
+    oqish = sync_to_async(fayl.read, thread_sensitive=False)
+    try:
+        while qism := await oqish(hajm):
+            yield qism
+    finally:
+        fayl.close()
+
+
+class StatikMiddleware(_SinxronVaAsinxron, WhiteNoiseMiddleware):
+    """WhiteNoiseMiddleware; statik bo'lmagan so'rovlar async zanjirdan chiqmaydi."""
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+        response = self.serve(static_file, request)
+        if response.file_to_stream is not None:
+            response.streaming_content = _fayl_qismlari(response.file_to_stream)
+        return response
+
+
+class OTPTasdiqlashMiddleware(_SinxronVaAsinxron, OTPMiddleware):
+    """
+    django_otp OTPMiddleware; request.user baribir dangasa (birinchi murojaatda) tekshiriladi.
+
+    Sessiyadagi OTP qurilmasi har so'rovda bazadan emas, kirish keshidan olinadi (ombor.kirish).
+    """
+
+    def _device_from_persistent_id(self, persistent_id):
+        return keshdan_olish(qurilma_kaliti(persistent_id),
+                             functools.partial(super()._device_from_persistent_id, persistent_id))
+
+    async def __acall__(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None:
+            request.user = SimpleLazyObject(functools.partial(self._verify_user, request, user))
+        return await self.get_response(request)
@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-18 12:38
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def takroriy_balanslarni_birlashtirish(apps, schema_editor):
+    # get_or_create poygalari natijasida paydo bo'lgan takroriy balans qatorlarini
+    # bittaga qisqartirish: qoldiq mahsulotning oxirgi tarix yozuvidan olinadi
+    MahsulotBalans = apps.get_model('ombor', 'MahsulotBalans')
+    MahsulotBalansTarix = apps.get_model('ombor', 'MahsulotBalansTarix')
+
+    takroriylar = (
+        MahsulotBalans.objects.values('mahsulot_nomi_id')
+        .annotate(soni=Count('id'))
+        .filter(soni__gt=1)
+        .values_list('mahsulot_nomi_id', flat=True)
+    )
+    for mahsulot_id in takroriylar:
+        balanslar = list(MahsulotBalans.objects.filter(mahsulot_nomi_id=mahsulot_id).order_by('-id'))
+        qolgan = balanslar[0]
+        oxirgi_tarix = MahsulotBalansTarix.objects.filter(mahsulot_nomi_id=mahsulot_id).order_by('-id').first()
+        if oxirgi_tarix is not None:
+            qolgan.qoldiq = oxirgi_tarix.qoldiq
+            qolgan.save(update_fields=['qoldiq'])
+        MahsulotBalans.objects.filter(id__in=[b.id for b in balanslar[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(takroriy_balanslarni_birlashtirish, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='mahsulotbalans',
+            constraint=models.UniqueConstraint(fields=('mahsulot_nomi',), name='unique_mahsulot_balans'),
+        ),
+    ]
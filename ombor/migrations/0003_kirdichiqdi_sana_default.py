@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 12:39
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0002_mahsulotbalans_unique'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='kirdichiqdi',
+            name='sana',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Sana'),
+        ),
+    ]
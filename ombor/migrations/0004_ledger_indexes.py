@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-18 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0003_kirdichiqdi_sana_default'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='kirdichiqdi',
+            index=models.Index(fields=['mahsulot_nomi', 'id'], name='kirdichiqdi_mahsulot_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kirdichiqdi',
+            index=models.Index(fields=['sana'], name='kirdichiqdi_sana_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kirdichiqdi',
+            index=models.Index(fields=['amaliyot_turi', 'sana'], name='kirdichiqdi_amaliyot_sana_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mahsulotbalanstarix',
+            index=models.Index(fields=['mahsulot_nomi', 'id'], name='tarix_mahsulot_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mahsulotbalanstarix',
+            index=models.Index(fields=['sana'], name='tarix_sana_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mahsulotbalanstarix',
+            index=models.Index(fields=['amaliyot_turi', 'sana'], name='tarix_amaliyot_sana_idx'),
+        ),
+    ]
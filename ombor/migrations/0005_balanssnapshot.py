@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-18 13:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0004_ledger_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalansSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sana', models.DateField(verbose_name='Sana')),
+                ('qoldiq', models.IntegerField(verbose_name='Qoldiq')),
+                ('oxirgi_harakat_id', models.PositiveBigIntegerField(verbose_name='Oxirgi harakat ID')),
+                ('mahsulot_nomi', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='ombor.mahsulot', verbose_name='Mahsulot nomi')),
+            ],
+            options={
+                'verbose_name': 'Balans Snapshot',
+                'verbose_name_plural': 'Balans Snapshotlari',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='balanssnapshot',
+            constraint=models.UniqueConstraint(fields=('sana', 'mahsulot_nomi'), name='unique_balans_snapshot'),
+        ),
+    ]
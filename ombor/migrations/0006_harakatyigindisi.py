@@ -0,0 +1,42 @@
+# Generated by Django 4.2 on 2026-10-18 13:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0005_balanssnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HarakatYigindisi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('davr_turi', models.CharField(choices=[('kun', 'Kun'), ('hafta', 'Hafta'), ('oy', 'Oy')], max_length=5, verbose_name='Davr turi')),
+                ('davr', models.DateField(verbose_name='Davr boshi')),
+                ('kirdi_sum', models.BigIntegerField(default=0, verbose_name='Kirdi')),
+                ('chiqdi_sum', models.BigIntegerField(default=0, verbose_name='Chiqdi')),
+                ('harakatlar_soni', models.IntegerField(default=0, verbose_name='Harakatlar soni')),
+                ('mahsulot_nomi', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='ombor.mahsulot', verbose_name='Mahsulot nomi')),
+            ],
+            options={
+                'verbose_name': "Harakatlar Yig'indisi",
+                'verbose_name_plural': "Harakatlar Yig'indilari",
+            },
+        ),
+        migrations.AddIndex(
+            model_name='harakatyigindisi',
+            index=models.Index(fields=['davr_turi', 'davr'], name='yigindi_tur_davr_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='harakatyigindisi',
+            index=models.Index(fields=['davr'], name='yigindi_davr_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='harakatyigindisi',
+            constraint=models.UniqueConstraint(fields=('mahsulot_nomi', 'davr_turi', 'davr'), name='unique_harakat_yigindisi'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2 on 2026-10-18 13:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0006_harakatyigindisi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EksportVazifasi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='Model')),
+                ('formati', models.CharField(choices=[('excel', 'Excel'), ('pdf', 'PDF')], max_length=10, verbose_name='Format')),
+                ('parametrlar', models.JSONField(default=dict, verbose_name='Filtr parametrlari')),
+                ('sorov', models.BinaryField(verbose_name="So'rov")),
+                ('kalit', models.CharField(db_index=True, max_length=64, verbose_name='Kalit')),
+                ('holat', models.CharField(choices=[('kutilmoqda', 'Kutilmoqda'), ('bajarilmoqda', 'Bajarilmoqda'), ('tayyor', 'Tayyor'), ('xato', 'Xato')], default='kutilmoqda', max_length=15, verbose_name='Holat')),
+                ('fayl', models.FileField(blank=True, upload_to='eksportlar/', verbose_name='Fayl')),
+                ('qatorlar_soni', models.PositiveIntegerField(blank=True, null=True, verbose_name='Qatorlar soni')),
+                ('hajm', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Hajm (bayt)')),
+                ('xato', models.TextField(blank=True, verbose_name='Xato')),
+                ('yaratilgan', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan')),
+                ('boshlangan', models.DateTimeField(blank=True, null=True, verbose_name='Boshlangan')),
+                ('tugagan', models.DateTimeField(blank=True, null=True, verbose_name='Tugagan')),
+                ('muddati', models.DateTimeField(blank=True, null=True, verbose_name='Saqlash muddati')),
+                ('foydalanuvchi', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Foydalanuvchi')),
+            ],
+            options={
+                'verbose_name': 'Eksport Vazifasi',
+                'verbose_name_plural': 'Eksport Vazifalari',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='eksportvazifasi',
+            index=models.Index(fields=['holat', 'id'], name='eksport_holat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eksportvazifasi',
+            index=models.Index(fields=['muddati'], name='eksport_muddati_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2 on 2026-10-18 14:03
+
+from django.db import migrations, models
+
+from ombor.normallash import nomni_normallash
+
+FTS_JADVALI = 'ombor_mahsulot_fts'
+
+# External content FTS5: matn ombor_mahsulot.qidiruv_nomi da, jadvalda faqat trigram indeksi.
+# Triggerlar har qanday yozuvda (save, bulk_create, SQL) indeksni jadval bilan bir xil saqlaydi.
+FTS_YARATISH = [
+    f"CREATE VIRTUAL TABLE {FTS_JADVALI} USING fts5("
+    f"qidiruv_nomi, content='ombor_mahsulot', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER {FTS_JADVALI}_ai AFTER INSERT ON ombor_mahsulot BEGIN "
+    f"INSERT INTO {FTS_JADVALI}(rowid, qidiruv_nomi) VALUES (new.id, new.qidiruv_nomi); END",
+    f"CREATE TRIGGER {FTS_JADVALI}_ad AFTER DELETE ON ombor_mahsulot BEGIN "
+    f"INSERT INTO {FTS_JADVALI}({FTS_JADVALI}, rowid, qidiruv_nomi) VALUES ('delete', old.id, old.qidiruv_nomi); END",
+    f"CREATE TRIGGER {FTS_JADVALI}_au AFTER UPDATE OF qidiruv_nomi ON ombor_mahsulot BEGIN "
+    f"INSERT INTO {FTS_JADVALI}({FTS_JADVALI}, rowid, qidiruv_nomi) VALUES ('delete', old.id, old.qidiruv_nomi); "
+    f"INSERT INTO {FTS_JADVALI}(rowid, qidiruv_nomi) VALUES (new.id, new.qidiruv_nomi); END",
+    f"INSERT INTO {FTS_JADVALI}({FTS_JADVALI}) VALUES ('rebuild')",
+]
+FTS_OCHIRISH = [
+    f"DROP TRIGGER IF EXISTS {FTS_JADVALI}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_JADVALI}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_JADVALI}_au",
+    f"DROP TABLE IF EXISTS {FTS_JADVALI}",
+]
+
+
+def qidiruv_nomlarini_toldirish(apps, schema_editor):
+    Mahsulot = apps.get_model('ombor', 'Mahsulot')
+    mahsulotlar = list(Mahsulot.objects.only('id', 'mahsulot_nomi'))
+    for mahsulot in mahsulotlar:
+        mahsulot.qidiruv_nomi = nomni_normallash(mahsulot.mahsulot_nomi)
+    Mahsulot.objects.bulk_update(mahsulotlar, ['qidiruv_nomi'], batch_size=1000)
+
+
+def _bajarish(sorovlar):
+    def bajarish(apps, schema_editor):
+        # FTS5 faqat SQLite'da; boshqa bazalarda qidiruv normallashgan ustun bo'yicha ishlaydi
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in sorovlar:
+            schema_editor.execute(sql)
+    return bajarish
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0007_eksportvazifasi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mahsulot',
+            name='qidiruv_nomi',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255, verbose_name='Qidiruv nomi'),
+        ),
+        migrations.RunPython(qidiruv_nomlarini_toldirish, migrations.RunPython.noop),
+        migrations.RunPython(_bajarish(FTS_YARATISH), _bajarish(FTS_OCHIRISH)),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2 on 2026-10-18 16:20
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+from ombor.normallash import nomni_normallash
+
+FTS_JADVALI = 'ombor_mahsulot_fts'
+
+# SQLite'da unikal indeks qo'shish ombor_mahsulot jadvalini qayta yaratadi va 0008 dagi
+# triggerlar eski jadval bilan birga o'chadi: ular qayta yaratiladi, indeks qayta quriladi.
+FTS_TRIGGERLARI = [
+    f"DROP TRIGGER IF EXISTS {FTS_JADVALI}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_JADVALI}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_JADVALI}_au",
+    f"CREATE TRIGGER {FTS_JADVALI}_ai AFTER INSERT ON ombor_mahsulot BEGIN "
+    f"INSERT INTO {FTS_JADVALI}(rowid, qidiruv_nomi) VALUES (new.id, new.qidiruv_nomi); END",
+    f"CREATE TRIGGER {FTS_JADVALI}_ad AFTER DELETE ON ombor_mahsulot BEGIN "
+    f"INSERT INTO {FTS_JADVALI}({FTS_JADVALI}, rowid, qidiruv_nomi) VALUES ('delete', old.id, old.qidiruv_nomi); END",
+    f"CREATE TRIGGER {FTS_JADVALI}_au AFTER UPDATE OF qidiruv_nomi ON ombor_mahsulot BEGIN "
+    f"INSERT INTO {FTS_JADVALI}({FTS_JADVALI}, rowid, qidiruv_nomi) VALUES ('delete', old.id, old.qidiruv_nomi); "
+    f"INSERT INTO {FTS_JADVALI}(rowid, qidiruv_nomi) VALUES (new.id, new.qidiruv_nomi); END",
+    f"INSERT INTO {FTS_JADVALI}({FTS_JADVALI}) VALUES ('rebuild')",
+]
+
+
+def _kalitlarni_toldirish(model, nom_maydoni):
+    """
+    qidiruv_nomi ni hisoblaydi. Normallashganda bir xil bo'lib qoladigan eski yozuvlar
+    ("Kg" va "Кг") o'chirilmaydi: birinchisidan keyingilarining kalitiga ID qo'shiladi.
+    Model saqlanganda nom o'zgarmasa bu kalit qoladi (normallash.qidiruv_kaliti).
+    """
+    yozuvlar = list(model.objects.order_by('id').only('id', nom_maydoni))
+    guruhlar = defaultdict(list)
+    for yozuv in yozuvlar:
+        guruhlar[nomni_normallash(getattr(yozuv, nom_maydoni))].append(yozuv)
+    for kalit, guruh in guruhlar.items():
+        for tartib, yozuv in enumerate(guruh):
+            yozuv.qidiruv_nomi = kalit if tartib == 0 else f'{kalit} {yozuv.id}'
+    model.objects.bulk_update(yozuvlar, ['qidiruv_nomi'], batch_size=1000)
+
+
+def kalitlarni_toldirish(apps, schema_editor):
+    _kalitlarni_toldirish(apps.get_model('ombor', 'OlchovBirligi'), 'olchov_birligi')
+    _kalitlarni_toldirish(apps.get_model('ombor', 'Mahsulot'), 'mahsulot_nomi')
+
+
+def triggerlarni_tiklash(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in FTS_TRIGGERLARI:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0008_mahsulot_qidiruv'),
+    ]
+
+    operations = [
+        # Orqaga qaytarishda AlterField jadvalni yana qayta yaratadi: triggerlar eng oxirida tiklanadi
+        migrations.RunPython(migrations.RunPython.noop, triggerlarni_tiklash),
+        migrations.AddField(
+            model_name='olchovbirligi',
+            name='qidiruv_nomi',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='Qidiruv nomi'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(kalitlarni_toldirish, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='olchovbirligi',
+            name='qidiruv_nomi',
+            field=models.CharField(editable=False, max_length=255, unique=True, verbose_name='Qidiruv nomi'),
+        ),
+        migrations.AlterField(
+            model_name='mahsulot',
+            name='qidiruv_nomi',
+            field=models.CharField(editable=False, max_length=255, unique=True, verbose_name='Qidiruv nomi'),
+        ),
+        migrations.RunPython(triggerlarni_tiklash, migrations.RunPython.noop),
+    ]
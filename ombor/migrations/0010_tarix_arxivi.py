@@ -0,0 +1,61 @@
+# Generated by Django 4.2 on 2026-10-18 14:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+USTUNLAR = 'id, mahsulot_nomi_id, miqdor, qoldiq, sana, amaliyot_turi'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0009_nom_kaliti_unikal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MahsulotBalansTarixHammasi',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('miqdor', models.PositiveIntegerField(verbose_name='Miqdor')),
+                ('qoldiq', models.PositiveIntegerField(verbose_name='Qoldiq')),
+                ('sana', models.DateTimeField(verbose_name='Sana')),
+                ('amaliyot_turi', models.CharField(max_length=5, verbose_name='Amaliyot turi')),
+            ],
+            options={
+                'verbose_name': 'Mahsulot Balans Tarixi',
+                'verbose_name_plural': 'Mahsulot Balans Tarixi',
+                'db_table': 'ombor_tarix_hammasi',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='MahsulotBalansTarixArxiv',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('miqdor', models.PositiveIntegerField(verbose_name='Miqdor')),
+                ('qoldiq', models.PositiveIntegerField(verbose_name='Qoldiq')),
+                ('sana', models.DateTimeField(verbose_name='Sana')),
+                ('amaliyot_turi', models.CharField(max_length=5, verbose_name='Amaliyot turi')),
+                ('mahsulot_nomi', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='ombor.mahsulot', verbose_name='Mahsulot nomi')),
+            ],
+            options={
+                'verbose_name': 'Mahsulot Balans Tarixi Arxivi',
+                'verbose_name_plural': 'Mahsulot Balans Tarixi Arxivi',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='mahsulotbalanstarixarxiv',
+            index=models.Index(fields=['mahsulot_nomi', 'id'], name='tarix_arxiv_mahsulot_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mahsulotbalanstarixarxiv',
+            index=models.Index(fields=['sana'], name='tarix_arxiv_sana_idx'),
+        ),
+        migrations.RunSQL(
+            f"CREATE VIEW ombor_tarix_hammasi AS "
+            f"SELECT {USTUNLAR} FROM ombor_mahsulotbalanstarix "
+            f"UNION ALL SELECT {USTUNLAR} FROM ombor_mahsulotbalanstarixarxiv",
+            "DROP VIEW ombor_tarix_hammasi",
+        ),
+    ]
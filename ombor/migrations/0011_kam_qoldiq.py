@@ -0,0 +1,47 @@
+# Generated by Django 4.2 on 2026-10-18 15:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0010_tarix_arxivi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mahsulot',
+            name='minimal_qoldiq',
+            field=models.PositiveIntegerField(blank=True, help_text="Bo'sh bo'lsa o'lchov birligining standart minimal qoldig'i ishlatiladi.", null=True, verbose_name='Minimal qoldiq'),
+        ),
+        migrations.AddField(
+            model_name='olchovbirligi',
+            name='standart_minimal_qoldiq',
+            field=models.PositiveIntegerField(blank=True, help_text="O'z minimal qoldig'i berilmagan mahsulotlar uchun. Bo'sh — kuzatilmaydi.", null=True, verbose_name='Standart minimal qoldiq'),
+        ),
+        migrations.CreateModel(
+            name='KamQoldiq',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('qoldiq', models.PositiveIntegerField(verbose_name='Qoldiq')),
+                ('chegara', models.PositiveIntegerField(verbose_name='Minimal qoldiq')),
+                ('sana', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Qachondan')),
+                ('mahsulot_nomi', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='ombor.mahsulot', verbose_name='Mahsulot nomi')),
+            ],
+            options={
+                'verbose_name': 'Kam Qoldiq',
+                'verbose_name_plural': 'Kam Qoldiqlar',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='kamqoldiq',
+            index=models.Index(fields=['qoldiq', '-chegara', 'id'], name='kam_qoldiq_tartib_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='kamqoldiq',
+            constraint=models.UniqueConstraint(fields=('mahsulot_nomi',), name='unique_kam_qoldiq'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 15:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ombor', '0011_kam_qoldiq'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='mahsulotbalanstarixhammasi',
+            options={'managed': False, 'verbose_name': 'Mahsulot Balans Tarixi (arxiv bilan)', 'verbose_name_plural': 'Mahsulot Balans Tarixi (arxiv bilan)'},
+        ),
+    ]
@@ -1,10 +1,25 @@
 import re
+from collections import defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import or_
 
 from django import forms
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
+from .balans_keshi import balans_tranzaksiyasi, balanslar_eskirdi, keshdagi_qoldiqlar, qoldiqlarni_keshlash
+from .metrikalar import vaqt_olchash
+from .normallash import qidiruv_kaliti
+from .rasmlar import eskiz_url, eskizlar_bormi, eskizlarni_saqlash
+
+# Mahsulot va o'lchov birligi nomlari: faqat harflar va tutuq belgisi
+NOM_ANDOZASI = re.compile(r"^[a-zA-Zа-яА-ЯёЁ']+$")
 
 # === Foydalanuvchi Modeli ===
 # Bu model foydalanuvchi uchun rasm o'rnatish uchun
@@ -20,11 +35,34 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        # Yangi yuklangan rasm FileField.pre_save da storage ga yoziladi; eskizlar shundan keyin.
+        # profile_image.save(..., save=False) bilan oldindan yozilgan rasmning eskizi yo'qligidan bilinadi.
+        # Kirishdagi last_login kabi update_fields li saqlashlar rasmga tegmaydi.
+        update_fields = kwargs.get('update_fields')
+        rasm_saqlanadimi = bool(self.profile_image) and (update_fields is None or 'profile_image' in update_fields)
+        yangi_rasm = rasm_saqlanadimi and not self.profile_image._committed
+        super().save(*args, **kwargs)
+        if yangi_rasm or (rasm_saqlanadimi and not eskizlar_bormi(self.profile_image.name,
+                                                                 self.profile_image.storage)):
+            eskizlarni_saqlash(self.profile_image.name, self.profile_image.storage)
+
+    @property
+    def avatar_url(self):
+        """jazzmin `user_avatar`: profil rasmining WebP eskizi; rasm bo'lmasa bo'sh satr (standart avatar)."""
+        return eskiz_url(self.profile_image, 'webp') if self.profile_image else ''
+
 
 # === O'lchov birligi Modeli ===
 # Bu model miqdor turini saqlash uchun ishlatiladi.
 class OlchovBirligi(models.Model):
     olchov_birligi = models.CharField(max_length=255, unique=True, verbose_name="O'lchov birligi")  # Miqdor turi
+    # Normallashgan nom (ombor.normallash): "Kg", "kg" va "Кг" bitta birlik, takror unikal indeks bilan taqiqlanadi
+    qidiruv_nomi = models.CharField(max_length=255, unique=True, editable=False, verbose_name="Qidiruv nomi")
+    # Shu birlikdagi, o'z chegarasi berilmagan mahsulotlar uchun buyurtma chegarasi (KamQoldiq)
+    standart_minimal_qoldiq = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Standart minimal qoldiq",
+        help_text="O'z minimal qoldig'i berilmagan mahsulotlar uchun. Bo'sh — kuzatilmaydi.")
 
     class Meta:
         verbose_name = "O'lchov Birlig"
@@ -33,21 +71,30 @@ class OlchovBirligi(models.Model):
     def clean(self):
 
         # O'lchov birligi faqat harflardan iboratligini tekshirish
-        if not re.fullmatch(r"^[a-zA-Zа-яА-ЯёЁ']+$", self.olchov_birligi):
+        if not NOM_ANDOZASI.fullmatch(self.olchov_birligi):
             raise ValidationError(
                 "O'lchov birligi faqat harflardan iborat bo'lishi kerak! Maxsus belgilar yoki raqamlar kiritish mumkin emas.")
 
-        # O'lchov birligini tekshirish: mavjudligini aniqlash
-        if OlchovBirligi.objects.filter(olchov_birligi__iexact=self.olchov_birligi).exclude(pk=self.pk).exists():
+        # O'lchov birligini tekshirish: mavjudligini aniqlash (qidiruv_nomi unikal indeksi bo'yicha)
+        kalit = qidiruv_kaliti(self.olchov_birligi, self.pk, self.qidiruv_nomi)
+        if OlchovBirligi.objects.filter(qidiruv_nomi=kalit).exclude(pk=self.pk).exists():
             raise ValidationError(f"'{self.olchov_birligi}' nomli o'lchov birligi bazada allaqachon mavjud!")
 
     def save(self, *args, **kwargs):
         # Ma'lumotni formatlash: birinchi harf katta, qolganlari kichik
         if self.olchov_birligi:
             self.olchov_birligi = self.olchov_birligi.capitalize()
+        self.qidiruv_nomi = qidiruv_kaliti(self.olchov_birligi or '', self.pk, self.qidiruv_nomi)
+        if kwargs.get('update_fields') is not None and 'olchov_birligi' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'qidiruv_nomi'}
         # Avval clean() chaqiriladi, keyin saqlash amalga oshiriladi
         self.clean()
-        super().save(*args, **kwargs)
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError:
+            # clean() dan keyin parallel so'rov xuddi shu birlikni qo'shdi
+            raise ValidationError(f"'{self.olchov_birligi}' nomli o'lchov birligi bazada allaqachon mavjud!")
 
     def __str__(self):
         return self.olchov_birligi  # Admin panelda miqdor turi ko'rsatadi
@@ -59,6 +106,13 @@ class Mahsulot(models.Model):
     mahsulot_nomi = models.CharField(max_length=255, unique=True, verbose_name="Mahsulot nomi")  # Mahsulot nomi
     olchov_birligi = models.ForeignKey(OlchovBirligi, on_delete=models.PROTECT,
                                        verbose_name="O'lchov birligi")  # O'lchov birligi
+    # Yozuvdan qat'i nazar normallashgan nom (ombor.normallash); FTS5 indeksi shundan quriladi.
+    # Unikal: "Shakar", "shakar" va "Шакар" bitta mahsulot, takrorni baza o'zi rad etadi
+    qidiruv_nomi = models.CharField(max_length=255, unique=True, editable=False, verbose_name="Qidiruv nomi")
+    # Buyurtma chegarasi: qoldiq shunga teng yoki kam bo'lsa mahsulot KamQoldiq jadvaliga tushadi
+    minimal_qoldiq = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Minimal qoldiq",
+        help_text="Bo'sh bo'lsa o'lchov birligining standart minimal qoldig'i ishlatiladi.")
 
     class Meta:
         verbose_name = "Mahsulot"
@@ -66,16 +120,18 @@ class Mahsulot(models.Model):
 
     def clean(self):
         # Mahsulot nomi faqat harflardan iboratligini tekshirish
-        if not re.fullmatch(r"^[a-zA-Zа-яА-ЯёЁ']+$", self.mahsulot_nomi):
+        if not NOM_ANDOZASI.fullmatch(self.mahsulot_nomi):
             raise ValidationError(
                 "Mahsulot nomi faqat harflardan iborat bo'lishi kerak! Maxsus belgilar yoki raqamlar kiritish mumkin emas.")
 
-        # Mahsulot nomining unikal ekanligini tekshirish
-        if Mahsulot.objects.filter(mahsulot_nomi__iexact=self.mahsulot_nomi).exclude(pk=self.pk).exists():
+        # Mahsulot nomining unikal ekanligini tekshirish (qidiruv_nomi unikal indeksi bo'yicha)
+        kalit = qidiruv_kaliti(self.mahsulot_nomi, self.pk, self.qidiruv_nomi)
+        if Mahsulot.objects.filter(qidiruv_nomi=kalit).exclude(pk=self.pk).exists():
             raise ValidationError(f"'{self.mahsulot_nomi}' nomli mahsulot bazada allaqachon mavjud!")
 
         # Mahsulot o'lchov birligini tekshirish
-        if Mahsulot.objects.filter(mahsulot_nomi=self.mahsulot_nomi, olchov_birligi=self.olchov_birligi).exists():
+        if Mahsulot.objects.filter(mahsulot_nomi=self.mahsulot_nomi,
+                                   olchov_birligi=self.olchov_birligi).exclude(pk=self.pk).exists():
             raise ValidationError(
                 f"{self.mahsulot_nomi} mahsuloti uchun {self.olchov_birligi} o'lchov birligi allaqachon mavjud!")
 
@@ -83,9 +139,17 @@ class Mahsulot(models.Model):
         # Mahsulot nomini formatlash: birinchi harf katta, qolganlari kichik
         if self.mahsulot_nomi:
             self.mahsulot_nomi = self.mahsulot_nomi.capitalize()
+        self.qidiruv_nomi = qidiruv_kaliti(self.mahsulot_nomi or '', self.pk, self.qidiruv_nomi)
+        if kwargs.get('update_fields') is not None and 'mahsulot_nomi' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'qidiruv_nomi'}
         # Avval clean() chaqiriladi, keyin saqlash amalga oshiriladi
         self.clean()
-        super().save(*args, **kwargs)
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError:
+            # clean() dan keyin parallel so'rov xuddi shu mahsulotni qo'shdi
+            raise ValidationError(f"'{self.mahsulot_nomi}' nomli mahsulot bazada allaqachon mavjud!")
 
     def __str__(self):
         return self.mahsulot_nomi  # Admin panelda mahsulot nomini ko'rsatadi
@@ -101,11 +165,138 @@ class MahsulotBalans(models.Model):
     class Meta:
         verbose_name = "Mahsulot Joriy Balansi"
         verbose_name_plural = "Mahsulot Joriy Balansi"
+        constraints = [
+            # Har bir mahsulot uchun faqat bitta joriy balans qatori bo'ladi
+            models.UniqueConstraint(fields=['mahsulot_nomi'], name='unique_mahsulot_balans'),
+        ]
+
+    @classmethod
+    def qoldiqni_ozgartirish(cls, mahsulot_id, farq):
+        """
+        Mahsulot balansini `farq` qiymatiga atomar o'zgartiradi va yangi qoldiqni qaytaradi.
+
+        Ochiq tranzaksiya ichida chaqirilishi kerak: UPDATE balans qatorini
+        (SQLite'da butun bazani) tranzaksiya oxirigacha qulflaydi, shuning uchun
+        keyingi o'qish boshqa yozuvchilar bilan aralashmaydi.
+        """
+        balanslar = cls.objects.filter(mahsulot_nomi_id=mahsulot_id)
+        if farq < 0:
+            # Chiqimda qoldiq manfiy bo'lib qolmasligini shartning o'zi kafolatlaydi
+            if not balanslar.filter(qoldiq__gte=-farq).update(qoldiq=F('qoldiq') + farq):
+                # Forma tekshiruvi o'tgan bo'lsa, keshdagi qoldiq eskirgan
+                balanslar_eskirdi([mahsulot_id])
+                raise ValidationError("Omborda mahsulot yetarli emas.")
+        elif not balanslar.update(qoldiq=F('qoldiq') + farq):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(mahsulot_nomi_id=mahsulot_id, qoldiq=farq)
+                return farq
+            except IntegrityError:
+                # Parallel so'rov balans qatorini birinchi bo'lib yaratdi
+                balanslar.update(qoldiq=F('qoldiq') + farq)
+        return balanslar.values_list('qoldiq', flat=True).get()
+
+    @classmethod
+    def joriy_qoldiqlar(cls, mahsulot_idlari):
+        """
+        {mahsulot_id: qoldiq} — balans keshidan, keshda yo'qlari bitta so'rov bilan bazadan.
+
+        Balans qatori yo'q mahsulot uchun qoldiq None. Tekshiruv va ko'rsatish uchun;
+        posting ichidagi hisob qulflangan qatordan o'qiladi.
+        """
+        qoldiqlar, topilmadi = keshdagi_qoldiqlar(mahsulot_idlari)
+        if topilmadi:
+            bazadan = dict.fromkeys(topilmadi)
+            bazadan.update(cls.objects.filter(mahsulot_nomi_id__in=topilmadi).values_list('mahsulot_nomi_id', 'qoldiq'))
+            qoldiqlarni_keshlash(bazadan)
+            qoldiqlar.update(bazadan)
+        return qoldiqlar
 
     def __str__(self):
         return f"{self.mahsulot_nomi} {self.qoldiq}"  # Admin panelda mahsulot va miqdorini ko'rsatadi
 
 
+# === Kam Qoldiq Modeli ===
+# Qoldig'i buyurtma chegarasiga (Mahsulot.minimal_qoldiq, bo'lmasa o'lchov birligining
+# standart_minimal_qoldiq) teng yoki undan kam mahsulotlar. Har bir posting faqat o'z mahsulotini
+# baholaydi; admin bosh sahifasi balanslarni emas, shu kichik jadvalni o'qiydi.
+class KamQoldiq(models.Model):
+    # Hosila jadval: mahsulot o'chirilishini to'smaydi. Alohida FK indeksi kerak emas: unikal cheklov uni qoplaydi
+    mahsulot_nomi = models.ForeignKey(Mahsulot, on_delete=models.CASCADE, db_index=False,
+                                      verbose_name="Mahsulot nomi")
+    qoldiq = models.PositiveIntegerField(verbose_name="Qoldiq")
+    chegara = models.PositiveIntegerField(verbose_name="Minimal qoldiq")
+    sana = models.DateTimeField(default=timezone.now, verbose_name="Qachondan")  # Chegaraga birinchi tushgan vaqt
+
+    class Meta:
+        verbose_name = "Kam Qoldiq"
+        verbose_name_plural = "Kam Qoldiqlar"
+        constraints = [
+            models.UniqueConstraint(fields=['mahsulot_nomi'], name='unique_kam_qoldiq'),
+        ]
+        indexes = [
+            # Bosh sahifa vidjeti va admin ro'yxati tartibi: birinchi qatorlar saralashsiz o'qiladi
+            models.Index(fields=['qoldiq', '-chegara', 'id'], name='kam_qoldiq_tartib_idx'),
+        ]
+
+    @staticmethod
+    def kammi(qoldiq, chegara):
+        return chegara is not None and qoldiq <= chegara
+
+    @classmethod
+    def chegaralar(cls, mahsulot_idlari):
+        """{mahsulot_id: amaldagi chegara yoki None} — o'lchov birligi bilan bitta JOIN so'rovi."""
+        return dict(Mahsulot.objects.filter(id__in=mahsulot_idlari).values_list(
+            'id', Coalesce('minimal_qoldiq', 'olchov_birligi__standart_minimal_qoldiq')))
+
+    @classmethod
+    def _yozish(cls, qatorlar):
+        # Mavjud qatorning `sana`si saqlanadi: mahsulot qachondan beri kamligi
+        cls.objects.bulk_create(qatorlar, update_conflicts=True, unique_fields=['mahsulot_nomi'],
+                                update_fields=['qoldiq', 'chegara'], batch_size=500)
+
+    @classmethod
+    def postingni_baholash(cls, mahsulot_id, qoldiq, farq):
+        """
+        Bitta posting uchun: mahsulotning yangi qoldig'ini chegarasi bilan solishtiradi.
+
+        Ochiq posting tranzaksiyasi ichida chaqiriladi. Chegara bitta PK so'rovi bilan
+        o'qiladi; jadvalga faqat mahsulot kam bo'lsa (UPSERT) yoki posting uni chegaradan
+        chiqarsa (DELETE) yoziladi. Oldingi qoldiq ham chegaradan yuqori bo'lsa, mahsulot
+        jadvalda yo'q — boshqa so'rov bajarilmaydi.
+        """
+        chegara = cls.chegaralar([mahsulot_id]).get(mahsulot_id)
+        if cls.kammi(qoldiq, chegara):
+            cls._yozish([cls(mahsulot_nomi_id=mahsulot_id, qoldiq=qoldiq, chegara=chegara)])
+        elif cls.kammi(qoldiq - farq, chegara):
+            cls.objects.filter(mahsulot_nomi_id=mahsulot_id).delete()
+
+    @classmethod
+    def qayta_hisoblash(cls, mahsulot_idlari):
+        """
+        Mahsulotlarni joriy balans va chegaralari bo'yicha qayta baholaydi.
+
+        Ommaviy yuklash, balanslarni tuzatish va chegara o'zgarishlari uchun; partiyalab,
+        har bir partiyaga to'rtta so'rov. Balans qatori yo'q mahsulot qoldig'i 0.
+        """
+        mahsulot_idlari = list(mahsulot_idlari)
+        for boshi in range(0, len(mahsulot_idlari), 500):
+            partiya = mahsulot_idlari[boshi:boshi + 500]
+            chegaralar = cls.chegaralar(partiya)
+            qoldiqlar = dict.fromkeys(partiya, 0)
+            qoldiqlar.update(MahsulotBalans.objects.filter(mahsulot_nomi_id__in=partiya)
+                             .values_list('mahsulot_nomi_id', 'qoldiq'))
+            kamlar = [cls(mahsulot_nomi_id=mahsulot_id, qoldiq=qoldiq, chegara=chegaralar[mahsulot_id])
+                      for mahsulot_id, qoldiq in qoldiqlar.items()
+                      if cls.kammi(qoldiq, chegaralar.get(mahsulot_id))]
+            (cls.objects.filter(mahsulot_nomi_id__in=partiya)
+             .exclude(mahsulot_nomi_id__in=[qator.mahsulot_nomi_id for qator in kamlar]).delete())
+            cls._yozish(kamlar)
+
+    def __str__(self):
+        return f"{self.mahsulot_nomi} {self.qoldiq} / {self.chegara}"
+
+
 # === Mahsulot Balans Tarix Modeli ===
 # Bu model mahsulot balansi tarixini saqlash uchun ishlatiladi.
 class MahsulotBalansTarix(models.Model):
@@ -120,21 +311,62 @@ class MahsulotBalansTarix(models.Model):
     class Meta:
         verbose_name = "Mahsulot Balans Tarixi"
         verbose_name_plural = "Mahsulot Balans Tarixi"
+        indexes = [
+            # Mahsulotning oxirgi tarix yozuvi: filter(mahsulot_nomi=...).order_by('-id')
+            models.Index(fields=['mahsulot_nomi', 'id'], name='tarix_mahsulot_id_idx'),
+            # date_hierarchy va sana oralig'i bo'yicha filter
+            models.Index(fields=['sana'], name='tarix_sana_idx'),
+            models.Index(fields=['amaliyot_turi', 'sana'], name='tarix_amaliyot_sana_idx'),
+        ]
 
-    def save(self, *args, **kwargs):
-        # Asl save metodini chaqirish
-        super().save(*args, **kwargs)
+    # MahsulotBalans endi KirdiChiqdi.save() ichida, shu tranzaksiyada yangilanadi
 
-        # MahsulotBalans modelini yangilash
-        if self.mahsulot_nomi:
-            # Mahsulot uchun MahsulotBalans ma'lumotini olish yoki yaratish
-            mahsulot_balans, yaratilgan = MahsulotBalans.objects.get_or_create(
-                mahsulot_nomi=self.mahsulot_nomi,
-                defaults={'qoldiq': self.qoldiq}
-            )
-            # Oxirgi qolgan miqdorni yangilash
-            mahsulot_balans.qoldiq = self.qoldiq
-            mahsulot_balans.save()
+    def __str__(self):
+        return f"{self.mahsulot_nomi} {self.miqdor} {self.qoldiq}  {self.sana} {self.amaliyot_turi}"
+
+
+# === Balans Tarixi Arxivi ===
+# TARIX_ARXIV_KUNLARI dan eski tarix yozuvlari `archive_history` bilan shu jadvalga asl ID si
+# bilan ko'chiriladi. Asosiy jadvalda har bir mahsulotning chegaradan oldingi oxirgi yozuvi
+# (o'sha paytdagi qoldiq) qoladi, shuning uchun oxirgi tarix qoldig'i arxivsiz aniqlanadi.
+class MahsulotBalansTarixArxiv(models.Model):
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID")  # Asosiy jadvaldagi ID
+    # Alohida FK indeksi kerak emas: (mahsulot_nomi, id) indeksi uni qoplaydi
+    mahsulot_nomi = models.ForeignKey(Mahsulot, on_delete=models.PROTECT, db_index=False,
+                                      verbose_name="Mahsulot nomi")  # Mahsulotga bog'langan
+    miqdor = models.PositiveIntegerField(verbose_name="Miqdor")
+    qoldiq = models.PositiveIntegerField(verbose_name="Qoldiq")
+    sana = models.DateTimeField(verbose_name="Sana")
+    amaliyot_turi = models.CharField(max_length=5, verbose_name="Amaliyot turi")
+
+    class Meta:
+        verbose_name = "Mahsulot Balans Tarixi Arxivi"
+        verbose_name_plural = "Mahsulot Balans Tarixi Arxivi"
+        indexes = [
+            models.Index(fields=['mahsulot_nomi', 'id'], name='tarix_arxiv_mahsulot_id_idx'),
+            models.Index(fields=['sana'], name='tarix_arxiv_sana_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.mahsulot_nomi} {self.miqdor} {self.qoldiq}  {self.sana} {self.amaliyot_turi}"
+
+
+# Asosiy jadval va arxiv birlashmasi (UNION ALL VIEW, 0010 migratsiyasi). Faqat o'qish uchun:
+# sana/ID shartlari va tartiblash har ikki jadvalning o'z indekslariga tushadi.
+class MahsulotBalansTarixHammasi(models.Model):
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID")
+    mahsulot_nomi = models.ForeignKey(Mahsulot, on_delete=models.DO_NOTHING, db_constraint=False,
+                                      related_name='+', verbose_name="Mahsulot nomi")
+    miqdor = models.PositiveIntegerField(verbose_name="Miqdor")
+    qoldiq = models.PositiveIntegerField(verbose_name="Qoldiq")
+    sana = models.DateTimeField(verbose_name="Sana")
+    amaliyot_turi = models.CharField(max_length=5, verbose_name="Amaliyot turi")
+
+    class Meta:
+        managed = False
+        db_table = 'ombor_tarix_hammasi'
+        verbose_name = "Mahsulot Balans Tarixi (arxiv bilan)"
+        verbose_name_plural = "Mahsulot Balans Tarixi (arxiv bilan)"
 
     def __str__(self):
         return f"{self.mahsulot_nomi} {self.miqdor} {self.qoldiq}  {self.sana} {self.amaliyot_turi}"
@@ -151,53 +383,234 @@ class KirdiChiqdi(models.Model):
     mahsulot_nomi = models.ForeignKey(Mahsulot, on_delete=models.PROTECT, default=1,
                                       verbose_name="Mahsulot nomi")  # Mahsulotga bog'langan
     miqdor = models.PositiveIntegerField(default=0, verbose_name="Miqdor")  # Mahsulot miqdori
-    sana = models.DateTimeField(auto_now_add=True, verbose_name="Sana")  # Operatsiya sanasi
+    # auto_now_add o'rniga default: ommaviy yuklashda asl sana saqlanib qoladi
+    sana = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Sana")  # Operatsiya sanasi
     amaliyot_turi = models.CharField(max_length=15, choices=Kirdi_Chiqdi,
                                      verbose_name="Amaliyot turi")  # Operatsiya turi ("Kirdi" yoki "Chiqdi")
 
     class Meta:
         verbose_name = "Kirdi Chiqdi"
         verbose_name_plural = "Kirdi Chiqdi"
+        indexes = [
+            models.Index(fields=['mahsulot_nomi', 'id'], name='kirdichiqdi_mahsulot_id_idx'),
+            # Admin ro'yxati '-sana' bo'yicha tartiblanadi va date_hierarchy ishlatadi
+            models.Index(fields=['sana'], name='kirdichiqdi_sana_idx'),
+            # list_filter: amaliyot_turi + sana
+            models.Index(fields=['amaliyot_turi', 'sana'], name='kirdichiqdi_amaliyot_sana_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        # Asl save metodini chaqirish
-        super().save(*args, **kwargs)
+        # Mavjud operatsiyani qayta saqlash balansni o'zgartirmaydi
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+
+        farq = self.miqdor if self.amaliyot_turi == "Kirdi" else -self.miqdor
+        with vaqt_olchash('ombor_posting_duration_seconds', "KirdiChiqdi postingi davomiyligi (tranzaksiya bilan)",
+                          bolim='posting', amaliyot_turi=self.amaliyot_turi), balans_tranzaksiyasi() as qoldiqni_yozish:
+            # Avval balans qatori qulflanadi va tekshiriladi: mahsulot yetarli
+            # bo'lmasa, operatsiya yozuvi umuman saqlanmaydi
+            yangi_qoldiq = MahsulotBalans.qoldiqni_ozgartirish(self.mahsulot_nomi_id, farq)
+            # Qoldiq keshi qulf ostida yangilanadi; tranzaksiya bekor qilinsa o'chiriladi
+            qoldiqni_yozish({self.mahsulot_nomi_id: yangi_qoldiq})
+            # Kam qoldiqlar jadvali faqat shu mahsulot uchun baholanadi
+            KamQoldiq.postingni_baholash(self.mahsulot_nomi_id, yangi_qoldiq, farq)
+
+            # Asl save metodini chaqirish
+            super().save(*args, **kwargs)
+
+            # Yangi tarix yozuvini qo'shish
+            MahsulotBalansTarix.objects.create(
+                mahsulot_nomi_id=self.mahsulot_nomi_id,
+                miqdor=self.miqdor,
+                qoldiq=yangi_qoldiq,
+                sana=self.sana,
+                amaliyot_turi="Kirdi" if self.amaliyot_turi == "Kirdi" else "Chiqdi"
+            )
 
-        # MahsulotBalansTarix uchun yozuv qo'shish yoki yangilash
-        if self.mahsulot_nomi:
-            mahsulot_tarix = MahsulotBalansTarix.objects.filter(mahsulot_nomi=self.mahsulot_nomi).last()
-
-            if mahsulot_tarix is None:
-                # Mahsulot uchun tarix mavjud bo'lmasa, yangi yozuv yaratish
-                MahsulotBalansTarix.objects.create(
-                    mahsulot_nomi=self.mahsulot_nomi,
-                    miqdor=self.miqdor,
-                    qoldiq=self.miqdor,
-                    sana=self.sana,
-                    amaliyot_turi="Kirdi" if self.amaliyot_turi == "Kirdi" else "Chiqdi"
-                )
-            else:
-                # Ombor balansini yangilash
-                if self.amaliyot_turi == "Kirdi":
-                    yangi_qoldiq = mahsulot_tarix.qoldiq + self.miqdor
-                elif self.amaliyot_turi == "Chiqdi":
-                    yangi_qoldiq = mahsulot_tarix.qoldiq - self.miqdor
-                    if yangi_qoldiq < 0:  # Omborda mahsulot yetarli emas
-                        raise ValidationError("Omborda mahsulot yetarli emas.")
-
-                # Yangi tarix yozuvini qo'shish
-                MahsulotBalansTarix.objects.create(
-                    mahsulot_nomi=self.mahsulot_nomi,
-                    miqdor=self.miqdor,
-                    qoldiq=yangi_qoldiq,
-                    sana=self.sana,
-                    amaliyot_turi="Kirdi" if self.amaliyot_turi == "Kirdi" else "Chiqdi"
-                )
+            # Kun/hafta/oy yig'indilari ham shu tranzaksiyada yangilanadi
+            HarakatYigindisi.harakatlarni_qoshish(
+                [(self.mahsulot_nomi_id, self.sana, self.amaliyot_turi, self.miqdor)])
 
     def __str__(self):
         return f"{self.mahsulot_nomi} {self.miqdor} {self.sana} {self.amaliyot_turi}"
 
 
+# === Balans Snapshot Modeli ===
+# Bu model mahsulotning kun (davr) oxiridagi qoldig'ini saqlaydi. Sana bo'yicha qoldiq
+# eng yaqin snapshotdan boshlab, faqat undan keyingi harakatlarni qo'shib hisoblanadi.
+class BalansSnapshot(models.Model):
+    mahsulot_nomi = models.ForeignKey(Mahsulot, on_delete=models.PROTECT,
+                                      verbose_name="Mahsulot nomi")  # Mahsulotga bog'langan
+    sana = models.DateField(verbose_name="Sana")  # Shu kun oxiridagi qoldiq
+    # Harakatlar yig'indisi: ledger nomuvofiq bo'lsa ham saqlanishi uchun manfiy bo'lishi mumkin
+    qoldiq = models.IntegerField(verbose_name="Qoldiq")
+    # Snapshot qurilayotganda hisobga olingan eng katta KirdiChiqdi ID si: undan kattalari
+    # orasida shu sanadan oldingi (kechiktirib yuklangan) harakatlar bo'lishi mumkin
+    oxirgi_harakat_id = models.PositiveBigIntegerField(verbose_name="Oxirgi harakat ID")
+
+    class Meta:
+        verbose_name = "Balans Snapshot"
+        verbose_name_plural = "Balans Snapshotlari"
+        constraints = [
+            # Sana birinchi: "eng yaqin snapshot sanasi" va shu sanadagi qatorlar bitta indeksdan o'qiladi
+            models.UniqueConstraint(fields=['sana', 'mahsulot_nomi'], name='unique_balans_snapshot'),
+        ]
+
+    def __str__(self):
+        return f"{self.mahsulot_nomi} {self.sana} {self.qoldiq}"
+
+
+# === Harakatlar Yig'indisi Modeli ===
+# Bu model har bir mahsulot uchun kun/hafta/oy bo'yicha kirim-chiqim yig'indilarini saqlaydi.
+# Har bir harakat bilan bir tranzaksiyada yangilanadi, hisobotlar xom ledgerni o'qimaydi.
+class HarakatYigindisi(models.Model):
+    DAVR_TURLARI = (
+        ("kun", "Kun"),
+        ("hafta", "Hafta"),  # Dushanbadan boshlanadi
+        ("oy", "Oy"),
+    )
+    mahsulot_nomi = models.ForeignKey(Mahsulot, on_delete=models.PROTECT,
+                                      verbose_name="Mahsulot nomi")  # Mahsulotga bog'langan
+    davr_turi = models.CharField(max_length=5, choices=DAVR_TURLARI, verbose_name="Davr turi")
+    davr = models.DateField(verbose_name="Davr boshi")  # Mahalliy vaqt bo'yicha kun, hafta yoki oy boshi
+    # Ishorali: yig'indilar qurilishidan oldingi harakat o'chirilsa, o'chirish bloklanmaydi
+    kirdi_sum = models.BigIntegerField(default=0, verbose_name="Kirdi")
+    chiqdi_sum = models.BigIntegerField(default=0, verbose_name="Chiqdi")
+    harakatlar_soni = models.IntegerField(default=0, verbose_name="Harakatlar soni")
+
+    class Meta:
+        verbose_name = "Harakatlar Yig'indisi"
+        verbose_name_plural = "Harakatlar Yig'indilari"
+        constraints = [
+            models.UniqueConstraint(fields=['mahsulot_nomi', 'davr_turi', 'davr'], name='unique_harakat_yigindisi'),
+        ]
+        indexes = [
+            # Hisobot: davr turi + sana oralig'i, davr bo'yicha teskari tartibda
+            models.Index(fields=['davr_turi', 'davr'], name='yigindi_tur_davr_idx'),
+            models.Index(fields=['davr'], name='yigindi_davr_idx'),
+        ]
+
+    @staticmethod
+    def davrlari(sana):
+        """Harakat sanasi tushadigan (davr_turi, davr boshi) juftliklari."""
+        kun = timezone.localdate(sana)
+        return [("kun", kun), ("hafta", kun - timedelta(days=kun.weekday())), ("oy", kun.replace(day=1))]
+
+    @classmethod
+    def _harakatni_qoshish(cls, mahsulot_id, sana, kirdi, chiqdi, soni):
+        """Bitta harakatning kun, hafta va oy qatorlarini bitta UPDATE bilan oshiradi; yo'qlarini yaratadi."""
+        davrlar = cls.davrlari(sana)
+        oshirish = dict(kirdi_sum=F('kirdi_sum') + kirdi, chiqdi_sum=F('chiqdi_sum') + chiqdi,
+                        harakatlar_soni=F('harakatlar_soni') + soni)
+        qatorlar = cls.objects.filter(reduce(or_, (Q(davr_turi=davr_turi, davr=davr) for davr_turi, davr in davrlar)),
+                                      mahsulot_nomi_id=mahsulot_id)
+        if qatorlar.update(**oshirish) == len(davrlar):
+            return
+        # Yangi kun, hafta yoki oy: yetishmagan qatorlar shu harakat qiymatlari bilan yaratiladi
+        mavjud = set(qatorlar.values_list('davr_turi', 'davr'))
+        for davr_turi, davr in davrlar:
+            if (davr_turi, davr) in mavjud:
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(mahsulot_nomi_id=mahsulot_id, davr_turi=davr_turi, davr=davr,
+                                       kirdi_sum=kirdi, chiqdi_sum=chiqdi, harakatlar_soni=soni)
+            except IntegrityError:
+                # Parallel so'rov qatorni birinchi bo'lib yaratdi
+                cls.objects.filter(mahsulot_nomi_id=mahsulot_id, davr_turi=davr_turi, davr=davr).update(**oshirish)
+
+    @classmethod
+    def harakatlarni_qoshish(cls, harakatlar, ishora=1):
+        """
+        (mahsulot_id, sana, amaliyot_turi, miqdor) harakatlarini yig'indilarga qo'shadi.
+
+        Ochiq tranzaksiya ichida chaqiriladi. Qiymatlar F ifodalari bilan oshiriladi,
+        shuning uchun parallel yozuvlar bir-birini bosib ketmaydi. Bitta harakat uchun
+        bitta UPDATE; ommaviy yuklashda yetishmagan qatorlar nol bilan yaratiladi va
+        hammasi bitta bulk UPDATE bilan oshiriladi. `ishora=-1` harakatlarni ayiradi.
+        """
+        harakatlar = list(harakatlar)
+        if len(harakatlar) == 1:
+            mahsulot_id, sana, amaliyot_turi, miqdor = harakatlar[0]
+            kirdi, chiqdi = (miqdor, 0) if amaliyot_turi == "Kirdi" else (0, miqdor)
+            cls._harakatni_qoshish(mahsulot_id, sana, ishora * kirdi, ishora * chiqdi, ishora)
+            return
+
+        farqlar = defaultdict(lambda: [0, 0, 0])
+        for mahsulot_id, sana, amaliyot_turi, miqdor in harakatlar:
+            for davr_turi, davr in cls.davrlari(sana):
+                farq = farqlar[mahsulot_id, davr_turi, davr]
+                farq[0 if amaliyot_turi == "Kirdi" else 1] += ishora * miqdor
+                farq[2] += ishora
+        if not farqlar:
+            return
+
+        cls.objects.bulk_create(
+            [cls(mahsulot_nomi_id=mahsulot_id, davr_turi=davr_turi, davr=davr)
+             for mahsulot_id, davr_turi, davr in farqlar],
+            ignore_conflicts=True, batch_size=500,
+        )
+        qatorlar = cls.objects.filter(mahsulot_nomi_id__in={kalit[0] for kalit in farqlar},
+                                      davr__in={kalit[2] for kalit in farqlar})
+        yangilanadi = []
+        for qator in qatorlar.only('id', 'mahsulot_nomi_id', 'davr_turi', 'davr'):
+            farq = farqlar.get((qator.mahsulot_nomi_id, qator.davr_turi, qator.davr))
+            if farq is not None:
+                qator.kirdi_sum = F('kirdi_sum') + farq[0]
+                qator.chiqdi_sum = F('chiqdi_sum') + farq[1]
+                qator.harakatlar_soni = F('harakatlar_soni') + farq[2]
+                yangilanadi.append(qator)
+        cls.objects.bulk_update(yangilanadi, ['kirdi_sum', 'chiqdi_sum', 'harakatlar_soni'], batch_size=500)
+
+    def __str__(self):
+        return f"{self.mahsulot_nomi} {self.davr_turi} {self.davr}"
+
+
+# === Eksport Vazifasi Modeli ===
+# Katta eksportlar so'rov ichida emas, navbat orqali `run_export_worker` jarayonida yig'iladi.
+# Tayyor fayl MEDIA_ROOT/eksportlar/ da muddati tugaguncha saqlanadi.
+class EksportVazifasi(models.Model):
+    FORMATLAR = (
+        ("excel", "Excel"),
+        ("pdf", "PDF"),
+    )
+    HOLATLAR = (
+        ("kutilmoqda", "Kutilmoqda"),
+        ("bajarilmoqda", "Bajarilmoqda"),
+        ("tayyor", "Tayyor"),
+        ("xato", "Xato"),
+    )
+    foydalanuvchi = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                      verbose_name="Foydalanuvchi")  # Eksportni so'ragan foydalanuvchi
+    model = models.CharField(max_length=100, verbose_name="Model")  # app_label.model_name
+    formati = models.CharField(max_length=10, choices=FORMATLAR, verbose_name="Format")
+    parametrlar = models.JSONField(default=dict, verbose_name="Filtr parametrlari")  # Changelist GET parametrlari
+    sorov = models.BinaryField(verbose_name="So'rov")  # Querysetning pickle qilingan Query obyekti
+    # Bir xil model, format, so'rov va ma'lumotlar holati uchun bir xil kalit (takroriy so'rovlar uchun)
+    kalit = models.CharField(max_length=64, db_index=True, verbose_name="Kalit")
+    holat = models.CharField(max_length=15, choices=HOLATLAR, default="kutilmoqda", verbose_name="Holat")
+    fayl = models.FileField(upload_to='eksportlar/', blank=True, verbose_name="Fayl")
+    qatorlar_soni = models.PositiveIntegerField(null=True, blank=True, verbose_name="Qatorlar soni")
+    hajm = models.PositiveBigIntegerField(null=True, blank=True, verbose_name="Hajm (bayt)")
+    xato = models.TextField(blank=True, verbose_name="Xato")
+    yaratilgan = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan")
+    boshlangan = models.DateTimeField(null=True, blank=True, verbose_name="Boshlangan")
+    tugagan = models.DateTimeField(null=True, blank=True, verbose_name="Tugagan")
+    muddati = models.DateTimeField(null=True, blank=True, verbose_name="Saqlash muddati")
+
+    class Meta:
+        verbose_name = "Eksport Vazifasi"
+        verbose_name_plural = "Eksport Vazifalari"
+        indexes = [
+            # Ishchi navbatni holat bo'yicha, kelish tartibida o'qiydi
+            models.Index(fields=['holat', 'id'], name='eksport_holat_idx'),
+            models.Index(fields=['muddati'], name='eksport_muddati_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.model} {self.formati} ({self.holat})"
+
+
 # === Kirdi Chiqdi Form ===
 class KirdiChiqdiForm(forms.ModelForm):
     class Meta:
@@ -216,12 +629,12 @@ class KirdiChiqdiForm(forms.ModelForm):
         if miqdor is None or miqdor <= 0:
             raise ValidationError({"miqdor": "Mahsulot miqdori nol yoki manfiy bo'lishi mumkin emas!"})
 
-        # 2. Ombordagi mahsulot balansini tekshirish
+        # 2. Ombordagi mahsulot balansini tekshirish (balans keshidan; saqlashda baza yana tekshiradi)
         if amaliyot_turi == "Chiqdi":
-            mahsulot_balans = MahsulotBalans.objects.filter(mahsulot_nomi=mahsulot_nomi).first()
-            if not mahsulot_balans:
+            qoldiq = MahsulotBalans.joriy_qoldiqlar([mahsulot_nomi.id])[mahsulot_nomi.id]
+            if qoldiq is None:
                 raise ValidationError({"mahsulot_nomi_id": "Bu mahsulot omborda mavjud emas!"})
-            if miqdor > mahsulot_balans.qoldiq:
+            if miqdor > qoldiq:
                 raise ValidationError({"miqdor": "Omborda yetarli mahsulot mavjud emas!"})
 
         return cleaned_data
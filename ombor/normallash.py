@@ -0,0 +1,33 @@
+import re
+
+from text_unidecode import unidecode
+
+# O'zbek kirill harflari lotin imlosi bo'yicha (unidecode ruscha o'qiydi: х -> kh, й -> i, қ -> k')
+KIRILL_LOTIN = str.maketrans({
+    'ў': "o'", 'қ': 'q', 'ғ': "g'", 'ҳ': 'h', 'х': 'x', 'й': 'y', 'ё': 'yo', 'ю': 'yu', 'я': 'ya',
+    'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': '', 'ь': '', 'е': 'e', 'э': 'e',
+})
+_BELGILAR = re.compile(r"[^a-z0-9]+")
+
+
+def nomni_normallash(nom):
+    """
+    Nomni yozuvdan qat'i nazar bir xil ko'rinishga keltiradi: "Шакар" va "shakar" -> "shakar".
+
+    O'zbek kirill harflari lotin imlosiga, qolganlari unidecode bilan ASCII ga o'giriladi;
+    kichik harf, tutuq belgilari (o', g') olib tashlanadi, boshqa belgilar bitta bo'shliq bo'ladi.
+    """
+    matn = unidecode(nom.lower().translate(KIRILL_LOTIN)).lower()
+    return _BELGILAR.sub(' ', matn.replace("'", '').replace('`', '')).strip()
+
+
+def qidiruv_kaliti(nom, pk=None, joriy=''):
+    """
+    Yozuvning qidiruv_nomi qiymati: normallashgan nom.
+
+    0009 migratsiyasi normallashganda bir xil bo'lib qolgan eski nomlarning ("Kg" va "Кг")
+    birinchisidan keyingilariga "<kalit> <id>" kalitini bergan; nom o'zgarmaguncha shu kalit
+    saqlanadi, aks holda yozuvni unikal indeks tufayli qayta saqlab bo'lmasdi.
+    """
+    kalit = nomni_normallash(nom)
+    return joriy if pk is not None and joriy == f'{kalit} {pk}' else kalit
@@ -0,0 +1,201 @@
+import base64
+import hashlib
+import json
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+KURSOR_VAR = 'kursor'
+KEYINGI, OLDINGI = 'k', 'o'
+# Sanash shu qatordan keyin to'xtatiladi: katta natijalar "10000+" ko'rinishida chiqadi
+SANOQ_CHEGARASI = 10_000
+SANOQ_KESH_MUDDATI = 60  # soniya
+
+
+# === Katta jadvallar uchun sahifalash ===
+# Tarix va kirim-chiqim jadvallari cheksiz o'sadi: to'liq COUNT(*) va OFFSET o'rniga
+# chegaralangan (keshlanadigan) sanoq va kursor (keyset) bo'yicha navigatsiya ishlatiladi.
+
+def taxminiy_son(queryset):
+    """
+    Querysetdagi qatorlar sonini (son, aniq) ko'rinishida qaytaradi.
+
+    Ko'pi bilan SANOQ_CHEGARASI + 1 qator sanaladi; natija so'rov matni bo'yicha
+    SANOQ_KESH_MUDDATI soniya keshlanadi. Chegaradan oshsa, `aniq` False bo'ladi.
+    """
+    queryset = queryset.order_by()
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0, True
+    kalit = 'ombor:sanoq:' + hashlib.md5(repr((sql, params)).encode()).hexdigest()
+    natija = cache.get(kalit)
+    if natija is None:
+        son = queryset[:SANOQ_CHEGARASI + 1].count()
+        natija = (min(son, SANOQ_CHEGARASI), son <= SANOQ_CHEGARASI)
+        cache.set(kalit, natija, SANOQ_KESH_MUDDATI)
+    return natija
+
+
+class TaxminiyPaginator(Paginator):
+    """Sanog'i chegaralangan paginator; son aniq bo'lmasa, oxirgi sahifa tekshirilmaydi."""
+
+    @cached_property
+    def count(self):
+        son, self.aniq = taxminiy_son(self.object_list)
+        return son
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.aniq:
+                raise
+            return int(number)
+
+    def page(self, number):
+        if self.aniq:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+def kursor_kalitlari(queryset):
+    """
+    Queryset tartibidan kursor kalitlarini [(maydon, kamayuvchi), ...] ko'rinishida qaytaradi.
+
+    Faqat modelning o'z (NULL bo'lmaydigan) maydonlari bo'yicha va oxirida yagona
+    maydon bilan tartiblangan querysetlar uchun ishlaydi; aks holda None.
+    """
+    opts = queryset.model._meta
+    kalitlar = []
+    for qism in queryset.query.order_by:
+        if not isinstance(qism, str):
+            return None
+        nom = qism.lstrip('-')
+        try:
+            field = opts.pk if nom == 'pk' else opts.get_field(nom)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.is_relation or field.null:
+            return None
+        # ModelAdmin.ordering ChangeList tartibida ikki marta uchraydi
+        if field not in [f for f, _ in kalitlar]:
+            kalitlar.append((field, qism.startswith('-')))
+    if not kalitlar or not kalitlar[-1][0].unique:
+        return None
+    return kalitlar
+
+
+def kursor_yasash(yonalish, qiymatlar):
+    matn = json.dumps([yonalish, [v.isoformat() if hasattr(v, 'isoformat') else str(v) for v in qiymatlar]])
+    return base64.urlsafe_b64encode(matn.encode()).decode().rstrip('=')
+
+
+def kursorni_ochish(kursor, kalitlar):
+    """Kursordan (yonalish, qiymatlar) ni tiklaydi; buzilgan kursor uchun IncorrectLookupParameters."""
+    try:
+        matn = base64.urlsafe_b64decode(kursor + '=' * (-len(kursor) % 4)).decode()
+        yonalish, qiymatlar = json.loads(matn)
+        if yonalish not in (KEYINGI, OLDINGI) or len(qiymatlar) != len(kalitlar):
+            raise ValueError
+        return yonalish, [field.to_python(q) for (field, _), q in zip(kalitlar, qiymatlar)]
+    except (ValueError, TypeError, ValidationError):
+        raise IncorrectLookupParameters
+
+
+def kursor_sharti(kalitlar, qiymatlar, yonalish):
+    """
+    Kursordan keyingi (yoki oldingi) qatorlar uchun shart.
+
+    (a, b) < (x, y) ko'rinishidagi taqqoslash `a <= x AND (a < x OR b < y)` shaklida
+    yoziladi: birinchi kalit bo'yicha indeks oralig'i ishlatiladi.
+    """
+    shart = None
+    for (field, kamayuvchi), qiymat in reversed(list(zip(kalitlar, qiymatlar))):
+        kichigi = kamayuvchi == (yonalish == KEYINGI)
+        qat_iy = Q(**{f"{field.name}__{'lt' if kichigi else 'gt'}": qiymat})
+        if shart is None:
+            shart = qat_iy
+        else:
+            shart = Q(**{f"{field.name}__{'lte' if kichigi else 'gte'}": qiymat}) & (qat_iy | shart)
+    return shart
+
+
+class KursorliChangeList(ChangeList):
+    """
+    Sahifalarni OFFSET o'rniga kursor bo'yicha ochadigan ChangeList.
+
+    Har bir sahifa bitta indeks oralig'idan o'qiladi, shuning uchun N-sahifa 1-sahifa
+    bilan bir xil turadi. Ustun bo'yicha kursorga mos kelmaydigan tartiblash yoki
+    eski `?p=` havolalari uchun oddiy sahifalash ishlatiladi.
+    """
+    kursorli = False
+    keyingi_url = oldingi_url = boshiga_url = None
+
+    def __init__(self, request, *args, **kwargs):
+        self.kursor = request.GET.get(KURSOR_VAR)
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(KURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        # Filtr, tartiblash va qidiruv havolalari kursorsiz (birinchi sahifadan) ochiladi
+        self.params.pop(KURSOR_VAR, None)
+        kalitlar = kursor_kalitlari(self.queryset)
+        if kalitlar is None or self.show_all or PAGE_VAR in request.GET:
+            super().get_results(request)
+            self.sanoq_aniq = getattr(self.paginator, 'aniq', True)
+            return
+
+        yonalish, qiymatlar = kursorni_ochish(self.kursor, kalitlar) if self.kursor else (KEYINGI, None)
+        queryset = self.queryset
+        if qiymatlar is not None:
+            queryset = queryset.filter(kursor_sharti(kalitlar, qiymatlar, yonalish))
+        if yonalish == OLDINGI:
+            queryset = queryset.reverse()
+        # Bitta ortiqcha qator keyingi sahifa bor-yo'qligini bildiradi
+        qatorlar = list(queryset.values_list(*[field.name for field, _ in kalitlar])[:self.list_per_page + 1])
+        davomi = len(qatorlar) > self.list_per_page
+        qatorlar = qatorlar[:self.list_per_page]
+        if yonalish == OLDINGI:
+            qatorlar.reverse()
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.paginator = paginator
+        self.result_count = paginator.count
+        self.sanoq_aniq = getattr(paginator, 'aniq', True)
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.full_result_count = self.root_queryset.count() if self.show_full_result_count else None
+        self.show_admin_actions = not self.show_full_result_count or bool(self.full_result_count)
+        self.can_show_all = self.sanoq_aniq and self.result_count <= self.list_max_show_all
+        # Sahifa qatorlari oxirgi (yagona) kalit bo'yicha, admin tartibida olinadi
+        yagona = kalitlar[-1][0].name
+        self.result_list = self.queryset.filter(**{f'{yagona}__in': [qator[-1] for qator in qatorlar]})
+
+        if qatorlar and (davomi if yonalish == KEYINGI else qiymatlar is not None):
+            self.keyingi_url = self.get_query_string({KURSOR_VAR: kursor_yasash(KEYINGI, qatorlar[-1])})
+        if qatorlar and (davomi if yonalish == OLDINGI else qiymatlar is not None):
+            self.oldingi_url = self.get_query_string({KURSOR_VAR: kursor_yasash(OLDINGI, qatorlar[0])})
+        if qiymatlar is not None:
+            self.boshiga_url = self.get_query_string()
+        self.multi_page = bool(self.keyingi_url or self.oldingi_url or self.boshiga_url)
+        self.kursorli = True
+
+
+class KursorliAdminMixin:
+    """Katta jadvallar admini uchun: kursorli sahifalash va chegaralangan sanoq."""
+    paginator = TaxminiyPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KursorliChangeList
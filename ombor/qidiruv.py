@@ -0,0 +1,80 @@
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Mahsulot
+from .normallash import nomni_normallash, qidiruv_kaliti
+
+FTS_JADVALI = 'ombor_mahsulot_fts'
+TRIGRAM_UZUNLIGI = 3  # trigram tokenizatori bundan qisqa satrni MATCH bilan qidira olmaydi
+
+
+# === Mahsulot nomi bo'yicha qidiruv ===
+# Mahsulot.qidiruv_nomi (lotin, kichik harf, tutuq belgilarisiz) ustidan SQLite'da trigram
+# tokenizatorli FTS5 jadvali quriladi; u ombor_mahsulot triggerlari bilan yangilanadi
+# (0008 migratsiyasi). Qidiruv matni ham xuddi shunday normallashadi, shuning uchun
+# "shakar", "Шакар" va "ШАКАР" bir xil natija beradi.
+
+def mahsulot_idlari_sorovi(qidiruv):
+    """
+    Nomida `qidiruv` qatnashgan mahsulotlar ID lari — `__in` uchun subquery.
+
+    3 belgidan qisqa matn nom boshi bo'yicha qidiriladi (B-tree oralig'i). SQLite
+    bo'lmagan bazalarda normallashgan ustun bo'yicha `contains` ishlatiladi.
+    """
+    nom = nomni_normallash(qidiruv)
+    if not nom:
+        return Mahsulot.objects.none().values('id')
+    if len(nom) < TRIGRAM_UZUNLIGI:
+        return Mahsulot.objects.filter(qidiruv_nomi__gte=nom, qidiruv_nomi__lt=nom + '\U0010ffff').values('id')
+    if connection.vendor != 'sqlite':
+        return Mahsulot.objects.filter(qidiruv_nomi__contains=nom).values('id')
+    # Normallashgan matnda faqat harf, raqam va bo'shliq: qo'shtirnoq ichida butun ibora qidiriladi
+    return RawSQL(f'SELECT rowid FROM {FTS_JADVALI} WHERE {FTS_JADVALI} MATCH %s', [f'"{nom}"'])
+
+
+def qidiruv_indeksini_qayta_qurish():
+    """
+    Barcha mahsulotlarning qidiruv_nomi ustunini va FTS jadvalini qayta hisoblaydi;
+    yangilangan mahsulotlar sonini qaytaradi. Modeldan o'tmagan yozuvlardan keyin ishlatiladi.
+    """
+    yangilanadi = []
+    for mahsulot in Mahsulot.objects.only('id', 'mahsulot_nomi', 'qidiruv_nomi').iterator(chunk_size=2000):
+        qidiruv_nomi = qidiruv_kaliti(mahsulot.mahsulot_nomi, mahsulot.pk, mahsulot.qidiruv_nomi)
+        if mahsulot.qidiruv_nomi != qidiruv_nomi:
+            mahsulot.qidiruv_nomi = qidiruv_nomi
+            yangilanadi.append(mahsulot)
+    Mahsulot.objects.bulk_update(yangilanadi, ['qidiruv_nomi'], batch_size=1000)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_JADVALI}({FTS_JADVALI}) VALUES ('rebuild')")
+    return len(yangilanadi)
+
+
+class MahsulotQidiruvMixin:
+    """
+    Admin qidiruvida mahsulot nomi maydonlarini (search_fields dagi `...mahsulot_nomi`)
+    LIKE '%x%' JOIN o'rniga FTS indeksidan olingan ID lar bilan qidiradi.
+
+    `mahsulot_maydoni` — modeldan Mahsulot ID sigacha yo'l. `qidiruv_qiymatlari` dagi
+    maydonlar (cheklangan qiymatlar) tenglik bilan, qolganlari odatdagidek icontains bilan qidiriladi.
+    """
+    mahsulot_maydoni = 'mahsulot_nomi'
+    qidiruv_qiymatlari = {}
+
+    def get_search_results(self, request, queryset, search_term):
+        qidiruv = search_term.strip()
+        if not qidiruv:
+            return super().get_search_results(request, queryset, search_term)
+        shart = Q(**{f'{self.mahsulot_maydoni}__in': mahsulot_idlari_sorovi(qidiruv)})
+        for maydon in self.get_search_fields(request):
+            if maydon.rsplit('__', 1)[-1] == 'mahsulot_nomi':
+                continue
+            if maydon in self.qidiruv_qiymatlari:
+                # Indeksli tenglik: faqat matnga mos keladigan qiymatlar
+                mos = [qiymat for qiymat in self.qidiruv_qiymatlari[maydon] if qidiruv.lower() in qiymat.lower()]
+                if mos:
+                    shart |= Q(**{f'{maydon}__in': mos})
+            else:
+                shart |= Q(**{f'{maydon}__icontains': qidiruv})
+        return queryset.filter(shart), False
@@ -0,0 +1,77 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Kvadrat eskiz: jazzmin sarlavhasidagi avatar 160 px, admin ro'yxatidagi ko'rinish 100 px
+ESKIZ_OLCHAMI = (160, 160)
+# kengaytma -> (Pillow formati, saqlash parametrlari)
+ESKIZ_FORMATLARI = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+# === Profil rasmlari eskizlari ===
+# Telefon rasmlari bir necha MB: admin sahifalarida ular o'rniga asl fayl yonida doimiy nom bilan
+# saqlangan kichik eskizlar ko'rsatiladi (profile_images/rasm.jpg -> profile_images/rasm.160x160.webp).
+# Eskiz hali yaratilmagan bo'lsa (eski yuklamalar, build_thumbnails ishga tushmagan), asl rasm beriladi.
+
+def eskiz_nomi(nom, kengaytma):
+    asos, _ = os.path.splitext(nom)
+    return f'{asos}.{ESKIZ_OLCHAMI[0]}x{ESKIZ_OLCHAMI[1]}.{kengaytma}'
+
+
+def eskizlarni_yasash(fayl):
+    """
+    Rasm faylidan {kengaytma: bayt} eskizlarini yasaydi.
+
+    EXIF orientatsiyasi qo'llanadi, metadata (EXIF, GPS, ICC) eskizga o'tmaydi; rasm markazdan
+    kvadratga kesiladi. Shaffof fon oq bilan to'ldiriladi.
+    """
+    with Image.open(fayl) as rasm:
+        # JPEG ni to'liq o'lchamda emas, 2 ning darajasiga kichraytirib o'qiydi: katta rasmlarda bir necha marta tez
+        rasm.draft('RGB', (ESKIZ_OLCHAMI[0] * 2, ESKIZ_OLCHAMI[1] * 2))
+        rasm = ImageOps.exif_transpose(rasm)
+        if rasm.mode in ('RGBA', 'LA') or (rasm.mode == 'P' and 'transparency' in rasm.info):
+            rasm = rasm.convert('RGBA')
+            fon = Image.new('RGB', rasm.size, 'white')
+            fon.paste(rasm, mask=rasm.getchannel('A'))
+            rasm = fon
+        elif rasm.mode != 'RGB':
+            rasm = rasm.convert('RGB')
+        rasm = ImageOps.fit(rasm, ESKIZ_OLCHAMI, Image.Resampling.LANCZOS)
+
+    eskizlar = {}
+    for kengaytma, (formati, parametrlar) in ESKIZ_FORMATLARI.items():
+        bufer = io.BytesIO()
+        rasm.save(bufer, formati, **parametrlar)
+        eskizlar[kengaytma] = bufer.getvalue()
+    return eskizlar
+
+
+def eskizlarni_saqlash(nom, storage=default_storage):
+    """Saqlangan rasm uchun eskizlarni yasab, asl fayl yoniga yozadi; {kengaytma: hajm} qaytaradi."""
+    with storage.open(nom, 'rb') as fayl:
+        eskizlar = eskizlarni_yasash(fayl)
+    for kengaytma, tana in eskizlar.items():
+        eskiz = eskiz_nomi(nom, kengaytma)
+        # Doimiy nom: storage.save mavjud fayl uchun yangi nom tanlamasligi uchun avval o'chiriladi
+        if storage.exists(eskiz):
+            storage.delete(eskiz)
+        storage.save(eskiz, ContentFile(tana))
+    return {kengaytma: len(tana) for kengaytma, tana in eskizlar.items()}
+
+
+def eskizlar_bormi(nom, storage=default_storage):
+    return all(storage.exists(eskiz_nomi(nom, kengaytma)) for kengaytma in ESKIZ_FORMATLARI)
+
+
+def eskiz_url(rasm, kengaytma):
+    """ImageField qiymati uchun eskiz URL i; eskiz hali yo'q bo'lsa — asl rasm URL i."""
+    eskiz = eskiz_nomi(rasm.name, kengaytma)
+    if rasm.storage.exists(eskiz):
+        return rasm.storage.url(eskiz)
+    return rasm.url
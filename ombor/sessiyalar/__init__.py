@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+
+YOZILGAN_KALITI = '_ombor_yozilgan'  # sessiya oxirgi marta yozilgan vaqt (unix soniya)
+
+
+# === Sessiya yozuvlarini kamaytirish ===
+# SESSION_SAVE_EVERY_REQUEST (SESSIYA_UZAYTIRISH=1) bilan Django har bir so'rovda sessiyani faqat
+# muddatini uzaytirish uchun qayta yozadi. Ma'lumoti o'zgarmagan sessiya SESSIYA_YOZISH_ORALIGI
+# soniyada ko'pi bilan bir marta yoziladi; bazadagi muddat cookie'dagidan shuncha orqada qolishi mumkin.
+
+class OzgarmaganniYozmaslikMixin:
+    _yuklangan = None
+
+    def _tana(self, data):
+        return self.serializer().dumps({kalit: qiymat for kalit, qiymat in data.items() if kalit != YOZILGAN_KALITI})
+
+    def load(self):
+        data = super().load()
+        self._yuklangan = self._tana(data)
+        return data
+
+    def save(self, must_create=False):
+        oraliq = settings.SESSIYA_YOZISH_ORALIGI
+        # Yuklanmagan sessiya shu yerda yuklanadi (Django'ning save() i ham shunday qiladi)
+        data = self._get_session(no_load=must_create)
+        if (oraliq and not must_create and self._yuklangan == self._tana(data)
+                and time.time() - data.get(YOZILGAN_KALITI, 0) < oraliq):
+            return
+        if oraliq:
+            data[YOZILGAN_KALITI] = int(time.time())
+        super().save(must_create)
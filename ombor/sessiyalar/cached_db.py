@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import cached_db
+
+from . import OzgarmaganniYozmaslikMixin
+
+
+class SessionStore(OzgarmaganniYozmaslikMixin, cached_db.SessionStore):
+    """Keshdan o'qiladigan, bazaga ham yoziladigan sessiyalar; o'zgarmagan sessiya qayta yozilmaydi."""
@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import db
+
+from . import OzgarmaganniYozmaslikMixin
+
+
+class SessionStore(OzgarmaganniYozmaslikMixin, db.SessionStore):
+    """Bazadagi sessiyalar; o'zgarmagan sessiya har so'rovda qayta yozilmaydi."""
@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django_otp.models import Device
+
+from .balans_keshi import balanslar_eskirdi
+from .kesh import api_eskirdi, birliklar_eskirdi, birliklarni_tekshirish
+from .kirish import foydalanuvchi_kaliti, keshdan_ochirish, qurilma_kaliti
+from .metrikalar import sql_kuzatuvchisi
+from .models import (BalansSnapshot, CustomUser, EksportVazifasi, HarakatYigindisi, KamQoldiq, KirdiChiqdi,
+                     Mahsulot, MahsulotBalans, OlchovBirligi)
+
+
+# === Kesh va snapshot signallari ===
+# Ishlatilgan o'lchov birliklari to'plami tranzaksiya yakunlangandan keyin yangilanadi:
+# aks holda parallel o'qish hali ko'rinmagan qatorlarsiz to'plamni yangi versiyaga yozishi mumkin.
+
+@receiver(post_save, sender=KirdiChiqdi)
+def kirdi_chiqdi_saqlandi(sender, instance, created, **kwargs):
+    if created:
+        mahsulot = instance.mahsulot_nomi  # formadan kelgan obyekt; bo'lmasa bitta pk so'rovi
+        transaction.on_commit(lambda: birliklarni_tekshirish([mahsulot.olchov_birligi_id]))
+        transaction.on_commit(api_eskirdi)
+
+
+@receiver(post_save, sender=Mahsulot)
+@receiver(post_save, sender=OlchovBirligi)
+def mahsulot_yoki_birlik_saqlandi(sender, instance, created, **kwargs):
+    # Yangi mahsulot yoki birlikda hali harakat yo'q; mavjudlarining birligi yoki nomi o'zgargan bo'lishi mumkin
+    if not created:
+        transaction.on_commit(birliklar_eskirdi)
+    # API ro'yxatlarida mahsulot va birlik nomlari bor
+    transaction.on_commit(api_eskirdi)
+
+
+@receiver(post_delete, sender=Mahsulot)
+@receiver(post_delete, sender=OlchovBirligi)
+def mahsulot_yoki_birlik_ochirildi(sender, instance, **kwargs):
+    transaction.on_commit(api_eskirdi)
+
+
+@receiver(post_delete, sender=KirdiChiqdi)
+def kirdi_chiqdi_ochirildi(sender, instance, **kwargs):
+    transaction.on_commit(birliklar_eskirdi)
+    transaction.on_commit(api_eskirdi)
+    # O'chirilgan harakatni o'z ichiga olgan snapshotlar keyingi ishga tushirishda qayta quriladi
+    BalansSnapshot.objects.filter(sana__gte=timezone.localdate(instance.sana)).delete()
+    HarakatYigindisi.harakatlarni_qoshish(
+        [(instance.mahsulot_nomi_id, instance.sana, instance.amaliyot_turi, instance.miqdor)], ishora=-1)
+
+
+# Postinglar balans keshini o'zlari yangilaydi (update(), signalsiz). Balans qatori boshqa yo'l
+# bilan (admin, shell) saqlansa yoki o'chirilsa, qoldiq keshdan commit'dan keyin o'chiriladi.
+@receiver(post_save, sender=MahsulotBalans)
+@receiver(post_delete, sender=MahsulotBalans)
+def balans_ozgardi(sender, instance, **kwargs):
+    mahsulot_id = instance.mahsulot_nomi_id
+    transaction.on_commit(lambda: balanslar_eskirdi([mahsulot_id]))
+
+
+# === Kam qoldiqlar ===
+# Postinglar KamQoldiq ni o'zlari baholaydi. Chegara yoki balans boshqa yo'l bilan o'zgarsa,
+# faqat tegishli mahsulotlar shu tranzaksiyada qayta baholanadi.
+@receiver(post_save, sender=Mahsulot)
+def mahsulot_chegarasi_saqlandi(sender, instance, **kwargs):
+    KamQoldiq.qayta_hisoblash([instance.id])
+
+
+@receiver(post_save, sender=OlchovBirligi)
+def birlik_chegarasi_saqlandi(sender, instance, created, **kwargs):
+    # Yangi birlikda hali mahsulot yo'q; o'z chegarasi bor mahsulotlarga standart ta'sir qilmaydi
+    if not created:
+        KamQoldiq.qayta_hisoblash(Mahsulot.objects.filter(olchov_birligi=instance, minimal_qoldiq__isnull=True)
+                                  .values_list('id', flat=True))
+
+
+@receiver(post_save, sender=MahsulotBalans)
+@receiver(post_delete, sender=MahsulotBalans)
+def balans_qatori_ozgardi(sender, instance, **kwargs):
+    KamQoldiq.qayta_hisoblash([instance.mahsulot_nomi_id])
+
+
+# === Kirish keshi ===
+# Parol, faollik yoki OTP qurilmasi o'zgarsa keyingi so'rov ularni bazadan o'qiydi.
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def foydalanuvchi_ozgardi(sender, instance, **kwargs):
+    keshdan_ochirish(foydalanuvchi_kaliti(instance.pk))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def otp_qurilmasi_ozgardi(sender, instance, **kwargs):
+    # Device abstrakt model: TOTP, statik va boshqa qurilma turlari uchun bitta qabul qiluvchi
+    if isinstance(instance, Device):
+        keshdan_ochirish(qurilma_kaliti(instance.persistent_id))
+
+
+# === Eksport fayllari ===
+@receiver(post_delete, sender=EksportVazifasi)
+def eksport_vazifasi_ochirildi(sender, instance, **kwargs):
+    # Fayl tranzaksiya yakunlangach o'chiriladi: bekor qilingan o'chirishda fayl yo'qolmaydi
+    if instance.fayl:
+        nomi, storage = instance.fayl.name, instance.fayl.storage
+        transaction.on_commit(lambda: storage.delete(nomi))
+
+
+# === SQLite ulanish sozlamalari ===
+@receiver(connection_created)
+def sqlite_sozlash(sender, connection, **kwargs):
+    """settings.SQLITE_PRAGMALAR ni har bir yangi SQLite ulanishiga qo'llaydi."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for nomi, qiymat in settings.SQLITE_PRAGMALAR.items():
+            cursor.execute(f'PRAGMA {nomi} = {qiymat}')
+
+
+# === So'rov metrikalari ===
+@receiver(connection_created)
+def sql_kuzatuvchisini_ulash(sender, connection, **kwargs):
+    """MetrikalarMiddleware SQL hisobi: kuzatuvchi har bir ulanishga bir marta o'rnatiladi."""
+    if sql_kuzatuvchisi not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, sql_kuzatuvchisi)
@@ -0,0 +1,137 @@
+import random
+from datetime import datetime, time, timedelta
+from itertools import accumulate
+
+from django.db import transaction
+from django.utils import timezone
+
+from .balans_keshi import balanslar_eskirdi
+from .benchmarking import harfli_nom
+from .kesh import api_eskirdi, birliklar_eskirdi
+from .models import KamQoldiq, KirdiChiqdi, Mahsulot, MahsulotBalans, MahsulotBalansTarix, OlchovBirligi
+from .normallash import nomni_normallash
+from .yigindilar import yigindilarni_qayta_qurish
+
+PARTIYA_HAJMI = 5000
+
+BIRLIK_NOMLARI = ("Dona", "Kg", "Litr", "Metr", "Quti", "Paket", "Tonna", "Gramm", "Rulon", "Juft")
+# Hafta kunlari (dushanbadan) va ish soatlari bo'yicha harakatlar ulushi
+KUN_ULUSHLARI = (1.0, 1.0, 1.0, 1.0, 1.1, 0.6, 0.2)
+SOAT_ULUSHLARI = {8: 3, 9: 8, 10: 10, 11: 10, 12: 6, 13: 7, 14: 10, 15: 10, 16: 9, 17: 6, 18: 3, 19: 1}
+KIRDI_EHTIMOLI = 0.25  # Kirimlar kamroq, lekin kattaroq partiyalarda keladi
+
+
+# === Sintetik ombor ma'lumotlari ===
+# Benchmark va qo'lda sinash uchun: birliklar, mahsulotlar va sana tartibidagi
+# kirim-chiqimlar bulk_create bilan yoziladi. Qoldiqlar har bir mahsulot uchun
+# xotirada yuritiladi, shuning uchun tarix, joriy balans va yig'indilar ledgerga mos.
+# Mahsulotning mavjud harakatlaridan keyingi sanalar kafolatlanmaydi — odatda bo'sh bazada ishlatiladi.
+
+def _kunlik_sonlar(harakatlar_soni, kunlar, boshlanish):
+    """Harakatlarni kunlar bo'yicha hafta kuni ulushlariga mos taqsimlaydi."""
+    ulushlar = [KUN_ULUSHLARI[(boshlanish + timedelta(days=i)).weekday()] for i in range(kunlar)]
+    jami = sum(ulushlar)
+    sonlar = [int(harakatlar_soni * ulush / jami) for ulush in ulushlar]
+    # Yaxlitlashdan qolganlari eng band kunlardan boshlab qo'shiladi
+    for i in sorted(range(kunlar), key=lambda i: -ulushlar[i])[:harakatlar_soni - sum(sonlar)]:
+        sonlar[i] += 1
+    return sonlar
+
+
+def _kun_vaqtlari(tasodif, kun, soni):
+    """Kun ichidagi `soni` ta ish vaqtini o'sish tartibida qaytaradi."""
+    soatlar = tasodif.choices(list(SOAT_ULUSHLARI), weights=list(SOAT_ULUSHLARI.values()), k=soni)
+    soniyalar = sorted(soat * 3600 + tasodif.randrange(3600) for soat in soatlar)
+    yarim_tun = timezone.make_aware(datetime.combine(kun, time.min))
+    return [yarim_tun + timedelta(seconds=s, microseconds=tasodif.randrange(1_000_000)) for s in soniyalar]
+
+
+def sintetik_ombor(birliklar=5, mahsulotlar=200, harakatlar=10_000, kunlar=365, urug=1, jarayon=None):
+    """
+    Birliklar, mahsulotlar va oxirgi `kunlar` kundagi harakatlarni yaratadi.
+
+    Mahsulotlar mashhurligi Zipf'ga o'xshash: bir nechta mahsulot harakatlarning katta
+    qismini oladi. Chiqim qoldiqdan oshsa, qoldiq miqdorida chiqim (qoldiq nol bo'lsa,
+    kirim) yoziladi — qoldiq manfiy bo'lmaydi. `jarayon(yozilgan, jami)` har bir
+    partiyadan keyin chaqiriladi. Yaratilgan harakatlar sonini qaytaradi.
+    """
+    tasodif = random.Random(urug)
+    with transaction.atomic():
+        birlik_nomlari = [BIRLIK_NOMLARI[i] if i < len(BIRLIK_NOMLARI) else harfli_nom("Birlik", i)
+                          for i in range(birliklar)]
+        birlik_kalitlari = [nomni_normallash(nom) for nom in birlik_nomlari]
+        OlchovBirligi.objects.bulk_create([OlchovBirligi(olchov_birligi=nom, qidiruv_nomi=kalit)
+                                           for nom, kalit in zip(birlik_nomlari, birlik_kalitlari)],
+                                          ignore_conflicts=True)
+        birlik_idlari = list(OlchovBirligi.objects.filter(qidiruv_nomi__in=birlik_kalitlari)
+                             .values_list('id', flat=True))
+
+        mahsulot_nomlari = [harfli_nom("Mahsulot", i) for i in range(mahsulotlar)]
+        kalitlar = [nomni_normallash(nom) for nom in mahsulot_nomlari]
+        Mahsulot.objects.bulk_create(
+            [Mahsulot(mahsulot_nomi=nom, qidiruv_nomi=kalit, olchov_birligi_id=tasodif.choice(birlik_idlari))
+             for nom, kalit in zip(mahsulot_nomlari, kalitlar)],
+            batch_size=PARTIYA_HAJMI, ignore_conflicts=True,
+        )
+        # Mavjud mahsulot boshqacha yozilgan bo'lishi mumkin ("Shakar" / "Шакар"): normallashgan nom bo'yicha
+        idlar = dict(Mahsulot.objects.filter(qidiruv_nomi__in=kalitlar).values_list('qidiruv_nomi', 'id'))
+        mahsulot_idlari = [idlar[kalit] for kalit in kalitlar]
+        tasodif.shuffle(mahsulot_idlari)
+        mashhurlik = list(accumulate(1 / (daraja + 1) ** 0.8 for daraja in range(len(mahsulot_idlari))))
+
+        qoldiqlar = dict.fromkeys(mahsulot_idlari, 0)
+        qoldiqlar.update(MahsulotBalans.objects.filter(mahsulot_nomi_id__in=mahsulot_idlari)
+                         .values_list('mahsulot_nomi_id', 'qoldiq'))
+
+        boshlanish = timezone.localdate() - timedelta(days=kunlar)
+        partiya = []
+        tarixlar = []
+        yozilgan = 0
+
+        def partiyani_yozish():
+            KirdiChiqdi.objects.bulk_create(partiya)
+            MahsulotBalansTarix.objects.bulk_create(tarixlar)
+
+        for kun_raqami, soni in enumerate(_kunlik_sonlar(harakatlar, kunlar, boshlanish)):
+            sanalar = _kun_vaqtlari(tasodif, boshlanish + timedelta(days=kun_raqami), soni)
+            tanlangan = tasodif.choices(mahsulot_idlari, cum_weights=mashhurlik, k=soni)
+            for sana, mahsulot_id in zip(sanalar, tanlangan):
+                qoldiq = qoldiqlar[mahsulot_id]
+                if tasodif.random() < KIRDI_EHTIMOLI or qoldiq == 0:
+                    amaliyot_turi, miqdor = "Kirdi", tasodif.randint(20, 200)
+                else:
+                    amaliyot_turi, miqdor = "Chiqdi", min(tasodif.randint(1, 25), qoldiq)
+                qoldiq = qoldiq + miqdor if amaliyot_turi == "Kirdi" else qoldiq - miqdor
+                qoldiqlar[mahsulot_id] = qoldiq
+                partiya.append(KirdiChiqdi(mahsulot_nomi_id=mahsulot_id, miqdor=miqdor,
+                                           amaliyot_turi=amaliyot_turi, sana=sana))
+                tarixlar.append(MahsulotBalansTarix(mahsulot_nomi_id=mahsulot_id, miqdor=miqdor, qoldiq=qoldiq,
+                                                    sana=sana, amaliyot_turi=amaliyot_turi))
+                if len(partiya) >= PARTIYA_HAJMI:
+                    partiyani_yozish()
+                    yozilgan += len(partiya)
+                    partiya, tarixlar = [], []
+                    if jarayon:
+                        jarayon(yozilgan, harakatlar)
+        if partiya:
+            partiyani_yozish()
+            yozilgan += len(partiya)
+            if jarayon:
+                jarayon(yozilgan, harakatlar)
+
+        MahsulotBalans.objects.bulk_create(
+            [MahsulotBalans(mahsulot_nomi_id=mahsulot_id, qoldiq=0) for mahsulot_id in mahsulot_idlari],
+            batch_size=PARTIYA_HAJMI, ignore_conflicts=True,
+        )
+        balanslar = list(MahsulotBalans.objects.filter(mahsulot_nomi_id__in=mahsulot_idlari))
+        for balans in balanslar:
+            balans.qoldiq = qoldiqlar[balans.mahsulot_nomi_id]
+        MahsulotBalans.objects.bulk_update(balanslar, ['qoldiq'], batch_size=PARTIYA_HAJMI)
+        KamQoldiq.qayta_hisoblash(mahsulot_idlari)
+        # Yig'indilar partiyalab qo'shilgandan ko'ra ledgerdan bitta GROUP BY bilan tezroq quriladi
+        yigindilarni_qayta_qurish(dan=boshlanish)
+        # bulk_create signal yubormaydi: keshlar shu yerda eskirgan deb belgilanadi
+        transaction.on_commit(birliklar_eskirdi)
+        transaction.on_commit(api_eskirdi)
+        transaction.on_commit(lambda: balanslar_eskirdi(mahsulot_idlari))
+    return yozilgan
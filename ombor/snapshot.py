@@ -0,0 +1,137 @@
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Min, Sum, When
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import BalansSnapshot, KirdiChiqdi
+
+PARTIYA_HAJMI = 1000
+
+
+# === Balans snapshotlari ===
+# Snapshot sanasi S — S kuni oxiridagi (mahalliy vaqt bilan keyingi yarim tungacha) qoldiq.
+# Snapshotlar ketma-ket quriladi: har bir yangi sana oldingisiga faqat oradagi harakatlarni qo'shadi.
+
+def kun_oxiri(kun):
+    """`kun` dan keyingi mahalliy yarim tun (aware datetime)."""
+    return timezone.make_aware(datetime.combine(kun + timedelta(days=1), time.min))
+
+
+def harakat_farqlari(queryset):
+    """Harakatlar querysetini {mahsulot_id: kirdi - chiqdi} lug'atiga yig'adi (bitta GROUP BY)."""
+    farqlar = (
+        queryset.order_by()
+        .values('mahsulot_nomi_id')
+        .annotate(farq=Sum(Case(When(amaliyot_turi="Kirdi", then=F('miqdor')), default=-F('miqdor'),
+                                output_field=IntegerField())))
+    )
+    return {qator['mahsulot_nomi_id']: qator['farq'] for qator in farqlar}
+
+
+def _kechikkan_harakatlar(snapshot_sana):
+    """Snapshot qurilgandan keyin yuklangan, lekin sanasi snapshotdan oldingi harakatlar."""
+    chegara = BalansSnapshot.objects.filter(sana=snapshot_sana).aggregate(Min('oxirgi_harakat_id'))
+    return KirdiChiqdi.objects.filter(id__gt=chegara['oxirgi_harakat_id__min'], sana__lt=kun_oxiri(snapshot_sana))
+
+
+def snapshotlarni_yangilash(davr=1, bugun=None):
+    """
+    Oxirgi snapshotdan keyingi yopilgan kunlar uchun har `davr` kunda snapshot quradi.
+
+    Faqat oxirgi snapshotdan keyingi harakatlar o'qiladi. Oxirgi snapshotdan oldingi
+    sanali harakat keyinroq yuklangan bo'lsa, snapshotlar shu sanadan boshlab qayta
+    quriladi. Yaratilgan snapshot sanalari sonini qaytaradi.
+    """
+    bugun = bugun or timezone.localdate()
+    # Shu ID dan kattalari keyingi ishga qoladi (ular kechikkan harakat sifatida aniqlanadi)
+    harakat_chegarasi = KirdiChiqdi.objects.aggregate(Max('id'))['id__max']
+    if harakat_chegarasi is None:
+        return 0
+
+    oxirgi = BalansSnapshot.objects.aggregate(Max('sana'))['sana__max']
+    if oxirgi is not None:
+        kechikkan = _kechikkan_harakatlar(oxirgi).aggregate(Min('sana'))['sana__min']
+        if kechikkan is not None:
+            BalansSnapshot.objects.filter(sana__gte=timezone.localdate(kechikkan)).delete()
+            oxirgi = BalansSnapshot.objects.aggregate(Max('sana'))['sana__max']
+
+    if oxirgi is None:
+        birinchi = KirdiChiqdi.objects.aggregate(Min('sana'))['sana__min']
+        balanslar = {}
+        sana = timezone.localdate(birinchi) + timedelta(days=davr - 1)
+    else:
+        balanslar = dict(BalansSnapshot.objects.filter(sana=oxirgi).values_list('mahsulot_nomi_id', 'qoldiq'))
+        sana = oxirgi + timedelta(days=davr)
+
+    boshlanish = kun_oxiri(oxirgi) if oxirgi is not None else None
+    yaratildi = 0
+    while sana < bugun:
+        oxiri = kun_oxiri(sana)
+        harakatlar = KirdiChiqdi.objects.filter(id__lte=harakat_chegarasi, sana__lt=oxiri)
+        if boshlanish is not None:
+            harakatlar = harakatlar.filter(sana__gte=boshlanish)
+        for mahsulot_id, farq in harakat_farqlari(harakatlar).items():
+            balanslar[mahsulot_id] = balanslar.get(mahsulot_id, 0) + farq
+        with transaction.atomic():
+            BalansSnapshot.objects.bulk_create(
+                [BalansSnapshot(mahsulot_nomi_id=mahsulot_id, sana=sana, qoldiq=qoldiq,
+                                oxirgi_harakat_id=harakat_chegarasi)
+                 for mahsulot_id, qoldiq in balanslar.items()],
+                batch_size=PARTIYA_HAJMI,
+            )
+        yaratildi += 1
+        boshlanish = oxiri
+        sana += timedelta(days=davr)
+    return yaratildi
+
+
+def sanani_oqish(matn):
+    """'YYYY-MM-DD' ni kun (date), to'liq ISO 8601 qiymatni vaqt (datetime) sifatida o'qiydi; xato bo'lsa None."""
+    matn = (matn or '').strip()
+    try:
+        return parse_date(matn) or parse_datetime(matn)
+    except ValueError:
+        return None
+
+
+def balance_as_of(sana, products=None):
+    """
+    `sana` holatidagi qoldiqlarni {mahsulot_id: qoldiq} ko'rinishida qaytaradi.
+
+    `sana` — kun (shu kun oxiridagi qoldiq) yoki aniq vaqt. Eng yaqin oldingi snapshot
+    o'qiladi va unga faqat snapshotdan keyingi hamda kechiktirib yuklangan harakatlar
+    qo'shiladi, shuning uchun hisob tarixning uzunligiga bog'liq emas. `products` —
+    mahsulot ID lari (yoki obyektlari); ko'rsatilmasa, barcha mahsulotlar.
+    """
+    if isinstance(sana, datetime):
+        lahza = sana if timezone.is_aware(sana) else timezone.make_aware(sana)
+        harakatlar = KirdiChiqdi.objects.filter(sana__lte=lahza)
+        # Snapshot kuni lahzadan oldin to'liq yopilgan bo'lishi kerak
+        oxirgi_kun = timezone.localdate(lahza) - timedelta(days=1)
+    elif isinstance(sana, date):
+        harakatlar = KirdiChiqdi.objects.filter(sana__lt=kun_oxiri(sana))
+        oxirgi_kun = sana
+    else:
+        raise TypeError("sana date yoki datetime bo'lishi kerak")
+
+    snapshotlar = BalansSnapshot.objects.all()
+    if products is not None:
+        harakatlar = harakatlar.filter(mahsulot_nomi_id__in=products)
+        snapshotlar = snapshotlar.filter(mahsulot_nomi_id__in=products)
+
+    natija = {}
+    snapshot_sana = BalansSnapshot.objects.filter(sana__lte=oxirgi_kun).aggregate(Max('sana'))['sana__max']
+    farq_toplamlari = [harakatlar]
+    if snapshot_sana is not None:
+        natija = dict(snapshotlar.filter(sana=snapshot_sana).values_list('mahsulot_nomi_id', 'qoldiq'))
+        kechikkanlar = _kechikkan_harakatlar(snapshot_sana)
+        if products is not None:
+            kechikkanlar = kechikkanlar.filter(mahsulot_nomi_id__in=products)
+        # Ikki alohida so'rov: snapshotdan keyingi kunlar (sana indeksi) va kechikkanlar (ID oralig'i)
+        farq_toplamlari = [harakatlar.filter(sana__gte=kun_oxiri(snapshot_sana)), kechikkanlar]
+    for toplam in farq_toplamlari:
+        for mahsulot_id, farq in harakat_farqlari(toplam).items():
+            natija[mahsulot_id] = natija.get(mahsulot_id, 0) + farq
+    return natija
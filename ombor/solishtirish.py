@@ -0,0 +1,112 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Max, Sum, When
+
+from .balans_keshi import balans_tranzaksiyasi
+from .kesh import api_eskirdi
+from .models import KamQoldiq, KirdiChiqdi, MahsulotBalans, MahsulotBalansTarix
+
+PARTIYA_HAJMI = 200  # Bitta vazifa yoki tuzatish tranzaksiyasidagi mahsulotlar soni
+
+
+# === Balanslarni ledger bilan solishtirish ===
+# Kutilgan qoldiq — mahsulotning barcha KirdiChiqdi harakatlari yig'indisi. U joriy
+# balans qatori(lari) va oxirgi tarix yozuvidagi qoldiq bilan solishtiriladi.
+# Mahsulotlar partiyalarga bo'linadi: har bir partiya alohida so'rovlar bilan o'qiladi,
+# shuning uchun xotira ledger hajmiga emas, partiya hajmiga bog'liq.
+
+def _ledger_yigindilari(mahsulot_idlari):
+    """{mahsulot_id: (kirdi - chiqdi, harakatlar soni)} — partiya bo'yicha bitta GROUP BY."""
+    qatorlar = (
+        KirdiChiqdi.objects.filter(mahsulot_nomi_id__in=mahsulot_idlari)
+        .order_by()
+        .values('mahsulot_nomi_id')
+        .annotate(farq=Sum(Case(When(amaliyot_turi="Kirdi", then=F('miqdor')), default=-F('miqdor'),
+                                output_field=IntegerField())),
+                  soni=Count('id'))
+    )
+    return {qator['mahsulot_nomi_id']: (qator['farq'], qator['soni']) for qator in qatorlar}
+
+
+def _oxirgi_tarix_qoldiqlari(mahsulot_idlari):
+    """{mahsulot_id: oxirgi tarix yozuvidagi qoldiq} — (mahsulot, id) indeksi bo'yicha."""
+    oxirgi_idlar = (
+        MahsulotBalansTarix.objects.filter(mahsulot_nomi_id__in=mahsulot_idlari)
+        .order_by()
+        .values('mahsulot_nomi_id')
+        .annotate(oxirgi_id=Max('id'))
+        .values('oxirgi_id')
+    )
+    return dict(MahsulotBalansTarix.objects.filter(id__in=oxirgi_idlar).values_list('mahsulot_nomi_id', 'qoldiq'))
+
+
+def partiyani_tekshirish(mahsulot_idlari):
+    """
+    Mahsulotlar partiyasini tekshiradi.
+
+    (tekshirilgan harakatlar soni, nomuvofiqliklar) qaytaradi. Har bir nomuvofiqlik —
+    (mahsulot_id, kutilgan qoldiq, balans qatorlaridagi qoldiqlar, oxirgi tarix qoldig'i);
+    balans yoki tarix bo'lmasa, mos ravishda bo'sh ro'yxat yoki None.
+    """
+    ledger = _ledger_yigindilari(mahsulot_idlari)
+    tarix = _oxirgi_tarix_qoldiqlari(mahsulot_idlari)
+    balanslar = defaultdict(list)
+    for mahsulot_id, qoldiq in (MahsulotBalans.objects.filter(mahsulot_nomi_id__in=mahsulot_idlari)
+                                .order_by('id').values_list('mahsulot_nomi_id', 'qoldiq')):
+        balanslar[mahsulot_id].append(qoldiq)
+
+    nomuvofiqlar = []
+    for mahsulot_id in mahsulot_idlari:
+        kutilgan, soni = ledger.get(mahsulot_id, (0, 0))
+        qoldiqlar = balanslar.get(mahsulot_id, [])
+        tarix_qoldiq = tarix.get(mahsulot_id)
+        # Harakati yo'q mahsulotning balans qatori bo'lmasligi yoki nolga teng bo'lishi mumkin
+        balans_togri = qoldiqlar == [kutilgan] or (not qoldiqlar and kutilgan == 0)
+        tarix_togri = tarix_qoldiq == kutilgan or (tarix_qoldiq is None and soni == 0)
+        if not (balans_togri and tarix_togri):
+            nomuvofiqlar.append((mahsulot_id, kutilgan, qoldiqlar, tarix_qoldiq))
+    return sum(soni for _, soni in ledger.values()), nomuvofiqlar
+
+
+def balanslarni_tuzatish(mahsulot_idlari):
+    """
+    Mahsulotlar balansini ledger yig'indisiga tenglashtiradi va tuzatilgan qatorlar sonini qaytaradi.
+
+    Takroriy balans qatorlaridan eng kichik ID lisi qoldiriladi. Kutilgan qoldiq
+    tranzaksiya ichida, balans qatorlari qulflangandan keyin qayta hisoblanadi:
+    tekshiruvdan keyin kelgan harakatlar yo'qolmaydi. Ledger yig'indisi manfiy bo'lgan
+    mahsulotlar tuzatilmaydi (qoldiq manfiy bo'la olmaydi). Tarix yozuvlari o'zgartirilmaydi.
+    """
+    with balans_tranzaksiyasi() as qoldiqlarni_yozish:
+        balanslar = MahsulotBalans.objects.filter(mahsulot_nomi_id__in=mahsulot_idlari)
+        # Bo'sh UPDATE balans qatorlarini qulflaydi (SQLite'da yozish qulfini oladi)
+        balanslar.update(qoldiq=F('qoldiq'))
+        ledger = _ledger_yigindilari(mahsulot_idlari)
+        mavjud = defaultdict(list)
+        for balans in balanslar.order_by('id'):
+            mavjud[balans.mahsulot_nomi_id].append(balans)
+
+        yangilanadi = []
+        yaratiladi = []
+        ortiqcha_idlar = []
+        for mahsulot_id in mahsulot_idlari:
+            kutilgan = ledger.get(mahsulot_id, (0, 0))[0]
+            qatorlar = mavjud.get(mahsulot_id, [])
+            if kutilgan < 0:
+                continue
+            ortiqcha_idlar.extend(balans.id for balans in qatorlar[1:])
+            if not qatorlar:
+                if kutilgan:
+                    yaratiladi.append(MahsulotBalans(mahsulot_nomi_id=mahsulot_id, qoldiq=kutilgan))
+            elif qatorlar[0].qoldiq != kutilgan or len(qatorlar) > 1:
+                qatorlar[0].qoldiq = kutilgan
+                yangilanadi.append(qatorlar[0])
+
+        MahsulotBalans.objects.filter(id__in=ortiqcha_idlar).delete()
+        MahsulotBalans.objects.bulk_update(yangilanadi, ['qoldiq'])
+        MahsulotBalans.objects.bulk_create(yaratiladi)
+        qoldiqlarni_yozish({balans.mahsulot_nomi_id: balans.qoldiq for balans in yangilanadi + yaratiladi})
+        KamQoldiq.qayta_hisoblash(balans.mahsulot_nomi_id for balans in yangilanadi + yaratiladi)
+        transaction.on_commit(api_eskirdi)
+    return len(yangilanadi) + len(yaratiladi)
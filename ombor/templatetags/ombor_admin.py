@@ -0,0 +1,110 @@
+from datetime import date, datetime, timedelta
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.contrib.admin.utils import get_fields_from_path
+from django.db import models
+from django.utils import formats, timezone
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+register = template.Library()
+
+
+# === Sana ierarxiyasi ===
+# Django'ning date_hierarchy tegi yil/oy/kun ro'yxatini har bir qator uchun sanani
+# qisqartirib, DISTINCT bilan butun jadvaldan oladi, chegaralar uchun esa MIN va MAX ni
+# bitta so'rovda so'raydi (SQLite bunda butun indeksni o'qiydi). Bu yerda chegaralar
+# ORDER BY ... LIMIT 1 bilan, har bir davr esa sana indeksi bo'yicha bitta exists() bilan
+# topiladi; bu arxivli tarixning UNION ALL VIEW ida ham ishlaydi.
+
+def sana_oraligi(queryset, maydon):
+    """Querysetdagi eng kichik va eng katta sana (bo'sh bo'lsa (None, None))."""
+    sanalar = queryset.filter(**{f'{maydon}__isnull': False}).values_list(maydon, flat=True)
+    return sanalar.order_by(maydon).first(), sanalar.order_by(f'-{maydon}').first()
+
+
+def _keyingi_davr(boshi, davr):
+    if davr == 'year':
+        return boshi.replace(year=boshi.year + 1)
+    if davr == 'month':
+        return boshi.replace(year=boshi.year + boshi.month // 12, month=boshi.month % 12 + 1)
+    ertasi = boshi.date() + timedelta(days=1)
+    return datetime(ertasi.year, ertasi.month, ertasi.day, tzinfo=boshi.tzinfo)
+
+
+def sana_davrlari(queryset, maydon, davr):
+    """Querysetda yozuvi bor yillar, oylar yoki kunlar boshlari (mahalliy vaqt), o'sish tartibida."""
+    birinchi, oxirgi = sana_oraligi(queryset, maydon)
+    if birinchi is None:
+        return []
+    birinchi, oxirgi = timezone.localtime(birinchi), timezone.localtime(oxirgi)
+    boshi = datetime(birinchi.year, 1 if davr == 'year' else birinchi.month,
+                     birinchi.day if davr == 'day' else 1, tzinfo=birinchi.tzinfo)
+    davrlar = []
+    while boshi <= oxirgi:
+        keyingi = _keyingi_davr(boshi, davr)
+        if queryset.filter(**{f'{maydon}__gte': boshi, f'{maydon}__lt': keyingi}).exists():
+            davrlar.append(boshi)
+        boshi = keyingi
+    return davrlar
+
+
+def sana_ierarxiyasi(cl):
+    """date_hierarchy tegi bilan bir xil natija; DateTimeField dan boshqa maydonlar uchun Django'niki."""
+    maydon = cl.date_hierarchy
+    if not maydon or not isinstance(get_fields_from_path(cl.model, maydon)[-1], models.DateTimeField):
+        return date_hierarchy(cl)
+    yil_maydoni, oy_maydoni, kun_maydoni = f'{maydon}__year', f'{maydon}__month', f'{maydon}__day'
+    yil, oy, kun = cl.params.get(yil_maydoni), cl.params.get(oy_maydoni), cl.params.get(kun_maydoni)
+
+    def havola(filtrlar):
+        return cl.get_query_string(filtrlar, [f'{maydon}__'])
+
+    if not (yil or oy or kun):
+        # Barcha yozuvlar bitta yil (oy) ichida bo'lsa, shu darajadan boshlanadi
+        birinchi, oxirgi = sana_oraligi(cl.queryset, maydon)
+        if birinchi is not None:
+            birinchi, oxirgi = timezone.localtime(birinchi), timezone.localtime(oxirgi)
+            if birinchi.year == oxirgi.year:
+                yil = birinchi.year
+                if birinchi.month == oxirgi.month:
+                    oy = birinchi.month
+
+    if yil and oy and kun:
+        sana = date(int(yil), int(oy), int(kun))
+        return {
+            'show': True,
+            'back': {'link': havola({yil_maydoni: yil, oy_maydoni: oy}),
+                     'title': capfirst(formats.date_format(sana, 'YEAR_MONTH_FORMAT'))},
+            'choices': [{'title': capfirst(formats.date_format(sana, 'MONTH_DAY_FORMAT'))}],
+        }
+    if yil and oy:
+        return {
+            'show': True,
+            'back': {'link': havola({yil_maydoni: yil}), 'title': str(yil)},
+            'choices': [{'link': havola({yil_maydoni: yil, oy_maydoni: oy, kun_maydoni: sana.day}),
+                         'title': capfirst(formats.date_format(sana, 'MONTH_DAY_FORMAT'))}
+                        for sana in sana_davrlari(cl.queryset, maydon, 'day')],
+        }
+    if yil:
+        return {
+            'show': True,
+            'back': {'link': havola({}), 'title': _('All dates')},
+            'choices': [{'link': havola({yil_maydoni: yil, oy_maydoni: sana.month}),
+                         'title': capfirst(formats.date_format(sana, 'YEAR_MONTH_FORMAT'))}
+                        for sana in sana_davrlari(cl.queryset, maydon, 'month')],
+        }
+    return {
+        'show': True,
+        'back': None,
+        'choices': [{'link': havola({yil_maydoni: str(sana.year)}), 'title': str(sana.year)}
+                    for sana in sana_davrlari(cl.queryset, maydon, 'year')],
+    }
+
+
+@register.tag(name='sana_ierarxiyasi')
+def sana_ierarxiyasi_tegi(parser, token):
+    return InclusionAdminNode(parser, token, func=sana_ierarxiyasi, template_name='date_hierarchy.html',
+                              takes_context=False)
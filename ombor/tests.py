@@ -1,3 +1,905 @@
-from django.test import TestCase
+import contextlib
+import os
+import pickle
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import DatabaseError, connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Case, F, Sum, When
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_otp import DEVICE_ID_SESSION_KEY
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from .arxiv import arxiv_chegarasi, atarix_modeli, tarix_modeli, tarixni_arxivlash
+from .balans_keshi import BALANS_KESHI, keshdagi_qoldiqlar
+from .eksport_vazifalari import vazifa_qoshish, vazifani_bajarish, vazifani_olish
+from .exports import eksport_yozish
+from .ingest import harakatlarni_joylash
+from .kirish import KIRISH_KESHI, KeshlanganModelBackend
+from .pagination import TaxminiyPaginator, kursor_yasash, taxminiy_son
+from .qidiruv import FTS_JADVALI, mahsulot_idlari_sorovi, qidiruv_indeksini_qayta_qurish
+from .sessiyalar import cached_db as cached_db_sessiyalar, db as db_sessiyalar
+from .snapshot import balance_as_of, kun_oxiri, snapshotlarni_yangilash
+from .templatetags.ombor_admin import sana_ierarxiyasi
+from .models import (BalansSnapshot, CustomUser, EksportVazifasi, HarakatYigindisi, KamQoldiq, KirdiChiqdi, KirdiChiqdiForm, Mahsulot, MahsulotBalans,
+                     MahsulotBalansTarix, MahsulotBalansTarixArxiv, MahsulotBalansTarixHammasi, OlchovBirligi)
+from .yigindilar import davr_boshi, yigindilarni_qayta_qurish
+
+
+def _vaqt(yil, oy, kun, soat=12):
+    return timezone.make_aware(datetime(yil, oy, kun, soat))
+
+
+def _admin_mijozi():
+    """OTP bilan tasdiqlangan superuser sessiyasi."""
+    # Bekor qilingan testlardagi foydalanuvchi ID lari qayta beriladi: keshdagi eskisi ishlatilmasin
+    caches[KIRISH_KESHI].clear()
+    admin = CustomUser.objects.create_superuser("admin", "admin@example.com", "admin")
+    mijoz = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+    mijoz.force_login(admin)
+    sessiya = mijoz.session
+    sessiya[DEVICE_ID_SESSION_KEY] = TOTPDevice.objects.create(user=admin, name="test").persistent_id
+    sessiya.save()
+    return mijoz
+
+
+def _ledger(**filtrlar):
+    """{mahsulot_id: kirdi - chiqdi} — xom ledgerdan."""
+    return dict(KirdiChiqdi.objects.filter(**filtrlar).values_list('mahsulot_nomi_id').annotate(
+        qoldiq=Sum(Case(When(amaliyot_turi="Kirdi", then=F('miqdor')), default=-F('miqdor')))))
+
+
+# === Harakatlar yig'indilari ===
+class HarakatYigindisiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        birlik = OlchovBirligi.objects.create(olchov_birligi="Kg")
+        cls.olma = Mahsulot.objects.create(mahsulot_nomi="Olma", olchov_birligi=birlik)
+        cls.nok = Mahsulot.objects.create(mahsulot_nomi="Nok", olchov_birligi=birlik)
+
+    def _ledgerdan(self):
+        """Xom ledgerdan hisoblangan {(mahsulot_id, davr_turi, davr): (kirdi, chiqdi, soni)}."""
+        kutilgan = defaultdict(lambda: [0, 0, 0])
+        for harakat in KirdiChiqdi.objects.all():
+            for davr_turi, davr in HarakatYigindisi.davrlari(harakat.sana):
+                qator = kutilgan[harakat.mahsulot_nomi_id, davr_turi, davr]
+                qator[0 if harakat.amaliyot_turi == "Kirdi" else 1] += harakat.miqdor
+                qator[2] += 1
+        return {kalit: tuple(qiymat) for kalit, qiymat in kutilgan.items() if qiymat[2]}
+
+    def _yigindilar(self):
+        return {
+            (y.mahsulot_nomi_id, y.davr_turi, y.davr): (y.kirdi_sum, y.chiqdi_sum, y.harakatlar_soni)
+            for y in HarakatYigindisi.objects.all() if y.harakatlar_soni
+        }
+
+    def _harakatlar(self):
+        # Hafta (2024-01-29 dushanba) va oy chegaralarini kesib o'tadi; 00:00 Toshkent vaqti UTC bo'yicha oldingi kun
+        KirdiChiqdi.objects.create(mahsulot_nomi=self.olma, miqdor=100, amaliyot_turi="Kirdi", sana=_vaqt(2024, 1, 28))
+        KirdiChiqdi.objects.create(mahsulot_nomi=self.olma, miqdor=30, amaliyot_turi="Chiqdi", sana=_vaqt(2024, 1, 29))
+        KirdiChiqdi.objects.create(mahsulot_nomi=self.nok, miqdor=50, amaliyot_turi="Kirdi",
+                                   sana=_vaqt(2024, 2, 1, soat=0))
+        harakatlarni_joylash([
+            {'mahsulot_nomi': "Olma", 'miqdor': 5, 'amaliyot_turi': "Chiqdi", 'sana': "2024-01-31T23:59:00"},
+            {'mahsulot_nomi': "Nok", 'miqdor': 7, 'amaliyot_turi': "Kirdi", 'sana': "2024-02-01T08:00:00"},
+            {'mahsulot_nomi': "Nok", 'miqdor': 3, 'amaliyot_turi': "Chiqdi", 'sana': "2024-02-05T08:00:00"},
+        ])
+
+    def test_yigindilar_ledgerga_mos(self):
+        self._harakatlar()
+        self.assertEqual(self._yigindilar(), self._ledgerdan())
+        self.assertEqual(
+            HarakatYigindisi.objects.values_list('kirdi_sum', 'chiqdi_sum', 'harakatlar_soni')
+            .get(mahsulot_nomi=self.olma, davr_turi="oy", davr=datetime(2024, 1, 1).date()),
+            (100, 35, 3),
+        )
+
+    def test_ochirilgan_harakat_ayiriladi(self):
+        self._harakatlar()
+        KirdiChiqdi.objects.filter(mahsulot_nomi=self.nok, amaliyot_turi="Chiqdi").get().delete()
+        self.assertEqual(self._yigindilar(), self._ledgerdan())
+
+    def test_qayta_qurish(self):
+        self._harakatlar()
+        kutilgan = self._ledgerdan()
+        HarakatYigindisi.objects.update(kirdi_sum=0)
+        dan = datetime(2024, 2, 3).date()
+        yigindilarni_qayta_qurish(dan=dan)
+
+        # `dan` ni o'z ichiga olgan hafta va oy ham qayta quriladi, oldingi kunlar tegmaydi
+        def qayta_qurilgan(yigindilar):
+            return {k: v for k, v in yigindilar.items() if k[2] >= davr_boshi(k[1], dan)}
+
+        self.assertEqual(qayta_qurilgan(self._yigindilar()), qayta_qurilgan(kutilgan))
+        self.assertIn((self.olma.id, "hafta", datetime(2024, 1, 29).date()), qayta_qurilgan(kutilgan))
+        self.assertEqual(self._yigindilar()[self.nok.id, "kun", datetime(2024, 2, 1).date()], (0, 0, 2))
+        yigindilarni_qayta_qurish()
+        self.assertEqual(self._yigindilar(), kutilgan)
+
+
+# === Ommaviy kirim-chiqim yuklash ===
+class OmmaviyYuklashTest(TestCase):
+    """harakatlarni_joylash KirdiChiqdi.save() ni chetlab o'tadi: qoldiq, tarix, yig'indi va kam qoldiqlar o'zida."""
+
+    @classmethod
+    def setUpTestData(cls):
+        birlik = OlchovBirligi.objects.create(olchov_birligi="Dona", standart_minimal_qoldiq=10)
+        cls.olma = Mahsulot.objects.create(mahsulot_nomi="Olma", olchov_birligi=birlik)
+        cls.nok = Mahsulot.objects.create(mahsulot_nomi="Nok", olchov_birligi=birlik)
+        KirdiChiqdi.objects.create(mahsulot_nomi=cls.olma, miqdor=20, amaliyot_turi="Kirdi", sana=_vaqt(2024, 1, 1))
+
+    def _holat(self):
+        return (list(KirdiChiqdi.objects.values_list('id', flat=True)),
+                list(MahsulotBalansTarix.objects.values_list('id', flat=True)),
+                dict(MahsulotBalans.objects.values_list('mahsulot_nomi_id', 'qoldiq')),
+                list(HarakatYigindisi.objects.values_list('id', 'kirdi_sum', 'chiqdi_sum')),
+                dict(KamQoldiq.objects.values_list('mahsulot_nomi_id', 'qoldiq')))
+
+    def _xatolar(self, qatorlar):
+        oldin = self._holat()
+        with self.assertRaises(ValidationError) as xato:
+            harakatlarni_joylash(qatorlar)
+        self.assertEqual(self._holat(), oldin)
+        return xato.exception.messages
+
+    def test_xatoli_fayl_butunlay_bekor_qilinadi(self):
+        xatolar = self._xatolar([
+            {'mahsulot_nomi': "Olma", 'miqdor': 5, 'amaliyot_turi': "Kirdi"},
+            {'mahsulot_nomi': "Anor", 'miqdor': 5, 'amaliyot_turi': "Kirdi"},
+            {'mahsulot_nomi': str(self.nok.id), 'miqdor': 3, 'amaliyot_turi': "Kirdi"},
+        ])
+        self.assertEqual(xatolar, ["2-qator: 'Anor' mahsuloti topilmadi!"])
+
+    def test_ascii_bolmagan_raqam_nom_sifatida_qidiriladi(self):
+        # "²".isdigit() True, lekin int("²") ValueError: ID sifatida emas, nom sifatida qidiriladi
+        xatolar = self._xatolar([
+            {'mahsulot_nomi': "²", 'miqdor': 1, 'amaliyot_turi': "Kirdi"},
+            {'mahsulot_nomi': "٣", 'miqdor': 1, 'amaliyot_turi': "Kirdi"},
+        ])
+        self.assertEqual(xatolar, ["1-qator: '²' mahsuloti topilmadi!", "2-qator: '٣' mahsuloti topilmadi!"])
+
+    def test_manfiy_qoldiq_rad_etiladi(self):
+        # Qatorlar sana tartibida hisoblanadi: keyinroq kelgan kirim oldingi chiqimni qoplamaydi
+        xatolar = self._xatolar([
+            {'mahsulot_nomi': "Olma", 'miqdor': 10, 'amaliyot_turi': "Kirdi", 'sana': "2024-02-02T10:00:00"},
+            {'mahsulot_nomi': "Olma", 'miqdor': 25, 'amaliyot_turi': "Chiqdi", 'sana': "2024-02-01T10:00:00"},
+        ])
+        self.assertEqual(len(xatolar), 1)
+        self.assertTrue(xatolar[0].startswith("2-qator: omborda 'Olma' mahsuloti yetarli emas"))
+
+    def test_kasr_miqdor_rad_etiladi(self):
+        xatolar = self._xatolar([
+            {'mahsulot_nomi': "Olma", 'miqdor': 2.7, 'amaliyot_turi': "Kirdi"},
+            {'mahsulot_nomi': "Olma", 'miqdor': "2.7", 'amaliyot_turi': "Kirdi"},
+            {'mahsulot_nomi': "Olma", 'miqdor': True, 'amaliyot_turi': "Kirdi"},
+            {'mahsulot_nomi': "Olma", 'miqdor': "3", 'amaliyot_turi': "Kirdi"},
+        ])
+        self.assertEqual(xatolar, [f"{raqam}-qator: mahsulot miqdori musbat butun son bo'lishi kerak!"
+                                   for raqam in (1, 2, 3)])
+
+    def test_mavjud_bolmagan_sana_rad_etiladi(self):
+        xatolar = self._xatolar([
+            {'mahsulot_nomi': "Olma", 'miqdor': 1, 'amaliyot_turi': "Kirdi", 'sana': "2026-02-30T10:00:00"},
+        ])
+        self.assertEqual(xatolar, ["1-qator: sana noto'g'ri (2026-02-30T10:00:00)."])
+
+    def test_balans_tarix_va_kam_qoldiq_ledgerga_mos(self):
+        saqlandi = harakatlarni_joylash([
+            {'mahsulot_nomi': "Olma", 'miqdor': "15", 'amaliyot_turi': "Chiqdi", 'sana': "2024-02-01T10:00:00"},
+            {'mahsulot_nomi': "Nok", 'miqdor': 40, 'amaliyot_turi': "Kirdi", 'sana': "2024-02-01T09:00:00"},
+            {'mahsulot_nomi': "nok", 'miqdor': 8, 'amaliyot_turi': "chiqdi", 'sana': "2024-02-03T09:00:00"},
+            {'mahsulot_nomi': "Olma", 'miqdor': 2, 'amaliyot_turi': "Kirdi", 'sana': "2024-02-02T10:00:00"},
+        ])
+        self.assertEqual(saqlandi, 4)
+        kutilgan = _ledger()
+        self.assertEqual(kutilgan, {self.olma.id: 7, self.nok.id: 32})
+        self.assertEqual(dict(MahsulotBalans.objects.values_list('mahsulot_nomi_id', 'qoldiq')), kutilgan)
+        for mahsulot_id, qoldiq in kutilgan.items():
+            oxirgi = MahsulotBalansTarix.objects.filter(mahsulot_nomi_id=mahsulot_id).order_by('-sana', '-id').first()
+            self.assertEqual(oxirgi.qoldiq, qoldiq)
+        self.assertEqual(
+            HarakatYigindisi.objects.values_list('kirdi_sum', 'chiqdi_sum', 'harakatlar_soni')
+            .get(mahsulot_nomi=self.olma, davr_turi="oy", davr=datetime(2024, 2, 1).date()),
+            (2, 15, 2),
+        )
+        # Standart chegara 10: Olma (7) kam, Nok (32) emas
+        self.assertEqual(dict(KamQoldiq.objects.values_list('mahsulot_nomi_id', 'qoldiq')), {self.olma.id: 7})
+
+
+# === Balans keshi ===
+class BalansKeshiTest(TransactionTestCase):
+    """Postinglar o'z tranzaksiyasida (commit bilan) ishlaydi, shuning uchun TransactionTestCase."""
+
+    def setUp(self):
+        caches[BALANS_KESHI].clear()
+        birlik = OlchovBirligi.objects.create(olchov_birligi="Dona")
+        self.mahsulot_idlari = [Mahsulot.objects.create(mahsulot_nomi=nom, olchov_birligi=birlik).id
+                                for nom in ("Olma", "Nok", "Uzum")]
+        for mahsulot_id in self.mahsulot_idlari:
+            KirdiChiqdi.objects.create(mahsulot_nomi_id=mahsulot_id, miqdor=20, amaliyot_turi="Kirdi")
+
+    def _ishchi(self, urug, natijalar, xatolar):
+        """Admin kabi: forma tekshiruvi (balans keshidan), keyin KirdiChiqdi.save()."""
+        tasodif = random.Random(urug)
+        try:
+            for _ in range(40):
+                forma = KirdiChiqdiForm({
+                    'mahsulot_nomi': tasodif.choice(self.mahsulot_idlari),
+                    'miqdor': tasodif.randint(1, 15),
+                    'amaliyot_turi': "Kirdi" if tasodif.random() < 0.4 else "Chiqdi",
+                })
+                if not forma.is_valid():
+                    natijalar['forma_rad_etdi'] += 1
+                    continue
+                try:
+                    forma.save()
+                except ValidationError:
+                    natijalar['baza_rad_etdi'] += 1
+                else:
+                    natijalar['saqlandi'] += 1
+        except Exception as xato:
+            xatolar.append(xato)
+        finally:
+            connections.close_all()
+
+    def test_parallel_postinglar_keshni_bazaga_mos_qoldiradi(self):
+        natijalar, xatolar = defaultdict(int), []
+        ishchilar = [threading.Thread(target=self._ishchi, args=(urug, natijalar, xatolar)) for urug in range(4)]
+        for ishchi in ishchilar:
+            ishchi.start()
+        for ishchi in ishchilar:
+            ishchi.join()
+
+        self.assertEqual(xatolar, [])
+        self.assertGreater(natijalar['saqlandi'], 0)
+        self.assertGreater(natijalar['forma_rad_etdi'], 0)
+        balanslar = dict(MahsulotBalans.objects.values_list('mahsulot_nomi_id', 'qoldiq'))
+        self.assertEqual(balanslar, _ledger())
+        keshda, topilmadi = keshdagi_qoldiqlar(self.mahsulot_idlari)
+        self.assertEqual(topilmadi, [])
+        self.assertEqual(keshda, balanslar)
+
+    def test_bekor_qilingan_posting_keshdan_ochiriladi(self):
+        olma = self.mahsulot_idlari[0]
+        self.assertEqual(MahsulotBalans.joriy_qoldiqlar([olma]), {olma: 20})
+        # Balans yangilangandan keyin, tranzaksiya ichida xato
+        with mock.patch.object(HarakatYigindisi, 'harakatlarni_qoshish', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                KirdiChiqdi.objects.create(mahsulot_nomi_id=olma, miqdor=5, amaliyot_turi="Chiqdi")
+        self.assertEqual(keshdagi_qoldiqlar([olma]), ({}, [olma]))
+        self.assertEqual(MahsulotBalans.joriy_qoldiqlar([olma]), {olma: 20})
+
+
+# === Nom kaliti migratsiyasi (0009) ===
+class NomKalitiMigratsiyasiTest(TransactionTestCase):
+    """0009 normallashganda takrorlanadigan eski nomlarga "<kalit> <id>" beradi; ular keyin ham saqlanadi."""
+
+    def _kochirish(self, nishon):
+        executor = MigrationExecutor(connection)
+        executor.migrate(nishon)
+        return executor.loader.project_state(nishon).apps
+
+    def tearDown(self):
+        self._kochirish(MigrationExecutor(connection).loader.graph.leaf_nodes('ombor'))
+
+    def test_takroriy_eski_nomlar_saqlanadi(self):
+        apps = self._kochirish([('ombor', '0008_mahsulot_qidiruv')])
+        EskiBirlik, EskiMahsulot = apps.get_model('ombor', 'OlchovBirligi'), apps.get_model('ombor', 'Mahsulot')
+        kg = EskiBirlik.objects.create(olchov_birligi="Kg")
+        kg_kirill = EskiBirlik.objects.create(olchov_birligi="Кг")
+        shakar = EskiMahsulot.objects.create(mahsulot_nomi="Shakar", qidiruv_nomi="shakar", olchov_birligi=kg)
+        shakar_kirill = EskiMahsulot.objects.create(mahsulot_nomi="Шакар", qidiruv_nomi="shakar",
+                                                    olchov_birligi=kg_kirill)
+        self._kochirish(MigrationExecutor(connection).loader.graph.leaf_nodes('ombor'))
+
+        birlik = OlchovBirligi.objects.get(pk=kg_kirill.pk)
+        self.assertEqual(birlik.qidiruv_nomi, f"kg {kg_kirill.pk}")
+        # Admin formasi kabi: full_clean(), keyin save()
+        birlik.standart_minimal_qoldiq = 5
+        birlik.full_clean()
+        birlik.save()
+        mahsulot = Mahsulot.objects.get(pk=shakar_kirill.pk)
+        mahsulot.minimal_qoldiq = 3
+        mahsulot.full_clean()
+        mahsulot.save()
+        self.assertEqual(
+            list(Mahsulot.objects.order_by('id').values_list('qidiruv_nomi', 'minimal_qoldiq')),
+            [("shakar", None), (f"shakar {shakar_kirill.pk}", 3)])
+        self.assertEqual(qidiruv_indeksini_qayta_qurish(), 0)
+
+        # Nomi o'zgarsa oddiy kalit beriladi; birinchi yozuv nomini olish esa hamon taqiqlangan
+        mahsulot.mahsulot_nomi = "Qand"
+        mahsulot.save()
+        self.assertEqual(Mahsulot.objects.get(pk=mahsulot.pk).qidiruv_nomi, "qand")
+        mahsulot.mahsulot_nomi = "Shakar"
+        with self.assertRaises(ValidationError):
+            mahsulot.save()
+        self.assertEqual(Mahsulot.objects.get(pk=shakar.pk).qidiruv_nomi, "shakar")
+
+
+    def _fts_idlari(self, nom):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {FTS_JADVALI} WHERE {FTS_JADVALI} MATCH %s ORDER BY rowid', [f'"{nom}"'])
+            return [qator[0] for qator in cursor.fetchall()]
+
+    def test_fts_triggerlari_qayta_yaratilgan_jadvalda_ishlaydi(self):
+        apps = self._kochirish([('ombor', '0008_mahsulot_qidiruv')])
+        EskiBirlik, EskiMahsulot = apps.get_model('ombor', 'OlchovBirligi'), apps.get_model('ombor', 'Mahsulot')
+        kg = EskiBirlik.objects.create(olchov_birligi="Kg")
+        shakar = EskiMahsulot.objects.create(mahsulot_nomi="Shakar", qidiruv_nomi="shakar", olchov_birligi=kg)
+        shakar_kirill = EskiMahsulot.objects.create(mahsulot_nomi="Шакар", qidiruv_nomi="shakar", olchov_birligi=kg)
+        self._kochirish(MigrationExecutor(connection).loader.graph.leaf_nodes('ombor'))
+
+        # Eski yozuvlar (suffiksli kalit bilan ham) indeksda
+        self.assertEqual(self._fts_idlari("shakar"), [shakar.pk, shakar_kirill.pk])
+        self.assertEqual(self._fts_idlari(f"shakar {shakar_kirill.pk}"), [shakar_kirill.pk])
+        birlik = OlchovBirligi.objects.get(pk=kg.pk)
+        # INSERT, UPDATE va DELETE triggerlari
+        qovun = Mahsulot.objects.create(mahsulot_nomi="Qovun", olchov_birligi=birlik)
+        self.assertEqual(self._fts_idlari("qovun"), [qovun.pk])
+        Mahsulot.objects.filter(pk=shakar.pk).update(mahsulot_nomi="Asal", qidiruv_nomi="asal")
+        self.assertEqual(self._fts_idlari("shakar"), [shakar_kirill.pk])
+        self.assertEqual(self._fts_idlari("asal"), [shakar.pk])
+        Mahsulot.objects.filter(pk=qovun.pk).delete()
+        self.assertEqual(self._fts_idlari("qovun"), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_JADVALI}({FTS_JADVALI}, rank) VALUES ('integrity-check', 1)")
+
+        # Orqaga (0008 gacha) qaytarilganda ham triggerlar tiklanadi
+        apps = self._kochirish([('ombor', '0008_mahsulot_qidiruv')])
+        uzum = apps.get_model('ombor', 'Mahsulot').objects.create(mahsulot_nomi="Uzum", qidiruv_nomi="uzum",
+                                                                  olchov_birligi_id=kg.pk)
+        self.assertEqual(self._fts_idlari("uzum"), [uzum.pk])
+
+
+# === Admin: sana ierarxiyasi ===
+class SanaIerarxiyasiTest(TestCase):
+    """Ombor changelist'lari date_hierarchy ni o'z tegi bilan chizadi: havolalar Django'nikiga mos, DISTINCT yo'q."""
+
+    @classmethod
+    def setUpTestData(cls):
+        birlik = OlchovBirligi.objects.create(olchov_birligi="Dona")
+        olma = Mahsulot.objects.create(mahsulot_nomi="Olma", olchov_birligi=birlik)
+        # 2024-02-01 00:00 Toshkent vaqti UTC bo'yicha 31-yanvar: kun mahalliy vaqtda olinadi
+        for sana in (_vaqt(2024, 1, 28), _vaqt(2024, 1, 29), _vaqt(2024, 2, 1, soat=0), _vaqt(2025, 3, 5)):
+            KirdiChiqdi.objects.create(mahsulot_nomi=olma, miqdor=1, amaliyot_turi="Kirdi", sana=sana)
+
+    def setUp(self):
+        self.mijoz = _admin_mijozi()
+
+    def _ierarxiya(self, yol, sorov_qatori):
+        with CaptureQueriesContext(connection) as sorovlar:
+            javob = self.mijoz.get(f'{yol}?{sorov_qatori}')
+        self.assertEqual(javob.status_code, 200)
+        self.assertFalse([s['sql'] for s in sorovlar.captured_queries if 'DISTINCT' in s['sql']])
+        natija = sana_ierarxiyasi(javob.context['cl'])
+        self.assertEqual(natija, date_hierarchy(javob.context['cl']))
+        return javob, [(tanlov['title'], tanlov.get('link')) for tanlov in natija['choices']]
+
+    def test_kirim_chiqim_havolalari(self):
+        yol = '/admin/ombor/kirdichiqdi/'
+        javob, tanlovlar = self._ierarxiya(yol, '')
+        self.assertEqual(tanlovlar, [("2024", "?sana__year=2024"), ("2025", "?sana__year=2025")])
+        self.assertContains(javob, 'href="?sana__year=2024"')
+        _, tanlovlar = self._ierarxiya(yol, 'sana__year=2024')
+        self.assertEqual([havola for _, havola in tanlovlar],
+                         ["?sana__month=1&sana__year=2024", "?sana__month=2&sana__year=2024"])
+        _, tanlovlar = self._ierarxiya(yol, 'sana__year=2024&sana__month=1')
+        self.assertEqual([havola for _, havola in tanlovlar], [
+            "?sana__day=28&sana__month=1&sana__year=2024", "?sana__day=29&sana__month=1&sana__year=2024"])
+        # Filtrlangan yozuvlar bitta oyda: oy darajasidan boshlanadi
+        _, tanlovlar = self._ierarxiya(yol, 'amaliyot_turi__exact=Kirdi&sana__year=2025')
+        self.assertEqual([havola for _, havola in tanlovlar],
+                         ["?amaliyot_turi__exact=Kirdi&sana__month=3&sana__year=2025"])
+
+    def test_tarix_havolalari(self):
+        _, tanlovlar = self._ierarxiya('/admin/ombor/mahsulotbalanstarix/', 'sana__year=2024&sana__month=2')
+        self.assertEqual([havola for _, havola in tanlovlar], ["?sana__day=1&sana__month=2&sana__year=2024"])
+
+
+# === Balans tarixi arxivi ===
+class TarixArxiviTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        birlik = OlchovBirligi.objects.create(olchov_birligi="Dona")
+        cls.olma = Mahsulot.objects.create(mahsulot_nomi="Olma", olchov_birligi=birlik)
+        cls.nok = Mahsulot.objects.create(mahsulot_nomi="Nok", olchov_birligi=birlik)
+        hozir = timezone.now()
+        for mahsulot, kun, miqdor, turi in ((cls.olma, 800, 10, "Kirdi"), (cls.olma, 600, 3, "Chiqdi"),
+                                            (cls.olma, 500, 2, "Kirdi"), (cls.nok, 700, 4, "Kirdi"),
+                                            (cls.olma, 10, 5, "Kirdi")):
+            KirdiChiqdi.objects.create(mahsulot_nomi=mahsulot, miqdor=miqdor, amaliyot_turi=turi,
+                                       sana=hozir - timedelta(days=kun))
+        cls.tarix = dict(MahsulotBalansTarix.objects.values_list('id', 'sana'))
+
+    def setUp(self):
+        self.chegara = arxiv_chegarasi()
+        self.assertEqual(tarix_modeli(), MahsulotBalansTarix)
+        self.assertEqual(tarixni_arxivlash(self.chegara, partiya=1), 2)
+
+    def test_arxivlash(self):
+        asosiy = set(MahsulotBalansTarix.objects.values_list('id', flat=True))
+        arxiv = set(MahsulotBalansTarixArxiv.objects.values_list('id', flat=True))
+        self.assertFalse(asosiy & arxiv)
+        self.assertEqual(asosiy | arxiv, set(self.tarix))
+        self.assertEqual(dict(MahsulotBalansTarixHammasi.objects.values_list('id', 'sana')), self.tarix)
+        # Har bir mahsulotning chegaradan oldingi oxirgi yozuvi asosiy jadvalda qoladi
+        sanasi = sorted(self.tarix, key=self.tarix.get)  # 800, 700 (Nok), 600, 500, 10 kun oldin
+        self.assertEqual(arxiv, {sanasi[0], sanasi[2]})
+        self.assertEqual(MahsulotBalansTarix.objects.filter(sana__lt=self.chegara).count(), 2)
+        self.assertEqual(tarixni_arxivlash(self.chegara), 0)
+
+    def test_tarix_modeli(self):
+        arxiv_oxiri = max(MahsulotBalansTarixArxiv.objects.values_list('sana', flat=True))
+        for dan, kutilgan in ((None, MahsulotBalansTarixHammasi), (arxiv_oxiri, MahsulotBalansTarixHammasi),
+                              (arxiv_oxiri + timedelta(seconds=1), MahsulotBalansTarix)):
+            self.assertEqual(tarix_modeli(dan), kutilgan)
+            self.assertEqual(async_to_sync(atarix_modeli)(dan), kutilgan)
+
+    def test_admin_royxatlari_va_yozuv_sahifasi(self):
+        mijoz = _admin_mijozi()
+        javob = mijoz.get('/admin/ombor/mahsulotbalanstarix/')
+        self.assertEqual(javob.status_code, 200)
+        self.assertEqual({type(qator) for qator in javob.context['cl'].result_list}, {MahsulotBalansTarix})
+        self.assertEqual({qator.id for qator in javob.context['cl'].result_list},
+                         set(MahsulotBalansTarix.objects.values_list('id', flat=True)))
+        self.assertContains(javob, 'Arxiv bilan birga: <a href="/admin/ombor/mahsulotbalanstarixhammasi/">')
+        eski = timezone.localtime(min(self.tarix.values()))
+        javob = mijoz.get(f'/admin/ombor/mahsulotbalanstarix/?sana__year={eski.year}&sana__month={eski.month}&p=1')
+        self.assertContains(javob, 'Arxiv bilan birga: <a href="/admin/ombor/mahsulotbalanstarixhammasi/'
+                                   f'?sana__year={eski.year}&amp;sana__month={eski.month}">')
+        # Oxirgi davr filtri arxivga yetmaydi: havola chiqmaydi
+        oy_oldin = timezone.localdate() - timedelta(days=30)
+        javob = mijoz.get(f'/admin/ombor/mahsulotbalanstarix/?sana__year={oy_oldin.year}&sana__month={oy_oldin.month}')
+        self.assertEqual(javob.status_code, 200)
+        self.assertNotContains(javob, 'Arxiv bilan birga')
+
+        javob = mijoz.get(f'/admin/ombor/mahsulotbalanstarixhammasi/?sana__year={eski.year}&sana__month={eski.month}')
+        self.assertEqual(javob.status_code, 200)
+        arxivdagi = MahsulotBalansTarixArxiv.objects.get(sana=min(self.tarix.values()))
+        self.assertEqual([qator.id for qator in javob.context['cl'].result_list], [arxivdagi.id])
+        javob = mijoz.get('/admin/ombor/mahsulotbalanstarixhammasi/')
+        self.assertEqual(sorted(qator.id for qator in javob.context['cl'].result_list), sorted(self.tarix))
+
+        # Arxivdagi yozuv sahifasi: faqat o'qish uchun
+        javob = mijoz.get(f'/admin/ombor/mahsulotbalanstarixhammasi/{arxivdagi.id}/change/')
+        self.assertEqual(javob.status_code, 200)
+        self.assertEqual(javob.context['original'].qoldiq, arxivdagi.qoldiq)
+        self.assertFalse(javob.context['has_change_permission'])
+        self.assertFalse(javob.context['has_delete_permission'])
+        self.assertEqual(mijoz.get(f'/admin/ombor/mahsulotbalanstarixhammasi/{arxivdagi.id}/delete/').status_code, 403)
+        # Asosiy tarix admini arxivlangan ID ni ko'rsatmaydi
+        self.assertEqual(mijoz.get(f'/admin/ombor/mahsulotbalanstarix/{arxivdagi.id}/change/').status_code, 302)
+
+
+# === Balans snapshotlari ===
+class BalansSnapshotTest(TestCase):
+    """balance_as_of snapshot va undan keyingi harakatlardan hisoblaydi: natija xom ledger SUM bilan bir xil."""
+
+    @classmethod
+    def setUpTestData(cls):
+        birlik = OlchovBirligi.objects.create(olchov_birligi="Dona")
+        cls.olma = Mahsulot.objects.create(mahsulot_nomi="Olma", olchov_birligi=birlik)
+        cls.nok = Mahsulot.objects.create(mahsulot_nomi="Nok", olchov_birligi=birlik)
+        for kun in range(1, 11):
+            KirdiChiqdi.objects.create(mahsulot_nomi=cls.olma, miqdor=10 + kun, amaliyot_turi="Kirdi",
+                                       sana=_vaqt(2024, 3, kun))
+            KirdiChiqdi.objects.create(mahsulot_nomi=cls.olma, miqdor=kun, amaliyot_turi="Chiqdi",
+                                       sana=_vaqt(2024, 3, kun, soat=18))
+            if kun % 2:
+                # Yarim tunda: kun mahalliy vaqt bo'yicha olinadi (UTC bo'yicha oldingi kun)
+                KirdiChiqdi.objects.create(mahsulot_nomi=cls.nok, miqdor=kun, amaliyot_turi="Kirdi",
+                                           sana=_vaqt(2024, 3, kun, soat=0))
+
+    def _tekshirish(self, sanalar):
+        for sana in sanalar:
+            with self.subTest(sana=sana):
+                if isinstance(sana, datetime):
+                    kutilgan = _ledger(sana__lte=sana)
+                else:
+                    kutilgan = _ledger(sana__lt=kun_oxiri(sana))
+                self.assertEqual(balance_as_of(sana), kutilgan)
+                self.assertEqual(balance_as_of(sana, products=[self.nok.id]),
+                                 {k: v for k, v in kutilgan.items() if k == self.nok.id})
+
+    def _sanalar(self):
+        kunlar = [date(2024, 2, 28)] + [date(2024, 3, kun) for kun in range(1, 13)]
+        lahzalar = [_vaqt(2024, 3, 3, soat=0), _vaqt(2024, 3, 6, soat=12), _vaqt(2024, 3, 6, soat=23),
+                    _vaqt(2024, 3, 7, soat=0), _vaqt(2024, 3, 9, soat=18)]
+        return kunlar + lahzalar
+
+    def test_snapshotsiz_va_snapshotli_natija_ledgerga_mos(self):
+        self._tekshirish(self._sanalar())
+        self.assertEqual(snapshotlarni_yangilash(davr=3, bugun=date(2024, 3, 8)), 2)
+        self.assertEqual(sorted(set(BalansSnapshot.objects.values_list('sana', flat=True))),
+                         [date(2024, 3, 3), date(2024, 3, 6)])
+        self._tekshirish(self._sanalar())
+        # Keyingi ish faqat yangi kunlarni qo'shadi
+        self.assertEqual(snapshotlarni_yangilash(davr=3, bugun=date(2024, 3, 12)), 1)
+        self._tekshirish(self._sanalar())
+
+    def test_kechiktirib_yuklangan_harakatlar(self):
+        snapshotlarni_yangilash(davr=3, bugun=date(2024, 3, 8))
+        oxirgi_harakat = KirdiChiqdi.objects.latest('id').id
+        # Snapshotlardan keyin yuklangan, sanasi snapshotlardan oldingi harakatlar (ID si oxirgi_harakat_id dan katta)
+        KirdiChiqdi.objects.create(mahsulot_nomi=self.nok, miqdor=7, amaliyot_turi="Kirdi", sana=_vaqt(2024, 3, 2))
+        harakatlarni_joylash([
+            {'mahsulot_nomi': "Olma", 'miqdor': 4, 'amaliyot_turi': "Chiqdi", 'sana': "2024-03-05T09:00:00"},
+            {'mahsulot_nomi': "Nok", 'miqdor': 2, 'amaliyot_turi': "Kirdi", 'sana': "2024-03-06T23:30:00"},
+        ])
+        self.assertTrue(BalansSnapshot.objects.filter(oxirgi_harakat_id=oxirgi_harakat).exists())
+        self._tekshirish(self._sanalar())
+
+        # Qayta qurish eng erta kechikkan kundan boshlanadi; snapshotlar ledgerga mos
+        self.assertEqual(snapshotlarni_yangilash(davr=3, bugun=date(2024, 3, 8)), 2)
+        yangi_chegara = KirdiChiqdi.objects.latest('id').id
+        for sana in (date(2024, 3, 3), date(2024, 3, 6)):
+            snapshotlar = BalansSnapshot.objects.filter(sana=sana)
+            self.assertEqual(dict(snapshotlar.values_list('mahsulot_nomi_id', 'qoldiq')),
+                             _ledger(sana__lt=kun_oxiri(sana)))
+            self.assertEqual(set(snapshotlar.values_list('oxirgi_harakat_id', flat=True)), {yangi_chegara})
+        self._tekshirish(self._sanalar())
+
+
+# === Kursorli sahifalash ===
+class KursorliSahifalashTest(TestCase):
+    """Kirim-chiqim ro'yxati (-sana, -id) kursori bilan: bir xil sanali qatorlar sahifalar chegarasida."""
+    yol = '/admin/ombor/kirdichiqdi/'
+
+    @classmethod
+    def setUpTestData(cls):
+        birlik = OlchovBirligi.objects.create(olchov_birligi="Dona")
+        olma = Mahsulot.objects.create(mahsulot_nomi="Olma", olchov_birligi=birlik)
+        # 55 qator, har 7 tasi bir xil sanada: 20 talik sahifalar chegarasi bir sana ichiga tushadi
+        KirdiChiqdi.objects.bulk_create([
+            KirdiChiqdi(mahsulot_nomi=olma, miqdor=1, amaliyot_turi="Kirdi", sana=_vaqt(2024, 5, 1 + i // 7))
+            for i in range(55)
+        ])
+        cls.tartib = list(KirdiChiqdi.objects.order_by('-sana', '-id').values_list('id', flat=True))
+
+    def setUp(self):
+        cache.clear()
+        self.mijoz = _admin_mijozi()
+
+    def _sahifa(self, sorov_qatori=''):
+        javob = self.mijoz.get(self.yol + sorov_qatori)
+        self.assertEqual(javob.status_code, 200)
+        cl = javob.context['cl']
+        self.assertTrue(cl.kursorli)
+        return cl, [qator.id for qator in cl.result_list]
+
+    def test_oldinga_orqaga_va_boshiga(self):
+        cl, idlar = self._sahifa()
+        sahifalar, urllar = [idlar], [None]
+        self.assertIsNone(cl.oldingi_url)
+        self.assertIsNone(cl.boshiga_url)
+        while cl.keyingi_url:
+            urllar.append(cl.keyingi_url)
+            cl, idlar = self._sahifa(cl.keyingi_url)
+            sahifalar.append(idlar)
+        self.assertEqual([len(idlar) for idlar in sahifalar], [20, 20, 15])
+        self.assertEqual(sum(sahifalar, []), self.tartib)
+
+        # Oxirgi sahifadan orqaga: xuddi shu qatorlar, teskari yo'nalishda o'qilgan kursor bilan
+        cl, idlar = self._sahifa(cl.oldingi_url)
+        self.assertEqual(idlar, sahifalar[1])
+        cl, idlar = self._sahifa(cl.oldingi_url)
+        self.assertEqual(idlar, sahifalar[0])
+        self.assertIsNone(cl.oldingi_url)
+        self.assertEqual(self._sahifa(cl.keyingi_url)[1], sahifalar[1])
+
+        cl, _ = self._sahifa(urllar[2])
+        self.assertEqual(cl.boshiga_url, '?')
+        self.assertEqual(self._sahifa(cl.boshiga_url)[1], sahifalar[0])
+
+    def test_buzilgan_kursor(self):
+        for kursor in ("buzilgan", "!!!", kursor_yasash("x", [_vaqt(2024, 5, 1), 1]),
+                       kursor_yasash("k", [_vaqt(2024, 5, 1)]), kursor_yasash("k", ["sana emas", 1]),
+                       kursor_yasash("k", [_vaqt(2024, 5, 1), "id emas"])):
+            with self.subTest(kursor=kursor):
+                javob = self.mijoz.get(self.yol, {'kursor': kursor})
+                # ChangeList IncorrectLookupParameters da ?e=1 ga qaytaradi
+                self.assertEqual(javob.status_code, 302)
+                self.assertEqual(javob['Location'], self.yol + '?e=1')
+
+    def test_chegaralangan_sanoq(self):
+        with mock.patch('ombor.pagination.SANOQ_CHEGARASI', 50):
+            self.assertEqual(taxminiy_son(KirdiChiqdi.objects.all()), (50, False))
+            self.assertEqual(taxminiy_son(KirdiChiqdi.objects.filter(sana__lt=_vaqt(2024, 5, 3))), (14, True))
+            paginator = TaxminiyPaginator(KirdiChiqdi.objects.order_by('-sana', '-id'), 20)
+            self.assertEqual(paginator.count, 50)
+            self.assertFalse(paginator.aniq)
+            # Son aniq emas: sanoqdan keyingi sahifa ham ochiladi
+            self.assertEqual(len(paginator.page(3).object_list), 15)
+            self.assertEqual(len(paginator.page(4).object_list), 0)
+
+            javob = self.mijoz.get(self.yol)
+            self.assertEqual(javob.context['cl'].result_count, 50)
+            self.assertContains(javob, '50+')
+            # Keshlangan sanoq: qayta sanalmaydi
+            with CaptureQueriesContext(connection) as sorovlar:
+                taxminiy_son(KirdiChiqdi.objects.all())
+            self.assertEqual(len(sorovlar.captured_queries), 0)
+
+
+# === JSON API: ETag va versiya ===
+class VersiyaliJsonTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.mijoz = _admin_mijozi()
+        birlik = OlchovBirligi.objects.create(olchov_birligi="Kg")
+        self.olma = Mahsulot.objects.create(mahsulot_nomi="Olma", olchov_birligi=birlik)
+
+    def _olish(self, yol, etag=None):
+        return self.mijoz.get(yol, **({'HTTP_IF_NONE_MATCH': etag} if etag else {}))
+
+    def test_etag_304_va_postingdan_keyin_yangi_versiya(self):
+        # balanslar — async view, birliklar — sinxron
+        for yol in ('/api/balanslar/', '/api/birliklar/'):
+            with self.subTest(yol=yol):
+                cache.clear()
+                birinchi = self._olish(yol)
+                self.assertEqual(birinchi.status_code, 200)
+                etag = birinchi['ETag']
+                self.assertIn('no-cache', birinchi['Cache-Control'])
+
+                with CaptureQueriesContext(connection) as sorovlar:
+                    javob = self._olish(yol, etag)
+                self.assertEqual(javob.status_code, 304)
+                self.assertEqual(javob['ETag'], etag)
+                # 304 ma'lumotlar bazasiga murojaat qilmaydi (sessiya va foydalanuvchi keshdan)
+                self.assertFalse([s for s in sorovlar.captured_queries if 'ombor_mahsulot' in s['sql']])
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    KirdiChiqdi.objects.create(mahsulot_nomi=self.olma, miqdor=5, amaliyot_turi="Kirdi",
+                                               sana=timezone.now())
+                javob = self._olish(yol, etag)
+                self.assertEqual(javob.status_code, 200)
+                self.assertNotEqual(javob['ETag'], etag)
+                self.assertEqual(self._olish(yol, javob['ETag']).status_code, 304)
+
+        self.assertEqual(self._olish('/api/balanslar/').json()['balanslar'][0]['qoldiq'], 10)
+
+
+# === Sessiya yozuvlari va kirish keshi ===
+def _sessiya_yozuvlari(sorovlar):
+    return [s['sql'] for s in sorovlar.captured_queries
+            if 'django_session' in s['sql'] and not s['sql'].lstrip().upper().startswith('SELECT')]
+
+
+@override_settings(SESSIYA_YOZISH_ORALIGI=300)
+class SessiyaYozishTest(TestCase):
+    def setUp(self):
+        caches[KIRISH_KESHI].clear()
+
+    def _saqlash(self, sessiya):
+        with CaptureQueriesContext(connection) as sorovlar:
+            sessiya.save()
+        return _sessiya_yozuvlari(sorovlar)
+
+    def test_ozgarmagan_sessiya_oraliq_ichida_yozilmaydi(self):
+        for SessionStore in (db_sessiyalar.SessionStore, cached_db_sessiyalar.SessionStore):
+            with self.subTest(SessionStore.__module__):
+                sessiya = SessionStore()
+                sessiya['savat'] = [1]
+                sessiya.save()
+                kalit = sessiya.session_key
+
+                sessiya = SessionStore(kalit)
+                self.assertEqual(sessiya['savat'], [1])
+                self.assertEqual(self._saqlash(sessiya), [])
+
+                # Oraliq o'tgach muddatni uzaytirish uchun yoziladi
+                with mock.patch('ombor.sessiyalar.time.time', return_value=time.time() + 301):
+                    sessiya = SessionStore(kalit)
+                    sessiya.load()
+                    self.assertTrue(self._saqlash(sessiya))
+
+    def test_ozgargan_sessiya_har_doim_yoziladi(self):
+        for SessionStore in (db_sessiyalar.SessionStore, cached_db_sessiyalar.SessionStore):
+            with self.subTest(SessionStore.__module__):
+                sessiya = SessionStore()
+                sessiya['savat'] = [1]
+                sessiya.save()
+                kalit = sessiya.session_key
+
+                sessiya = SessionStore(kalit)
+                sessiya['savat'] = [1, 2]
+                self.assertTrue(self._saqlash(sessiya))
+                self.assertEqual(Session.objects.get(session_key=kalit).get_decoded()['savat'], [1, 2])
+                self.assertEqual(SessionStore(kalit)['savat'], [1, 2])
+
+                # O'zgarish darhol (oraliq tugashini kutmasdan) yoziladi, o'chirish ham
+                sessiya = SessionStore(kalit)
+                del sessiya['savat']
+                self.assertTrue(self._saqlash(sessiya))
+                self.assertNotIn('savat', SessionStore(kalit).load())
+
+    @override_settings(SESSIYA_YOZISH_ORALIGI=0)
+    def test_oraliq_nol_bolsa_har_safar_yoziladi(self):
+        sessiya = db_sessiyalar.SessionStore()
+        sessiya['savat'] = [1]
+        sessiya.save()
+        sessiya = db_sessiyalar.SessionStore(sessiya.session_key)
+        sessiya.load()
+        self.assertTrue(self._saqlash(sessiya))
+
+
+@override_settings(KIRISH_KESHI_YOQILGAN=True)
+class KirishKeshiTest(TestCase):
+    def setUp(self):
+        caches[KIRISH_KESHI].clear()
+        self.foydalanuvchi = CustomUser.objects.create_user(username='omborchi', password='eski-parol', is_staff=True)
+        self.backend = KeshlanganModelBackend()
+
+    def _keshdan(self):
+        with CaptureQueriesContext(connection) as sorovlar:
+            foydalanuvchi = self.backend.get_user(self.foydalanuvchi.pk)
+        return foydalanuvchi, len(sorovlar.captured_queries)
+
+    def test_foydalanuvchi_keshlanadi(self):
+        self.assertEqual(self._keshdan()[1], 1)
+        foydalanuvchi, sorovlar = self._keshdan()
+        self.assertEqual(foydalanuvchi, self.foydalanuvchi)
+        self.assertEqual(sorovlar, 0)
+
+    def test_faolsizlantirish_keshni_tozalaydi(self):
+        self._keshdan()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.foydalanuvchi.is_active = False
+            self.foydalanuvchi.save()
+        self.assertIsNone(self._keshdan()[0])
+
+    def test_parol_ozgarishi_keshni_tozalaydi(self):
+        self._keshdan()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.foydalanuvchi.set_password('yangi-parol')
+            self.foydalanuvchi.save()
+        foydalanuvchi, sorovlar = self._keshdan()
+        self.assertEqual(sorovlar, 1)
+        self.assertTrue(foydalanuvchi.check_password('yangi-parol'))
+
+    def test_sessiya_eskirgan_foydalanuvchi_bilan_tirik_qolmaydi(self):
+        for ozgartirish in (lambda u: u.set_password('yangi-parol'), lambda u: setattr(u, 'is_active', False)):
+            with self.subTest():
+                caches[KIRISH_KESHI].clear()
+                foydalanuvchi = CustomUser.objects.get(pk=self.foydalanuvchi.pk)
+                foydalanuvchi.is_active = True
+                foydalanuvchi.set_password('eski-parol')
+                with self.captureOnCommitCallbacks(execute=True):
+                    foydalanuvchi.save()
+                mijoz = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+                mijoz.force_login(foydalanuvchi)
+                sessiya = mijoz.session
+                sessiya[DEVICE_ID_SESSION_KEY] = TOTPDevice.objects.create(user=foydalanuvchi, name='t').persistent_id
+                sessiya.save()
+                self.assertEqual(mijoz.get('/admin/').status_code, 200)
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    ozgartirish(foydalanuvchi)
+                    foydalanuvchi.save()
+                javob = mijoz.get('/admin/')
+                self.assertEqual(javob.status_code, 302)
+                self.assertIn('/login/', javob['Location'])
+
+
+# === Fon eksport vazifalari ===
+class EksportVazifasiTest(TestCase):
+    def setUp(self):
+        papka = tempfile.TemporaryDirectory()
+        self.addCleanup(papka.cleanup)
+        sozlama = override_settings(MEDIA_ROOT=papka.name)
+        sozlama.enable()
+        self.addCleanup(sozlama.disable)
+        self.foydalanuvchi = CustomUser.objects.create_superuser(username='eksportchi', password='x')
+        birlik = OlchovBirligi.objects.create(olchov_birligi="Kg")
+        olma = Mahsulot.objects.create(mahsulot_nomi="Olma", olchov_birligi=birlik)
+        nok = Mahsulot.objects.create(mahsulot_nomi="Nok", olchov_birligi=birlik)
+        for i, mahsulot in enumerate([olma, nok, olma, olma]):
+            KirdiChiqdi.objects.create(mahsulot_nomi=mahsulot, miqdor=i + 1, amaliyot_turi="Kirdi",
+                                       sana=_vaqt(2024, 3, 1 + i))
+        self.queryset = KirdiChiqdi.objects.filter(mahsulot_nomi=olma, miqdor__gt=1).order_by('-sana')
+
+    def test_navbat_olish_bajarish(self):
+        vazifa, yangi = vazifa_qoshish(self.foydalanuvchi, KirdiChiqdi, self.queryset, 'excel', qatorlar_soni=2)
+        self.assertTrue(yangi)
+        self.assertEqual(vazifa_qoshish(self.foydalanuvchi, KirdiChiqdi, self.queryset, 'excel'), (vazifa, False))
+
+        self.assertTrue(vazifani_olish(vazifa.id))
+        self.assertFalse(vazifani_olish(vazifa.id))
+        with mock.patch('ombor.eksport_vazifalari.eksport_yozish', wraps=eksport_yozish) as yozish:
+            self.assertTrue(vazifani_bajarish(vazifa.id))
+        # Tiklangan queryset filtr va tartibni saqlaydi
+        self.assertEqual(list(yozish.call_args.args[2].values_list('id', flat=True)),
+                         list(self.queryset.values_list('id', flat=True)))
+
+        vazifa.refresh_from_db()
+        self.assertEqual(vazifa.holat, "tayyor")
+        self.assertEqual(vazifa.xato, '')
+        self.assertTrue(vazifa.fayl.name.endswith('.xlsx'))
+        self.assertEqual(os.path.getsize(vazifa.fayl.path), vazifa.hajm)
+        self.assertFalse(os.path.exists(vazifa.fayl.path + '.tmp'))
+
+    def _xato_matni(self, sorov, model='ombor.kirdichiqdi', yamoq=None):
+        vazifa, _ = vazifa_qoshish(self.foydalanuvchi, KirdiChiqdi, self.queryset, 'pdf')
+        EksportVazifasi.objects.filter(id=vazifa.id).update(sorov=sorov, model=model)
+        self.assertTrue(vazifani_olish(vazifa.id))
+        with yamoq or contextlib.nullcontext(), self.assertLogs('ombor.eksport', 'ERROR'):
+            self.assertFalse(vazifani_bajarish(vazifa.id))
+        vazifa.refresh_from_db()
+        self.assertEqual(vazifa.holat, "xato")
+        self.assertIsNotNone(vazifa.muddati)
+        self.assertFalse(vazifa.fayl)
+        vazifa.delete()
+        return vazifa.xato
+
+    def test_tiklanmaydigan_yoki_eskirgan_sorov_xato(self):
+        sorov = pickle.dumps(self.queryset.query)
+        self.assertIn("Saqlangan so'rovni tiklab bo'lmadi", self._xato_matni(b'buzilgan'))
+        self.assertIn("Saqlangan so'rovni tiklab bo'lmadi", self._xato_matni(sorov[:len(sorov) // 2]))
+        self.assertIn("Saqlangan so'rovni tiklab bo'lmadi", self._xato_matni(sorov, model='ombor.ochirilgan'))
+        # Navbatga qo'yilgandan keyin maydon o'chirilgan (migratsiya)
+        yamoq = mock.patch('django.db.models.fields._load_field',
+                           side_effect=FieldDoesNotExist("KirdiChiqdi has no field named 'miqdor'"))
+        self.assertIn("FieldDoesNotExist: KirdiChiqdi has no field named 'miqdor'", self._xato_matni(sorov, yamoq=yamoq))
+        self.assertIn("modeliga tegishli emas",
+                      self._xato_matni(pickle.dumps(Mahsulot.objects.all().query)))
+        self.assertEqual(len(os.listdir(os.path.join(settings.MEDIA_ROOT, 'eksportlar'))), 0)
+
+
+# === Mahsulot qidiruvi ===
+class MahsulotQidiruviTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        birlik = OlchovBirligi.objects.create(olchov_birligi="Kg")
+        cls.mahsulotlar = {nom: Mahsulot.objects.create(mahsulot_nomi=nom, olchov_birligi=birlik).pk
+                           for nom in ("Shakar", "O'rik", "Чой", "Qovun", "Olma", "Kola", "Qulupnay", "G'o'za")}
+
+    def _topilgan(self, qidiruv):
+        return set(Mahsulot.objects.filter(id__in=mahsulot_idlari_sorovi(qidiruv)).values_list('mahsulot_nomi', flat=True))
+
+    def test_lotin_va_kirill(self):
+        # O'zbek kirill harflari (ў, қ, ғ) lotin imlosi bo'yicha, ichki qism ham topiladi
+        for qidiruv, kutilgan in [("шакар", {"Shakar"}), ("ШАКАР", {"Shakar"}), ("shakar", {"Shakar"}),
+                                  ("o'rik", {"O'rik"}), ("ўрик", {"O'rik"}), ("ORIK", {"O'rik"}),
+                                  ("choy", {"Чой"}), ("ЧОЙ", {"Чой"}), ("қовун", {"Qovun"}), ("ғўза", {"G'o'za"}),
+                                  ("akar", {"Shakar"}), ("лупн", {"Qulupnay"}), ("qovunlar", set())]:
+            with self.subTest(qidiruv=qidiruv):
+                self.assertEqual(self._topilgan(qidiruv), kutilgan)
+
+    def test_qisqa_matn_nom_boshidan(self):
+        # Trigramdan qisqa: "ol" Olma ning boshi, Kola ning o'rtasi
+        for qidiruv, kutilgan in [("ol", {"Olma"}), ("Ол", {"Olma"}), ("ш", {"Shakar"}), ("g'", {"G'o'za"}),
+                                  ("о", {"Olma", "O'rik"}), ("'", set()), ("  ", set())]:
+            with self.subTest(qidiruv=qidiruv):
+                self.assertEqual(self._topilgan(qidiruv), kutilgan)
+        with CaptureQueriesContext(connection) as sorovlar:
+            self._topilgan("ol")
+        self.assertNotIn(FTS_JADVALI, sorovlar.captured_queries[0]['sql'])
+
+    def test_admin_qidiruvi(self):
+        mijoz = _admin_mijozi()
+        olma = Mahsulot.objects.get(mahsulot_nomi="Olma")
+        KirdiChiqdi.objects.create(mahsulot_nomi=olma, miqdor=2, amaliyot_turi="Kirdi", sana=_vaqt(2024, 1, 1))
+        KirdiChiqdi.objects.create(mahsulot_nomi=olma, miqdor=1, amaliyot_turi="Chiqdi", sana=_vaqt(2024, 1, 2))
+        javob = mijoz.get('/admin/ombor/mahsulot/', {'q': 'ШАКАР'})
+        self.assertEqual([m.mahsulot_nomi for m in javob.context['cl'].result_list], ["Shakar"])
+        javob = mijoz.get('/admin/ombor/kirdichiqdi/', {'q': 'олма'})
+        self.assertEqual(len(javob.context['cl'].result_list), 2)
+        # amaliyot_turi tenglik bilan (qidiruv_qiymatlari)
+        javob = mijoz.get('/admin/ombor/kirdichiqdi/', {'q': 'chiqdi'})
+        self.assertEqual([k.amaliyot_turi for k in javob.context['cl'].result_list], ["Chiqdi"])
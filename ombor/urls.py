@@ -0,0 +1,13 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'ombor'
+
+urlpatterns = [
+    path('kirdi-chiqdi/ommaviy/', views.kirdi_chiqdi_ommaviy, name='kirdi_chiqdi_ommaviy'),
+    path('balans/', views.balans_sana_boyicha, name='balans_sana_boyicha'),
+    path('balanslar/', views.balanslar_royxati, name='balanslar'),
+    path('mahsulot/<int:mahsulot_id>/tarix/', views.mahsulot_tarixi, name='mahsulot_tarixi'),
+    path('birliklar/', views.birliklar_royxati, name='birliklar'),
+]
@@ -1,3 +1,269 @@
-from django.shortcuts import render
+import hashlib
+import json
+from functools import wraps
 
-# Create your views here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.utils.http import quote_etag
+from django.utils.log import log_response
+from django.views.decorators.http import require_GET, require_POST
+
+from .arxiv import atarix_modeli
+from .ingest import harakatlarni_joylash, qatorlarni_oqish
+from .kesh import API_KESH_MUDDATI, aapi_versiyasi, api_versiyasi, ishlatilgan_birlik_idlari
+from .metrikalar import prometheus_matni
+from .models import Mahsulot, MahsulotBalans, OlchovBirligi
+from .pagination import KEYINGI, kursor_sharti, kursor_yasash, kursorni_ochish
+from .snapshot import balance_as_of, sanani_oqish
+
+TARIX_SAHIFA_HAJMI = 100
+TARIX_SAHIFA_CHEGARASI = 1000
+
+
+def _xodimmi(user):
+    tasdiqlangan = getattr(user, 'is_verified', lambda: True)()
+    return user.is_active and user.is_staff and tasdiqlangan
+
+
+def xodim_talab_qilinadi(view):
+    """Admin paneldagi kabi: faqat OTP orqali tasdiqlangan xodimlarga ruxsat beradi."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def _async_view(request, *args, **kwargs):
+            # request.user dangasa: sessiya, foydalanuvchi va OTP qurilmasi shu yerda bazadan o'qiladi
+            if not await sync_to_async(_xodimmi)(request.user):
+                return JsonResponse({'xato': "Ruxsat yo'q"}, status=403)
+            return await view(request, *args, **kwargs)
+
+        return _async_view
+
+    @wraps(view)
+    def _view(request, *args, **kwargs):
+        if not _xodimmi(request.user):
+            return JsonResponse({'xato': "Ruxsat yo'q"}, status=403)
+        return view(request, *args, **kwargs)
+
+    return _view
+
+
+def faqat_get(view):
+    """require_GET; Django 4.2 dagi dekorator async view'ni o'ray olmaydi."""
+    if not iscoroutinefunction(view):
+        return require_GET(view)
+
+    @wraps(view)
+    async def _async_view(request, *args, **kwargs):
+        if request.method != 'GET':
+            javob = HttpResponseNotAllowed(['GET'])
+            log_response("Method Not Allowed (%s): %s", request.method, request.path, response=javob, request=request)
+            return javob
+        return await view(request, *args, **kwargs)
+
+    return _async_view
+
+
+# === Ommaviy kirim-chiqim API ===
+# JSON ro'yxat yoki CSV fayl qabul qiladi: mahsulot_nomi, miqdor, amaliyot_turi, sana
+@require_POST
+@xodim_talab_qilinadi
+def kirdi_chiqdi_ommaviy(request):
+    if not request.user.has_perm('ombor.add_kirdichiqdi'):
+        return JsonResponse({'xato': "Ruxsat yo'q"}, status=403)
+
+    fayl_turi = 'csv' if request.content_type in ('text/csv', 'application/csv') else 'json'
+    try:
+        qatorlar = qatorlarni_oqish(request.body.decode('utf-8-sig'), fayl_turi)
+        saqlandi = harakatlarni_joylash(qatorlar)
+    except UnicodeDecodeError:
+        return JsonResponse({'xatolar': ["Fayl UTF-8 kodlashda bo'lishi kerak."]}, status=400)
+    except ValidationError as xato:
+        return JsonResponse({'xatolar': xato.messages}, status=400)
+    return JsonResponse({'saqlandi': saqlandi}, status=201)
+
+
+# === Sana bo'yicha qoldiq API ===
+# ?sana=2025-03-01 (kun oxiridagi qoldiq) yoki to'liq ISO vaqt; ?mahsulot=<id> bir necha marta berilishi mumkin
+@require_GET
+@xodim_talab_qilinadi
+def balans_sana_boyicha(request):
+    if not request.user.has_perm('ombor.view_mahsulotbalans'):
+        return JsonResponse({'xato': "Ruxsat yo'q"}, status=403)
+
+    sana = sanani_oqish(request.GET.get('sana'))
+    if sana is None:
+        return JsonResponse({'xatolar': ["sana YYYY-MM-DD yoki ISO 8601 formatida bo'lishi kerak."]}, status=400)
+    mahsulotlar = request.GET.getlist('mahsulot')
+    if not all(mahsulot.isdigit() for mahsulot in mahsulotlar):
+        return JsonResponse({'xatolar': ["mahsulot butun son (ID) bo'lishi kerak."]}, status=400)
+
+    qoldiqlar = balance_as_of(sana, [int(m) for m in mahsulotlar] or None)
+    nomlar = dict(Mahsulot.objects.filter(id__in=list(qoldiqlar)).values_list('id', 'mahsulot_nomi'))
+    return JsonResponse({
+        'sana': sana.isoformat(),
+        'balanslar': [{'mahsulot_id': mahsulot_id, 'mahsulot_nomi': nomlar.get(mahsulot_id), 'qoldiq': qoldiq}
+                      for mahsulot_id, qoldiq in sorted(qoldiqlar.items())],
+    })
+
+
+# === Faqat o'qish uchun JSON API ===
+# Dashboardlar admin ro'yxatlarini HTML sifatida o'qimasligi uchun. ETag ma'lumotlar
+# versiyasidan yasaladi: o'zgarish bo'lmagan bo'lsa, bazaga murojaat qilmasdan 304 qaytadi.
+# Javob tanasi versiyali kalit ostida qisqa muddat keshlanadi.
+
+def _javob_kaliti(request, versiya):
+    return 'ombor:api:javob:%s:%s' % (versiya, hashlib.md5(request.get_full_path().encode()).hexdigest())
+
+
+def _versiyali_javob(javob, etag):
+    javob['ETag'] = etag
+    # Brauzer va proksilar har safar ETag bilan qayta tekshiradi
+    patch_cache_control(javob, private=True, no_cache=True)
+    return javob
+
+
+def versiyali_json(ruxsat):
+    """
+    View qaytargan lug'atni JSON javobga aylantiradi, ETag/304 va javob keshini qo'shadi.
+
+    Ruxsat keshdan oldin tekshiriladi. View HttpResponse qaytarsa (xato), u keshlanmaydi.
+    Async view'lar uchun kesh va ruxsat ham async o'qiladi.
+    """
+
+    def dekorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def _async_view(request, *args, **kwargs):
+                if not await sync_to_async(request.user.has_perm)(ruxsat):
+                    return JsonResponse({'xato': "Ruxsat yo'q"}, status=403)
+
+                versiya = await aapi_versiyasi()
+                etag = quote_etag(str(versiya))
+                javob = get_conditional_response(request, etag=etag)
+                if javob is None:
+                    kalit = _javob_kaliti(request, versiya)
+                    tana = await cache.aget(kalit)
+                    if tana is None:
+                        natija = await view(request, *args, **kwargs)
+                        if isinstance(natija, HttpResponse):
+                            return natija
+                        tana = json.dumps(natija, cls=DjangoJSONEncoder, ensure_ascii=False)
+                        await cache.aset(kalit, tana, API_KESH_MUDDATI)
+                    javob = HttpResponse(tana, content_type='application/json')
+                return _versiyali_javob(javob, etag)
+
+            return _async_view
+
+        @wraps(view)
+        def _view(request, *args, **kwargs):
+            if not request.user.has_perm(ruxsat):
+                return JsonResponse({'xato': "Ruxsat yo'q"}, status=403)
+
+            versiya = api_versiyasi()
+            etag = quote_etag(str(versiya))
+            javob = get_conditional_response(request, etag=etag)
+            if javob is None:
+                kalit = _javob_kaliti(request, versiya)
+                tana = cache.get(kalit)
+                if tana is None:
+                    natija = view(request, *args, **kwargs)
+                    if isinstance(natija, HttpResponse):
+                        return natija
+                    tana = json.dumps(natija, cls=DjangoJSONEncoder, ensure_ascii=False)
+                    cache.set(kalit, tana, API_KESH_MUDDATI)
+                javob = HttpResponse(tana, content_type='application/json')
+            return _versiyali_javob(javob, etag)
+
+        return _view
+
+    return dekorator
+
+
+# Balans va tarix view'lari async: ASGI rejimida dashboardlar so'rovi ishchini band qilmaydi.
+# ?birlik=<id> — faqat shu o'lchov birligidagi mahsulotlar
+@faqat_get
+@xodim_talab_qilinadi
+@versiyali_json('ombor.view_mahsulotbalans')
+async def balanslar_royxati(request):
+    balanslar = MahsulotBalans.objects.order_by('mahsulot_nomi_id')
+    birlik = request.GET.get('birlik')
+    if birlik is not None:
+        if not birlik.isdigit():
+            return JsonResponse({'xatolar': ["birlik butun son (ID) bo'lishi kerak."]}, status=400)
+        balanslar = balanslar.filter(mahsulot_nomi__olchov_birligi_id=birlik)
+    qatorlar = balanslar.values_list('mahsulot_nomi_id', 'mahsulot_nomi__mahsulot_nomi',
+                                     'mahsulot_nomi__olchov_birligi__olchov_birligi', 'qoldiq')
+    return {
+        'balanslar': [{'mahsulot_id': mahsulot_id, 'mahsulot_nomi': nomi, 'olchov_birligi': birlik, 'qoldiq': qoldiq}
+                      async for mahsulot_id, nomi, birlik, qoldiq in qatorlar],
+    }
+
+
+# Eng yangi yozuvlardan boshlab; ?soni=<N> (ko'pi bilan 1000), keyingi sahifa — javobdagi `keyingi` havolasi
+@faqat_get
+@xodim_talab_qilinadi
+@versiyali_json('ombor.view_mahsulotbalanstarix')
+async def mahsulot_tarixi(request, mahsulot_id):
+    if not await Mahsulot.objects.filter(id=mahsulot_id).aexists():
+        return JsonResponse({'xato': "Mahsulot topilmadi"}, status=404)
+    soni = request.GET.get('soni', str(TARIX_SAHIFA_HAJMI))
+    if not soni.isdigit() or not 1 <= int(soni) <= TARIX_SAHIFA_CHEGARASI:
+        return JsonResponse({'xatolar': [f"soni 1 dan {TARIX_SAHIFA_CHEGARASI} gacha bo'lishi kerak."]}, status=400)
+    soni = int(soni)
+
+    # (mahsulot_nomi, id) indeksi bo'yicha: sahifa chuqurligidan qat'i nazar bir xil tezlikda.
+    # Arxivlangan yozuvlar ham shu tartibda davom etadi (asosiy jadval va arxiv birlashmasi)
+    tarix_model = await atarix_modeli()
+    yozuvlar = tarix_model.objects.filter(mahsulot_nomi_id=mahsulot_id).order_by('-id')
+    kalitlar = [(tarix_model._meta.pk, True)]
+    if request.GET.get('kursor'):
+        try:
+            yonalish, qiymatlar = kursorni_ochish(request.GET['kursor'], kalitlar)
+        except IncorrectLookupParameters:
+            yonalish = None
+        if yonalish != KEYINGI:
+            return JsonResponse({'xatolar': ["kursor noto'g'ri."]}, status=400)
+        yozuvlar = yozuvlar.filter(kursor_sharti(kalitlar, qiymatlar, KEYINGI))
+
+    qatorlar = yozuvlar.values('id', 'miqdor', 'qoldiq', 'sana', 'amaliyot_turi')[:soni + 1]
+    tarix = [qator async for qator in qatorlar]
+    keyingi = None
+    if len(tarix) > soni:
+        tarix = tarix[:soni]
+        keyingi = '%s?soni=%d&kursor=%s' % (
+            reverse('ombor:mahsulot_tarixi', args=[mahsulot_id]), soni, kursor_yasash(KEYINGI, [tarix[-1]['id']]))
+    return {'mahsulot_id': mahsulot_id, 'tarix': tarix, 'keyingi': keyingi}
+
+
+@require_GET
+@xodim_talab_qilinadi
+@versiyali_json('ombor.view_olchovbirligi')
+def birliklar_royxati(request):
+    ishlatilgan = set(ishlatilgan_birlik_idlari())
+    return {
+        'birliklar': [{'id': birlik_id, 'olchov_birligi': nomi, 'ishlatilgan': birlik_id in ishlatilgan}
+                      for birlik_id, nomi in OlchovBirligi.objects.order_by('olchov_birligi')
+                      .values_list('id', 'olchov_birligi')],
+    }
+
+
+# === Prometheus metrikalari ===
+# Joriy jarayon histogrammalari. METRIKALAR_TOKENI berilgan bo'lsa Bearer token talab qilinadi,
+# aks holda faqat shu serverning o'zidan (localhost) so'rovlarga ruxsat.
+@require_GET
+def metrikalar(request):
+    if settings.METRIKALAR_TOKENI:
+        ruxsat = constant_time_compare(request.headers.get('Authorization', ''),
+                                       f'Bearer {settings.METRIKALAR_TOKENI}')
+    else:
+        ruxsat = request.META.get('REMOTE_ADDR') in ('127.0.0.1', '::1')
+    if not ruxsat:
+        return HttpResponse("Ruxsat yo'q", status=403, content_type='text/plain')
+    return HttpResponse(prometheus_matni(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,80 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
+
+from .models import HarakatYigindisi, KirdiChiqdi
+
+PARTIYA_HAJMI = 1000
+
+DAVR_TURLARI = [davr_turi for davr_turi, _ in HarakatYigindisi.DAVR_TURLARI]
+
+
+# === Harakatlar yig'indilarini qayta qurish ===
+# Odatda yig'indilar harakat bilan bir tranzaksiyada yangilanadi. Modeldan o'tmasdan
+# yozilgan qatorlardan keyin (to'g'ridan-to'g'ri bulk_create, SQL import) yoki birinchi
+# ishga tushirishda ular shu yerda ledgerdan qayta hisoblanadi.
+
+def davr_boshi(davr_turi, kun):
+    """`kun` tushadigan davrning birinchi kuni."""
+    if davr_turi == "hafta":
+        return kun - timedelta(days=kun.weekday())
+    if davr_turi == "oy":
+        return kun.replace(day=1)
+    return kun
+
+
+def yigindilarni_qayta_qurish(dan=None):
+    """
+    `dan` kuni tushadigan davrlardan boshlab (ko'rsatilmasa, hammasini) yig'indilarni
+    ledgerdan qayta hisoblaydi va yaratilgan qatorlar sonini qaytaradi.
+
+    Ledger bitta GROUP BY bilan kunlar bo'yicha o'qiladi; haftalik va oylik
+    yig'indilar kunliklardan xotirada yig'iladi. Hammasi bitta tranzaksiyada,
+    shuning uchun o'quvchilar yarim qurilgan holatni ko'rmaydi.
+    """
+    yigindilar = HarakatYigindisi.objects.all()
+    harakatlar = KirdiChiqdi.objects.order_by()
+    boshlari = {}
+    if dan is not None:
+        # Har bir davr turi `dan` tushadigan davr boshidan; ledger eng erta boshlanishdan o'qiladi
+        boshlari = {davr_turi: davr_boshi(davr_turi, dan) for davr_turi in DAVR_TURLARI}
+        harakatlar = harakatlar.filter(
+            sana__gte=timezone.make_aware(datetime.combine(min(boshlari.values()), time.min)))
+        yigindilar = yigindilar.filter(
+            reduce(or_, (Q(davr_turi=davr_turi, davr__gte=boshi) for davr_turi, boshi in boshlari.items())))
+
+    with transaction.atomic():
+        # Avval o'chirish: SQLite'da yozish qulfi olinadi va o'qish davomida yangi harakatlar
+        # yig'indilarga qo'shilib, keyin qayta hisobda yo'qolib ketmaydi
+        yigindilar.delete()
+        kunliklar = (
+            harakatlar
+            .annotate(kun=Trunc('sana', 'day', output_field=DateField()))
+            .values('mahsulot_nomi_id', 'kun')
+            .annotate(kirdi=Coalesce(Sum('miqdor', filter=Q(amaliyot_turi="Kirdi")), 0),
+                      chiqdi=Coalesce(Sum('miqdor', filter=Q(amaliyot_turi="Chiqdi")), 0),
+                      soni=Count('id'))
+        )
+        jami = defaultdict(lambda: [0, 0, 0])
+        for qator in kunliklar.iterator(chunk_size=PARTIYA_HAJMI):
+            for davr_turi in DAVR_TURLARI:
+                davr = davr_boshi(davr_turi, qator['kun'])
+                if davr < boshlari.get(davr_turi, davr):
+                    continue  # Qayta qurilmaydigan (dan dan oldin boshlangan) davr
+                farq = jami[qator['mahsulot_nomi_id'], davr_turi, davr]
+                farq[0] += qator['kirdi']
+                farq[1] += qator['chiqdi']
+                farq[2] += qator['soni']
+        HarakatYigindisi.objects.bulk_create(
+            [HarakatYigindisi(mahsulot_nomi_id=mahsulot_id, davr_turi=davr_turi, davr=davr,
+                              kirdi_sum=kirdi, chiqdi_sum=chiqdi, harakatlar_soni=soni)
+             for (mahsulot_id, davr_turi, davr), (kirdi, chiqdi, soni) in jami.items()],
+            batch_size=PARTIYA_HAJMI,
+        )
+    return len(jami)
@@ -0,0 +1,169 @@
+import hashlib
+import io
+import multiprocessing
+import tempfile
+
+import qrcode
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from qrcode.constants import ERROR_CORRECT_M
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+
+from .exports import PDF_CONTENT_TYPE, PDF_XOTIRA_CHEGARASI, fayl_javobi
+
+QR_PREFIKSI = 'OMBOR'
+QR_FORMAT_VERSIYASI = '1'
+# Rasm parametrlari kesh kalitiga kiradi: o'zgarsa eski PNG lar ishlatilmaydi
+# Bir modul 4 px: 31 mm lik QR da ~130 dpi. PDF rasmni kattalashtiradi, modul chegaralari aniq qoladi;
+# 8 px da varaq 2.5 marta katta va sekin (reportlab har bir rasmni RGB ga o'girib qayta siqadi)
+QR_MODUL_PX = 4
+QR_CHEGARA_MODULLARI = 4  # standart bo'yicha QR atrofidagi oq hoshiya
+QR_SHAKLI = f'M-{QR_MODUL_PX}-{QR_CHEGARA_MODULLARI}'
+QR_KESH_PAPKASI = 'qr_kesh'
+# Shundan kam yangi rasm uchun jarayonlar puli ochilmaydi: fork qilish chizishdan qimmatga tushadi
+QR_PUL_CHEGARASI = 32
+
+# A4 varag'i: 3 ustun × 8 qator, 70 × 37 mm yorliqlar (L7160 kabi tayyor yorliq varaqlari)
+YORLIQ_USTUNLARI = 3
+YORLIQ_QATORLARI = 8
+YORLIQ_KENGLIGI = 70 * mm
+YORLIQ_BALANDLIGI = 37 * mm
+YORLIQ_ICHKI_CHETI = 3 * mm
+
+
+# === QR matni ===
+# "OMBOR|1|<mahsulot id>|<nomi>|<o'lchov birligi>". Skaner faqat ID ni o'qiydi (bitta PK qidiruvi);
+# nom va birlik qog'ozdagi yorliqni odam ham, boshqa ilova ham tushunishi uchun.
+
+def qr_matni(mahsulot_id, nomi, birlik):
+    return '|'.join([QR_PREFIKSI, QR_FORMAT_VERSIYASI, str(mahsulot_id), nomi, birlik])
+
+
+def qr_matnini_ochish(matn):
+    """QR matnidan mahsulot ID sini qaytaradi; matn bu ombor yorlig'i bo'lmasa None."""
+    qismlar = (matn or '').strip().split('|')
+    if len(qismlar) < 3 or qismlar[0] != QR_PREFIKSI or qismlar[1] != QR_FORMAT_VERSIYASI:
+        return None
+    return int(qismlar[2]) if qismlar[2].isdigit() else None
+
+
+# === QR rasmlari keshi ===
+# PNG lar mazmun xeshi bilan storage'da saqlanadi (qr_kesh/<sha256>.png). Qayta chop etishda va
+# nomi/birligi o'zgarmagan mahsulotlar uchun rasm qayta chizilmaydi; nom o'zgarsa xesh ham o'zgaradi.
+
+def qr_kaliti(matn):
+    return hashlib.sha256(f'{QR_SHAKLI}|{matn}'.encode()).hexdigest()
+
+
+def qr_kesh_nomi(matn):
+    return f'{QR_KESH_PAPKASI}/{qr_kaliti(matn)}.png'
+
+
+def qr_png(matn):
+    """QR ni 1-bitli PNG ko'rinishida chizadi (bazaga ham, storage'ga ham murojaat qilmaydi)."""
+    qr = qrcode.QRCode(error_correction=ERROR_CORRECT_M, box_size=QR_MODUL_PX, border=QR_CHEGARA_MODULLARI)
+    qr.add_data(matn)
+    qr.make(fit=True)
+    bufer = io.BytesIO()
+    qr.make_image().get_image().save(bufer, 'PNG', optimize=True)
+    return bufer.getvalue()
+
+
+def _qr_chizish(matn):
+    """Pul ishchisi: (matn, PNG baytlari)."""
+    return matn, qr_png(matn)
+
+
+def qr_rasmlarini_tayyorlash(matnlar, jarayonlar=1, storage=default_storage):
+    """
+    Har bir matn uchun keshdagi PNG nomini {matn: nom} ko'rinishida qaytaradi, yo'qlarini chizadi.
+
+    Keshdagi fayllar bitta `listdir` bilan aniqlanadi. Yangi rasmlar QR_PUL_CHEGARASI dan
+    ko'p bo'lsa, fork qilingan jarayonlar pulida chiziladi; storage'ga ota jarayon yozadi.
+    Ikkinchi qiymat — yangi chizilgan rasmlar soni.
+    """
+    nomlar = {matn: qr_kesh_nomi(matn) for matn in matnlar}
+    try:
+        mavjud = set(storage.listdir(QR_KESH_PAPKASI)[1])
+    except FileNotFoundError:
+        mavjud = set()
+    yangilar = [matn for matn, nom in nomlar.items() if nom.rsplit('/', 1)[1] not in mavjud]
+
+    if len(yangilar) >= QR_PUL_CHEGARASI and jarayonlar > 1:
+        # Fork qilingan jarayonlar ota jarayonning baza ulanishini meros qilib olmasligi kerak
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(min(jarayonlar, len(yangilar))) as pool:
+            chizilganlar = pool.imap_unordered(_qr_chizish, yangilar, chunksize=16)
+            for matn, png in chizilganlar:
+                _keshga_yozish(storage, nomlar[matn], png)
+    else:
+        for matn in yangilar:
+            _keshga_yozish(storage, nomlar[matn], qr_png(matn))
+    return nomlar, len(yangilar)
+
+
+def _keshga_yozish(storage, nom, png):
+    # Parallel chop etish xuddi shu faylni yozgan bo'lishi mumkin: mazmuni bir xil, qaytadan yozilmaydi
+    if not storage.exists(nom):
+        storage.save(nom, ContentFile(png))
+
+
+# === Yorliqlar varag'i (PDF) ===
+
+def yorliq_qatorlari(queryset):
+    """(id, nomi, birligi) — o'lchov birligi bilan bitta JOIN so'rovi, nom bo'yicha tartibda."""
+    return list(queryset.order_by('mahsulot_nomi', 'id')
+                .values_list('id', 'mahsulot_nomi', 'olchov_birligi__olchov_birligi'))
+
+
+def yorliqlar_yozish(queryset, fayl, jarayonlar=1, storage=default_storage):
+    """
+    Mahsulotlar uchun A4 yorliqlar varag'ini `fayl`ga PDF ko'rinishida yozadi.
+
+    Har bir yorliqda QR, mahsulot nomi, o'lchov birligi va ID. (yorliqlar soni, yangi chizilgan
+    QR lar soni) qaytaradi.
+    """
+    qatorlar = yorliq_qatorlari(queryset)
+    matnlar = [qr_matni(*qator) for qator in qatorlar]
+    rasm_nomlari, yangilari = qr_rasmlarini_tayyorlash(matnlar, jarayonlar, storage)
+
+    sahifa_kengligi, sahifa_balandligi = A4
+    chap_chet = (sahifa_kengligi - YORLIQ_USTUNLARI * YORLIQ_KENGLIGI) / 2
+    yuqori_chet = (sahifa_balandligi - YORLIQ_QATORLARI * YORLIQ_BALANDLIGI) / 2
+    qr_olchami = YORLIQ_BALANDLIGI - 2 * YORLIQ_ICHKI_CHETI
+    matn_kengligi = YORLIQ_KENGLIGI - qr_olchami - 3 * YORLIQ_ICHKI_CHETI
+    sahifadagi = YORLIQ_USTUNLARI * YORLIQ_QATORLARI
+
+    pdf = canvas.Canvas(fayl, pagesize=A4, pageCompression=1)
+    pdf.setTitle("Mahsulot yorliqlari")
+    for index, ((mahsulot_id, nomi, birlik), matn) in enumerate(zip(qatorlar, matnlar)):
+        if index and index % sahifadagi == 0:
+            pdf.showPage()
+        qator, ustun = divmod(index % sahifadagi, YORLIQ_USTUNLARI)
+        x = chap_chet + ustun * YORLIQ_KENGLIGI
+        y = sahifa_balandligi - yuqori_chet - (qator + 1) * YORLIQ_BALANDLIGI
+        pdf.drawImage(storage.path(rasm_nomlari[matn]), x + YORLIQ_ICHKI_CHETI, y + YORLIQ_ICHKI_CHETI,
+                      qr_olchami, qr_olchami)
+
+        matn_x = x + qr_olchami + 2 * YORLIQ_ICHKI_CHETI
+        matn_y = y + YORLIQ_BALANDLIGI - YORLIQ_ICHKI_CHETI - 10
+        pdf.setFont('Helvetica-Bold', 10)
+        for satr in simpleSplit(nomi, 'Helvetica-Bold', 10, matn_kengligi)[:3]:
+            pdf.drawString(matn_x, matn_y, satr)
+            matn_y -= 12
+        pdf.setFont('Helvetica', 8)
+        pdf.drawString(matn_x, y + YORLIQ_ICHKI_CHETI + 10, birlik)
+        pdf.drawString(matn_x, y + YORLIQ_ICHKI_CHETI, f"ID: {mahsulot_id}")
+    pdf.save()
+    return len(qatorlar), yangilari
+
+
+def yorliqlar_javobi(queryset, jarayonlar=1):
+    """Yorliqlar varag'ini so'rov ichida yig'ib, bo'laklab yuboradigan javob qaytaradi."""
+    fayl = tempfile.SpooledTemporaryFile(max_size=PDF_XOTIRA_CHEGARASI)
+    yorliqlar_yozish(queryset, fayl, jarayonlar)
+    return fayl_javobi(fayl, 'yorliqlar.pdf', PDF_CONTENT_TYPE)
@@ -1,3 +1,5 @@
 #!/bin/bash
 set -e
-python manange.py migrate
\ No newline at end of file
+# Xeshli nomlar, .gz/.br variantlari va staticfiles.json (WhiteNoise shu manifestdan o'qiydi)
+STATIK_MANIFEST=1 python manage.py collectstatic --noinput
+python manage.py migrate
\ No newline at end of file
@@ -34,6 +34,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # STATIC_ROOT dagi fayllarni Accept-Encoding bo'yicha .br/.gz varianti bilan beradi; statik
+    # so'rovlar keyingi middleware'larga (metrikalar, sessiya, OTP) yetib bormaydi.
+    # ombor.middleware dagilar WhiteNoise/django_otp ning ASGI da ham async ishlaydigan variantlari
+    'ombor.middleware.StatikMiddleware',
+    'ombor.metrikalar.MetrikalarMiddleware',  # Boshqa middleware'lar vaqti va so'rovlari ham o'lchanadi
+    'django.middleware.gzip.GZipMiddleware',  # Admin HTML va JSON javoblari
+    'django.middleware.http.ConditionalGetMiddleware',  # ETag/Last-Modified bo'yicha 304 (siqishdan oldin)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -41,11 +48,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'django_otp.middleware.OTPMiddleware',
+    'ombor.middleware.OTPTasdiqlashMiddleware',
 ]
 
 ROOT_URLCONF = 'sozlamalar.urls'
 
+# Metrikalar: shundan (soniya) uzoq davom etgan so'rovlar 'ombor.metrikalar' loggeriga yoziladi
+SEKIN_SOROV_CHEGARASI = float(os.environ.get('SEKIN_SOROV_CHEGARASI', 1.0))
+# /metrics uchun "Authorization: Bearer <token>"; berilmasa faqat localhost'dan ruxsat
+METRIKALAR_TOKENI = os.environ.get('METRIKALAR_TOKENI', '')
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -68,12 +80,54 @@ WSGI_APPLICATION = 'sozlamalar.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Profil muhit o'zgaruvchilari orqali tanlanadi: DB_ENGINE=sqlite (standart) yoki postgres.
+# Ulanishlar so'rovlar orasida qayta ishlatiladi (DB_CONN_MAX_AGE soniya, 0 — har so'rovda yangi ulanish)
+# va qayta ishlatishdan oldin tekshiriladi.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
+if DB_ENGINE == 'postgres':
+    # psycopg (yoki psycopg2) o'rnatilgan bo'lishi kerak
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'ombor'),
+            'USER': os.environ.get('DB_USER', 'ombor'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            # PgBouncer (transaction rejimi) orqali ulanganda server tomonidagi kursorlar ishlamaydi
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_PGBOUNCER') == '1',
+            'OPTIONS': {'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5))},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            # Xotiradagi test bazasida parallel yozuvchi kutmasdan "table is locked" oladi;
+            # fayldagi bazada parallel posting testlari WAL va busy_timeout bilan ishlaydi
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
     }
-}
+
+# Har bir yangi SQLite ulanishida bajariladigan PRAGMA lar (ombor.signals.sqlite_sozlash).
+# WAL: o'quvchilar yozuvchini kutmaydi; NORMAL: WAL rejimida commit'da fsync qilinmaydi (buzilish
+# xavfi yo'q, faqat elektr uzilganda oxirgi tranzaksiyalar yo'qolishi mumkin); busy_timeout: qulf
+# bo'shashini kutish (ms). DB_SQLITE_PRAGMALAR=0 bilan o'chiriladi.
+SQLITE_PRAGMALAR = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('DB_SQLITE_BUSY_TIMEOUT', 5000)),
+    'mmap_size': int(os.environ.get('DB_SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': -int(os.environ.get('DB_SQLITE_CACHE_KB', 64 * 1024)),  # manfiy qiymat — KiB
+    'temp_store': 'MEMORY',
+} if os.environ.get('DB_SQLITE_PRAGMALAR', '1') == '1' else {}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -115,12 +169,100 @@ USE_I18N = True
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Katta eksportlar navbatga qo'yiladi va `python manage.py run_export_worker` jarayonida yig'iladi.
+# Shu qatorgacha eksport so'rov ichida yuboriladi; tayyor fayllar MEDIA_ROOT/eksportlar/ da
+# EKSPORT_SAQLASH_MUDDATI soniya saqlanadi. Bir xil eksport EKSPORT_QAYTA_ISHLATISH_MUDDATI
+# soniya ichida qayta so'ralsa (va yangi harakat bo'lmasa), mavjud natija qaytariladi.
+EKSPORT_SINXRON_CHEGARASI = int(os.environ.get('EKSPORT_SINXRON_CHEGARASI', 2000))
+EKSPORT_SAQLASH_MUDDATI = int(os.environ.get('EKSPORT_SAQLASH_MUDDATI', 24 * 3600))
+EKSPORT_QAYTA_ISHLATISH_MUDDATI = int(os.environ.get('EKSPORT_QAYTA_ISHLATISH_MUDDATI', 600))
+
+# Admin'dagi "QR yorliqlar" amali yangi QR rasmlarini shuncha jarayonda chizadi (ombor.yorliqlar).
+# Standart 1: veb ishchi fork qilinmaydi, yorliqlar oldindan `build_qr_labels` bilan keshlanadi.
+QR_YORLIQ_JARAYONLARI = int(os.environ.get('QR_YORLIQ_JARAYONLARI', 1))
+
+# `python manage.py archive_history` TARIX_ARXIV_KUNLARI kundan eski balans tarixini arxiv
+# jadvaliga ko'chiradi; admin, eksport va API sana oralig'i talab qilsa arxivni ham o'qiydi.
+TARIX_ARXIV_KUNLARI = int(os.environ.get('TARIX_ARXIV_KUNLARI', 365))
+
+# Mahsulot qoldiqlari keshi (ombor.balans_keshi). Standart LocMemCache har bir jarayonda alohida:
+# boshqa ishchidagi posting bu jarayonda BALANS_KESH_MUDDATI soniyagacha kechikib ko'rinadi.
+# Bir nechta ishchi bilan umumiy backend tanlanadi (masalan,
+# BALANS_KESH_BACKEND=django.core.cache.backends.redis.RedisCache, BALANS_KESH_LOCATION=redis://...).
+BALANS_KESH_BACKEND = os.environ.get('BALANS_KESH_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+# 'default' keshida JSON API versiyasi (ombor.kesh, ETag) va ro'yxat sanoqlari saqlanadi. LocMemCache
+# da versiya hisoblagichi har bir ishchida alohida: gunicorn bir nechta ishchi (WEB_CONCURRENCY > 1)
+# bilan ishlaganda boshqa ishchidagi posting versiyani bu ishchida oshirmaydi va 304 eski ma'lumotni
+# API_VERSIYA_MUDDATI (60) soniyagacha tasdiqlashi mumkin. Bunday joylashtirishda KESH_BACKEND umumiy
+# (Redis, memcached) bo'lishi shart, masalan KESH_BACKEND=django.core.cache.backends.redis.RedisCache.
+KESH_BACKEND = os.environ.get('KESH_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {'BACKEND': KESH_BACKEND, 'LOCATION': os.environ.get('KESH_LOCATION', '')},
+    'balans': {
+        'BACKEND': BALANS_KESH_BACKEND,
+        'LOCATION': os.environ.get('BALANS_KESH_LOCATION', 'ombor-balans'),
+        'TIMEOUT': int(os.environ.get('BALANS_KESH_MUDDATI', 60)),
+    },
+}
+if BALANS_KESH_BACKEND.endswith('.LocMemCache'):
+    # Standart 300 ta yozuv chegarasidan oshganda kesh uchdan biri bo'yicha tozalanadi
+    CACHES['balans']['OPTIONS'] = {'MAX_ENTRIES': int(os.environ.get('BALANS_KESH_HAJMI', 100_000))}
+
+# === Kirish tezkor yo'li ===
+# Har bir admin so'rovi sessiya, foydalanuvchi va OTP qurilmasini o'qiydi (ombor.kirish, ombor.sessiyalar).
+# SESSIYA_REJIMI: db — sessiya har so'rovda bazadan o'qiladi; cached_db — 'kirish' keshidan (yo'q bo'lsa
+# bazadan), yozish ikkalasiga; signed_cookies — sessiya imzolangan cookie'da, bazaga murojaat yo'q.
+# LocMemCache har bir ishchida alohida: cached_db da bir ishchidagi logout boshqasining keshidagi sessiyani
+# o'chirmaydi, shuning uchun bir nechta ishchi bilan KIRISH_KESH_BACKEND umumiy (Redis, memcached) bo'lsin.
+# Foydalanuvchi va OTP qurilmasi keshi (KIRISH_KESHI) saqlash signalida tozalanadi; boshqa ishchida
+# KIRISH_KESH_MUDDATI soniyagacha eski qiymat ko'rinishi mumkin.
+SESSIYA_REJIMI = os.environ.get('SESSIYA_REJIMI', 'db')
+SESSIYA_DVIGATELLARI = {
+    'db': 'ombor.sessiyalar.db',
+    'cached_db': 'ombor.sessiyalar.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+if SESSIYA_REJIMI not in SESSIYA_DVIGATELLARI:
+    raise ValueError(f"SESSIYA_REJIMI {', '.join(SESSIYA_DVIGATELLARI)} dan biri bo'lishi kerak, "
+                     f"{SESSIYA_REJIMI!r} berildi")
+SESSION_ENGINE = SESSIYA_DVIGATELLARI[SESSIYA_REJIMI]
+SESSION_CACHE_ALIAS = 'kirish'
+# Faol foydalanuvchi sessiyasi muddati har so'rovda uzaytiriladi (SESSION_COOKIE_AGE — oxirgi faollikdan)
+SESSION_SAVE_EVERY_REQUEST = os.environ.get('SESSIYA_UZAYTIRISH', '0') == '1'
+# Ma'lumoti o'zgarmagan sessiya shuncha soniyada ko'pi bilan bir marta yoziladi (0 — har safar)
+SESSIYA_YOZISH_ORALIGI = int(os.environ.get('SESSIYA_YOZISH_ORALIGI', 300))
+KIRISH_KESHI_YOQILGAN = os.environ.get('KIRISH_KESHI', '1') == '1'
+AUTHENTICATION_BACKENDS = ['ombor.kirish.KeshlanganModelBackend']
+KIRISH_KESH_BACKEND = os.environ.get('KIRISH_KESH_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHES['kirish'] = {
+    'BACKEND': KIRISH_KESH_BACKEND,
+    'LOCATION': os.environ.get('KIRISH_KESH_LOCATION', 'ombor-kirish'),
+    'TIMEOUT': int(os.environ.get('KIRISH_KESH_MUDDATI', 60)),
+}
+if KIRISH_KESH_BACKEND.endswith('.LocMemCache'):
+    CACHES['kirish']['OPTIONS'] = {'MAX_ENTRIES': int(os.environ.get('KIRISH_KESH_HAJMI', 10_000))}
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
+# collectstatic fayllarni kontent xeshli nomlar bilan (admin/css/base.1a2b3c.css) va ularning
+# .gz/.br variantlari bilan yozadi; WhiteNoise xeshli fayllarni "immutable" va 10 yillik
+# Cache-Control bilan beradi. Manifestda yo'q fayl xato emas, xeshsiz nom bilan qaytadi.
+# Manifest (staticfiles.json) hali yozilmagan bo'lsa (testlar, mahalliy ishga tushirish) oddiy
+# StaticFilesStorage: manifest ombori STATIC_ROOT da yo'q har bir fayl uchun xato beradi.
+# release.sh collectstatic ni STATIK_MANIFEST=1 bilan ishga tushiradi.
+STATIK_MANIFEST = os.environ.get(
+    'STATIK_MANIFEST', '1' if os.path.exists(os.path.join(STATIC_ROOT, 'staticfiles.json')) else '0') == '1'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage' if STATIK_MANIFEST
+                    else 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+WHITENOISE_MANIFEST_STRICT = False
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -137,19 +279,19 @@ JAZZMIN_SETTINGS = {
     "site_brand": "TATUFF Ombor",
 
     # Logo to use for your site, must be present in static files, used for brand on top left
-    "site_logo": "vendor/adminlte/img/tatuff_logo.jpg",
+    "site_logo": "ombor/img/tatuff_logo.jpg",
 
     # Logo to use for your site, must be present in static files, used for login form logo (defaults to site_logo)
-    "login_logo": "vendor/adminlte/img/tatuff_logo.jpg",
+    "login_logo": "ombor/img/tatuff_logo.jpg",
 
     # Logo to use for login form in dark themes (defaults to login_logo)
-    "login_logo_dark": "vendor/adminlte/img/tatuff_logo.jpg",
+    "login_logo_dark": "ombor/img/tatuff_logo.jpg",
 
     # CSS classes that are applied to the logo above
     "site_logo_classes": "img-circle",
 
     # Relative path to a favicon for your site, will default to site_logo if absent (ideally 32x32 px)
-    "site_icon": "jazzmin/img/tatuff_logo.jpg",
+    "site_icon": "ombor/img/tatuff_logo.jpg",
 
     # Welcome text on the login screen
     "welcome_sign": "Omboriga xush kelibsiz",
@@ -164,7 +306,8 @@ JAZZMIN_SETTINGS = {
     "search_model": ["auth.User"],
 
     # Field name on user model that contains avatar ImageField/URLField/Charfield or a callable that receives the user
-    "user_avatar": "profile_image",
+    # CustomUser.avatar_url: har sahifa sarlavhasida asl rasm emas, 160 px WebP eskiz yuklanadi
+    "user_avatar": "avatar_url",
 
     ############
     # Top Menu #
@@ -207,7 +350,8 @@ JAZZMIN_SETTINGS = {
     "navigation_expanded": True,
 
     # Whether to link font from fonts.googleapis.com (use custom_css to supply font otherwise)
-    "use_google_fonts_cdn": True,
+    # Tashqi tarmoqqa so'rov yubormaslik uchun o'chirilgan: tizim shriftlari ishlatiladi
+    "use_google_fonts_cdn": False,
     # Whether to show the UI customizer on the sidebar
     "show_ui_builder": True,
 
@@ -1,13 +1,17 @@
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
 from django.views.i18n import set_language
 
 from django.conf import settings
 from django.conf.urls.static import static
 
+from ombor.views import metrikalar
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('i18n/',set_language, name='set_language'),
+    path('api/', include('ombor.urls')),
+    path('metrics', metrikalar, name='metrikalar'),
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)